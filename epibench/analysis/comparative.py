@@ -8,12 +8,13 @@ import pandas as pd
 import numpy as np
 # Add imports for models, data loaders, evaluation metrics as needed
 from ..config.config_manager import ConfigManager
-from ..models import models # Import model registry
-from ..training.trainer import Trainer # For loading models
-from ..data.data_loader import create_dataloaders 
+from ..models.export import check_artifact_input
+from ..models.loading import compile_model, example_input_from_dataset, get_compile_config, load_inference_model
+from ..data.data_loader import build_dataset, build_feature_transform
 from ..evaluation import calculate_regression_metrics # Assuming this function exists and returns a dict
 from ..utils.io_utils import ensure_dir, load_predictions, save_results # Corrected: utils instead of util
 import torch
+from torch.utils.data import DataLoader
 from tqdm import tqdm
 import os
 import json
@@ -106,24 +107,13 @@ class ComparativeAnalyzer:
                 cfg_manager = ConfigManager(config_path)
                 train_config = cfg_manager.get_config()
                 
-                model_name = train_config.get('model', {}).get('name')
-                model_params = train_config.get('model', {}).get('params', {})
-                if not model_name:
+                if not train_config.get('model', {}).get('name'):
                     logger.warning(f"Skipping {model_key}: Model name not found in config {config_path}.")
                     continue
-                    
-                ModelClass = models.get_model(model_name)
-                model_instance = ModelClass(**model_params)
-                
+
                 logger.info(f"Loading model weights for {model_key} from: {checkpoint_path}")
-                model_instance, _, _, _ = Trainer.load_model(
-                    checkpoint_path=checkpoint_path, 
-                    model=model_instance, 
-                    device=device,
-                    load_optimizer_state=False,
-                    load_scheduler_state=False
-                )
-                model_instance.eval() # Set to evaluation mode
+                model_instance, checkpoint_info = load_inference_model(train_config, checkpoint_path, device)
+                compile_config = get_compile_config(train_config)
 
                 # --- Evaluate on Each Sample Group's Test Data --- 
                 for group_name, group_data_paths in self.sample_group_data.items():
@@ -142,12 +132,15 @@ class ComparativeAnalyzer:
                          # Adjust batch size if needed, e.g., allow override
                          # data_loader_config['batch_size'] = eval_batch_size or data_loader_config.get('batch_size', 32)
 
-                         dataloaders = create_dataloaders(data_loader_config, splits=['test'])
-                         test_loader = dataloaders.get('test')
-
-                         if not test_loader:
-                             logger.warning(f"Could not create test loader for group '{group_name}'. Skipping.")
-                             continue
+                         test_dataset = build_dataset(test_data_path, transform=build_feature_transform(data_loader_config))
+                         check_artifact_input(checkpoint_info, test_dataset)
+                         test_loader = DataLoader(test_dataset, batch_size=data_loader_config.get('batch_size', 32), shuffle=False,
+                                                  num_workers=data_loader_config.get('num_workers', 0))
+                         if compile_config.get('enabled'):
+                             example_input = example_input_from_dataset(test_dataset, device, batch_size=test_loader.batch_size)
+                             eval_model = compile_model(model_instance, compile_config, example_input=example_input)
+                         else:
+                             eval_model = model_instance
 
                          # --- Run Predictions --- 
                          all_preds = []
@@ -163,7 +156,7 @@ class ComparativeAnalyzer:
                                      logger.warning(f"Unexpected batch format for group '{group_name}'. Skipping batch.")
                                      continue # Or handle differently
                                 
-                                preds = model_instance(inputs)
+                                preds = eval_model(inputs)
                                 all_preds.append(preds.cpu().numpy())
                                 all_targets.append(targets.cpu().numpy())
                          
@@ -21,8 +21,11 @@ if project_root not in sys.path:
 from epibench.config.config_manager import ConfigManager
 from epibench.utils.logging import LoggerManager
 from epibench.models import models
-from epibench.data.data_loader import create_dataloaders # Ensure this can create a test loader
+from epibench.data.data_loader import apply_checkpoint_crop, create_dataloaders # Ensure this can create a test loader
+from epibench.data.prefetch import BackgroundPrefetcher, maybe_prefetch
 from epibench.training.trainer import Trainer # For static load_model method
+from epibench.models.loading import compile_model, example_input_from_dataset, get_compile_config
+from epibench.models.export import check_artifact_input, is_inference_artifact, load_inference_artifact
 from epibench.evaluation import (
     calculate_regression_metrics, 
     plot_predictions_vs_actual, 
@@ -69,6 +72,12 @@ def setup_evaluate_parser(parser: argparse.ArgumentParser):
         default=None, # Auto-detect by default
         help="Device to use ('cpu' or 'cuda'). Defaults to cuda if available."
     )
+    parser.add_argument(
+        "--quantized",
+        action="store_true",
+        default=False,
+        help="--checkpoint is an int8 model written by 'epibench quantize'; runs on the CPU. (Artifacts from 'epibench optimize'/'quantize' are detected automatically.)"
+    )
     parser.add_argument(
         "--no-plots",
         action="store_true",
@@ -167,7 +176,11 @@ def evaluate_main(args):
         sys.exit(1)
 
     # --- Setup Device ---
-    if args.device:
+    if getattr(args, 'quantized', False):
+        if args.device and args.device != 'cpu':
+            logger.warning(f"Quantized models run on the CPU; ignoring --device {args.device}.")
+        device = torch.device('cpu')
+    elif args.device:
         device = torch.device(args.device)
     else:
         device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
@@ -182,16 +195,21 @@ def evaluate_main(args):
             raise ValueError("Model name ('model.name') not found in configuration.")
         
         logger.info(f"Instantiating model architecture: {model_name}")
-        ModelClass = models.get_model(model_name)
-        model = ModelClass(**model_params) # Instantiate architecture
-
-        logger.info(f"Loading model weights from checkpoint: {args.checkpoint}")
-        # Use the static method from Trainer to load state
-        model, _, _, checkpoint_info = Trainer.load_model(
-            checkpoint_path=args.checkpoint, 
-            model=model, 
-            device=device
-        ) 
+        ModelClass = models.get_model(model_name) # Also used for the AML comparison model
+
+        if args.quantized or is_inference_artifact(args.checkpoint):
+            # Self-describing artifact from `epibench optimize`/`quantize`: no reconstruction from the config
+            model, checkpoint_info = load_inference_artifact(args.checkpoint, device)
+        else:
+            model = ModelClass(**model_params) # Instantiate architecture
+
+            logger.info(f"Loading model weights from checkpoint: {args.checkpoint}")
+            # Use the static method from Trainer to load state
+            model, _, _, checkpoint_info = Trainer.load_model(
+                checkpoint_path=args.checkpoint, 
+                model=model, 
+                device=device
+            ) 
         logger.info(f"Model loaded successfully from epoch {checkpoint_info.get('epoch', 'N/A')}.")
         model.eval() # Set model to evaluation mode
 
@@ -268,6 +286,7 @@ def evaluate_main(args):
         config['data']['batch_size'] = batch_size
         config['data']['test_path'] = test_data_path # Ensure the correct path is used
         config['data']['shuffle_test'] = False # Typically don't shuffle test data for evaluation
+        apply_checkpoint_crop(config['data'], checkpoint_info) # Same input geometry as during validation
 
         logger.info(f"Loading test data from: {test_data_path} with batch size: {batch_size}")
         # Pass the full config dictionary to create_dataloaders
@@ -279,6 +298,7 @@ def evaluate_main(args):
 
         if test_loader is None:
              raise RuntimeError("create_dataloaders did not return a test loader.")
+        check_artifact_input(checkpoint_info, test_loader.dataset)
 
         logger.info("Test data loaded successfully.")
 
@@ -292,13 +312,21 @@ def evaluate_main(args):
         logger.error(f"Error loading test data: {e}", exc_info=True)
         sys.exit(1)
 
+    # --- Optional Compilation (model.compile) ---
+    compile_config = get_compile_config(config)
+    if compile_config.get('enabled') and not isinstance(model, torch.jit.ScriptModule): # Artifacts are already traced
+        example_input = example_input_from_dataset(test_loader.dataset, device, batch_size=test_loader.batch_size)
+        model = compile_model(model, compile_config, example_input=example_input)
+
     # --- Evaluation Loop (Subtask 10.4) ---
     logger.info("Running evaluation loop...")
     all_y_true = []
     all_y_pred = []
+    prefetch_batches = config.get('data', {}).get('prefetch_batches', 0)
     try:
+        batches = maybe_prefetch(test_loader, prefetch_batches, device)
         with torch.no_grad(): # Disable gradient calculations
-            for batch in tqdm(test_loader, desc="Evaluating"): 
+            for batch in tqdm(batches, desc="Evaluating"): 
                 # Handle potential inclusion of coordinates or other metadata
                 if len(batch) == 3:
                     inputs, targets, _ = batch  # Unpack coords but ignore them for now
@@ -325,6 +353,8 @@ def evaluate_main(args):
         all_y_true = np.concatenate(all_y_true)
         all_y_pred = np.concatenate(all_y_pred)
         logger.info(f"Evaluation loop completed. Processed {len(all_y_true)} samples.")
+        if isinstance(batches, BackgroundPrefetcher):
+            logger.info(f"Waited {batches.wait_time:.2f}s for data over {batches.batches_served} prefetched batches.")
 
     except Exception as e:
         logger.error(f"Error during evaluation loop: {e}", exc_info=True)
@@ -21,8 +21,10 @@ if project_root not in sys.path:
 
 from epibench.config import config_manager
 from epibench.utils.logging import LoggerManager
-from epibench.models import models
+from epibench.models.export import check_artifact_input
+from epibench.models.loading import load_inference_model
 from epibench.data.datasets import HDF5Dataset
+from epibench.data.data_loader import apply_checkpoint_crop, build_eval_transform
 from torch.utils.data import DataLoader
 from epibench.validation.config_validator import validate_interpret_config, InterpretConfig
 from epibench.interpretation.attributors import calculate_integrated_gradients, generate_baseline
@@ -171,38 +173,9 @@ def interpret_main(args):
              if not train_config_data or 'model' not in train_config_data:
                  raise ValueError("Training config missing or does not contain 'model' section.")
             
-        model_config = train_config_data['model']
-        model_name = model_config.get('name')
-        model_params = model_config.get('params', {})
-        if not model_name:
-            raise ValueError("Model name ('model.name') not found in configuration.")
-        
-        logger.info(f"Instantiating model architecture: {model_name}")
-        ModelClass = models.get_model(model_name)
-        model = ModelClass(**model_params)
-        model.to(device) # Move model to device BEFORE loading state dict
-
-        # --- Load Model Checkpoint --- 
+        # Attributions need gradients through the eager model, so model.compile is not applied here
         logger.info(f"Loading model weights from checkpoint: {args.checkpoint}")
-        checkpoint = torch.load(args.checkpoint, map_location=device)
-        # Handle different checkpoint formats (e.g., containing 'model_state_dict')
-        if 'model_state_dict' in checkpoint:
-             model_state_dict = checkpoint['model_state_dict']
-             epoch = checkpoint.get('epoch', 'N/A')
-             logger.info(f"Loading model_state_dict from epoch {epoch}.")
-        elif 'state_dict' in checkpoint: # Another common pattern
-            model_state_dict = checkpoint['state_dict']
-            epoch = checkpoint.get('epoch', 'N/A')
-            logger.info(f"Loading state_dict from epoch {epoch}.")
-        else:
-             # Assume the checkpoint *is* the state_dict
-             model_state_dict = checkpoint
-             logger.info("Loading entire checkpoint file as state_dict.")
-            
-        # Load the state dict
-        model.load_state_dict(model_state_dict)
-        logger.info(f"Model weights loaded successfully from {args.checkpoint}")
-        model.eval() # IMPORTANT: Ensure model is in evaluation mode for interpretation
+        model, checkpoint_info = load_inference_model(train_config_data, args.checkpoint, device) # Returned in eval mode
 
     except FileNotFoundError as e:
         logger.error(f"File not found during model/config loading: {e}")
@@ -235,8 +208,15 @@ def interpret_main(args):
 
         logger.info(f"Loading interpretation input data from: {interpret_data_path} with batch size: {batch_size}")
 
+        # Same normalization and crop as predict/evaluate, so attributions explain the inputs the model was trained on
+        data_config = apply_checkpoint_crop(train_config_data.setdefault('data', {}), checkpoint_info)
+        if data_config.get('normalize') and not data_config.get('train_path'):
+            raise ValueError("'data.normalize' is enabled but 'data.train_path' (source of the normalization statistics) is not set.")
+        transform = build_eval_transform(data_config)
+
         # Directly use HDF5Dataset and DataLoader
-        interpret_dataset = HDF5Dataset(h5_path=interpret_data_path)
+        interpret_dataset = HDF5Dataset(h5_path=interpret_data_path, transform=transform)
+        check_artifact_input(checkpoint_info, interpret_dataset)
         dataset_len = len(interpret_dataset)
         if dataset_len == 0:
             raise ValueError(f"Input data file {interpret_data_path} contains 0 samples.")
@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+"""CLI command for launching multi-process (DistributedDataParallel) EpiBench runs."""
+
+import argparse
+import logging
+import subprocess
+import sys
+import os
+from typing import List
+
+# Add project root to sys.path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from epibench.utils.performance import available_cpus
+
+logger = logging.getLogger(__name__)
+
+
+def setup_launch_parser(parser: argparse.ArgumentParser):
+    """Adds arguments specific to the launch command."""
+    parser.add_argument(
+        "--nproc-per-node",
+        type=int,
+        default=2,
+        help="Number of training processes to start on this node (default: 2)."
+    )
+    parser.add_argument(
+        "--nnodes",
+        type=int,
+        default=1,
+        help="Total number of nodes taking part in the run (default: 1)."
+    )
+    parser.add_argument(
+        "--node-rank",
+        type=int,
+        default=0,
+        help="Rank of this node (0 .. nnodes-1). Node 0 hosts the rendezvous (default: 0)."
+    )
+    parser.add_argument(
+        "--master-addr",
+        type=str,
+        default="127.0.0.1",
+        help="Address of node 0, reachable from all nodes (default: 127.0.0.1)."
+    )
+    parser.add_argument(
+        "--master-port",
+        type=int,
+        default=29500,
+        help="Free TCP port on node 0 used for the rendezvous (default: 29500)."
+    )
+    parser.add_argument(
+        "epibench_args",
+        nargs=argparse.REMAINDER,
+        help="The epibench command to run in every process, e.g. 'train -c config.yaml'."
+    )
+
+
+def build_launch_command(args: argparse.Namespace) -> List[str]:
+    """Builds the torchrun command that starts ``epibench <epibench_args>`` in each process."""
+    epibench_args = list(args.epibench_args)
+    if epibench_args and epibench_args[0] == '--':
+        epibench_args = epibench_args[1:]
+    if not epibench_args:
+        raise ValueError("No epibench command given to launch (e.g. 'epibench launch --nproc-per-node 4 train -c config.yaml').")
+    if args.nproc_per_node <= 0 or args.nnodes <= 0:
+        raise ValueError("--nproc-per-node and --nnodes must be positive.")
+    if not 0 <= args.node_rank < args.nnodes:
+        raise ValueError(f"--node-rank must be between 0 and {args.nnodes - 1}.")
+
+    return [
+        sys.executable, '-m', 'torch.distributed.run',
+        f'--nproc-per-node={args.nproc_per_node}',
+        f'--nnodes={args.nnodes}',
+        f'--node-rank={args.node_rank}',
+        f'--master-addr={args.master_addr}',
+        f'--master-port={args.master_port}',
+        '-m', 'epibench.cli.main',
+        *epibench_args,
+    ]
+
+
+def launch_main(args: argparse.Namespace):
+    """Starts one epibench process per rank via torchrun and waits for them to finish."""
+    try:
+        command = build_launch_command(args)
+    except ValueError as e:
+        logger.error(str(e))
+        sys.exit(1)
+
+    env = os.environ.copy()
+    # Each rank sets its own thread count (see Trainer); keep OpenMP from oversubscribing before that happens
+    env.setdefault('OMP_NUM_THREADS', str(max(1, available_cpus() // args.nproc_per_node)))
+
+    world_size = args.nproc_per_node * args.nnodes
+    logger.info(f"Launching {args.nproc_per_node} process(es) on node {args.node_rank} (world size {world_size}): {' '.join(command)}")
+    return_code = subprocess.call(command, env=env)
+    if return_code != 0:
+        logger.error(f"Distributed run failed with exit code {return_code}.")
+        sys.exit(return_code)
+    logger.info("Distributed run finished successfully.")
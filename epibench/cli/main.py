@@ -21,6 +21,10 @@ from .predict import setup_predict_parser, predict_main
 from .interpret import setup_interpret_parser, interpret_main
 from .compare import setup_compare_parser, compare_main
 from .logs import setup_logs_parser, logs_main
+from .tune_loader import setup_tune_loader_parser, tune_loader_main
+from .launch import setup_launch_parser, launch_main
+from .quantize import setup_quantize_parser, quantize_main
+from .optimize import setup_optimize_parser, optimize_main
 
 # Basic logger setup for the main entry point
 # Logging will be potentially reconfigured by subcommands based on their configs
@@ -122,6 +126,42 @@ def main():
     setup_logs_parser(logs_parser)
     logs_parser.set_defaults(func=logs_main)
     
+    # Tune Loader Command
+    tune_loader_parser = subparsers.add_parser(
+        'tune-loader',
+        help='Benchmark DataLoader settings and write the fastest as a config overlay.',
+        description='Runs short timed passes over a processed split across a grid of DataLoader settings, reports samples/sec, peak RSS and whether reading is I/O- or decode-bound, and writes the best settings as a config overlay.'
+    )
+    setup_tune_loader_parser(tune_loader_parser)
+    tune_loader_parser.set_defaults(func=tune_loader_main)
+    
+    # Quantize Command
+    quantize_parser = subparsers.add_parser(
+        'quantize',
+        help='Create an int8 version of a trained model for CPU inference.',
+        description='Quantizes a trained checkpoint to int8 (dynamic: Linear layers; static: also convolutions, calibrated on training regions), checks its accuracy against the float model on held-out data and saves it next to the checkpoint for use with "predict/evaluate --quantized".'
+    )
+    setup_quantize_parser(quantize_parser)
+    quantize_parser.set_defaults(func=quantize_main)
+    
+    # Optimize Command
+    optimize_parser = subparsers.add_parser(
+        'optimize',
+        help='Export a trained model as an optimized, self-describing inference artifact.',
+        description='Folds BatchNorm into the convolutions, removes dropout, traces and freezes the model, checks its outputs against the original and saves a TorchScript artifact (with its metadata) that predict/evaluate/compare/interpret load directly.'
+    )
+    setup_optimize_parser(optimize_parser)
+    optimize_parser.set_defaults(func=optimize_main)
+    
+    # Launch Command
+    launch_parser = subparsers.add_parser(
+        'launch',
+        help='Run an epibench command as a multi-process DistributedDataParallel job.',
+        description='Starts one process per rank (via torchrun) for the given epibench command, e.g. "epibench launch --nproc-per-node 4 train -c config.yaml". Use --nnodes/--node-rank/--master-addr to span several nodes.'
+    )
+    setup_launch_parser(launch_parser)
+    launch_parser.set_defaults(func=launch_main)
+    
     logger.debug("Parsing command line arguments...")
     args = parser.parse_args()
     
@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+"""CLI command for exporting trained EpiBench models as optimized inference artifacts."""
+
+import argparse
+import logging
+import sys
+import os
+import time
+
+import torch
+
+# Add project root to sys.path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from epibench.config.config_manager import ConfigManager
+from epibench.utils.logging import LoggerManager
+from epibench.data.data_loader import apply_checkpoint_crop, build_dataset, build_eval_transform
+from epibench.models.export import OPTIMIZED_SUFFIX, optimize_for_inference, save_inference_artifact
+from epibench.models.loading import example_input_from_dataset, load_inference_model
+
+logger = logging.getLogger(__name__)
+
+
+def setup_optimize_parser(parser: argparse.ArgumentParser):
+    """Adds arguments specific to the optimize command."""
+    parser.add_argument(
+        "-c", "--config",
+        type=str,
+        required=True,
+        help="Path to the YAML/JSON configuration file used during training."
+    )
+    parser.add_argument(
+        "--checkpoint",
+        type=str,
+        required=True,
+        help="Path to the model checkpoint file (.pth) to optimize."
+    )
+    parser.add_argument(
+        "--sample-data",
+        type=str,
+        default=None,
+        help="Data providing the example input for tracing and the output check (default: data.test_path, val_path or train_path)."
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=None,
+        help="Batch size of the output check and timing. Overrides config if provided."
+    )
+    parser.add_argument(
+        "--device",
+        type=str,
+        default=None,
+        help="Device the artifact will run on ('cpu' or 'cuda'). Defaults to cuda if available."
+    )
+    parser.add_argument(
+        "-o", "--output",
+        type=str,
+        default=None,
+        help=f"Path of the artifact (default: next to the checkpoint, e.g. best_model{OPTIMIZED_SUFFIX})."
+    )
+
+
+def _time_forward(model, inputs, repeats=3):
+    with torch.no_grad():
+        model(inputs) # Warm-up (the first calls of a TorchScript module run its optimization passes)
+        start = time.perf_counter()
+        for _ in range(repeats):
+            outputs = model(inputs)
+        if inputs.device.type == 'cuda':
+            torch.cuda.synchronize(inputs.device)
+    return outputs, (time.perf_counter() - start) / repeats
+
+
+def optimize_main(args):
+    """Main function for the optimize command."""
+    try:
+        config_manager = ConfigManager(args.config)
+        config = config_manager.config
+    except Exception as e:
+        logging.basicConfig(level="INFO", format='%(asctime)s - %(levelname)s - %(message)s')
+        logger.error(f"Error loading configuration from {args.config}: {e}", exc_info=True)
+        sys.exit(1)
+
+    LoggerManager.setup_logger(config_manager=config_manager)
+    logger.info("Starting EpiBench inference export...")
+    logger.info(f"Optimize arguments: {args}")
+
+    device = torch.device(args.device) if args.device else torch.device("cuda" if torch.cuda.is_available() else "cpu")
+    try:
+        model, checkpoint_info = load_inference_model(config, args.checkpoint, device)
+    except (FileNotFoundError, KeyError, ValueError) as e:
+        logger.error(f"Error loading model: {e}", exc_info=True)
+        sys.exit(1)
+    if isinstance(model, torch.jit.ScriptModule):
+        logger.error(f"{args.checkpoint} is already an inference artifact; pass the training checkpoint.")
+        sys.exit(1)
+
+    data_config = apply_checkpoint_crop(config.setdefault('data', {}), checkpoint_info)
+    sample_path = args.sample_data or data_config.get('test_path') or data_config.get('val_path') or data_config.get('train_path')
+    if not sample_path:
+        logger.error("No data (--sample-data, data.test_path, val_path or train_path) to trace the model with.")
+        sys.exit(1)
+    dataset = build_dataset(sample_path, transform=build_eval_transform(data_config))
+    example_input = example_input_from_dataset(dataset, device)
+
+    try:
+        optimized = optimize_for_inference(model, example_input)
+    except Exception as e:
+        logger.error(f"Could not optimize {type(model).__name__} for inference: {e}", exc_info=True)
+        sys.exit(1)
+
+    # --- Output check and timing against the original model ---
+    batch_size = min(args.batch_size or data_config.get('batch_size', 32), len(dataset))
+    inputs = torch.stack([torch.as_tensor(dataset[i][0]) for i in range(batch_size)]).to(device)
+    reference, eager_seconds = _time_forward(model, inputs)
+    outputs, optimized_seconds = _time_forward(optimized, inputs)
+    max_abs_diff = (outputs - reference).abs().max().item()
+    logger.info(f"Optimized model: max |output diff| {max_abs_diff:.2e} on {batch_size} samples, "
+                f"forward {eager_seconds * 1000:.1f}ms -> {optimized_seconds * 1000:.1f}ms per batch on {device}")
+
+    output_path = args.output or os.path.splitext(args.checkpoint)[0] + OPTIMIZED_SUFFIX
+    metadata = {
+        'model_name': config.get('model', {}).get('name'),
+        'model_params': config.get('model', {}).get('params', {}),
+        'optimizations': ['fold_batch_norm', 'strip_dropout', 'freeze'],
+        'source_checkpoint': os.path.abspath(args.checkpoint),
+        'epoch': checkpoint_info.get('epoch'),
+        'device': str(device),
+        'check': {'samples': batch_size, 'max_abs_diff': max_abs_diff,
+                  'eager_seconds': eager_seconds, 'optimized_seconds': optimized_seconds},
+        'config': config,
+    }
+    if 'crop_length' in checkpoint_info:
+        metadata['crop_length'] = checkpoint_info['crop_length']
+    save_inference_artifact(optimized, output_path, example_input, metadata)
+    logger.info("EpiBench inference export finished.")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Export an EpiBench model as an optimized inference artifact.")
+    setup_optimize_parser(parser)
+    optimize_main(parser.parse_args())
@@ -20,7 +20,11 @@ from epibench.config.config_manager import ConfigManager
 from epibench.utils.logging import LoggerManager
 from epibench.models import models # Assuming get_model exists
 from epibench.data.datasets import HDF5Dataset # Import dataset class directly
+from epibench.data.prefetch import BackgroundPrefetcher, maybe_prefetch
+from epibench.data.data_loader import apply_checkpoint_crop, build_eval_transform
 from epibench.training.trainer import Trainer # To load model state
+from epibench.models.loading import compile_model, example_input_from_dataset, get_compile_config
+from epibench.models.export import check_artifact_input, is_inference_artifact, load_inference_artifact
 
 logger = logging.getLogger(__name__)
 
@@ -62,6 +66,12 @@ def setup_predict_parser(parser: argparse.ArgumentParser):
         default=None, # Auto-detect by default
         help="Device to use ('cpu' or 'cuda'). Defaults to cuda if available."
     )
+    parser.add_argument(
+        "--quantized",
+        action="store_true",
+        default=False,
+        help="--checkpoint is an int8 model written by 'epibench quantize'; runs on the CPU. (Artifacts from 'epibench optimize'/'quantize' are detected automatically.)"
+    )
     # Potentially add arguments for output format (csv, tsv, etc.) later
 
 def predict_main(args):
@@ -95,7 +105,11 @@ def predict_main(args):
             sys.exit(1)
 
     # --- Setup Device ---
-    if args.device:
+    if getattr(args, 'quantized', False):
+        if args.device and args.device != 'cpu':
+            logger.warning(f"Quantized models run on the CPU; ignoring --device {args.device}.")
+        device = torch.device('cpu')
+    elif args.device:
         device = torch.device(args.device)
     else:
         device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
@@ -109,18 +123,22 @@ def predict_main(args):
         if not model_name:
             raise ValueError("Model name ('model.name') not found in configuration.")
 
-        logger.info(f"Instantiating model architecture: {model_name}")
-        ModelClass = models.get_model(model_name)
-        model = ModelClass(**model_params) # Instantiate architecture
-
-        logger.info(f"Loading model weights from checkpoint: {args.checkpoint}")
-        # Use the static method from Trainer to load state
-        # We only need the model, not optimizer/scheduler state for prediction
-        model, _, _, checkpoint_info = Trainer.load_model(
-            checkpoint_path=args.checkpoint,
-            model=model,
-            device=device,
-        )
+        if args.quantized or is_inference_artifact(args.checkpoint):
+            # Self-describing artifact from `epibench optimize`/`quantize`: no reconstruction from the config
+            model, checkpoint_info = load_inference_artifact(args.checkpoint, device)
+        else:
+            logger.info(f"Instantiating model architecture: {model_name}")
+            ModelClass = models.get_model(model_name)
+            model = ModelClass(**model_params) # Instantiate architecture
+
+            logger.info(f"Loading model weights from checkpoint: {args.checkpoint}")
+            # Use the static method from Trainer to load state
+            # We only need the model, not optimizer/scheduler state for prediction
+            model, _, _, checkpoint_info = Trainer.load_model(
+                checkpoint_path=args.checkpoint,
+                model=model,
+                device=device,
+            )
         logger.info(f"Model loaded successfully from epoch {checkpoint_info.get('epoch', 'N/A')}.")
         model.eval() # Set model to evaluation mode
 
@@ -149,8 +167,15 @@ def predict_main(args):
 
         logger.info(f"Loading prediction input data from: {args.input_data} with batch size: {batch_size}")
 
+        # Apply the same input crop and feature normalization the model was validated with
+        data_config = apply_checkpoint_crop(config.setdefault('data', {}), checkpoint_info)
+        if data_config.get('normalize') and not data_config.get('train_path'):
+            raise ValueError("'data.normalize' is enabled but 'data.train_path' (source of the normalization statistics) is not set.")
+        transform = build_eval_transform(data_config)
+
         # Directly create the dataset and dataloader for prediction
-        predict_dataset = HDF5Dataset(h5_path=args.input_data)
+        predict_dataset = HDF5Dataset(h5_path=args.input_data, transform=transform)
+        check_artifact_input(checkpoint_info, predict_dataset)
         predict_loader = DataLoader(
             dataset=predict_dataset,
             batch_size=batch_size,
@@ -176,11 +201,18 @@ def predict_main(args):
         logger.error(f"Error loading prediction input data: {e}", exc_info=True)
         sys.exit(1)
 
+    # --- Optional Compilation (model.compile) ---
+    compile_config = get_compile_config(config)
+    if compile_config.get('enabled') and not isinstance(model, torch.jit.ScriptModule): # Artifacts are already traced
+        model = compile_model(model, compile_config, example_input=example_input_from_dataset(predict_dataset, device, batch_size=batch_size))
+
     # Subtask 11.4: Prediction Loop
     logger.info("Running prediction loop...")
     all_predictions = []
+    prefetch_batches = config.get('data', {}).get('prefetch_batches', 0)
+    batches = maybe_prefetch(predict_loader, prefetch_batches, device)
     with torch.no_grad():
-        for batch in predict_loader:
+        for batch in batches:
             # Assuming batch is a tuple/list like (features, targets)
             # We only need the features for prediction.
             inputs = batch[0] # Get the features tensor from the batch
@@ -188,6 +220,8 @@ def predict_main(args):
             outputs = model(inputs)
             all_predictions.append(outputs.cpu().numpy())
     all_predictions = np.concatenate(all_predictions)
+    if isinstance(batches, BackgroundPrefetcher):
+        logger.info(f"Waited {batches.wait_time:.2f}s for data over {batches.batches_served} prefetched batches.")
 
     # Subtask 11.4: Save Predictions
     logger.info(f"Saving predictions to: {args.output_file}")
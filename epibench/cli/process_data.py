@@ -18,6 +18,7 @@ import logging # Import logging module
 # from epibench.config.config_manager import ConfigManager # No longer using ConfigManager here
 from epibench.utils.logging import LoggerManager # Import the LoggerManager class
 from epibench.validation.config_validator import validate_process_config, ProcessConfig # Import validator
+from epibench.data.statistics import RunningStats, TargetHistogram, write_stats_attrs
 
 # Get a logger for this module
 logger = logging.getLogger(__name__)
@@ -381,6 +382,10 @@ def process_data_main(args):
         for split_name, indices_for_split in split_indices.items():
             logger.info(f"Processing {len(indices_for_split)} regions for {split_name} split...")
             h5_handle = h5_handles[split_name]
+            # Streaming statistics, stored in the file attributes once the split is complete
+            feature_stats = RunningStats(output_feature_dim)
+            target_stats = RunningStats(1)
+            target_hist = TargetHistogram()
             
             # Use tqdm for progress bar
             for region_idx in tqdm(indices_for_split, desc=f"Processing {split_name}", unit="region"):
@@ -533,6 +538,14 @@ def process_data_main(args):
                 h5_handle['start'][current_size] = bed_start # Assumes bed_start is int
                 h5_handle['end'][current_size] = bed_end # Assumes bed_end is int
 
+                feature_stats.update(features_matrix)
+                target_stats.update(np.array([target_methylation]))
+                target_hist.update(np.array([target_methylation]))
+
+            write_stats_attrs(h5_handle, feature_stats, target_stats, target_hist)
+            logger.info(f"Stored statistics for {split_name} split ({target_stats.count} regions). "
+                        f"Channel means: {np.round(feature_stats.mean, 4).tolist()}")
+
         # --- Validation Check (Added as per Plan Item 6) ---
         logger.info("Validating final dataset counts...")
         validation_passed = True
@@ -0,0 +1,199 @@
+# -*- coding: utf-8 -*-
+"""CLI command for post-training int8 quantization of trained EpiBench models."""
+
+import argparse
+import json
+import logging
+import sys
+import os
+
+import numpy as np
+import torch
+from torch.utils.data import DataLoader, Subset
+
+# Add project root to sys.path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from epibench.config.config_manager import ConfigManager
+from epibench.utils.logging import LoggerManager
+from epibench.data.data_loader import apply_checkpoint_crop, build_dataset, build_eval_transform
+from epibench.models.loading import example_input_from_dataset, load_inference_model
+from epibench.models.quantization import (
+    QUANTIZATION_MODES,
+    evaluate_quantization,
+    quantize_model,
+    quantized_model_path,
+    save_quantized_model,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def setup_quantize_parser(parser: argparse.ArgumentParser):
+    """Adds arguments specific to the quantize command."""
+    parser.add_argument(
+        "-c", "--config",
+        type=str,
+        required=True,
+        help="Path to the YAML/JSON configuration file used during training."
+    )
+    parser.add_argument(
+        "--checkpoint",
+        type=str,
+        required=True,
+        help="Path to the float model checkpoint file (.pth) to quantize."
+    )
+    parser.add_argument(
+        "--mode",
+        type=str,
+        default="static",
+        choices=QUANTIZATION_MODES,
+        help="'dynamic' (int8 Linear layers) or 'static' (also int8 convolutions, calibrated on training regions). Default: static."
+    )
+    parser.add_argument(
+        "--calibration-samples",
+        type=int,
+        default=256,
+        help="Number of randomly drawn training regions used to calibrate activation ranges (static mode, default: 256)."
+    )
+    parser.add_argument(
+        "--eval-data",
+        type=str,
+        default=None,
+        help="Held-out data for the accuracy check (default: data.val_path, else data.test_path)."
+    )
+    parser.add_argument(
+        "--eval-samples",
+        type=int,
+        default=1024,
+        help="Number of held-out samples for the accuracy check (default: 1024; 0 skips the check)."
+    )
+    parser.add_argument(
+        "--max-r2-drop",
+        type=float,
+        default=0.01,
+        help="Largest acceptable R2 decrease of the quantized model before it is reported as failing the check (default: 0.01)."
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=None,
+        help="Batch size for calibration and the accuracy check. Overrides config if provided."
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=0,
+        help="Seed for drawing the calibration regions (default: 0)."
+    )
+    parser.add_argument(
+        "-o", "--output",
+        type=str,
+        default=None,
+        help="Path of the quantized model (default: next to the checkpoint, e.g. best_model.static.int8.pt)."
+    )
+
+
+def _sample_loader(path_spec, data_config, num_samples, batch_size, seed=None):
+    """DataLoader over ``num_samples`` regions of a split: a random draw if ``seed`` is given, else the first ones."""
+    dataset = build_dataset(path_spec, transform=build_eval_transform(data_config))
+    num_samples = min(num_samples, len(dataset))
+    if seed is None:
+        indices = list(range(num_samples))
+    else:
+        indices = np.random.default_rng(seed).choice(len(dataset), size=num_samples, replace=False).tolist()
+    return DataLoader(Subset(dataset, sorted(indices)), batch_size=batch_size, shuffle=False)
+
+
+def quantize_main(args):
+    """Main function for the quantize command."""
+    try:
+        config_manager = ConfigManager(args.config)
+        config = config_manager.config
+    except Exception as e:
+        logging.basicConfig(level="INFO", format='%(asctime)s - %(levelname)s - %(message)s')
+        logger.error(f"Error loading configuration from {args.config}: {e}", exc_info=True)
+        sys.exit(1)
+
+    LoggerManager.setup_logger(config_manager=config_manager)
+    logger.info("Starting EpiBench quantization...")
+    logger.info(f"Quantize arguments: {args}")
+
+    device = torch.device('cpu') # int8 kernels are CPU-only
+    try:
+        model, checkpoint_info = load_inference_model(config, args.checkpoint, device)
+    except (FileNotFoundError, KeyError, ValueError) as e:
+        logger.error(f"Error loading model: {e}", exc_info=True)
+        sys.exit(1)
+
+    data_config = apply_checkpoint_crop(config.setdefault('data', {}), checkpoint_info)
+    batch_size = args.batch_size or data_config.get('batch_size', 32)
+
+    # --- Calibration on a random sample of training regions ---
+    calibration_loader = None
+    if args.mode == 'static':
+        train_path = data_config.get('train_path')
+        if not train_path:
+            logger.error("Static quantization calibrates on training regions, but 'data.train_path' is not set.")
+            sys.exit(1)
+        calibration_loader = _sample_loader(train_path, data_config, args.calibration_samples, batch_size, seed=args.seed)
+        logger.info(f"Calibrating on {len(calibration_loader.dataset)} regions drawn from {train_path}")
+
+    try:
+        quantized = quantize_model(model, args.mode, calibration_loader)
+    except (RuntimeError, ValueError) as e:
+        logger.error(f"Quantization failed: {e}", exc_info=True)
+        sys.exit(1)
+
+    # --- Accuracy check against the float model ---
+    accuracy = None
+    eval_path = args.eval_data or data_config.get('val_path') or data_config.get('test_path')
+    if args.eval_samples > 0 and eval_path:
+        eval_loader = _sample_loader(eval_path, data_config, args.eval_samples, batch_size)
+        accuracy = evaluate_quantization(model, quantized, eval_loader)
+        r2_delta = accuracy['delta'].get('r2')
+        accuracy['max_r2_drop'] = args.max_r2_drop
+        accuracy['passed'] = r2_delta is not None and -r2_delta <= args.max_r2_drop
+        logger.info(f"Accuracy check on {accuracy['samples']} samples of {eval_path}: "
+                    f"R2 {accuracy['float'].get('r2')} -> {accuracy['quantized'].get('r2')}, "
+                    f"MSE delta {accuracy['delta'].get('mse')}, max |prediction diff| {accuracy['max_abs_prediction_diff']:.2e}, "
+                    f"inference {accuracy['float_seconds']:.2f}s -> {accuracy['quantized_seconds']:.2f}s")
+        if not accuracy['passed']:
+            logger.warning(f"Quantized model loses more than {args.max_r2_drop} R2; consider 'dynamic' mode or more calibration samples.")
+    elif args.eval_samples > 0:
+        logger.warning("No held-out data (--eval-data, data.val_path or data.test_path); skipping the accuracy check.")
+
+    output_path = args.output or quantized_model_path(args.checkpoint, args.mode)
+    metadata = {
+        'model_name': config.get('model', {}).get('name'),
+        'quantization': args.mode,
+        'optimizations': (['fold_batch_norm', 'int8_conv'] if args.mode == 'static' else []) + ['int8_linear'],
+        'source_checkpoint': os.path.abspath(args.checkpoint),
+        'epoch': checkpoint_info.get('epoch'),
+        'calibration_samples': len(calibration_loader.dataset) if calibration_loader is not None else 0,
+        'accuracy': accuracy,
+        'config': config,
+    }
+    if 'crop_length' in checkpoint_info:
+        metadata['crop_length'] = checkpoint_info['crop_length']
+    # The saved model is a TorchScript trace; it is traced with a sample in the layout the datasets produce
+    sample_path = data_config.get('train_path') or eval_path
+    if not sample_path:
+        logger.error("No data (data.train_path, --eval-data, data.val_path or data.test_path) to trace the quantized model with.")
+        sys.exit(1)
+    example_input = example_input_from_dataset(build_dataset(sample_path, transform=build_eval_transform(data_config)), device)
+    save_quantized_model(quantized, output_path, example_input, metadata)
+
+    report_path = os.path.splitext(output_path)[0] + '.json'
+    with open(report_path, 'w') as f:
+        json.dump({k: v for k, v in metadata.items() if k != 'config'}, f, indent=2)
+    logger.info(f"Quantization report saved to {report_path}")
+    logger.info("EpiBench quantization finished.")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Quantize an EpiBench model to int8 for CPU inference.")
+    setup_quantize_parser(parser)
+    quantize_main(parser.parse_args())
@@ -2,8 +2,9 @@ import argparse
 import logging
 import sys
 import os
+import shutil
+import time
 import torch.optim as optim
-import copy # Import the copy module
 
 # Add project root to sys.path to allow imports from epibench
 # This assumes the script is run from the project root or similar context
@@ -17,8 +18,11 @@ from epibench.config.config_manager import ConfigManager
 from epibench.data.data_loader import create_dataloaders
 from epibench.models import models
 from epibench.training.trainer import Trainer
-from epibench.training.hpo import HPOptimizer
+from epibench.training.hpo import HPOptimizer, default_study_storage, run_parallel_optimization
+from epibench.training.distributed import (cleanup_distributed, distributed_device, get_rank, init_distributed, is_main_process,
+                                           per_rank_threads)
 from epibench.utils.logging import LoggerManager
+from epibench.utils.performance import configure_threads
 import torch
 
 logger = logging.getLogger(__name__)
@@ -46,8 +50,116 @@ def setup_arg_parser(parser: argparse.ArgumentParser):
         choices=["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"],
         help="Set the default logging level (might be overridden by config file)."
     )
+    parser.add_argument(
+        "--resume",
+        nargs="?",
+        const="auto",
+        default=None,
+        metavar="STATE_FILE",
+        help="Resume an interrupted run from a training-state file (default: last_state.pth in the run's checkpoint directory)."
+    )
+    parser.add_argument(
+        "--hpo-workers",
+        type=int,
+        default=None,
+        metavar="N",
+        help="Run HPO trials in N parallel worker processes sharing one study (default: hpo.n_workers, or 1)."
+    )
+    parser.add_argument(
+        "--hpo-worker",
+        action="store_true",
+        default=False,
+        help="Only run trials of the shared study in hpo.storage until hpo.n_trials is reached (e.g. on another node)."
+    )
+    parser.add_argument(
+        "--num-threads",
+        type=int,
+        default=None,
+        help="Intra-op CPU threads for this process (overrides training.num_threads)."
+    )
     # Add other potential arguments like --checkpoint, --device, --num-workers etc. later if needed
 
+def run_final_model_step(hpo_optimizer: HPOptimizer, hpo_config: dict, train_loader, val_loader, device):
+    """Produces the final model after HPO according to 'hpo.final_model.strategy'.
+
+    - promote (default): copy the best trial's best checkpoint, no further training.
+    - finetune: continue training the best trial's weights for 'epochs' (default 10) epochs.
+    - retrain: train a new model with the best hyperparameters for 'epochs' (default 50) epochs.
+
+    The model is written to <dirname of the checkpoint dir>/final_model. promote and
+    finetune fall back to retrain if the best trial's checkpoint is missing.
+    """
+    final_settings = hpo_config.get('final_model', {}) or {}
+    strategy = final_settings.get('strategy', 'promote')
+    if strategy not in ('promote', 'finetune', 'retrain'):
+        logger.warning(f"Unknown final model strategy '{strategy}'. Using 'promote'.")
+        strategy = 'promote'
+    best_checkpoint = hpo_optimizer.best_trial_checkpoint()
+    if strategy != 'retrain' and best_checkpoint is None:
+        logger.warning("The best trial's checkpoint is not available. Retraining the final model from scratch.")
+        strategy = 'retrain'
+    try:
+        trial_seconds = hpo_optimizer.best_trial().user_attrs.get('train_seconds')
+    except ValueError:
+        trial_seconds = None
+
+    # Config with the best HPO params applied to their dotted config paths
+    final_model_config = hpo_optimizer.build_final_config()
+    base_hpo_checkpoint_dir = final_model_config.get('checkpoint_dir') or final_model_config.get('output', {}).get('checkpoint_dir', './training_results/AML_263578_SeqCNNRegressor_new_hpo')
+    final_dir = os.path.join(os.path.dirname(os.path.normpath(base_hpo_checkpoint_dir)), "final_model")
+    final_model_config['checkpoint_dir'] = final_dir # Top-level keys take precedence in Trainer
+    final_model_config['log_dir'] = os.path.join(final_dir, 'logs')
+    os.makedirs(final_dir, exist_ok=True)
+
+    if strategy == 'promote':
+        shutil.copyfile(best_checkpoint, os.path.join(final_dir, 'best_model.pth'))
+        saved = f" (saves roughly the {trial_seconds:.0f}s the best trial trained for)" if trial_seconds else ""
+        logger.info(f"Promoted {best_checkpoint} to {final_dir}/best_model.pth without retraining{saved}.")
+        return
+
+    default_epochs = 10 if strategy == 'finetune' else 50
+    final_model_config['training']['epochs'] = final_settings.get('epochs', default_epochs)
+    final_model_config['training']['early_stopping_patience'] = final_settings.get('early_stopping_patience', 7)
+    logger.info(f"Final model ({strategy}) configuration: {final_model_config}")
+
+    # Create Model with best HPO params
+    model_name_final = final_model_config['model']['name']
+    model_params_final = final_model_config['model'].get('params', {})
+    ModelClass_final = models.get_model(model_name_final)
+    model_final = ModelClass_final(**model_params_final).to(device)
+    if strategy == 'finetune':
+        checkpoint = torch.load(best_checkpoint, map_location=device, weights_only=False)
+        model_final.load_state_dict(checkpoint['model_state_dict'])
+        logger.info(f"Fine-tuning from {best_checkpoint} (epoch {checkpoint.get('epoch')}, val loss {checkpoint.get('best_val_loss')}).")
+
+    # Create Optimizer with best HPO params
+    optimizer_name_final = final_model_config['training']['optimizer']
+    optimizer_params_final = final_model_config['training'].get('optimizer_params', {})
+    OptimizerClass_final = getattr(optim, optimizer_name_final)
+    optimizer_final = OptimizerClass_final(model_final.parameters(), **optimizer_params_final)
+
+    # Criterion remains the same
+    loss_name_final = final_model_config['training']['loss_function']
+    CriterionClass_final = getattr(torch.nn, loss_name_final)
+    criterion_final = CriterionClass_final()
+
+    trainer_final = Trainer(
+        model=model_final,
+        optimizer=optimizer_final,
+        criterion=criterion_final,
+        train_loader=train_loader, # Use the same data loaders
+        val_loader=val_loader,
+        config=final_model_config,
+        device=device
+    )
+    logger.info("Starting final model training...")
+    start_time = time.monotonic()
+    trainer_final.train()
+    elapsed = time.monotonic() - start_time
+    comparison = f"; the best trial trained for {trial_seconds:.0f}s" if trial_seconds else ""
+    logger.info(f"Final model training ({strategy}) completed in {elapsed:.0f}s{comparison}.")
+
+
 def main(args):
     """Main function to parse arguments and orchestrate training."""
     # The parser is now handled by the main CLI entry point
@@ -84,8 +196,30 @@ def main(args):
     logger.info(f"Loaded configuration from: {args.config}")
     logger.debug(f"Full configuration: {config}") # Log full config at debug level
 
+    if getattr(args, 'hpo_worker', False):
+        args.hpo = True # A trial worker is always an HPO run
+    if getattr(args, 'num_threads', None):
+        config.setdefault('training', {})['num_threads'] = args.num_threads
+
+    # --- Distributed Setup (processes started by `epibench launch`) ---
+    try:
+        distributed = init_distributed(config.get('training', {}).get('distributed'))
+    except Exception as e:
+        logger.error(f"Failed to initialize distributed training: {e}", exc_info=True)
+        sys.exit(1)
+    if args.hpo and getattr(args, 'resume', None):
+        logger.error("--resume is not supported together with --hpo.")
+        sys.exit(1)
+    if distributed:
+        if args.hpo:
+            logger.error("Hyperparameter optimization is not supported in distributed runs. Launch it as a single process.")
+            sys.exit(1)
+        logger.info(f"Distributed training: rank {get_rank()} started.")
+        if not is_main_process():
+            logging.getLogger().setLevel(logging.WARNING) # Only rank 0 logs progress
+
     # --- Setup Device ---
-    device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+    device = distributed_device(torch.device("cuda" if torch.cuda.is_available() else "cpu"))
     logger.info(f"Using device: {device}")
 
     # --- Load Data ---
@@ -97,6 +231,19 @@ def main(args):
         logger.error(f"Error loading data: {e}", exc_info=True)
         sys.exit(1)
 
+    # --- Thread Pools (process-wide, so set here once rather than by each Trainer) ---
+    training_config = config.get('training', {})
+    num_workers = getattr(train_loader, 'num_workers', 0) or 0
+    num_threads = training_config.get('num_threads')
+    if num_threads is None and distributed:
+        num_threads = per_rank_threads(num_workers) # Split the node's CPUs between local ranks
+    try:
+        thread_settings = configure_threads(num_threads, training_config.get('num_interop_threads'), num_workers)
+    except ValueError as e:
+        logger.error(f"Invalid thread settings: {e}")
+        sys.exit(1)
+    logger.info(f"CPU threads: {thread_settings} (DataLoader workers: {num_workers})")
+
     # --- Determine Execution Mode (Standard Training vs. HPO) ---
     if args.hpo:
         # --- Hyperparameter Optimization ---
@@ -111,12 +258,19 @@ def main(args):
 
             # optimizer_metric = hpo_config.get('metric', 'val_loss') # Metric is implicitly val_loss in HPOptimizer.objective
             n_trials = hpo_config.get('n_trials', 20) # Default trials from HPOptimizer or override from config
+            hpo_worker = getattr(args, 'hpo_worker', False)
+            n_workers = getattr(args, 'hpo_workers', None) or hpo_config.get('n_workers', 1)
+            storage = hpo_config.get('storage', None)
+            if storage is None and (n_workers > 1 or hpo_worker):
+                # Worker processes need a persistent study shared through the filesystem
+                storage = default_study_storage(config)
+                logger.info(f"No 'hpo.storage' configured; sharing the study through {storage}")
 
             hpo_optimizer = HPOptimizer(
                 base_config=config, # Pass the full config dictionary
                 study_name=hpo_config.get('study_name', 'epibench_hpo_study'), # Get from HPO config or default
                 direction=hpo_config.get('direction', 'minimize'),     # Get from HPO config or default
-                storage=hpo_config.get('storage', None),               # Get from HPO config or default (None for in-memory)
+                storage=storage,                                       # None for in-memory
                 sampler_name=hpo_config.get('sampler', 'TPE'),       # Pass sampler name string
                 pruner_name=hpo_config.get('pruner', 'MedianPruner'),       # Pass pruner name string
                 train_loader=train_loader,
@@ -124,12 +278,25 @@ def main(args):
                 device=device
             )
 
+            if hpo_config.get('warm_start') and not hpo_worker:
+                hpo_optimizer.warm_start(hpo_config['warm_start'])
+
+            if hpo_worker:
+                # Trial-only process started by run_parallel_optimization or by hand on another node
+                hpo_optimizer.run_worker(n_trials=n_trials, timeout=hpo_config.get('timeout'))
+                cleanup_distributed()
+                logger.info("HPO worker finished.")
+                return
+
             # Run optimization
-            hpo_optimizer.run_optimization( # HPOptimizer has its own objective method
-                 n_trials=n_trials, # Pass n_trials from config
-                 # timeout can be added if needed
-                 # n_jobs can be added if needed
-            )
+            if n_workers > 1:
+                run_parallel_optimization(args.config, n_workers, threads_per_worker=hpo_config.get('threads_per_worker'),
+                                          log_level=args.log_level)
+            else:
+                hpo_optimizer.run_optimization( # HPOptimizer has its own objective method
+                     n_trials=n_trials, # Pass n_trials from config
+                     timeout=hpo_config.get('timeout'),
+                )
             
             best_trial_params = hpo_optimizer.get_best_params()
             best_trial_value = hpo_optimizer.get_best_value()
@@ -140,75 +307,7 @@ def main(args):
             logger.info(f"Best parameters: {best_trial_params}")
             logger.info(f"Best value: {best_trial_value}")
 
-            # After HPO, train the final model with best parameters and 50 epochs
-            logger.info("Training final model with best hyperparameters...")
-            
-            # Create a new config for the final model, updating with best HPO params
-            final_model_config = copy.deepcopy(config_manager.config) # Use copy.deepcopy
-            
-            # Update specific parameters from HPO results
-            # This needs careful mapping from hpo_optimizer.get_best_params() keys to config structure
-            if 'learning_rate' in best_trial_params:
-                final_model_config['training']['optimizer_params']['lr'] = best_trial_params['learning_rate']
-            if 'weight_decay' in best_trial_params:
-                final_model_config['training']['optimizer_params']['weight_decay'] = best_trial_params['weight_decay']
-            if 'dropout_rate' in best_trial_params:
-                final_model_config['model']['params']['dropout_rate'] = best_trial_params['dropout_rate']
-            # Example for fc_units - assumes HPO tunes only the first FC layer
-            # And that best_params returns a flat key like 'fc_units_0' if you named it so in define_search_space
-            # Or if define_search_space returned 'fc_units' as a single int for the first layer:
-            if 'fc_units' in best_trial_params: # If 'fc_units' was tuned as a single value for the first layer
-                 if isinstance(final_model_config['model']['params']['fc_units'], list) and \
-                    len(final_model_config['model']['params']['fc_units']) > 0:
-                    final_model_config['model']['params']['fc_units'][0] = best_trial_params['fc_units']
-                 else: # Or if fc_units in config is just an int (less likely based on current config)
-                    final_model_config['model']['params']['fc_units'] = [best_trial_params['fc_units'], 512] # Assuming a structure
-            if 'num_filters' in best_trial_params:
-                 final_model_config['model']['params']['num_filters'] = best_trial_params['num_filters']
-
-
-            # Set epochs for the final training run
-            final_model_config['training']['epochs'] = 50  # As requested
-            final_model_config['training']['early_stopping_patience'] = 7 # A reasonable patience for final run
-
-            # Update checkpoint_dir for the final model to distinguish from HPO runs
-            base_hpo_checkpoint_dir = final_model_config.get('output', {}).get('checkpoint_dir', './training_results/AML_263578_SeqCNNRegressor_new_hpo')
-            final_model_config['output']['checkpoint_dir'] = os.path.join(os.path.dirname(base_hpo_checkpoint_dir), "final_model")
-            os.makedirs(final_model_config['output']['checkpoint_dir'], exist_ok=True)
-
-            logger.info(f"Final model configuration: {final_model_config}")
-
-            # Create Model with best HPO params
-            model_name_final = final_model_config['model']['name']
-            model_params_final = final_model_config['model'].get('params', {})
-            ModelClass_final = models.get_model(model_name_final)
-            model_final = ModelClass_final(**model_params_final).to(device)
-
-            # Create Optimizer with best HPO params
-            optimizer_name_final = final_model_config['training']['optimizer']
-            optimizer_params_final = final_model_config['training'].get('optimizer_params', {})
-            OptimizerClass_final = getattr(optim, optimizer_name_final)
-            optimizer_final = OptimizerClass_final(model_final.parameters(), **optimizer_params_final)
-            
-            # Criterion remains the same
-            loss_name_final = final_model_config['training']['loss_function']
-            CriterionClass_final = getattr(torch.nn, loss_name_final)
-            criterion_final = CriterionClass_final()
-
-            # Create Trainer for the final model
-            trainer_final = Trainer(
-                model=model_final,
-                optimizer=optimizer_final,
-                criterion=criterion_final,
-                train_loader=train_loader, # Use the same data loaders
-                val_loader=val_loader,
-                config=final_model_config, # Pass the updated config
-                device=device
-            )
-            logger.info("Starting final model training...")
-            trainer_final.train()
-            logger.info("Final model training completed.")
-
+            run_final_model_step(hpo_optimizer, hpo_config, train_loader, val_loader, device)
 
         except ImportError as e:
              logger.error(f"Error during HPO setup: {e}. Make sure Optuna is installed (`pip install optuna`)", exc_info=True)
@@ -267,6 +366,10 @@ def main(args):
             )
             logger.info("Trainer initialized.")
 
+            if getattr(args, 'resume', None):
+                state_path = None if args.resume == 'auto' else args.resume
+                trainer.resume(state_path)
+
             # 4. Call trainer.train()
             logger.info("Starting training loop...")
             # Assuming trainer.train handles epochs, steps, logging, etc., based on config
@@ -295,6 +398,7 @@ def main(args):
             logger.error(f"An error occurred during standard training: {e}", exc_info=True)
             sys.exit(1)
 
+    cleanup_distributed()
     logger.info("EpiBench training process finished.")
 
 if __name__ == "__main__":
@@ -0,0 +1,172 @@
+# -*- coding: utf-8 -*-
+"""CLI command for benchmarking and tuning EpiBench DataLoader settings."""
+
+import argparse
+import logging
+import sys
+import os
+
+# Add project root to sys.path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from epibench.config.config_manager import ConfigManager
+from epibench.utils.logging import LoggerManager
+from epibench.data.data_loader import build_dataset
+from epibench.data.loader_tuning import (
+    benchmark_loader,
+    build_grid,
+    default_pin_memory_options,
+    diagnose_bottleneck,
+    select_best,
+    write_overlay,
+)
+
+logger = logging.getLogger(__name__)
+
+SPLIT_KEYS = {'train': 'train_path', 'val': 'val_path', 'test': 'test_path'}
+
+
+def setup_tune_loader_parser(parser: argparse.ArgumentParser):
+    """Adds arguments specific to the tune-loader command."""
+    parser.add_argument(
+        "-c", "--config",
+        type=str,
+        required=True,
+        help="Path to the training configuration file (YAML or JSON) whose 'data' section points at processed HDF5 files."
+    )
+    parser.add_argument(
+        "--split",
+        type=str,
+        default="train",
+        choices=sorted(SPLIT_KEYS),
+        help="Which processed split to benchmark (default: train)."
+    )
+    parser.add_argument(
+        "--batch-sizes",
+        type=int,
+        nargs='+',
+        default=[32, 64, 128],
+        help="Batch sizes to try (default: 32 64 128)."
+    )
+    parser.add_argument(
+        "--num-workers",
+        type=int,
+        nargs='+',
+        default=None,
+        help="Worker counts to try (default: 0, 2, 4, ... up to the CPU count)."
+    )
+    parser.add_argument(
+        "--prefetch-factors",
+        type=int,
+        nargs='+',
+        default=[2, 4],
+        help="prefetch_factor values to try when using workers (default: 2 4)."
+    )
+    parser.add_argument(
+        "--max-batches",
+        type=int,
+        default=20,
+        help="Batches per timed pass (default: 20)."
+    )
+    parser.add_argument(
+        "--max-rss-mb",
+        type=float,
+        default=None,
+        help="Only consider settings whose peak RSS (including workers) stays below this many MB."
+    )
+    parser.add_argument(
+        "-o", "--output",
+        type=str,
+        default="loader_overlay.yaml",
+        help="Path of the YAML config overlay to write with the best settings (default: loader_overlay.yaml)."
+    )
+
+
+def _default_worker_counts():
+    cpu_count = os.cpu_count() or 1
+    counts = [0]
+    workers = 2
+    while workers <= cpu_count:
+        counts.append(workers)
+        workers *= 2
+    return counts
+
+
+def tune_loader_main(args):
+    """Main function for the tune-loader command."""
+    try:
+        config_manager = ConfigManager(args.config)
+        config = config_manager.config
+    except Exception as e:
+        logging.basicConfig(level="INFO", format='%(asctime)s - %(levelname)s - %(message)s')
+        logger.error(f"Error loading configuration from {args.config}: {e}", exc_info=True)
+        sys.exit(1)
+
+    LoggerManager.setup_logger(config_manager=config_manager)
+    logger.info("Starting EpiBench DataLoader tuning...")
+    logger.info(f"Tune-loader arguments: {args}")
+
+    path_spec = config.get('data', {}).get(SPLIT_KEYS[args.split])
+    if not path_spec:
+        logger.error(f"Data path 'data.{SPLIT_KEYS[args.split]}' not found in configuration.")
+        sys.exit(1)
+
+    try:
+        dataset = build_dataset(path_spec)
+    except Exception as e:
+        logger.error(f"Failed to open {args.split} data {path_spec}: {e}", exc_info=True)
+        sys.exit(1)
+
+    # --- I/O vs decode diagnosis ---
+    diagnosis_paths = [path_spec] if isinstance(path_spec, str) else getattr(dataset, 'file_paths', [])[:1]
+    for path in diagnosis_paths:
+        try:
+            diagnosis = diagnose_bottleneck(path)
+            if diagnosis['io_sec'] is not None:
+                logger.info(f"Read diagnosis for {path}: raw chunk I/O {diagnosis['io_sec']:.3f}s vs decode "
+                            f"{diagnosis['decode_sec']:.3f}s over {diagnosis['chunks_sampled']} chunks -> {diagnosis['bound']}-bound")
+            if diagnosis['bound'] == 'decode':
+                logger.info("Decompression dominates: more workers (or a chunk cache) should help more than faster storage.")
+            else:
+                logger.info("Storage I/O dominates: larger batches, prefetching and chunk caching help more than extra workers.")
+        except Exception as e:
+            logger.warning(f"Could not diagnose read bottleneck for {path}: {e}")
+
+    # --- Grid benchmark ---
+    num_workers = args.num_workers or _default_worker_counts()
+    grid = build_grid(args.batch_sizes, num_workers, args.prefetch_factors, default_pin_memory_options())
+    logger.info(f"Benchmarking {len(grid)} DataLoader configurations on {len(dataset)} {args.split} samples...")
+
+    results = []
+    for settings in grid:
+        try:
+            result = benchmark_loader(dataset, max_batches=args.max_batches, **settings)
+        except Exception as e:
+            logger.warning(f"Configuration {settings} failed: {e}")
+            continue
+        results.append(result)
+        logger.info(f"  {settings} -> {result['samples_per_sec']:.1f} samples/sec, peak RSS {result['peak_rss_mb']:.0f} MB")
+
+    close = getattr(dataset, 'close', None)
+    if callable(close):
+        close()
+
+    best = select_best(results, args.max_rss_mb)
+    if best is None:
+        logger.error("No DataLoader configuration completed within the given constraints.")
+        sys.exit(1)
+
+    logger.info(f"Best settings: batch_size={best['batch_size']}, num_workers={best['num_workers']}, "
+                f"prefetch_factor={best['prefetch_factor']}, persistent_workers={best['persistent_workers']}, "
+                f"pin_memory={best['pin_memory']} ({best['samples_per_sec']:.1f} samples/sec, peak RSS {best['peak_rss_mb']:.0f} MB)")
+    write_overlay(best, args.output)
+    logger.info(f"Config overlay written to {args.output}. Merge its 'data' section into your training config.")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark and tune EpiBench DataLoader settings.")
+    setup_tune_loader_parser(parser)
+    args = parser.parse_args()
+    tune_loader_main(args)
@@ -0,0 +1,123 @@
+import logging
+import multiprocessing as mp
+from typing import Callable, Dict, Tuple
+
+import numpy as np
+import torch
+
+logger = logging.getLogger(__name__)
+
+# Indices into the shared statistics tensor
+_HITS, _MISSES, _EVICTIONS, _CLOCK = range(4)
+
+
+class SharedChunkCache:
+    """Bounded LRU cache of decoded HDF5 chunks kept in shared memory.
+
+    Decoded chunks are stored in a fixed slab of equally sized slots allocated
+    with ``share_memory_()``. Slot ownership, recency and hit/miss counters also
+    live in shared tensors, so every DataLoader worker forked (or spawned) from
+    the process that created the cache sees the same contents. A single
+    multiprocessing lock guards the bookkeeping; chunk decoding itself happens
+    outside the lock.
+
+    Args:
+        max_bytes (int): Byte budget for cached chunk data. At least one slot is always allocated.
+        chunk_shape (Tuple[int, ...]): Shape of one decoded chunk (rows first).
+        dtype (np.dtype): Element type of the cached data.
+    """
+    def __init__(self, max_bytes: int, chunk_shape: Tuple[int, ...], dtype=np.float32):
+        self.chunk_shape = tuple(int(dim) for dim in chunk_shape)
+        self.dtype = np.dtype(dtype)
+        slot_bytes = int(np.prod(self.chunk_shape)) * self.dtype.itemsize
+        self.num_slots = max(1, int(max_bytes) // max(slot_bytes, 1))
+        self.max_bytes = self.num_slots * slot_bytes
+
+        torch_dtype = torch.from_numpy(np.empty(0, dtype=self.dtype)).dtype
+        self._storage = torch.zeros((self.num_slots,) + self.chunk_shape, dtype=torch_dtype).share_memory_()
+        self._keys = torch.full((self.num_slots,), -1, dtype=torch.int64).share_memory_()
+        self._rows = torch.zeros(self.num_slots, dtype=torch.int64).share_memory_()
+        self._last_used = torch.zeros(self.num_slots, dtype=torch.int64).share_memory_()
+        self._stats = torch.zeros(4, dtype=torch.int64).share_memory_()
+        self._lock = mp.Lock()
+
+        logger.info(f"Initialized shared chunk cache with {self.num_slots} slots of shape {self.chunk_shape} ({self.max_bytes / 1024**2:.1f} MB).")
+
+    def _find_slot(self, key: int) -> int:
+        matches = (self._keys == key).nonzero()
+        return int(matches[0, 0]) if matches.numel() else -1
+
+    def _touch(self, slot: int) -> None:
+        self._stats[_CLOCK] += 1
+        self._last_used[slot] = self._stats[_CLOCK]
+
+    def get_row(self, key: int, row: int, load_chunk: Callable[[], np.ndarray]) -> np.ndarray:
+        """Return one row of a chunk, decoding and caching the chunk on a miss.
+
+        Args:
+            key: Non-negative identifier of the chunk (e.g. its chunk index).
+            row: Row offset inside the chunk.
+            load_chunk: Callable returning the decoded chunk as an array whose
+                trailing dimensions match ``chunk_shape`` (the first dimension
+                may be shorter for the final chunk of a dataset).
+
+        Returns:
+            A copy of the requested row.
+        """
+        with self._lock:
+            slot = self._find_slot(key)
+            if slot >= 0 and row < int(self._rows[slot]):
+                self._stats[_HITS] += 1
+                self._touch(slot)
+                return self._storage[slot, row].numpy().copy()
+            self._stats[_MISSES] += 1
+
+        chunk = np.asarray(load_chunk(), dtype=self.dtype)
+        n_rows = chunk.shape[0]
+        if n_rows > self.chunk_shape[0] or chunk.shape[1:] != self.chunk_shape[1:]:
+            raise ValueError(f"Decoded chunk shape {chunk.shape} does not fit cache slot shape {self.chunk_shape}.")
+
+        with self._lock:
+            # Another worker may have inserted the same chunk while we were decoding
+            if self._find_slot(key) < 0:
+                empty = (self._keys < 0).nonzero()
+                if empty.numel():
+                    slot = int(empty[0, 0])
+                else:
+                    slot = int(torch.argmin(self._last_used))
+                    self._stats[_EVICTIONS] += 1
+                self._keys[slot] = -1
+                self._storage[slot, :n_rows] = torch.from_numpy(chunk)
+                self._rows[slot] = n_rows
+                self._keys[slot] = key
+                self._touch(slot)
+
+        return chunk[row].copy()
+
+    def stats(self) -> Dict[str, float]:
+        """Return hit/miss/eviction counters and the hit rate since the last reset."""
+        with self._lock:
+            hits = int(self._stats[_HITS])
+            misses = int(self._stats[_MISSES])
+            evictions = int(self._stats[_EVICTIONS])
+        total = hits + misses
+        return {
+            'hits': hits,
+            'misses': misses,
+            'evictions': evictions,
+            'hit_rate': hits / total if total else 0.0,
+        }
+
+    def reset_stats(self) -> None:
+        """Reset hit/miss/eviction counters (cached chunks are kept)."""
+        with self._lock:
+            self._stats[_HITS] = 0
+            self._stats[_MISSES] = 0
+            self._stats[_EVICTIONS] = 0
+
+    def clear(self) -> None:
+        """Drop all cached chunks."""
+        with self._lock:
+            self._keys.fill_(-1)
+            self._rows.zero_()
+            self._last_used.zero_()
@@ -1,10 +1,13 @@
 import logging
 import os
-from typing import Dict, Tuple, Optional, Any
+from typing import Callable, Dict, Tuple, Optional, Any
 import torch
 from torch.utils.data import DataLoader, Dataset
 
 from . import datasets # Import the datasets module
+from .samplers import LossAwareSampler, ResumableSampler, distributed_sampler
+from .transforms import ChannelNormalize, Compose, build_crop_transforms
+from ..utils.distributed import get_rank, get_world_size
 
 logger = logging.getLogger(__name__)
 
@@ -29,8 +32,8 @@ def validate_dataloader_config(config: Dict[str, Any]) -> Dict[str, Any]:
     for key in required_keys:
         if key not in data_config or not data_config[key]:
             raise ValueError(f"Data configuration missing required key: '{key}'")
-        if not isinstance(data_config[key], str):
-             raise ValueError(f"Data configuration key '{key}' must be a string path.")
+        if not isinstance(data_config[key], (str, list, dict)):
+             raise ValueError(f"Data configuration key '{key}' must be a string path, a list of paths, or a mapping of sample ID to path(s).")
         # Basic check if file exists, more robust checks happen in HDF5Dataset
         # if not os.path.exists(data_config[key]):
         #     logger.warning(f"Data file path specified in config does not exist: {data_config[key]}")
@@ -41,6 +44,14 @@ def validate_dataloader_config(config: Dict[str, Any]) -> Dict[str, Any]:
     data_config.setdefault('num_workers', 0)
     data_config.setdefault('shuffle_train', True)
     data_config.setdefault('pin_memory', torch.cuda.is_available())
+    data_config.setdefault('chunk_cache_mb', None)
+    data_config.setdefault('prefetch_factor', None)
+    data_config.setdefault('persistent_workers', False)
+    data_config.setdefault('normalize', False)
+    data_config.setdefault('seed', 0)
+    data_config.setdefault('val_batch_size', None)
+    data_config.setdefault('loss_aware_sampling', False)
+    data_config.setdefault('crop', None)
 
     if not isinstance(data_config['batch_size'], int) or data_config['batch_size'] <= 0:
         raise ValueError("'batch_size' must be a positive integer.")
@@ -50,13 +61,128 @@ def validate_dataloader_config(config: Dict[str, Any]) -> Dict[str, Any]:
         raise ValueError("'shuffle_train' must be a boolean.")
     if not isinstance(data_config['pin_memory'], bool):
         raise ValueError("'pin_memory' must be a boolean.")
+    if data_config['chunk_cache_mb'] is not None and (not isinstance(data_config['chunk_cache_mb'], (int, float)) or data_config['chunk_cache_mb'] < 0):
+        raise ValueError("'chunk_cache_mb' must be a non-negative number.")
+    if data_config['prefetch_factor'] is not None and (not isinstance(data_config['prefetch_factor'], int) or data_config['prefetch_factor'] <= 0):
+        raise ValueError("'prefetch_factor' must be a positive integer.")
+    if not isinstance(data_config['normalize'], (bool, dict)):
+        raise ValueError("'normalize' must be a boolean or a mapping with optional 'channels'.")
+    if data_config['val_batch_size'] is not None and (not isinstance(data_config['val_batch_size'], int) or data_config['val_batch_size'] <= 0):
+        raise ValueError("'val_batch_size' must be a positive integer.")
+    if not isinstance(data_config['loss_aware_sampling'], (bool, dict)):
+        raise ValueError("'loss_aware_sampling' must be a boolean or a mapping of LossAwareSampler options.")
+    build_crop_transforms(data_config['crop']) # Raises ValueError for an invalid crop configuration
+    if not isinstance(data_config['seed'], int):
+        raise ValueError("'seed' must be an integer.")
+    if not isinstance(data_config['persistent_workers'], bool):
+        raise ValueError("'persistent_workers' must be a boolean.")
+    if data_config['num_workers'] == 0 and (data_config['prefetch_factor'] is not None or data_config['persistent_workers']):
+        logger.warning("'prefetch_factor' and 'persistent_workers' only apply when 'num_workers' > 0. Ignoring them.")
 
     logger.info("Data loader configuration validated successfully.")
     return data_config
 
+def build_dataset(path_spec: Any, transform=None, target_transform=None, chunk_cache_mb: Optional[float] = None) -> Dataset:
+    """Creates the dataset for one split from its path specification.
+
+    A single path is loaded with HDF5Dataset. A list of paths or a mapping of
+    sample ID to path(s) is loaded with MultiFileDataset, which indexes across
+    all files without concatenating them.
+    """
+    if isinstance(path_spec, str):
+        return datasets.HDF5Dataset(path_spec, transform=transform, target_transform=target_transform, chunk_cache_mb=chunk_cache_mb)
+    if chunk_cache_mb:
+        logger.warning("'chunk_cache_mb' is only supported for single-file datasets. Ignoring it for multi-file data.")
+    return datasets.MultiFileDataset(path_spec, transform=transform, target_transform=target_transform)
+
+def build_feature_transform(data_config: Dict[str, Any]) -> Optional[Callable]:
+    """Creates the feature transform configured in the data section, if any.
+
+    With ``normalize: true`` the histone channels are standardized using the
+    statistics process-data stored in the training file(s); ``normalize:
+    {channels: [...]}`` selects the channels explicitly. Training statistics
+    are used for every split.
+    """
+    normalize = data_config.get('normalize', False)
+    if not normalize:
+        return None
+    channels = normalize.get('channels') if isinstance(normalize, dict) else None
+    train_spec = data_config['train_path']
+    if isinstance(train_spec, str):
+        train_paths = [train_spec]
+    else:
+        train_paths = [path for _, path in datasets.resolve_sample_sources(train_spec)]
+    return ChannelNormalize.from_hdf5(train_paths, channels=channels)
+
+def build_split_transforms(data_config: Dict[str, Any]) -> Tuple[Optional[Callable], Optional[Callable]]:
+    """Feature transforms of the training split and of the validation/test/prediction splits.
+
+    Crops ('crop') come first so normalization only touches the kept
+    positions. Training gets the random (or curriculum) crop, every other
+    split the deterministic center crop of the same length.
+    """
+    normalize = build_feature_transform(data_config)
+    train_crop, eval_crop = build_crop_transforms(data_config.get('crop'))
+    if train_crop is None:
+        return normalize, normalize
+    logger.info(f"Cropping inputs: {train_crop} for training, {eval_crop} for evaluation.")
+    return Compose([train_crop, normalize]), Compose([eval_crop, normalize])
+
+def build_eval_transform(data_config: Dict[str, Any]) -> Optional[Callable]:
+    """Feature transform for evaluation and prediction (center crop, then normalization)."""
+    return build_split_transforms(data_config)[1]
+
+def apply_checkpoint_crop(data_config: Dict[str, Any], checkpoint: Dict[str, Any]) -> Dict[str, Any]:
+    """Makes evaluation crop inputs the way the checkpointed model was validated.
+
+    Trainer checkpoints record the evaluation crop length as 'crop_length'
+    (None for full windows); it replaces any 'crop' in ``data_config``.
+    Checkpoints written before crops existed leave the configuration unchanged.
+    """
+    if 'crop_length' not in checkpoint:
+        return data_config
+    crop_length = checkpoint['crop_length']
+    _, configured = build_crop_transforms(data_config.get('crop'))
+    if (configured.length if configured is not None else None) != crop_length:
+        logger.info(f"Using the checkpoint's input crop length ({crop_length or 'full window'}) instead of the configured one.")
+    data_config['crop'] = crop_length
+    return data_config
+
+def worker_loader_kwargs(num_workers: int, prefetch_factor: Optional[int] = None,
+                         persistent_workers: bool = False) -> Dict[str, Any]:
+    """Returns DataLoader keyword arguments that are only valid with worker processes."""
+    if num_workers <= 0:
+        return {}
+    kwargs: Dict[str, Any] = {'persistent_workers': persistent_workers}
+    if prefetch_factor is not None:
+        kwargs['prefetch_factor'] = prefetch_factor
+    return kwargs
+
+def build_train_sampler(train_dataset: Dataset, data_config: Dict[str, Any]) -> ResumableSampler:
+    """Creates the training sampler: a LossAwareSampler if 'loss_aware_sampling' is set, else a ResumableSampler.
+
+    ``loss_aware_sampling: true`` uses the default options; a mapping is passed
+    to LossAwareSampler (ema_decay, uniform_mix, staleness_decay).
+    """
+    loss_aware = data_config.get('loss_aware_sampling', False)
+    if not loss_aware:
+        return ResumableSampler(train_dataset, shuffle=data_config.get('shuffle_train', True), seed=data_config.get('seed', 0),
+                                num_replicas=get_world_size(), rank=get_rank())
+    if not data_config.get('shuffle_train', True):
+        logger.warning("'shuffle_train: false' is ignored with 'loss_aware_sampling'; samples are drawn at random.")
+    options = loss_aware if isinstance(loss_aware, dict) else {}
+    logger.info(f"Loss-aware importance sampling of training samples enabled (options: {options or 'defaults'}).")
+    return LossAwareSampler(train_dataset, seed=data_config.get('seed', 0), num_replicas=get_world_size(), rank=get_rank(), **options)
+
 def create_dataloaders(config: Dict[str, Any]) -> Tuple[DataLoader, DataLoader, DataLoader]:
     """Creates PyTorch DataLoaders for train, validation, and test sets.
 
+    The training loader uses a ResumableSampler seeded with 'seed', so its
+    order can be restored mid-epoch. In distributed runs (see
+    epibench.training.distributed) the training and validation sets are
+    sharded across ranks and 'batch_size' is the per-process batch size. The
+    test loader is not sharded.
+
     Args:
         config (Dict[str, Any]): The main configuration dictionary.
 
@@ -75,41 +201,54 @@ def create_dataloaders(config: Dict[str, Any]) -> Tuple[DataLoader, DataLoader,
     val_path = data_config['val_path']
     test_path = data_config['test_path']
     batch_size = data_config['batch_size']
+    # Validation keeps no activations for backward, so it can usually afford larger batches
+    val_batch_size = data_config['val_batch_size'] or batch_size
     num_workers = data_config['num_workers']
     shuffle_train = data_config['shuffle_train']
     pin_memory = data_config['pin_memory']
+    chunk_cache_mb = data_config['chunk_cache_mb']
+    worker_kwargs = worker_loader_kwargs(num_workers, data_config['prefetch_factor'], data_config['persistent_workers'])
 
-    # TODO: Add support for transforms/augmentation later
-    transform = None 
+    train_transform, eval_transform = build_split_transforms(data_config)
     target_transform = None
 
     try:
         # Create Datasets
         logger.info(f"Loading training data from: {train_path}")
-        train_dataset = datasets.HDF5Dataset(train_path, transform=transform, target_transform=target_transform)
+        train_dataset = build_dataset(train_path, transform=train_transform, target_transform=target_transform, chunk_cache_mb=chunk_cache_mb)
         logger.info(f"Loading validation data from: {val_path}")
-        val_dataset = datasets.HDF5Dataset(val_path, transform=transform, target_transform=target_transform)
+        val_dataset = build_dataset(val_path, transform=eval_transform, target_transform=target_transform)
         logger.info(f"Loading testing data from: {test_path}")
-        test_dataset = datasets.HDF5Dataset(test_path, transform=transform, target_transform=target_transform)
+        test_dataset = build_dataset(test_path, transform=eval_transform, target_transform=target_transform)
+
+        # Resumable (and, in distributed runs, sharded) training order; validation is sharded only in distributed runs
+        train_sampler = build_train_sampler(train_dataset, data_config)
+        val_sampler = distributed_sampler(val_dataset, shuffle=False)
+        if val_sampler is not None:
+            logger.info(f"Sharding data across {get_world_size()} processes (global batch size: {batch_size * get_world_size()}).")
 
         # Create DataLoaders
-        logger.info(f"Creating DataLoader instances (Batch size: {batch_size}, Workers: {num_workers}, Shuffle Train: {shuffle_train}, Pin Memory: {pin_memory})")
+        logger.info(f"Creating DataLoader instances (Batch size: {batch_size}, Validation batch size: {val_batch_size}, Workers: {num_workers}, Shuffle Train: {shuffle_train}, Pin Memory: {pin_memory}, Worker options: {worker_kwargs})")
         train_loader = DataLoader(
             dataset=train_dataset,
             batch_size=batch_size,
-            shuffle=shuffle_train,
+            sampler=train_sampler, # Shuffles when shuffle_train is set
+            generator=torch.Generator().manual_seed(data_config['seed']), # Seeds workers without touching the global RNG
             num_workers=num_workers,
             pin_memory=pin_memory,
-            drop_last=False # Keep last batch even if smaller
+            drop_last=False, # Keep last batch even if smaller
+            **worker_kwargs
         )
 
         val_loader = DataLoader(
             dataset=val_dataset,
-            batch_size=batch_size,
+            batch_size=val_batch_size,
             shuffle=False, # No shuffling for validation
+            sampler=val_sampler,
             num_workers=num_workers,
             pin_memory=pin_memory,
-            drop_last=False
+            drop_last=False,
+            **worker_kwargs
         )
 
         test_loader = DataLoader(
@@ -118,7 +257,8 @@ def create_dataloaders(config: Dict[str, Any]) -> Tuple[DataLoader, DataLoader,
             shuffle=False, # No shuffling for testing
             num_workers=num_workers,
             pin_memory=pin_memory,
-            drop_last=False
+            drop_last=False,
+            **worker_kwargs
         )
 
         logger.info("DataLoaders created successfully.")
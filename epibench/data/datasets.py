@@ -3,10 +3,14 @@ from torch.utils.data import Dataset
 import h5py
 import numpy as np
 import os
+import json
+from collections import OrderedDict
 from typing import Optional, Callable, List, Dict, Tuple, Any, Union
 import warnings
 import logging
 
+from .chunk_cache import SharedChunkCache
+
 logger = logging.getLogger(__name__)
 
 CoordinateInfo = Dict[str, Union[str, int]]  # Type hint for coordinate information
@@ -182,8 +186,12 @@ class HDF5Dataset(Dataset):
         h5_path (str): Path to the HDF5 file.
         transform (Optional[Callable]): Optional transform applied to features.
         target_transform (Optional[Callable]): Optional transform applied to targets.
+        chunk_cache_mb (Optional[float]): If set, decoded 'features' chunks are kept in a
+            shared-memory LRU cache of this size (in MB) that all DataLoader workers use.
+            Reads are then aligned to the dataset's HDF5 chunks.
     """
-    def __init__(self, h5_path: str, transform: Optional[Callable] = None, target_transform: Optional[Callable] = None):
+    def __init__(self, h5_path: str, transform: Optional[Callable] = None, target_transform: Optional[Callable] = None,
+                 chunk_cache_mb: Optional[float] = None):
         super().__init__()
         self.h5_path = h5_path
         self.transform = transform
@@ -196,6 +204,8 @@ class HDF5Dataset(Dataset):
         self._end_ds: Optional[h5py.Dataset] = None
         self._length: Optional[int] = None
         self.has_coordinates: bool = False
+        self.chunk_cache: Optional[SharedChunkCache] = None
+        self._chunk_rows: int = 0
 
         # Validate file existence and basic structure immediately
         try:
@@ -227,6 +237,16 @@ class HDF5Dataset(Dataset):
                     logger.info(f"Coordinate datasets ('chrom', 'start', 'end') not found or incomplete in {h5_path}. Coordinates will not be loaded.")
                     self.has_coordinates = False
 
+                if chunk_cache_mb:
+                    features_ds = f['features']
+                    # Contiguous datasets have no chunks; fall back to the row count process-data uses
+                    self._chunk_rows = features_ds.chunks[0] if features_ds.chunks else 64
+                    self.chunk_cache = SharedChunkCache(
+                        max_bytes=int(chunk_cache_mb * 1024 ** 2),
+                        chunk_shape=(self._chunk_rows,) + features_ds.shape[1:],
+                        dtype=features_ds.dtype,
+                    )
+
         except FileNotFoundError:
             logger.error(f"HDF5 file not found: {h5_path}")
             raise
@@ -291,7 +311,10 @@ class HDF5Dataset(Dataset):
 
         try:
             # Get features and target
-            features = self._features_ds[idx]
+            if self.chunk_cache is not None:
+                features = self._read_cached_features(idx)
+            else:
+                features = self._features_ds[idx]
             target = self._targets_ds[idx]
 
             # Apply transforms if provided
@@ -336,6 +359,29 @@ class HDF5Dataset(Dataset):
             # Re-raising is often safest to signal the problem upstream.
             raise
 
+    def _read_cached_features(self, idx: int) -> np.ndarray:
+        """Read one feature row through the shared chunk cache using chunk-aligned reads."""
+        if not 0 <= idx < self._length:
+            raise IndexError(f"Index {idx} out of range for dataset size {self._length}")
+        chunk_idx, row = divmod(idx, self._chunk_rows)
+        chunk_start = chunk_idx * self._chunk_rows
+        chunk_end = min(chunk_start + self._chunk_rows, self._length)
+        return self.chunk_cache.get_row(chunk_idx, row, lambda: self._features_ds[chunk_start:chunk_end])
+
+    def cache_stats(self) -> Optional[Dict[str, float]]:
+        """Return chunk cache counters aggregated over all workers, or None if caching is disabled."""
+        return self.chunk_cache.stats() if self.chunk_cache is not None else None
+
+    def reset_cache_stats(self) -> None:
+        """Reset chunk cache counters, e.g. at the start of an epoch."""
+        if self.chunk_cache is not None:
+            self.chunk_cache.reset_stats()
+
+    def targets_array(self) -> np.ndarray:
+        """Return all targets (without target_transform) in one read, e.g. to stratify subsets."""
+        with h5py.File(self.h5_path, 'r') as f:
+            return f['targets'][:]
+
     def get_coordinates(self, idx: int) -> Optional[CoordinateInfo]:
         """Retrieve genomic coordinates for a specific index, if available.
 
@@ -386,3 +432,270 @@ class HDF5Dataset(Dataset):
     def __del__(self):
         """Ensure the file handle is closed when the object is deleted."""
         self.close()
+
+
+SampleSources = Union[List[str], Dict[str, Union[str, List[str]]]]  # Type hint for multi-file sources
+
+
+def resolve_sample_sources(sources: SampleSources) -> List[Tuple[str, str]]:
+    """Normalizes multi-file sources into an ordered list of (sample_id, path) pairs.
+
+    Args:
+        sources: Either a list of HDF5 paths (the sample ID is taken from the
+            parent directory name, matching the per-sample layout written by
+            ``process-data``) or a mapping of sample ID to one or more paths.
+
+    Returns:
+        List of (sample_id, path) tuples in a deterministic order.
+
+    Raises:
+        ValueError: If no sources are given.
+    """
+    resolved: List[Tuple[str, str]] = []
+    if isinstance(sources, dict):
+        for sample_id, paths in sources.items():
+            if isinstance(paths, str):
+                paths = [paths]
+            for path in paths:
+                resolved.append((str(sample_id), str(path)))
+    else:
+        for path in sources:
+            sample_id = os.path.basename(os.path.dirname(os.path.abspath(path))) or os.path.splitext(os.path.basename(path))[0]
+            resolved.append((sample_id, str(path)))
+
+    if not resolved:
+        raise ValueError("At least one HDF5 source file must be provided.")
+    return resolved
+
+
+class MultiFileDataset(Dataset):
+    """PyTorch Dataset presenting several processed HDF5 files as one dataset.
+
+    Rows are addressed through a global-to-local index map, so nothing is
+    copied or concatenated in memory. Each DataLoader worker keeps its own
+    small pool of open file handles (least recently used handles are closed
+    once ``max_open_files`` is reached). Every row carries the ID of the
+    sample it came from, which is returned in the coordinates dictionary and
+    exposed as ``sample_index`` for cross-sample evaluation.
+
+    Args:
+        sources (SampleSources): List of HDF5 paths or mapping of sample ID to path(s).
+        transform (Optional[Callable]): Optional transform applied to features.
+        target_transform (Optional[Callable]): Optional transform applied to targets.
+        max_open_files (int): Maximum number of HDF5 handles kept open per process.
+    """
+    def __init__(self, sources: SampleSources, transform: Optional[Callable] = None,
+                 target_transform: Optional[Callable] = None, max_open_files: int = 16):
+        super().__init__()
+        if max_open_files <= 0:
+            raise ValueError(f"max_open_files must be positive, got {max_open_files}.")
+
+        self.transform = transform
+        self.target_transform = target_transform
+        self.max_open_files = max_open_files
+
+        resolved = resolve_sample_sources(sources)
+        self.file_paths: List[str] = [path for _, path in resolved]
+        self.sample_names: List[str] = list(dict.fromkeys(sample_id for sample_id, _ in resolved))
+        self._file_sample_index = np.array([self.sample_names.index(sample_id) for sample_id, _ in resolved], dtype=np.int64)
+
+        lengths = []
+        has_coordinates = []
+        for path in self.file_paths:
+            if not os.path.exists(path):
+                logger.error(f"HDF5 file not found: {path}")
+                raise FileNotFoundError(f"HDF5 file not found: {path}")
+            with h5py.File(path, 'r') as f:
+                if 'features' not in f or 'targets' not in f:
+                    raise ValueError(f"HDF5 file {path} missing required dataset 'features' or 'targets'.")
+                length = f['features'].shape[0]
+                if f['targets'].shape[0] != length:
+                    raise ValueError(f"Feature count ({length}) and target count ({f['targets'].shape[0]}) mismatch in {path}.")
+                lengths.append(length)
+                has_coordinates.append(all(key in f and f[key].shape[0] == length for key in ('chrom', 'start', 'end')))
+
+        # Coordinates are only returned when every file has them, so batches collate consistently
+        self.has_coordinates: bool = all(has_coordinates)
+        if not self.has_coordinates and any(has_coordinates):
+            logger.warning("Only some source files contain coordinate datasets. Coordinates will not be loaded.")
+
+        self._lengths = np.array(lengths, dtype=np.int64)
+        self._offsets = np.concatenate([[0], np.cumsum(self._lengths)])
+        self._length = int(self._offsets[-1])
+        self.sample_index: np.ndarray = np.repeat(self._file_sample_index, self._lengths)
+
+        self._handles: "OrderedDict[int, h5py.File]" = OrderedDict()
+        self._pool_pid: Optional[int] = None
+
+        logger.info(f"Initialized MultiFileDataset with {len(self.file_paths)} files from {len(self.sample_names)} samples. Found {self._length} samples.")
+
+    def __len__(self) -> int:
+        """Return the total number of rows across all files."""
+        return self._length
+
+    def locate(self, idx: int) -> Tuple[int, int]:
+        """Map a global row index to a (file index, local row index) pair.
+
+        Raises:
+            IndexError: If the index is out of range.
+        """
+        if not 0 <= idx < self._length:
+            raise IndexError(f"Index {idx} out of range for dataset size {self._length}")
+        file_idx = int(np.searchsorted(self._offsets, idx, side='right') - 1)
+        return file_idx, int(idx - self._offsets[file_idx])
+
+    def indices_for_sample(self, sample_id: str) -> np.ndarray:
+        """Return the global row indices belonging to one sample (e.g. for a Subset)."""
+        if sample_id not in self.sample_names:
+            raise KeyError(f"Unknown sample ID '{sample_id}'. Available samples: {self.sample_names}")
+        return np.flatnonzero(self.sample_index == self.sample_names.index(sample_id))
+
+    def targets_array(self) -> np.ndarray:
+        """Return the targets (without target_transform) of all files in global row order."""
+        arrays = []
+        for path in self.file_paths:
+            with h5py.File(path, 'r') as f:
+                arrays.append(f['targets'][:])
+        return np.concatenate(arrays)
+
+    def _get_handle(self, file_idx: int) -> h5py.File:
+        """Return an open handle for a source file from this process's pool."""
+        pid = os.getpid()
+        if self._pool_pid != pid:
+            # Handles inherited from a parent process (fork) must not be reused or closed here
+            self._handles = OrderedDict()
+            self._pool_pid = pid
+
+        handle = self._handles.get(file_idx)
+        if handle is not None:
+            self._handles.move_to_end(file_idx)
+            return handle
+
+        while len(self._handles) >= self.max_open_files:
+            _, evicted = self._handles.popitem(last=False)
+            evicted.close()
+        handle = h5py.File(self.file_paths[file_idx], 'r')
+        self._handles[file_idx] = handle
+        logger.debug(f"Opened HDF5 file: {self.file_paths[file_idx]}")
+        return handle
+
+    def __getitem__(self, idx: int) -> Tuple[Any, Any, CoordinateInfo]:
+        """Fetch (features, target, coordinates) for a global row index.
+
+        The coordinates dictionary always contains 'sample_id' and additionally
+        'chrom', 'start' and 'end' when every source file provides them.
+        """
+        file_idx, local_idx = self.locate(idx)
+        handle = self._get_handle(file_idx)
+
+        features = handle['features'][local_idx]
+        target = handle['targets'][local_idx]
+        if self.transform:
+            features = self.transform(features)
+        if self.target_transform:
+            target = self.target_transform(target)
+
+        coordinates: CoordinateInfo = {'sample_id': self.sample_names[self._file_sample_index[file_idx]]}
+        if self.has_coordinates:
+            chrom_val = handle['chrom'][local_idx]
+            coordinates['chrom'] = chrom_val.decode('utf-8') if isinstance(chrom_val, bytes) else str(chrom_val)
+            coordinates['start'] = int(handle['start'][local_idx])
+            coordinates['end'] = int(handle['end'][local_idx])
+
+        return features, target, coordinates
+
+    def close(self) -> None:
+        """Close all pooled file handles owned by this process."""
+        if self._pool_pid == os.getpid():
+            for handle in self._handles.values():
+                try:
+                    handle.close()
+                except Exception as e:
+                    logger.error(f"Error closing pooled HDF5 handle: {e}", exc_info=True)
+        self._handles = OrderedDict()
+
+    def __getstate__(self) -> Dict[str, Any]:
+        """Drop open handles when the dataset is pickled into worker processes."""
+        state = self.__dict__.copy()
+        state['_handles'] = OrderedDict()
+        state['_pool_pid'] = None
+        return state
+
+    def __del__(self):
+        """Ensure pooled handles are closed when the object is deleted."""
+        self.close()
+
+
+def write_virtual_dataset(sources: SampleSources, output_path: str) -> str:
+    """Write an HDF5 file that maps many processed files into one without copying.
+
+    'features', 'targets', 'start' and 'end' become h5py virtual datasets that
+    point at the source files. Variable-length strings cannot be virtual, so the
+    (small) 'chrom' column is copied. A 'sample_id' column indexes into the
+    JSON list stored in the 'sample_names' attribute. The result can be read
+    directly with :class:`HDF5Dataset`.
+
+    Args:
+        sources: List of HDF5 paths or mapping of sample ID to path(s).
+        output_path: Path of the virtual HDF5 file to create.
+
+    Returns:
+        The output path.
+
+    Raises:
+        ValueError: If source files have inconsistent shapes.
+    """
+    resolved = resolve_sample_sources(sources)
+    sample_names = list(dict.fromkeys(sample_id for sample_id, _ in resolved))
+
+    shapes: Dict[str, Tuple[int, ...]] = {}
+    dtypes: Dict[str, Any] = {}
+    lengths: List[int] = []
+    virtual_names = ['features', 'targets', 'start', 'end']
+    for _, path in resolved:
+        with h5py.File(path, 'r') as f:
+            lengths.append(f['features'].shape[0])
+            for name in virtual_names:
+                if name not in f:
+                    raise ValueError(f"HDF5 file {path} missing required dataset '{name}'.")
+                row_shape = f[name].shape[1:]
+                if shapes.setdefault(name, row_shape) != row_shape:
+                    raise ValueError(f"Dataset '{name}' in {path} has row shape {row_shape}, expected {shapes[name]}.")
+                dtypes.setdefault(name, f[name].dtype)
+
+    total = int(sum(lengths))
+    output_dir = os.path.dirname(output_path)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+
+    with h5py.File(output_path, 'w') as out:
+        for name in virtual_names:
+            layout = h5py.VirtualLayout(shape=(total,) + shapes[name], dtype=dtypes[name])
+            offset = 0
+            for (_, path), length in zip(resolved, lengths):
+                if length:
+                    source = h5py.VirtualSource(os.path.abspath(path), name, shape=(length,) + shapes[name])
+                    layout[offset:offset + length] = source
+                offset += length
+            out.create_virtual_dataset(name, layout, fillvalue=0)
+
+        chrom = out.create_dataset('chrom', shape=(total,), dtype=h5py.string_dtype(encoding='utf-8'))
+        sample_id = np.empty(total, dtype=np.int32)
+        offset = 0
+        for (name, path), length in zip(resolved, lengths):
+            with h5py.File(path, 'r') as f:
+                if length:
+                    chrom[offset:offset + length] = f['chrom'][:] if 'chrom' in f else ''
+            sample_id[offset:offset + length] = sample_names.index(name)
+            offset += length
+        out.create_dataset('sample_id', data=sample_id)
+
+        out.attrs['sample_names'] = json.dumps(sample_names)
+        out.attrs['source_files'] = json.dumps([os.path.abspath(path) for _, path in resolved])
+        with h5py.File(resolved[0][1], 'r') as first:
+            for key in ('target_sequence_length', 'feature_channels'):
+                if key in first.attrs:
+                    out.attrs[key] = first.attrs[key]
+
+    logger.info(f"Wrote virtual dataset with {total} rows from {len(resolved)} files to {output_path}")
+    return output_path
@@ -0,0 +1,182 @@
+import itertools
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+import h5py
+import psutil
+import torch
+import yaml
+from torch.utils.data import DataLoader, Dataset
+
+from .data_loader import worker_loader_kwargs
+
+logger = logging.getLogger(__name__)
+
+
+class _PeakRSSMonitor:
+    """Samples the resident set size of this process and its children in a background thread."""
+    def __init__(self, interval: float = 0.05):
+        self.interval = interval
+        self.peak_bytes = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _current_rss(self) -> int:
+        process = psutil.Process(os.getpid())
+        total = process.memory_info().rss
+        for child in process.children(recursive=True):
+            try:
+                total += child.memory_info().rss
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                continue
+        return total
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.peak_bytes = max(self.peak_bytes, self._current_rss())
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self.peak_bytes = self._current_rss()
+        self._thread = threading.Thread(target=self._run, name="epibench-rss-monitor", daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak_bytes = max(self.peak_bytes, self._current_rss())
+        return False
+
+
+def benchmark_loader(dataset: Dataset, batch_size: int, num_workers: int = 0,
+                     prefetch_factor: Optional[int] = None, persistent_workers: bool = False,
+                     pin_memory: bool = False, max_batches: int = 20, passes: int = 2) -> Dict[str, Any]:
+    """Times short passes over a dataset with one set of DataLoader settings.
+
+    Each pass iterates up to ``max_batches`` shuffled batches, so worker start-up
+    (and therefore the effect of ``persistent_workers``) is included in the
+    measurement from the second pass on.
+
+    Returns:
+        Dict with the settings, 'samples_per_sec', 'peak_rss_mb' and 'elapsed_sec'.
+    """
+    loader = DataLoader(
+        dataset,
+        batch_size=batch_size,
+        shuffle=True,
+        num_workers=num_workers,
+        pin_memory=pin_memory,
+        drop_last=False,
+        **worker_loader_kwargs(num_workers, prefetch_factor, persistent_workers)
+    )
+
+    samples = 0
+    with _PeakRSSMonitor() as monitor:
+        start = time.perf_counter()
+        for _ in range(passes):
+            for batch_idx, batch in enumerate(loader):
+                samples += len(batch[0])
+                if batch_idx + 1 >= max_batches:
+                    break
+        elapsed = time.perf_counter() - start
+    del loader  # Shut down persistent workers before the next configuration
+
+    return {
+        'batch_size': batch_size,
+        'num_workers': num_workers,
+        'prefetch_factor': prefetch_factor,
+        'persistent_workers': persistent_workers,
+        'pin_memory': pin_memory,
+        'samples_per_sec': samples / elapsed if elapsed > 0 else 0.0,
+        'peak_rss_mb': monitor.peak_bytes / 1024 ** 2,
+        'elapsed_sec': elapsed,
+    }
+
+
+def diagnose_bottleneck(h5_path: str, dataset_name: str = 'features', num_chunks: int = 16) -> Dict[str, Any]:
+    """Estimates whether reading a processed file is I/O-bound or decode-bound.
+
+    Raw (still compressed) chunks are read with ``read_direct_chunk`` first,
+    which measures storage I/O. The same rows are then read through the filter
+    pipeline; as the bytes are now in the page cache, that time is dominated by
+    decompression.
+
+    Returns:
+        Dict with 'io_sec', 'decode_sec', 'chunks_sampled' and 'bound' ('io' or 'decode').
+    """
+    with h5py.File(h5_path, 'r') as f:
+        ds = f[dataset_name]
+        if ds.chunks is None or not ds.compression:
+            logger.info(f"Dataset '{dataset_name}' in {h5_path} is not compressed; reads are I/O-bound.")
+            return {'io_sec': None, 'decode_sec': 0.0, 'chunks_sampled': 0, 'bound': 'io'}
+
+        n_chunks = min(num_chunks, ds.id.get_num_chunks())
+        chunk_infos = [ds.id.get_chunk_info(i) for i in range(n_chunks)]
+
+        start = time.perf_counter()
+        for info in chunk_infos:
+            ds.id.read_direct_chunk(info.chunk_offset)
+        io_sec = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for info in chunk_infos:
+            selection = tuple(slice(offset, min(offset + size, dim)) for offset, size, dim in zip(info.chunk_offset, ds.chunks, ds.shape))
+            ds[selection]
+        decode_sec = time.perf_counter() - start
+
+    bound = 'decode' if decode_sec > io_sec else 'io'
+    return {'io_sec': io_sec, 'decode_sec': decode_sec, 'chunks_sampled': n_chunks, 'bound': bound}
+
+
+def build_grid(batch_sizes: Iterable[int], num_workers: Iterable[int], prefetch_factors: Iterable[int],
+               pin_memory_options: Iterable[bool]) -> List[Dict[str, Any]]:
+    """Expands the loader setting grid, skipping combinations that only differ in worker-only options."""
+    grid = []
+    for batch_size, workers, pin_memory in itertools.product(batch_sizes, num_workers, pin_memory_options):
+        if workers == 0:
+            grid.append({'batch_size': batch_size, 'num_workers': 0, 'prefetch_factor': None,
+                         'persistent_workers': False, 'pin_memory': pin_memory})
+            continue
+        for prefetch_factor, persistent in itertools.product(prefetch_factors, (False, True)):
+            grid.append({'batch_size': batch_size, 'num_workers': workers, 'prefetch_factor': prefetch_factor,
+                         'persistent_workers': persistent, 'pin_memory': pin_memory})
+    return grid
+
+
+def select_best(results: List[Dict[str, Any]], max_rss_mb: Optional[float] = None) -> Optional[Dict[str, Any]]:
+    """Returns the fastest result, optionally restricted to runs under a peak RSS budget."""
+    candidates = [r for r in results if max_rss_mb is None or r['peak_rss_mb'] <= max_rss_mb]
+    if not candidates:
+        return None
+    return max(candidates, key=lambda r: r['samples_per_sec'])
+
+
+def write_overlay(best: Dict[str, Any], output_path: str) -> str:
+    """Writes the selected loader settings as a YAML overlay for the 'data' config section."""
+    data_settings = {
+        'batch_size': best['batch_size'],
+        'num_workers': best['num_workers'],
+        'pin_memory': best['pin_memory'],
+    }
+    if best['num_workers'] > 0:
+        data_settings['persistent_workers'] = best['persistent_workers']
+        if best['prefetch_factor'] is not None:
+            data_settings['prefetch_factor'] = best['prefetch_factor']
+
+    output_dir = os.path.dirname(output_path)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+    with open(output_path, 'w') as f:
+        f.write(f"# DataLoader settings selected by 'epibench tune-loader' "
+                f"({best['samples_per_sec']:.1f} samples/sec, peak RSS {best['peak_rss_mb']:.0f} MB)\n")
+        yaml.safe_dump({'data': data_settings}, f, sort_keys=False)
+    return output_path
+
+
+def default_pin_memory_options() -> List[bool]:
+    """pin_memory only matters when batches are copied to a CUDA device."""
+    return [False, True] if torch.cuda.is_available() else [False]
@@ -0,0 +1,129 @@
+import logging
+import queue
+import threading
+import time
+from typing import Any, Iterable, Iterator, Optional, Union
+
+import torch
+
+logger = logging.getLogger(__name__)
+
+_END_OF_DATA = object()
+
+
+class _PrefetchError:
+    """Carries an exception raised in the prefetch thread to the consumer."""
+    def __init__(self, exc: BaseException):
+        self.exc = exc
+
+
+def move_batch(batch: Any, device: Optional[torch.device] = None, dtype: Optional[torch.dtype] = None,
+               non_blocking: bool = True) -> Any:
+    """Recursively moves tensors in a batch to a device and casts floating tensors to a dtype.
+
+    Non-tensor items (e.g. coordinate strings) are returned unchanged.
+    """
+    if isinstance(batch, torch.Tensor):
+        if dtype is not None and batch.is_floating_point():
+            batch = batch.to(dtype=dtype)
+        if device is not None:
+            batch = batch.to(device, non_blocking=non_blocking)
+        return batch
+    if isinstance(batch, dict):
+        return {key: move_batch(value, device, dtype, non_blocking) for key, value in batch.items()}
+    if isinstance(batch, list):
+        return [move_batch(item, device, dtype, non_blocking) for item in batch]
+    if isinstance(batch, tuple):
+        moved = [move_batch(item, device, dtype, non_blocking) for item in batch]
+        return type(batch)(*moved) if hasattr(batch, '_fields') else tuple(moved)
+    return batch
+
+
+class BackgroundPrefetcher:
+    """Wraps an iterable of batches (typically a DataLoader) and loads ahead in a thread.
+
+    A background thread keeps up to ``num_prefetch`` batches ready in a bounded
+    queue, optionally already moved to ``device`` and with floating tensors cast
+    to ``dtype``. HDF5 decoding and most tensor operations release the GIL, so
+    this overlaps data loading with compute even with ``num_workers: 0``.
+
+    The time the consumer spends blocked waiting for the next batch is recorded
+    in ``wait_time`` (seconds, reset on every new iteration). Exceptions raised
+    while loading are re-raised in the consuming thread, and leaving the loop
+    early stops the background thread.
+
+    Args:
+        loader (Iterable): The DataLoader (or any re-iterable of batches) to wrap.
+        num_prefetch (int): Number of batches to keep ready.
+        device (Optional[Union[str, torch.device]]): Device to move tensors to.
+        dtype (Optional[torch.dtype]): Dtype to cast floating tensors to.
+    """
+    def __init__(self, loader: Iterable, num_prefetch: int = 2,
+                 device: Optional[Union[str, torch.device]] = None, dtype: Optional[torch.dtype] = None):
+        if num_prefetch <= 0:
+            raise ValueError(f"num_prefetch must be positive, got {num_prefetch}.")
+        self.loader = loader
+        self.num_prefetch = num_prefetch
+        self.device = torch.device(device) if device is not None else None
+        self.dtype = dtype
+        self.wait_time = 0.0
+        self.batches_served = 0
+
+    @property
+    def dataset(self):
+        """The dataset of the wrapped loader, if any."""
+        return getattr(self.loader, 'dataset', None)
+
+    def __len__(self) -> int:
+        return len(self.loader)
+
+    def _produce(self, batch_queue: queue.Queue, stop_event: threading.Event) -> None:
+        def put(item) -> bool:
+            while not stop_event.is_set():
+                try:
+                    batch_queue.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        try:
+            for batch in self.loader:
+                if not put(move_batch(batch, self.device, self.dtype)):
+                    return
+        except BaseException as e:  # Forward everything, including KeyboardInterrupt raised in the loader
+            put(_PrefetchError(e))
+            return
+        put(_END_OF_DATA)
+
+    def __iter__(self) -> Iterator[Any]:
+        self.wait_time = 0.0
+        self.batches_served = 0
+        batch_queue: queue.Queue = queue.Queue(maxsize=self.num_prefetch)
+        stop_event = threading.Event()
+        thread = threading.Thread(target=self._produce, args=(batch_queue, stop_event),
+                                  name="epibench-prefetch", daemon=True)
+        thread.start()
+        try:
+            while True:
+                wait_start = time.perf_counter()
+                item = batch_queue.get()
+                self.wait_time += time.perf_counter() - wait_start
+                if item is _END_OF_DATA:
+                    break
+                if isinstance(item, _PrefetchError):
+                    raise item.exc
+                self.batches_served += 1
+                yield item
+        finally:
+            stop_event.set()
+            thread.join()
+
+
+def maybe_prefetch(loader: Iterable, num_prefetch: Optional[int], device: Optional[Union[str, torch.device]] = None,
+                   dtype: Optional[torch.dtype] = None) -> Iterable:
+    """Wraps ``loader`` in a BackgroundPrefetcher if ``num_prefetch`` is a positive integer."""
+    if not num_prefetch or num_prefetch <= 0:
+        return loader
+    logger.debug(f"Prefetching {num_prefetch} batches in a background thread.")
+    return BackgroundPrefetcher(loader, num_prefetch=num_prefetch, device=device, dtype=dtype)
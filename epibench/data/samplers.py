@@ -0,0 +1,282 @@
+import logging
+from typing import Any, Dict, Iterator, Optional, Tuple, Union
+
+import numpy as np
+import torch
+import torch.distributed as dist
+from torch.utils.data import Dataset, DistributedSampler, TensorDataset
+
+from ..utils.distributed import get_rank, get_world_size, is_distributed
+
+logger = logging.getLogger(__name__)
+
+
+class ResumableSampler(DistributedSampler):
+    """Training sampler whose position can be saved and restored mid-epoch.
+
+    The order of each epoch is a deterministic function of (seed, epoch), as in
+    DistributedSampler, so after ``load_state_dict`` iteration continues with
+    exactly the samples the interrupted run had not consumed yet. It also
+    shards the data across ranks in distributed runs (num_replicas > 1) and is
+    a plain (optionally shuffled) sampler otherwise.
+
+    Args:
+        dataset (Dataset): Dataset to sample from.
+        shuffle (bool): Shuffle the order every epoch.
+        seed (int): Base seed of the per-epoch permutation.
+        num_replicas (int): Number of ranks the data is sharded across.
+        rank (int): Rank of this process.
+    """
+    def __init__(self, dataset: Dataset, shuffle: bool = True, seed: int = 0, num_replicas: int = 1, rank: int = 0):
+        super().__init__(dataset, num_replicas=num_replicas, rank=rank, shuffle=shuffle, seed=seed, drop_last=False)
+        self.start_index = 0
+
+    def set_start_index(self, start_index: int):
+        """Skips the first ``start_index`` samples of this rank's shard in the next iteration only."""
+        if start_index < 0 or start_index > self.num_samples:
+            raise ValueError(f"start_index must be between 0 and {self.num_samples}, got {start_index}.")
+        self.start_index = start_index
+
+    def __iter__(self) -> Iterator[int]:
+        indices = list(super().__iter__())
+        start_index, self.start_index = self.start_index, 0
+        return iter(indices[start_index:])
+
+    def __len__(self) -> int:
+        return self.num_samples - self.start_index
+
+    def state_dict(self) -> Dict[str, Any]:
+        return {'epoch': self.epoch, 'seed': self.seed, 'shuffle': self.shuffle, 'start_index': self.start_index}
+
+    def load_state_dict(self, state: Dict[str, Any]):
+        if state.get('seed', self.seed) != self.seed or state.get('shuffle', self.shuffle) != self.shuffle:
+            logger.warning(f"Sampler settings differ from the saved state (saved seed={state.get('seed')}, shuffle={state.get('shuffle')}). "
+                           f"Using the saved settings so the sample order matches the interrupted run.")
+            self.seed = state.get('seed', self.seed)
+            self.shuffle = state.get('shuffle', self.shuffle)
+        self.set_epoch(state.get('epoch', 0))
+        self.set_start_index(state.get('start_index', 0))
+
+
+class LossAwareSampler(ResumableSampler):
+    """Training sampler that draws hard samples more often, with importance weights that keep the loss unbiased.
+
+    Every sample keeps a score: an exponential moving average of its training
+    loss. Each epoch draws ``num_samples`` indices with replacement from
+
+        p_i = (1 - uniform_mix) * score_i / sum(score) + uniform_mix / N
+
+    and the training loss of sample i is weighted by ``1 / (N * p_i)``, so the
+    weighted batch loss is an unbiased estimate of the uniform mean loss while
+    most gradient steps are spent on regions the model still gets wrong. The
+    uniform part bounds the weights by ``1 / uniform_mix`` and guarantees every
+    sample is revisited.
+
+    Scores come for free from the training forward pass: the trainer takes each
+    batch's indices and weights with :meth:`next_batch` and hands the per-sample
+    losses back with :meth:`record_losses`. :meth:`update_scores` folds them in
+    at the end of the epoch (summed over ranks in distributed runs). Scores of
+    samples not drawn in an epoch are stale; they shrink towards the mean score
+    by ``staleness_decay`` per epoch, so an easy sample's probability slowly
+    rises until it is drawn and re-scored, without extra forward passes.
+    Samples never seen use the mean score. The first epoch is uniform.
+
+    The order of an epoch is a deterministic function of (seed, epoch, scores),
+    and the scores and partial-epoch losses are part of :meth:`state_dict`, so
+    resuming reproduces the interrupted run's sample order.
+
+    Args:
+        dataset (Dataset): Dataset to sample from.
+        seed (int): Base seed of the per-epoch draws.
+        num_replicas (int): Number of ranks the draws are sharded across.
+        rank (int): Rank of this process.
+        ema_decay (float): Weight of the previous score when a sample's new loss is folded in.
+        uniform_mix (float): Fraction of the sampling probability spread uniformly, in (0, 1].
+        staleness_decay (float): Per-epoch shrinkage of unvisited scores towards the mean (1 keeps them).
+    """
+    def __init__(self, dataset: Dataset, seed: int = 0, num_replicas: int = 1, rank: int = 0,
+                 ema_decay: float = 0.9, uniform_mix: float = 0.1, staleness_decay: float = 0.9):
+        super().__init__(dataset, shuffle=True, seed=seed, num_replicas=num_replicas, rank=rank)
+        if not 0.0 <= ema_decay < 1.0:
+            raise ValueError(f"ema_decay must be in [0, 1), got {ema_decay}.")
+        if not 0.0 < uniform_mix <= 1.0:
+            raise ValueError(f"uniform_mix must be in (0, 1], got {uniform_mix}.")
+        if not 0.0 <= staleness_decay <= 1.0:
+            raise ValueError(f"staleness_decay must be in [0, 1], got {staleness_decay}.")
+        self.ema_decay = ema_decay
+        self.uniform_mix = uniform_mix
+        self.staleness_decay = staleness_decay
+        size = len(dataset)
+        self.scores = torch.zeros(size, dtype=torch.float64)
+        self.seen = torch.zeros(size, dtype=torch.bool)
+        self._loss_sum = torch.zeros(size)
+        self._loss_count = torch.zeros(size)
+        self._order = torch.zeros(0, dtype=torch.long)
+        self._weights = torch.zeros(0)
+        self._position = 0
+
+    def to(self, device: torch.device) -> 'LossAwareSampler':
+        """Keeps the per-epoch loss accumulators on ``device`` so recording losses needs no host sync."""
+        self._loss_sum = self._loss_sum.to(device)
+        self._loss_count = self._loss_count.to(device)
+        return self
+
+    def probabilities(self) -> torch.Tensor:
+        """Current sampling probability of every sample (uniform until scores exist)."""
+        size = len(self.scores)
+        if not self.seen.any():
+            return torch.full((size,), 1.0 / size, dtype=torch.float64)
+        scores = torch.where(self.seen, self.scores, self.scores[self.seen].mean())
+        total = scores.sum()
+        if not total > 0:
+            return torch.full((size,), 1.0 / size, dtype=torch.float64)
+        return (1.0 - self.uniform_mix) * scores / total + self.uniform_mix / size
+
+    def __iter__(self) -> Iterator[int]:
+        generator = torch.Generator().manual_seed(self.seed + self.epoch)
+        probabilities = self.probabilities()
+        # Inverse-CDF draws (torch.multinomial is limited to 2^24 categories); every rank draws the same global sample
+        cdf = probabilities.cumsum(0)
+        uniform = torch.rand(self.total_size, generator=generator, dtype=torch.float64) * cdf[-1]
+        indices = torch.searchsorted(cdf, uniform).clamp_(max=len(cdf) - 1)[self.rank:self.total_size:self.num_replicas]
+        start_index, self.start_index = self.start_index, 0
+        self._order = indices[start_index:]
+        self._weights = (1.0 / (len(cdf) * probabilities[self._order])).float()
+        self._position = 0
+        return iter(self._order.tolist())
+
+    def next_batch(self, batch_size: int) -> Tuple[torch.Tensor, torch.Tensor]:
+        """Indices and importance weights of the next ``batch_size`` samples of the current iteration, in loader order."""
+        end = min(self._position + batch_size, len(self._order))
+        if end - self._position != batch_size:
+            raise RuntimeError(f"LossAwareSampler has {len(self._order) - self._position} samples left in this epoch, "
+                               f"requested {batch_size}. Batches must be taken in loader order.")
+        indices, weights = self._order[self._position:end], self._weights[self._position:end]
+        self._position = end
+        return indices, weights
+
+    def record_losses(self, indices: torch.Tensor, losses: torch.Tensor):
+        """Accumulates the (unweighted) per-sample training losses of a batch; non-finite losses are ignored."""
+        losses = losses.detach().float().to(self._loss_sum.device)
+        indices = indices.to(self._loss_sum.device)
+        finite = torch.isfinite(losses)
+        self._loss_sum.index_add_(0, indices, torch.where(finite, losses, torch.zeros_like(losses)))
+        self._loss_count.index_add_(0, indices, finite.float())
+
+    def update_scores(self) -> Dict[str, float]:
+        """Folds this epoch's losses into the scores and returns sampling statistics.
+
+        Collective in distributed runs: all ranks must call it at the same point.
+        """
+        if dist.is_available() and dist.is_initialized() and self.num_replicas > 1:
+            dist.all_reduce(self._loss_sum, op=dist.ReduceOp.SUM)
+            dist.all_reduce(self._loss_count, op=dist.ReduceOp.SUM)
+        loss_sum, loss_count = self._loss_sum.cpu().double(), self._loss_count.cpu().double()
+        visited = loss_count > 0
+        if self.seen.any() and self.staleness_decay < 1.0:
+            stale = self.seen & ~visited
+            mean_score = self.scores[self.seen].mean()
+            self.scores[stale] = mean_score + (self.scores[stale] - mean_score) * self.staleness_decay
+        epoch_loss = loss_sum[visited] / loss_count[visited]
+        previous = self.seen[visited]
+        self.scores[visited] = torch.where(previous, self.ema_decay * self.scores[visited] + (1.0 - self.ema_decay) * epoch_loss,
+                                           epoch_loss)
+        self.seen |= visited
+        self._loss_sum.zero_()
+        self._loss_count.zero_()
+        probabilities = self.probabilities()
+        size = len(probabilities)
+        return {
+            'visited_fraction': visited.float().mean().item(),
+            'seen_fraction': self.seen.float().mean().item(),
+            'max_weight': (1.0 / (size * probabilities.min())).item(),
+            # Kish effective sample size of the importance weights as a fraction of the draws: 1 / E_p[w^2]
+            'effective_sample_fraction': (size ** 2 / (1.0 / probabilities).sum()).item(),
+        }
+
+    def state_dict(self) -> Dict[str, Any]:
+        state = super().state_dict()
+        state.update({
+            'scores': self.scores.clone(),
+            'seen': self.seen.clone(),
+            'loss_sum': self._loss_sum.cpu(),
+            'loss_count': self._loss_count.cpu(),
+        })
+        return state
+
+    def load_state_dict(self, state: Dict[str, Any]):
+        super().load_state_dict(state)
+        if 'scores' not in state:
+            logger.warning("Sampler state has no loss-aware scores; starting from uniform sampling.")
+            return
+        if len(state['scores']) != len(self.scores):
+            logger.warning(f"Saved loss-aware scores cover {len(state['scores'])} samples but the dataset has {len(self.scores)}. "
+                           f"Starting from uniform sampling.")
+            return
+        device = self._loss_sum.device
+        self.scores = state['scores'].cpu().double()
+        self.seen = state['seen'].cpu().bool()
+        self._loss_sum = state['loss_sum'].to(device).float()
+        self._loss_count = state['loss_count'].to(device).float()
+
+
+def distributed_sampler(dataset: Dataset, shuffle: bool, seed: int = 0) -> Optional[DistributedSampler]:
+    """Returns a DistributedSampler that shards ``dataset`` across ranks, or None outside distributed runs."""
+    if not is_distributed():
+        return None
+    return DistributedSampler(dataset, num_replicas=get_world_size(), rank=get_rank(), shuffle=shuffle, seed=seed)
+
+
+def dataset_targets(dataset: Dataset) -> np.ndarray:
+    """Targets of every sample as an array of shape (N, ...).
+
+    Uses the dataset's ``targets_array()`` (one HDF5 read) or the tensors of a
+    TensorDataset; otherwise falls back to indexing every sample.
+    """
+    targets_array = getattr(dataset, 'targets_array', None)
+    if callable(targets_array):
+        return np.asarray(targets_array())
+    if isinstance(dataset, TensorDataset):
+        return dataset.tensors[1].cpu().numpy()
+    logger.warning(f"{type(dataset).__name__} has no targets_array(); reading every sample to collect targets.")
+    return np.stack([np.asarray(dataset[idx][1]) for idx in range(len(dataset))])
+
+
+def stratified_subset_indices(targets: Union[np.ndarray, torch.Tensor], size: Union[int, float],
+                              num_bins: int = 10, seed: int = 0) -> np.ndarray:
+    """Fixed subset of sample indices whose target distribution follows the full set.
+
+    Samples are grouped into ``num_bins`` quantile bins of their (mean) target
+    and each bin contributes in proportion to its size. The result is sorted and
+    deterministic for a given seed.
+
+    Args:
+        targets: Targets of shape (N,) or (N, ...); extra dimensions are averaged.
+        size: Number of samples, or a fraction of N if a float in (0, 1].
+        num_bins: Number of target quantile bins.
+        seed: Seed of the within-bin selection.
+
+    Raises:
+        ValueError: If size is not positive.
+    """
+    targets = np.asarray(targets, dtype=np.float64).reshape(len(targets), -1).mean(axis=1)
+    n = len(targets)
+    if size <= 0 or (isinstance(size, float) and size > 1):
+        raise ValueError(f"size must be a positive count or a fraction in (0, 1], got {size}.")
+    subset_size = int(round(size * n)) if isinstance(size, float) else int(size)
+    subset_size = max(1, min(subset_size, n))
+    if subset_size == n:
+        return np.arange(n)
+
+    edges = np.unique(np.quantile(targets, np.linspace(0, 1, num_bins + 1)[1:-1]))
+    bins = np.searchsorted(edges, targets, side='right')
+    rng = np.random.default_rng(seed)
+    bin_ids, counts = np.unique(bins, return_counts=True)
+    # Largest-remainder allocation so the per-bin counts add up to subset_size exactly
+    quotas = counts * subset_size / n
+    allocation = np.floor(quotas).astype(np.int64)
+    for idx in np.argsort(-(quotas - allocation))[:subset_size - allocation.sum()]:
+        allocation[idx] += 1
+    selected = [rng.choice(np.flatnonzero(bins == bin_id), size=take, replace=False)
+                for bin_id, take in zip(bin_ids, allocation) if take > 0]
+    return np.sort(np.concatenate(selected))
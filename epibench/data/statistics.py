@@ -0,0 +1,177 @@
+import logging
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+import h5py
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+STATS_ATTR_PREFIX = 'stats_'
+
+
+class RunningStats:
+    """Streaming per-channel count, mean, variance, min and max.
+
+    Values are folded in batch by batch: the batch moments are computed with
+    numpy and combined with the running moments using the parallel form of
+    Welford's algorithm (Chan et al.), so two RunningStats built on disjoint
+    data (e.g. by different workers) can be merged exactly with :meth:`merge`.
+
+    Args:
+        num_channels (int): Number of channels (size of the last axis of updates).
+    """
+    def __init__(self, num_channels: int):
+        self.num_channels = num_channels
+        self.count = 0
+        self.mean = np.zeros(num_channels, dtype=np.float64)
+        self.m2 = np.zeros(num_channels, dtype=np.float64)
+        self.min = np.full(num_channels, np.inf, dtype=np.float64)
+        self.max = np.full(num_channels, -np.inf, dtype=np.float64)
+
+    def _combine(self, count: int, mean: np.ndarray, m2: np.ndarray, minimum: np.ndarray, maximum: np.ndarray) -> None:
+        if count == 0:
+            return
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean = self.mean + delta * (count / total)
+        self.m2 = self.m2 + m2 + delta ** 2 * (self.count * count / total)
+        self.count = total
+        self.min = np.minimum(self.min, minimum)
+        self.max = np.maximum(self.max, maximum)
+
+    def update(self, values: np.ndarray) -> None:
+        """Fold in a batch of values with shape (..., num_channels)."""
+        values = np.asarray(values, dtype=np.float64).reshape(-1, self.num_channels)
+        if values.shape[0] == 0:
+            return
+        batch_mean = values.mean(axis=0)
+        batch_m2 = ((values - batch_mean) ** 2).sum(axis=0)
+        self._combine(values.shape[0], batch_mean, batch_m2, values.min(axis=0), values.max(axis=0))
+
+    def merge(self, other: 'RunningStats') -> 'RunningStats':
+        """Merge statistics computed on a disjoint set of values into this one."""
+        if other.num_channels != self.num_channels:
+            raise ValueError(f"Cannot merge statistics with {other.num_channels} channels into {self.num_channels} channels.")
+        self._combine(other.count, other.mean, other.m2, other.min, other.max)
+        return self
+
+    @property
+    def variance(self) -> np.ndarray:
+        """Population variance per channel."""
+        return self.m2 / self.count if self.count else np.zeros(self.num_channels)
+
+    @property
+    def std(self) -> np.ndarray:
+        return np.sqrt(self.variance)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'count': self.count, 'mean': self.mean, 'var': self.variance, 'min': self.min, 'max': self.max}
+
+    @classmethod
+    def from_dict(cls, values: Dict[str, Any]) -> 'RunningStats':
+        mean = np.asarray(values['mean'], dtype=np.float64).reshape(-1)
+        stats = cls(len(mean))
+        stats.count = int(values['count'])
+        stats.mean = mean
+        stats.m2 = np.asarray(values['var'], dtype=np.float64).reshape(-1) * stats.count
+        stats.min = np.asarray(values['min'], dtype=np.float64).reshape(-1)
+        stats.max = np.asarray(values['max'], dtype=np.float64).reshape(-1)
+        return stats
+
+
+class TargetHistogram:
+    """Fixed-bin histogram of target values (methylation levels lie in [0, 1] by default).
+
+    Values outside the range are counted in the first or last bin.
+    """
+    def __init__(self, bins: int = 20, value_range: Sequence[float] = (0.0, 1.0)):
+        self.edges = np.linspace(value_range[0], value_range[1], bins + 1)
+        self.counts = np.zeros(bins, dtype=np.int64)
+
+    def update(self, values: np.ndarray) -> None:
+        values = np.clip(np.asarray(values, dtype=np.float64).reshape(-1), self.edges[0], self.edges[-1])
+        self.counts += np.histogram(values, bins=self.edges)[0]
+
+    def merge(self, other: 'TargetHistogram') -> 'TargetHistogram':
+        if not np.array_equal(self.edges, other.edges):
+            raise ValueError("Cannot merge histograms with different bin edges.")
+        self.counts += other.counts
+        return self
+
+
+def write_stats_attrs(h5_file: h5py.File, feature_stats: RunningStats, target_stats: RunningStats,
+                      target_hist: Optional[TargetHistogram] = None) -> None:
+    """Store feature/target statistics as attributes of an open HDF5 file."""
+    for name, stats in (('feature', feature_stats), ('target', target_stats)):
+        for key, value in stats.to_dict().items():
+            h5_file.attrs[f'{STATS_ATTR_PREFIX}{name}_{key}'] = value
+    if target_hist is not None:
+        h5_file.attrs[f'{STATS_ATTR_PREFIX}target_hist_counts'] = target_hist.counts
+        h5_file.attrs[f'{STATS_ATTR_PREFIX}target_hist_edges'] = target_hist.edges
+
+
+def read_stats_attrs(h5_file: Union[str, h5py.File]) -> Optional[Dict[str, Any]]:
+    """Read statistics written by :func:`write_stats_attrs`.
+
+    Returns:
+        Dict with 'feature' and 'target' RunningStats and, if present, a
+        'target_hist' dict of counts and edges; None if the file has no statistics.
+    """
+    if isinstance(h5_file, str):
+        with h5py.File(h5_file, 'r') as f:
+            return read_stats_attrs(f)
+
+    attrs = h5_file.attrs
+    if f'{STATS_ATTR_PREFIX}feature_count' not in attrs:
+        return None
+    result: Dict[str, Any] = {}
+    for name in ('feature', 'target'):
+        result[name] = RunningStats.from_dict({key: attrs[f'{STATS_ATTR_PREFIX}{name}_{key}']
+                                               for key in ('count', 'mean', 'var', 'min', 'max')})
+    if f'{STATS_ATTR_PREFIX}target_hist_counts' in attrs:
+        result['target_hist'] = {'counts': np.asarray(attrs[f'{STATS_ATTR_PREFIX}target_hist_counts']),
+                                 'edges': np.asarray(attrs[f'{STATS_ATTR_PREFIX}target_hist_edges'])}
+    return result
+
+
+def compute_file_statistics(h5_path: str, rows_per_read: int = 256, write: bool = False) -> Dict[str, Any]:
+    """Compute statistics for an existing file in one streaming pass.
+
+    Intended for files written before process-data recorded statistics. With
+    ``write=True`` the result is stored in the file's attributes so later
+    readers do not need to scan it again.
+    """
+    with h5py.File(h5_path, 'r+' if write else 'r') as f:
+        features = f['features']
+        targets = f['targets']
+        feature_stats = RunningStats(features.shape[-1])
+        target_stats = RunningStats(1)
+        target_hist = TargetHistogram()
+        for start in range(0, features.shape[0], rows_per_read):
+            stop = min(start + rows_per_read, features.shape[0])
+            feature_stats.update(features[start:stop])
+            target_values = targets[start:stop]
+            target_stats.update(target_values)
+            target_hist.update(target_values)
+        if write:
+            write_stats_attrs(f, feature_stats, target_stats, target_hist)
+            logger.info(f"Wrote statistics attributes to {h5_path}")
+    return {'feature': feature_stats, 'target': target_stats,
+            'target_hist': {'counts': target_hist.counts, 'edges': target_hist.edges}}
+
+
+def merged_feature_stats(h5_paths: List[str]) -> RunningStats:
+    """Merge the stored feature statistics of several files (e.g. multi-sample training data).
+
+    Raises:
+        ValueError: If a file has no stored statistics.
+    """
+    merged: Optional[RunningStats] = None
+    for path in h5_paths:
+        stats = read_stats_attrs(path)
+        if stats is None:
+            raise ValueError(f"No statistics attributes found in {path}. Re-run process-data or use compute_file_statistics(write=True).")
+        merged = stats['feature'] if merged is None else merged.merge(stats['feature'])
+    if merged is None:
+        raise ValueError("No files given to merge statistics from.")
+    return merged
@@ -0,0 +1,214 @@
+import logging
+from typing import Any, Callable, List, Optional, Sequence, Tuple, Union
+
+import h5py
+import numpy as np
+import torch
+
+from .statistics import RunningStats, merged_feature_stats
+
+logger = logging.getLogger(__name__)
+
+# Processed features are laid out as 4 one-hot sequence channels, N histone channels and one boundary mask
+NUM_SEQUENCE_CHANNELS = 4
+
+
+def histone_channels(num_channels: int) -> List[int]:
+    """Indices of the histone channels in the standard process-data layout."""
+    return list(range(NUM_SEQUENCE_CHANNELS, num_channels - 1))
+
+
+class ChannelNormalize:
+    """Standardize selected feature channels with precomputed statistics.
+
+    Applied to a (SeqLen, Channels) feature array as returned by HDF5Dataset.
+    Channels with zero variance are only centered.
+
+    Args:
+        mean (Sequence[float]): Per-channel mean for all channels.
+        std (Sequence[float]): Per-channel standard deviation for all channels.
+        channels (Optional[Sequence[int]]): Channels to normalize. Defaults to the histone channels.
+        eps (float): Stabilizer added to the standard deviation.
+    """
+    def __init__(self, mean: Sequence[float], std: Sequence[float], channels: Optional[Sequence[int]] = None, eps: float = 1e-8):
+        mean = np.asarray(mean, dtype=np.float32)
+        std = np.asarray(std, dtype=np.float32)
+        if mean.shape != std.shape:
+            raise ValueError(f"Mean and std must have the same shape, got {mean.shape} and {std.shape}.")
+        self.channels = np.asarray(list(channels) if channels is not None else histone_channels(len(mean)), dtype=np.int64)
+        self.mean = mean[self.channels]
+        self.scale = np.where(std[self.channels] > 0, 1.0 / (std[self.channels] + eps), 1.0).astype(np.float32)
+
+    @classmethod
+    def from_stats(cls, stats: RunningStats, channels: Optional[Sequence[int]] = None) -> 'ChannelNormalize':
+        return cls(stats.mean, stats.std, channels=channels)
+
+    @classmethod
+    def from_hdf5(cls, h5_paths: Union[str, Sequence[str]], channels: Optional[Sequence[int]] = None) -> 'ChannelNormalize':
+        """Build the transform from statistics stored in processed file attributes.
+
+        Always pass the training split (or all training files) so every split is
+        normalized with the same training statistics.
+        """
+        paths = [h5_paths] if isinstance(h5_paths, str) else list(h5_paths)
+        stats = merged_feature_stats(paths)
+        logger.info(f"Loaded normalization statistics for {stats.num_channels} channels from {len(paths)} file(s).")
+        return cls.from_stats(stats, channels=channels)
+
+    def __call__(self, features: np.ndarray) -> np.ndarray:
+        features = np.array(features, dtype=np.float32, copy=True)
+        features[..., self.channels] = (features[..., self.channels] - self.mean) * self.scale
+        return features
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(channels={self.channels.tolist()})"
+
+
+def region_center(features: np.ndarray) -> int:
+    """Center position of the BED region, taken from the boundary-mask channel (the last channel).
+
+    Falls back to the window center if the mask is empty.
+    """
+    inside = np.flatnonzero(np.asarray(features[:, -1]) > 0)
+    if len(inside) == 0:
+        return features.shape[0] // 2
+    return int(inside[0] + inside[-1]) // 2
+
+
+def _crop_around(features: np.ndarray, length: int, center: int) -> np.ndarray:
+    """Window of ``length`` positions around ``center``, shifted to stay inside the sequence."""
+    seq_len = features.shape[0]
+    if length >= seq_len:
+        return features
+    start = min(max(center - length // 2, 0), seq_len - length)
+    return features[start:start + length]
+
+
+class CenterCrop:
+    """Deterministic crop of ``length`` positions centered on the BED region (evaluation and prediction).
+
+    Applied to a (SeqLen, Channels) feature array as returned by HDF5Dataset,
+    before any normalization. Windows shorter than ``length`` are returned unchanged.
+
+    Args:
+        length (int): Crop length in base pairs.
+    """
+    def __init__(self, length: int):
+        if not isinstance(length, int) or length <= 0:
+            raise ValueError(f"Crop length must be a positive integer, got {length}.")
+        self.length = length
+
+    def __call__(self, features: np.ndarray) -> np.ndarray:
+        return _crop_around(features, self.length, region_center(features))
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(length={self.length})"
+
+
+class RandomCrop(CenterCrop):
+    """Training crop centered on the BED region with a random shift of up to ``jitter`` positions.
+
+    The shift is drawn from torch's RNG, which DataLoader seeds per worker and
+    the training state checkpoints, so crops are reproducible after a resume.
+
+    Args:
+        length (int): Crop length in base pairs.
+        jitter (Optional[int]): Maximum shift of the crop center. Defaults to a quarter of the crop length.
+    """
+    def __init__(self, length: int, jitter: Optional[int] = None):
+        super().__init__(length)
+        self.jitter = length // 4 if jitter is None else jitter
+        if self.jitter < 0:
+            raise ValueError(f"Crop jitter must be non-negative, got {self.jitter}.")
+
+    def __call__(self, features: np.ndarray) -> np.ndarray:
+        shift = int(torch.randint(-self.jitter, self.jitter + 1, ()).item()) if self.jitter else 0
+        return _crop_around(features, self.length, region_center(features) + shift)
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(length={self.length}, jitter={self.jitter})"
+
+
+class CurriculumCrop(RandomCrop):
+    """RandomCrop whose length grows linearly from ``min_length`` to ``max_length`` over ``epochs`` epochs.
+
+    The trainer calls :meth:`set_epoch` at the start of every epoch. DataLoader
+    workers receive a copy of the dataset when an epoch's iterator is created,
+    so this does not reach persistent workers.
+
+    Args:
+        min_length (int): Crop length of the first epoch.
+        max_length (int): Crop length from epoch ``epochs`` on.
+        epochs (int): Number of epochs over which the length grows.
+        jitter (Optional[int]): Maximum shift of the crop center (default: a quarter of the current length).
+    """
+    def __init__(self, min_length: int, max_length: int, epochs: int, jitter: Optional[int] = None):
+        if max_length < min_length:
+            raise ValueError(f"max_length ({max_length}) must not be smaller than min_length ({min_length}).")
+        if not isinstance(epochs, int) or epochs <= 0:
+            raise ValueError(f"Curriculum epochs must be a positive integer, got {epochs}.")
+        super().__init__(min_length, jitter)
+        self.min_length = min_length
+        self.max_length = max_length
+        self.epochs = epochs
+        self.fixed_jitter = jitter
+
+    def length_at(self, epoch: int) -> int:
+        """Crop length used in (0-based) ``epoch``."""
+        progress = min(epoch / max(self.epochs - 1, 1), 1.0)
+        return int(round(self.min_length + progress * (self.max_length - self.min_length)))
+
+    def set_epoch(self, epoch: int):
+        self.length = self.length_at(epoch)
+        self.jitter = self.length // 4 if self.fixed_jitter is None else self.fixed_jitter
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(min_length={self.min_length}, max_length={self.max_length}, epochs={self.epochs})"
+
+
+class Compose:
+    """Applies transforms in order; ``set_epoch`` is forwarded to those that have it."""
+    def __init__(self, transforms: Sequence[Callable]):
+        self.transforms = [transform for transform in transforms if transform is not None]
+
+    def __call__(self, features: np.ndarray) -> np.ndarray:
+        for transform in self.transforms:
+            features = transform(features)
+        return features
+
+    def set_epoch(self, epoch: int):
+        for transform in self.transforms:
+            if hasattr(transform, 'set_epoch'):
+                transform.set_epoch(epoch)
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({self.transforms})"
+
+
+def build_crop_transforms(crop_config: Any) -> Tuple[Optional[CenterCrop], Optional[CenterCrop]]:
+    """Training and evaluation crops for the ``data.crop`` configuration (both None if not configured).
+
+    ``{length, jitter}`` gives a RandomCrop for training; ``{min_length,
+    max_length, curriculum_epochs, jitter}`` a CurriculumCrop. An integer is
+    shorthand for ``{length: N}``. Evaluation always uses a CenterCrop of the
+    final training length.
+
+    Raises:
+        ValueError: If the configuration is incomplete or invalid.
+    """
+    if not crop_config:
+        return None, None
+    if isinstance(crop_config, int):
+        crop_config = {'length': crop_config}
+    if not isinstance(crop_config, dict):
+        raise ValueError("'crop' must be a crop length or a mapping with 'length' or 'min_length'/'max_length'.")
+    jitter = crop_config.get('jitter')
+    if 'min_length' in crop_config or 'curriculum_epochs' in crop_config:
+        max_length = crop_config.get('max_length', crop_config.get('length'))
+        if max_length is None or 'min_length' not in crop_config:
+            raise ValueError("Curriculum crops need 'min_length' and 'max_length'.")
+        train_crop = CurriculumCrop(crop_config['min_length'], max_length, crop_config.get('curriculum_epochs', 10), jitter)
+        return train_crop, CenterCrop(max_length)
+    if 'length' not in crop_config:
+        raise ValueError("'crop' needs a 'length' (or 'min_length'/'max_length' for a curriculum).")
+    return RandomCrop(crop_config['length'], jitter), CenterCrop(crop_config['length'])
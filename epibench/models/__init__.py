@@ -7,6 +7,7 @@ from .base import BaseModel # Assuming a base class exists
 from .cnn import SimpleCNN
 from .transformer import SimpleTransformer
 from .seq_cnn_regressor import SeqCNNRegressor
+from .efficient_seq_cnn import EfficientSeqCNNRegressor
 
 logger = logging.getLogger(__name__)
 
@@ -15,6 +16,7 @@ _MODEL_REGISTRY: Dict[str, Type[BaseModel]] = {
     'SimpleCNN': SimpleCNN,
     'SimpleTransformer': SimpleTransformer,
     'SeqCNNRegressor': SeqCNNRegressor,
+    'EfficientSeqCNNRegressor': EfficientSeqCNNRegressor,
     # Add other models here as they are created
     # e.g., 'MyAwesomeModel': MyAwesomeModel,
 }
@@ -0,0 +1,51 @@
+# epibench/models/checkpointing.py
+
+"""Activation (gradient) checkpointing helpers shared by the models."""
+
+import contextlib
+from typing import Callable, Iterator
+
+import torch
+import torch.nn as nn
+from torch.utils.checkpoint import checkpoint
+
+
+@contextlib.contextmanager
+def frozen_batchnorm_stats(module: nn.Module) -> Iterator[None]:
+    """Keeps the running statistics of the BatchNorm layers in ``module`` unchanged inside the block.
+
+    The layers still normalize with the batch statistics in training mode;
+    only the running-mean/variance update (and the batch counter) is skipped.
+    """
+    norms = [m for m in module.modules() if isinstance(m, nn.modules.batchnorm._BatchNorm) and m.track_running_stats]
+    saved = [(m.momentum, m.num_batches_tracked.clone() if m.num_batches_tracked is not None else None) for m in norms]
+    for m in norms:
+        m.momentum = 0.0
+    try:
+        yield
+    finally:
+        for m, (momentum, num_batches_tracked) in zip(norms, saved):
+            m.momentum = momentum
+            if num_batches_tracked is not None:
+                m.num_batches_tracked.copy_(num_batches_tracked)
+
+
+def checkpoint_segment(function: Callable[..., torch.Tensor], module: nn.Module, *inputs: torch.Tensor) -> torch.Tensor:
+    """Runs ``function(*inputs)`` without keeping its intermediate activations; they are recomputed in backward.
+
+    ``module`` contains the layers ``function`` uses (passing the whole model
+    is fine). Their BatchNorm running statistics are updated once, in the
+    forward pass, not again when the segment is recomputed, so training with
+    and without checkpointing gives identical models. Dropout masks are reproduced by restoring the RNG state.
+    """
+    recomputing = False
+
+    def run(*args: torch.Tensor) -> torch.Tensor:
+        nonlocal recomputing
+        if recomputing:
+            with frozen_batchnorm_stats(module):
+                return function(*args)
+        recomputing = True
+        return function(*args)
+
+    return checkpoint(run, *inputs, use_reentrant=False, preserve_rng_state=True)
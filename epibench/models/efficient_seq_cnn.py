@@ -0,0 +1,178 @@
+import logging
+from typing import List, Optional, Tuple
+
+import torch
+import torch.nn as nn
+
+from .checkpointing import checkpoint_segment
+
+logger = logging.getLogger(__name__)
+
+
+class DepthwiseSeparableBlock(nn.Module):
+    """Depthwise conv -> BN -> activation -> pointwise (1x1) conv -> BN -> activation -> max pool.
+
+    Costs about ``C * k + C * C_out`` multiply-accumulates per position
+    instead of ``C * C_out * k`` for a dense convolution.
+
+    Args:
+        in_channels (int): Input channels.
+        out_channels (int): Output channels of the pointwise convolution.
+        kernel_size (int): Kernel size of the depthwise convolution (odd).
+        pool_size (int): Max-pooling factor after the block (1 disables).
+        use_batch_norm (bool): Use BatchNorm after both convolutions.
+        activation (nn.Module): Activation module (shared, stateless).
+    """
+    def __init__(self, in_channels: int, out_channels: int, kernel_size: int, pool_size: int,
+                 use_batch_norm: bool, activation: nn.Module):
+        super().__init__()
+        self.depthwise = nn.Conv1d(in_channels, in_channels, kernel_size, padding=kernel_size // 2,
+                                   groups=in_channels, bias=not use_batch_norm)
+        self.bn_depthwise = nn.BatchNorm1d(in_channels) if use_batch_norm else nn.Identity()
+        self.pointwise = nn.Conv1d(in_channels, out_channels, 1, bias=not use_batch_norm)
+        self.bn_pointwise = nn.BatchNorm1d(out_channels) if use_batch_norm else nn.Identity()
+        self.activation = activation
+        self.pool = nn.MaxPool1d(pool_size) if pool_size > 1 else nn.Identity()
+
+    def forward(self, x: torch.Tensor) -> torch.Tensor:
+        x = self.activation(self.bn_depthwise(self.depthwise(x)))
+        x = self.activation(self.bn_pointwise(self.pointwise(x)))
+        return self.pool(x)
+
+
+class EfficientSeqCNNRegressor(nn.Module):
+    """Compute-efficient variant of SeqCNNRegressor for long inputs.
+
+    Keeps the multi-branch stem (parallel kernel sizes over the one-hot DNA
+    and histone tracks) but downsamples in it, by a strided convolution or a
+    max pool after a full-resolution convolution, and replaces the dense
+    conv2-conv4 blocks with depthwise-separable blocks whose width grows by
+    ``channel_growth`` per block (instead of doubling) and which halve the
+    resolution each. Output: sigmoid regression of shape (batch, 1), like
+    SeqCNNRegressor. Use epibench.models.profiling.model_cost to compare the
+    parameter count and FLOPs of both models.
+    """
+    def __init__(self,
+                 input_channels: int = 11,
+                 num_filters: int = 32,
+                 kernel_sizes: List[int] = [3, 9, 25, 51],
+                 stem_stride: int = 4,
+                 stem_downsampling: str = 'stride',
+                 num_blocks: int = 3,
+                 block_kernel_size: int = 9,
+                 channel_growth: float = 1.5,
+                 fc_units: Optional[List[int]] = None,
+                 dropout_rate: float = 0.5,
+                 use_batch_norm: bool = True,
+                 activation: str = 'relu',
+                 gradient_checkpointing: bool = False):
+        """Initialize the EfficientSeqCNNRegressor model.
+
+        Args:
+            input_channels: Number of input features (e.g., 11 for one-hot DNA + histone marks).
+            num_filters: Number of filters of each stem branch.
+            kernel_sizes: Kernel sizes of the parallel stem branches (odd).
+            stem_stride: Downsampling factor of the stem (1 keeps base-pair resolution).
+            stem_downsampling: 'stride' (strided branch convolutions, stem cost / stem_stride) or
+                'pool' (full-resolution branch convolutions followed by max pooling).
+            num_blocks: Number of depthwise-separable blocks, each halving the resolution.
+            block_kernel_size: Kernel size of the depthwise convolutions (odd).
+            channel_growth: Channel multiplier per block (1.0 keeps the width).
+            fc_units: Hidden units of the fully connected layers (default [128]).
+            dropout_rate: Dropout rate for the fully connected layers.
+            use_batch_norm: Whether to use Batch Normalization after conv layers.
+            activation: Activation function to use ('relu' or 'gelu').
+            gradient_checkpointing: Recompute the stem and block activations in the backward pass.
+        """
+        super().__init__()
+        if activation.lower() == 'relu':
+            self.activation_fn = nn.ReLU(inplace=True)
+        elif activation.lower() == 'gelu':
+            self.activation_fn = nn.GELU()
+        else:
+            raise ValueError(f"Unsupported activation function: {activation}. Choose 'relu' or 'gelu'.")
+        if stem_downsampling not in ('stride', 'pool'):
+            raise ValueError(f"Unsupported stem_downsampling: {stem_downsampling}. Choose 'stride' or 'pool'.")
+        if any(k % 2 == 0 for k in list(kernel_sizes) + [block_kernel_size]):
+            raise ValueError(f"Kernel sizes must be odd, got {kernel_sizes} and block_kernel_size={block_kernel_size}.")
+        if stem_stride < 1 or num_blocks < 0 or channel_growth <= 0:
+            raise ValueError("stem_stride must be >= 1, num_blocks >= 0 and channel_growth > 0.")
+
+        self.input_channels = input_channels
+        self.kernel_sizes = kernel_sizes
+        self.use_batch_norm = use_batch_norm
+        self.fc_units = [128] if fc_units is None else ([fc_units] if isinstance(fc_units, int) else fc_units)
+        self.gradient_checkpointing = gradient_checkpointing
+
+        # 1. Multi-branch stem with downsampling
+        conv_stride = stem_stride if stem_downsampling == 'stride' else 1
+        self.branches = nn.ModuleList()
+        self.branch_norms = nn.ModuleList()
+        for k in kernel_sizes:
+            self.branches.append(nn.Conv1d(input_channels, num_filters, kernel_size=k, stride=conv_stride, padding=k // 2))
+            self.branch_norms.append(nn.BatchNorm1d(num_filters) if use_batch_norm else nn.Identity())
+        self.stem_pool = nn.MaxPool1d(stem_stride) if stem_downsampling == 'pool' and stem_stride > 1 else nn.Identity()
+
+        # 2. Depthwise-separable blocks with configurable channel growth
+        channels = num_filters * len(kernel_sizes)
+        self.blocks = nn.ModuleList()
+        for _ in range(num_blocks):
+            out_channels = max(1, int(round(channels * channel_growth)))
+            self.blocks.append(DepthwiseSeparableBlock(channels, out_channels, block_kernel_size, 2, use_batch_norm, self.activation_fn))
+            channels = out_channels
+
+        # 3. Fully connected layers
+        fc_layers = []
+        in_features = channels
+        for units in self.fc_units:
+            fc_layers.append(nn.Linear(in_features, units))
+            fc_layers.append(nn.Dropout(dropout_rate))
+            in_features = units
+        fc_layers.append(nn.Linear(in_features, 1))
+        self.fc_layers = nn.ModuleList(fc_layers)
+
+    def forward(self, x: torch.Tensor) -> torch.Tensor:
+        """Forward pass.
+
+        Args:
+            x: Input tensor of shape (batch_size, sequence_length, input_channels) or (batch_size, input_channels, sequence_length).
+
+        Returns:
+            Output tensor (regression prediction), shape (batch_size, 1).
+        """
+        if x.shape[1] == self.input_channels:
+            pass
+        elif x.shape[2] == self.input_channels:
+            x = x.permute(0, 2, 1).contiguous()
+        else:
+            raise ValueError(f"Unexpected input shape: {x.shape}. Expected channels={self.input_channels}")
+
+        checkpointing = self.gradient_checkpointing and self.training and torch.is_grad_enabled()
+        x = checkpoint_segment(self._stem, self, x) if checkpointing else self._stem(x)
+        for block in self.blocks:
+            x = checkpoint_segment(block, self, x) if checkpointing else block(x)
+
+        x = x.mean(dim=2) # Global average pooling
+        for i, layer in enumerate(self.fc_layers):
+            x = layer(x)
+            if not isinstance(layer, nn.Dropout) and i < len(self.fc_layers) - 1: # nn.Linear, or its quantized replacement
+                x = self.activation_fn(x)
+        return torch.sigmoid(x)
+
+    def _stem(self, x: torch.Tensor) -> torch.Tensor:
+        out = torch.cat([self.activation_fn(bn(conv(x))) for conv, bn in zip(self.branches, self.branch_norms)], dim=1)
+        return self.stem_pool(out)
+
+    def conv_bn_pairs(self) -> List[Tuple[str, str]]:
+        """Names of (convolution, BatchNorm) submodule pairs whose BatchNorm directly follows the convolution."""
+        if not self.use_batch_norm:
+            return []
+        pairs = [(f'branches.{i}', f'branch_norms.{i}') for i in range(len(self.branches))]
+        for j in range(len(self.blocks)):
+            pairs += [(f'blocks.{j}.depthwise', f'blocks.{j}.bn_depthwise'), (f'blocks.{j}.pointwise', f'blocks.{j}.bn_pointwise')]
+        return pairs
+
+    def set_gradient_checkpointing(self, enabled: bool = True) -> 'EfficientSeqCNNRegressor':
+        """Enables or disables activation checkpointing of the stem and of each block during training."""
+        self.gradient_checkpointing = enabled
+        return self
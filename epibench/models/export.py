@@ -0,0 +1,174 @@
+# epibench/models/export.py
+
+"""Self-describing TorchScript inference artifacts: BatchNorm folding, dropout removal and graph freezing."""
+
+import copy
+import json
+import logging
+import os
+import zipfile
+from typing import Any, Dict, Tuple
+
+import torch
+import torch.nn as nn
+from torch.nn.utils.fusion import fuse_conv_bn_eval
+
+logger = logging.getLogger(__name__)
+
+ARTIFACT_METADATA_FILENAME = 'epibench_model.json'
+ARTIFACT_FORMAT_VERSION = 1
+OPTIMIZED_SUFFIX = '.optimized.pt'
+
+
+def _get_submodule_parent(model: nn.Module, name: str) -> Tuple[nn.Module, str]:
+    parent_name, _, child_name = name.rpartition('.')
+    return (model.get_submodule(parent_name) if parent_name else model), child_name
+
+
+def fold_batch_norm(model: nn.Module) -> nn.Module:
+    """Folds each BatchNorm into the convolution before it, in place (model must be in eval mode).
+
+    Uses the model's ``conv_bn_pairs()`` (SeqCNNRegressor, EfficientSeqCNNRegressor);
+    folded BatchNorms are replaced by nn.Identity. Models without the method are returned unchanged.
+    """
+    if model.training:
+        raise ValueError("BatchNorm folding uses the running statistics; call model.eval() first.")
+    pairs = model.conv_bn_pairs() if hasattr(model, 'conv_bn_pairs') else []
+    for conv_name, bn_name in pairs:
+        conv, bn = model.get_submodule(conv_name), model.get_submodule(bn_name)
+        if not isinstance(bn, nn.modules.batchnorm._BatchNorm):
+            continue # Already folded
+        conv_parent, conv_attr = _get_submodule_parent(model, conv_name)
+        bn_parent, bn_attr = _get_submodule_parent(model, bn_name)
+        setattr(conv_parent, conv_attr, fuse_conv_bn_eval(conv, bn))
+        setattr(bn_parent, bn_attr, nn.Identity())
+    logger.debug(f"Folded {len(pairs)} BatchNorm layers into their convolutions.")
+    return model
+
+
+def strip_dropout(model: nn.Module) -> nn.Module:
+    """Removes dropout modules in place: dropped from ModuleLists/Sequentials, replaced by nn.Identity elsewhere.
+
+    Removing list entries keeps loops such as SeqCNNRegressor's fc_layers
+    (which apply the activation after every non-dropout layer but the last) correct.
+    """
+    removed = 0
+    for module in list(model.modules()):
+        if isinstance(module, (nn.ModuleList, nn.Sequential)):
+            kept = [child for child in module if not isinstance(child, nn.Dropout)]
+            if len(kept) != len(module):
+                removed += len(module) - len(kept)
+                module._modules.clear()
+                module._modules.update((str(i), child) for i, child in enumerate(kept))
+        else:
+            for name, child in list(module.named_children()):
+                if isinstance(child, nn.Dropout):
+                    setattr(module, name, nn.Identity())
+                    removed += 1
+    logger.debug(f"Removed {removed} dropout layers.")
+    return model
+
+
+def optimize_for_inference(model: nn.Module, example_input: torch.Tensor) -> torch.jit.ScriptModule:
+    """Returns a frozen TorchScript version of ``model`` for inference; ``model`` itself is left unchanged.
+
+    Folds BatchNorm into the convolutions, strips dropout, traces the forward
+    pass with ``example_input`` (which removes Python-level control flow such as
+    input-layout checks and per-layer isinstance dispatch) and freezes the
+    graph, inlining the weights as constants. The trace accepts inputs in the
+    layout and sequence length of ``example_input`` on its device; only the
+    batch size may vary, since tracing records Python-computed sizes (e.g. the
+    number of local-attention blocks) as constants. save_inference_artifact
+    records the traced shape and check_artifact_input enforces it.
+    """
+    optimized = copy.deepcopy(model).eval()
+    if getattr(optimized, 'stem_impl', 'branches') != 'branches':
+        optimized.stem_impl = 'branches' # Same weights; the FFT size of the 'fft' stem would be traced as a constant
+    fold_batch_norm(optimized)
+    strip_dropout(optimized)
+    with torch.no_grad():
+        traced = torch.jit.trace(optimized, example_input)
+    return torch.jit.freeze(traced)
+
+
+def save_inference_artifact(model: nn.Module, path: str, example_input: torch.Tensor, metadata: Dict[str, Any]) -> str:
+    """Saves ``model`` as TorchScript with ``metadata`` (JSON) inside the archive.
+
+    Script modules are saved as they are; eager modules are traced with
+    ``example_input`` first. The artifact loads without the model's class or
+    configuration (see load_inference_artifact).
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    if not isinstance(model, torch.jit.ScriptModule):
+        with torch.no_grad():
+            model = torch.jit.trace(model.eval(), example_input)
+    metadata = {'format_version': ARTIFACT_FORMAT_VERSION, 'input_shape': list(example_input.shape[1:]), **metadata}
+    torch.jit.save(model, path, _extra_files={ARTIFACT_METADATA_FILENAME: json.dumps(metadata, default=str)})
+    logger.info(f"Inference artifact saved to {path}")
+    return path
+
+
+def _read_metadata(path: str):
+    """Artifact metadata read straight from the archive, or None if ``path`` is not an inference artifact."""
+    try:
+        with zipfile.ZipFile(path) as archive:
+            for name in archive.namelist():
+                if name.endswith(f'extra/{ARTIFACT_METADATA_FILENAME}'):
+                    return json.loads(archive.read(name))
+    except (OSError, zipfile.BadZipFile):
+        pass
+    return None
+
+
+def is_inference_artifact(path: str) -> bool:
+    """Whether ``path`` is an artifact written by save_inference_artifact (checked without loading the model)."""
+    return _read_metadata(path) is not None
+
+
+def check_artifact_input(metadata: Dict[str, Any], dataset) -> None:
+    """Checks that the samples of ``dataset`` have the per-sample shape an inference artifact was traced with.
+
+    ``metadata`` is the artifact's metadata (or a Trainer checkpoint dict, which is not checked).
+
+    Raises:
+        ValueError: If the shapes differ, e.g. windows of another length than the traced one.
+    """
+    if 'format_version' not in metadata or not metadata.get('input_shape') or len(dataset) == 0:
+        return
+    sample_shape = list(torch.as_tensor(dataset[0][0]).shape)
+    if sample_shape != list(metadata['input_shape']):
+        raise ValueError(f"The inference artifact was traced for samples of shape {metadata['input_shape']} "
+                         f"but the data has shape {sample_shape}. Export it again with data of this shape, or crop the inputs "
+                         f"(data.crop) to the traced length.")
+
+
+def load_inference_artifact(path: str, device: torch.device) -> Tuple[nn.Module, Dict[str, Any]]:
+    """Loads an artifact written by save_inference_artifact onto ``device``.
+
+    Returns:
+        Tuple of the model (in eval mode) and its metadata, which carries the
+        source checkpoint's 'epoch' and 'crop_length' like a Trainer checkpoint.
+
+    Raises:
+        FileNotFoundError: If the file does not exist.
+        KeyError: If the file is not an inference artifact.
+        ValueError: If a quantized (CPU-only) artifact is loaded for another device.
+    """
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Inference artifact not found: {path}")
+    metadata = _read_metadata(path)
+    if metadata is None:
+        raise KeyError(f"{ARTIFACT_METADATA_FILENAME} not found in {path}; create it with `epibench optimize` or `epibench quantize`.")
+    if metadata.get('quantization'):
+        if torch.device(device).type != 'cpu':
+            raise ValueError(f"{path} is an int8 model and runs on the CPU only; use --device cpu.")
+        backend = metadata.get('backend')
+        if backend in torch.backends.quantized.supported_engines:
+            torch.backends.quantized.engine = backend
+    # map_location also moves the constants of frozen graphs, which .to() would not
+    model = torch.jit.load(path, map_location=device)
+    logger.info(f"Loaded inference artifact {path} ({metadata.get('model_name', 'model')}, "
+                f"{', '.join(metadata.get('optimizations', [])) or 'no optimizations'}).")
+    return model.eval(), metadata
@@ -0,0 +1,238 @@
+"""Shared helpers for building, loading and compiling EpiBench models."""
+
+import hashlib
+import json
+import logging
+import os
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+import torch
+import torch.nn as nn
+
+from . import get_model
+from .export import is_inference_artifact, load_inference_artifact
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_COMPILE_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'epibench', 'compile')
+
+
+def build_model(model_config: Dict[str, Any]) -> nn.Module:
+    """Instantiates a registered model from a ``model`` config section ({'name': ..., 'params': {...}}).
+
+    Raises:
+        ValueError: If the model name is missing or not registered.
+    """
+    model_name = model_config.get('name')
+    if not model_name:
+        raise ValueError("Model name ('model.name') not found in configuration.")
+    model_params = model_config.get('params', {}) or {}
+    logger.info(f"Instantiating model architecture: {model_name}")
+    return get_model(model_name)(**model_params)
+
+
+def load_inference_model(config: Dict[str, Any], checkpoint_path: str, device: torch.device) -> Tuple[nn.Module, Dict[str, Any]]:
+    """Builds the configured architecture and loads checkpoint weights for inference.
+
+    Accepts Trainer checkpoints ('model_state_dict'), plain {'state_dict': ...}
+    files and bare state dicts. Inference artifacts written by `epibench optimize`
+    or `epibench quantize` are loaded as they are, without the configured architecture.
+
+    Returns:
+        Tuple of the model (on ``device``, in eval mode) and the checkpoint dict.
+
+    Raises:
+        FileNotFoundError: If the checkpoint does not exist.
+    """
+    if not os.path.exists(checkpoint_path):
+        raise FileNotFoundError(f"Checkpoint file not found: {checkpoint_path}")
+    if is_inference_artifact(checkpoint_path):
+        return load_inference_artifact(checkpoint_path, device)
+
+    model = build_model(config.get('model', {}))
+    checkpoint = torch.load(checkpoint_path, map_location=device, weights_only=False)
+    if isinstance(checkpoint, dict) and 'model_state_dict' in checkpoint:
+        state_dict = checkpoint['model_state_dict']
+    elif isinstance(checkpoint, dict) and 'state_dict' in checkpoint:
+        state_dict = checkpoint['state_dict']
+    else:
+        state_dict = checkpoint
+        checkpoint = {'model_state_dict': state_dict}
+
+    model.load_state_dict(state_dict)
+    model.to(device)
+    model.eval()
+    logger.info(f"Model weights loaded from epoch {checkpoint.get('epoch', 'N/A')} in {checkpoint_path}")
+    return model, checkpoint
+
+
+def get_compile_config(config: Dict[str, Any]) -> Dict[str, Any]:
+    """Returns the ``model.compile`` block as a dict (``compile: true`` is shorthand for enabled)."""
+    compile_config = config.get('model', {}).get('compile') or {}
+    if isinstance(compile_config, bool):
+        compile_config = {'enabled': compile_config}
+    return dict(compile_config)
+
+
+def _architecture_key(model: nn.Module, input_shape: Sequence[int]) -> str:
+    """Hash of the model class, its configuration and module structure, the per-sample input shape and the torch version."""
+    try:
+        model_config = model.get_config()
+    except (AttributeError, NotImplementedError):
+        model_config = {
+            key: value for key, value in vars(model).items()
+            if not key.startswith('_') and key != 'training' and isinstance(value, (int, float, str, bool, list, tuple, type(None)))
+        }
+    payload = json.dumps({
+        'class': f"{type(model).__module__}.{type(model).__qualname__}",
+        'config': model_config,
+        'structure': repr(model),
+        'input_shape': list(input_shape),
+        'torch': torch.__version__,
+    }, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]
+
+
+def trace_with_cache(model: nn.Module, example_input: torch.Tensor, cache_dir: str) -> torch.jit.ScriptModule:
+    """Returns a TorchScript trace of ``model``, reusing a cached trace of the same architecture and input shape.
+
+    The cached trace is not frozen, so the current weights of ``model`` are
+    loaded into it and one trace serves every checkpoint of an architecture.
+    """
+    key = _architecture_key(model, example_input.shape[1:])
+    trace_dir = os.path.join(cache_dir, 'torchscript')
+    trace_path = os.path.join(trace_dir, f"{type(model).__name__}_{key}.pt")
+    device = example_input.device
+
+    if os.path.exists(trace_path):
+        try:
+            traced = torch.jit.load(trace_path, map_location=device)
+            traced.load_state_dict(model.state_dict())
+            logger.info(f"Loaded cached TorchScript trace: {trace_path}")
+            return traced.eval()
+        except Exception as e:
+            logger.warning(f"Cached TorchScript trace {trace_path} is unusable ({e}). Re-tracing.")
+
+    was_training = model.training
+    model.eval()
+    with torch.no_grad():
+        traced = torch.jit.trace(model, example_input)
+    model.train(was_training)
+
+    os.makedirs(trace_dir, exist_ok=True)
+    tmp_path = f"{trace_path}.tmp{os.getpid()}"
+    traced.save(tmp_path)
+    os.replace(tmp_path, trace_path)
+    logger.info(f"Saved TorchScript trace to cache: {trace_path}")
+    return traced
+
+
+def use_inductor_cache_dir(cache_dir: str) -> str:
+    """Points Inductor's FX-graph and kernel caches at ``<cache_dir>/inductor`` for the rest of the process.
+
+    Inductor reads TORCHINDUCTOR_CACHE_DIR at every compilation, including the
+    recompilations for new input shapes long after compile_model returned, so
+    the variable stays set rather than being restored.
+    """
+    inductor_cache_dir = os.path.join(cache_dir, 'inductor')
+    os.makedirs(inductor_cache_dir, exist_ok=True)
+    if os.environ.get('TORCHINDUCTOR_CACHE_DIR') != inductor_cache_dir:
+        os.environ['TORCHINDUCTOR_CACHE_DIR'] = inductor_cache_dir
+        logger.info(f"Inductor cache directory: {inductor_cache_dir}")
+    return inductor_cache_dir
+
+
+def _warm_up_for_training(compiled: nn.Module, model: nn.Module, example_input: torch.Tensor):
+    """Compiles the training (forward and backward) and evaluation graphs now, so failures surface here.
+
+    Parameters, gradients, buffers (e.g. BatchNorm running statistics), the
+    train/eval mode and the RNG state of ``model`` are left as they were.
+    """
+    if example_input.shape[0] == 1:
+        example_input = example_input.expand(2, *example_input.shape[1:]).contiguous() # BatchNorm needs >1 sample
+    was_training = model.training
+    gradients = [(parameter, parameter.grad) for parameter in model.parameters()]
+    buffers = [(buffer, buffer.detach().clone()) for buffer in model.buffers()]
+    rng_devices = [example_input.device.index or 0] if example_input.device.type == 'cuda' else []
+    try:
+        with torch.random.fork_rng(devices=rng_devices):
+            model.train()
+            compiled(example_input).float().sum().backward()
+            model.eval()
+            with torch.no_grad():
+                compiled(example_input)
+    finally:
+        model.train(was_training)
+        for parameter, gradient in gradients:
+            parameter.grad = gradient
+        with torch.no_grad():
+            for buffer, saved in buffers:
+                buffer.copy_(saved)
+
+
+def compile_model(model: nn.Module, compile_config: Dict[str, Any], example_input: Optional[torch.Tensor] = None,
+                  for_training: bool = False) -> nn.Module:
+    """Applies the ``model.compile`` settings to a model.
+
+    Supported keys: ``enabled`` (bool), ``backend`` ('inductor' (default), any
+    other torch.compile backend, or 'torchscript'), ``mode`` and ``dynamic``
+    (passed to torch.compile), ``cache_dir`` (default ~/.cache/epibench/compile)
+    and ``fallback`` ('torchscript' (default) or 'none').
+
+    torch.compile keeps Inductor's FX-graph and kernel caches under
+    ``<cache_dir>/inductor`` for the rest of the process (see
+    use_inductor_cache_dir), so later runs with the same architecture and
+    input shapes skip most of the compile time. A warm-up on ``example_input``
+    surfaces compilation errors immediately; give it the real batch size
+    (example_input_from_dataset(..., batch_size=...)) so the warmed-up graph is
+    the one the run uses. For inference the warm-up is a forward pass,
+    falling back to a cached TorchScript trace; for training, a forward and
+    backward pass in train mode plus an eval-mode forward pass, staying eager
+    on failure. Training never uses the trace fallback. Without an example
+    input, compilation (and any failure) happens on the first call.
+
+    The returned module shares parameters with ``model``; keep saving
+    checkpoints from the original module.
+    """
+    if not compile_config.get('enabled', False):
+        return model
+
+    backend = compile_config.get('backend', 'inductor')
+    cache_dir = os.path.expanduser(compile_config.get('cache_dir') or DEFAULT_COMPILE_CACHE_DIR)
+    fallback = compile_config.get('fallback', 'torchscript')
+    use_trace_fallback = not for_training and fallback == 'torchscript' and example_input is not None
+
+    if backend == 'torchscript':
+        if for_training or example_input is None:
+            logger.warning("TorchScript backend is only used for inference with an example input. Running eagerly.")
+            return model
+        return trace_with_cache(model, example_input, cache_dir)
+
+    use_inductor_cache_dir(cache_dir)
+    try:
+        compiled = torch.compile(model, backend=backend, mode=compile_config.get('mode'),
+                                 dynamic=compile_config.get('dynamic'))
+        # Compile now so failures can fall back
+        if for_training and example_input is not None:
+            _warm_up_for_training(compiled, model, example_input)
+        elif example_input is not None:
+            with torch.no_grad():
+                compiled(example_input)
+        logger.info(f"Model compiled with torch.compile (backend={backend}, mode={compile_config.get('mode')}).")
+        return compiled
+    except Exception as e:
+        if use_trace_fallback:
+            logger.warning(f"torch.compile failed ({e}). Falling back to TorchScript trace.")
+            return trace_with_cache(model, example_input, cache_dir)
+        logger.warning(f"torch.compile failed ({e}). Running the model eagerly.")
+        return model
+
+
+def example_input_from_dataset(dataset, device: torch.device, batch_size: Optional[int] = 1) -> torch.Tensor:
+    """Builds an example input batch from the first ``batch_size`` samples of a dataset (fewer if it is smaller).
+
+    Compile warm-ups pass the loader's batch size, so the warmed-up graph has the
+    shape of the real batches; ``None`` (e.g. a loader with a batch sampler) means 1.
+    """
+    count = max(1, min(batch_size or 1, len(dataset)))
+    return torch.stack([torch.as_tensor(dataset[i][0]) for i in range(count)]).to(device)
@@ -0,0 +1,133 @@
+# epibench/models/profiling.py
+
+"""Model cost accounting: parameter counts and forward-pass FLOPs, to compare accuracy against compute."""
+
+import logging
+from typing import Any, Dict, Optional
+
+import math
+
+import torch
+import torch.nn as nn
+
+from .seq_cnn_regressor import SeqCNNRegressor, _fft_size
+from .transformer import LocalSelfAttention
+
+logger = logging.getLogger(__name__)
+
+
+def count_parameters(model: nn.Module, trainable_only: bool = False) -> int:
+    """Number of parameters of ``model`` (shared parameters are counted once)."""
+    return sum(p.numel() for p in model.parameters() if p.requires_grad or not trainable_only)
+
+
+def _conv_macs(module: nn.modules.conv._ConvNd, output: torch.Tensor) -> int:
+    kernel_elements = 1
+    for size in module.kernel_size:
+        kernel_elements *= size
+    return output.numel() * (module.in_channels // module.groups) * kernel_elements
+
+
+def _attention_macs(module: nn.MultiheadAttention, inputs: tuple) -> int:
+    query, key = inputs[0], inputs[1]
+    if not module.batch_first:
+        query, key = query.transpose(0, 1), key.transpose(0, 1)
+    batch, target_len, embed_dim = query.shape
+    source_len = key.shape[1]
+    projections = batch * (target_len + 2 * source_len) * embed_dim * embed_dim # Q, K and V input projections
+    scores = 2 * batch * target_len * source_len * embed_dim # QK^T and attention @ V
+    output_projection = batch * target_len * embed_dim * embed_dim # out_proj weights are applied functionally, not via its hook
+    return projections + scores + output_projection
+
+
+def _local_attention_macs(module: LocalSelfAttention, inputs: tuple) -> int:
+    length, batch, embed_dim = inputs[0].shape
+    window = module.window_size
+    padded_length = math.ceil(length / window) * window
+    return 2 * batch * padded_length * 3 * window * embed_dim # Scores and weighted sum over 3 key blocks per query block
+
+
+def _functional_stem_macs(module: SeqCNNRegressor, inputs: tuple) -> int:
+    """Cost of SeqCNNRegressor's stacked branch convolution ('fused' or 'fft' stem), which runs without Conv1d modules."""
+    x = inputs[0]
+    batch = x.shape[0]
+    length = x.shape[2] if x.shape[1] == module.input_channels else x.shape[1]
+    in_channels, out_channels = module.input_channels, module.num_filters * len(module.kernel_sizes)
+    max_kernel = max(module.kernel_sizes)
+    if module.stem_impl == 'fused':
+        return batch * out_channels * length * in_channels * max_kernel # Kernels zero-padded to the largest size
+    n_fft = _fft_size(length + max_kernel - 1)
+    transforms = batch * in_channels + out_channels * in_channels + batch * out_channels # rfft of inputs and kernels, irfft of outputs
+    fft_macs = int(transforms * 1.25 * n_fft * math.log2(n_fft)) # ~2.5 N log2(N) flops per real FFT
+    product_macs = 4 * batch * out_channels * in_channels * (n_fft // 2 + 1) # Complex multiply-accumulate per frequency
+    return fft_macs + product_macs
+
+
+def estimate_flops(model: nn.Module, example_input: torch.Tensor) -> int:
+    """Forward-pass FLOPs of ``model`` for ``example_input`` (2 x multiply-accumulates).
+
+    Counts convolutions, linear layers and (full or local) multi-head attention, which
+    dominate the cost of the EpiBench models; normalization, activations and
+    pooling are ignored. Layers are seen through module hooks; the functional
+    stems of SeqCNNRegressor ('fused': the stacked convolution, 'fft': the
+    FFTs and spectral products) are counted from the input length. Divide by
+    the batch size of ``example_input`` for a per-sample figure.
+    """
+    macs = 0
+
+    def hook(module, inputs, output):
+        nonlocal macs
+        if isinstance(module, nn.modules.conv._ConvNd):
+            macs += _conv_macs(module, output)
+        elif isinstance(module, nn.Linear):
+            macs += output.numel() * module.in_features
+        elif isinstance(module, nn.MultiheadAttention):
+            macs += _attention_macs(module, inputs)
+        elif isinstance(module, LocalSelfAttention):
+            macs += _local_attention_macs(module, inputs) # Projections are nn.Linear children
+
+    def stem_hook(module, inputs):
+        nonlocal macs
+        macs += _functional_stem_macs(module, inputs)
+
+    handles = [m.register_forward_hook(hook) for m in model.modules()
+               if isinstance(m, (nn.modules.conv._ConvNd, nn.Linear, nn.MultiheadAttention, LocalSelfAttention))]
+    handles += [m.register_forward_pre_hook(stem_hook) for m in model.modules()
+                if isinstance(m, SeqCNNRegressor) and m.stem_impl != 'branches']
+    was_training = model.training
+    try:
+        model.eval()
+        # Grad stays enabled: under no_grad, eval-mode TransformerEncoderLayer takes a fused fast path
+        # that bypasses the MultiheadAttention module (and its hook)
+        with torch.enable_grad():
+            model(example_input)
+    finally:
+        for handle in handles:
+            handle.remove()
+        model.train(was_training)
+    return 2 * macs
+
+
+def model_cost(model: nn.Module, example_input: Optional[torch.Tensor] = None) -> Dict[str, Any]:
+    """Parameter count and, given an example input, forward FLOPs per sample.
+
+    Returns:
+        Dict with 'parameters', 'trainable_parameters' and, if ``example_input``
+        is given, 'input_shape' (of one sample), 'flops_per_sample' and 'gflops_per_sample'.
+    """
+    cost: Dict[str, Any] = {
+        'parameters': count_parameters(model),
+        'trainable_parameters': count_parameters(model, trainable_only=True),
+    }
+    if example_input is not None:
+        try:
+            flops = estimate_flops(model, example_input) / max(example_input.shape[0], 1)
+        except Exception as e:
+            logger.warning(f"Could not estimate the FLOPs of {type(model).__name__}: {e}")
+        else:
+            cost.update({
+                'input_shape': list(example_input.shape[1:]),
+                'flops_per_sample': int(flops),
+                'gflops_per_sample': flops / 1e9,
+            })
+    return cost
@@ -0,0 +1,142 @@
+# epibench/models/quantization.py
+
+"""Post-training int8 quantization of EpiBench models for CPU inference."""
+
+import copy
+import logging
+import os
+import time
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+import numpy as np
+import torch
+import torch.nn as nn
+from torch.ao import quantization as tq
+
+from epibench.evaluation import calculate_regression_metrics
+from .export import _get_submodule_parent, fold_batch_norm, load_inference_artifact, save_inference_artifact
+
+logger = logging.getLogger(__name__)
+
+QUANTIZATION_MODES = ('dynamic', 'static')
+QUANTIZED_SUFFIX = '.int8.pt'
+
+
+def default_backend() -> str:
+    """Quantized kernel backend: 'x86' (fbgemm/oneDNN) where available, otherwise 'qnnpack' (ARM)."""
+    engines = torch.backends.quantized.supported_engines
+    for backend in ('x86', 'fbgemm', 'qnnpack'):
+        if backend in engines:
+            return backend
+    raise RuntimeError(f"No int8 CPU backend available in this PyTorch build (engines: {engines}).")
+
+
+def quantize_model(model: nn.Module, mode: str = 'dynamic', calibration_batches: Optional[Iterable] = None,
+                   backend: Optional[str] = None) -> nn.Module:
+    """Returns an int8 copy of ``model`` for CPU inference; ``model`` itself is left unchanged.
+
+    'dynamic' quantizes the weights of the Linear layers and quantizes their
+    activations on the fly. 'static' additionally folds BatchNorm into the
+    convolutions and runs each dense Conv1d with int8 weights and activations, using
+    activation ranges observed on ``calibration_batches`` (input tensors or
+    (inputs, targets, ...) batches). Each convolution quantizes its input and
+    dequantizes its output, so activations, pooling and the sequence-level
+    operations between them stay in float32.
+
+    Raises:
+        ValueError: For an unknown mode, or 'static' without calibration batches.
+    """
+    if mode not in QUANTIZATION_MODES:
+        raise ValueError(f"Unsupported quantization mode: {mode}. Choose one of {QUANTIZATION_MODES}.")
+    if mode == 'static' and calibration_batches is None:
+        raise ValueError("Static quantization needs calibration batches.")
+    backend = backend or default_backend()
+    torch.backends.quantized.engine = backend
+
+    quantized = copy.deepcopy(model).cpu().eval()
+    if mode == 'static':
+        if getattr(quantized, 'stem_impl', 'branches') != 'branches':
+            quantized.stem_impl = 'branches' # Same weights; the branch modules are what gets quantized
+        fold_batch_norm(quantized)
+        qconfig = tq.get_default_qconfig(backend)
+        # Grouped (depthwise) convolutions stay in float32: the int8 kernels for them are slower than float
+        convs = [name for name, module in quantized.named_modules() if isinstance(module, nn.Conv1d) and module.groups == 1]
+        for name in convs:
+            parent, attr = _get_submodule_parent(quantized, name)
+            wrapper = tq.QuantWrapper(getattr(parent, attr))
+            wrapper.qconfig = qconfig
+            setattr(parent, attr, wrapper)
+        tq.prepare(quantized, inplace=True)
+        num_samples = 0
+        with torch.no_grad():
+            for batch in calibration_batches:
+                inputs = batch[0] if isinstance(batch, (list, tuple)) else batch
+                quantized(inputs.cpu())
+                num_samples += inputs.shape[0]
+        if not num_samples:
+            raise ValueError("Static quantization needs at least one calibration batch.")
+        tq.convert(quantized, inplace=True)
+        logger.info(f"Statically quantized {len(convs)} Conv1d layers ({backend}), calibrated on {num_samples} samples.")
+    quantized = tq.quantize_dynamic(quantized, {nn.Linear}, dtype=torch.qint8)
+    return quantized
+
+
+def evaluate_quantization(float_model: nn.Module, quantized_model: nn.Module, loader: Iterable) -> Dict[str, Any]:
+    """Compares the quantized model against the float model on a held-out slice (on CPU).
+
+    Returns:
+        Dict with the regression metrics of both models ('float', 'quantized'),
+        'delta' (quantized - float per metric), 'max_abs_prediction_diff',
+        'samples', and the inference time of both models in seconds.
+    """
+    float_model = float_model.cpu().eval()
+    y_true, float_preds, quantized_preds = [], [], []
+    float_seconds = quantized_seconds = 0.0
+    with torch.no_grad():
+        for batch in loader:
+            inputs, targets = batch[0].cpu(), batch[1]
+            start = time.perf_counter()
+            float_preds.append(float_model(inputs).numpy())
+            float_seconds += time.perf_counter() - start
+            start = time.perf_counter()
+            quantized_preds.append(quantized_model(inputs).numpy())
+            quantized_seconds += time.perf_counter() - start
+            y_true.append(np.asarray(targets))
+    if not y_true:
+        raise ValueError("The held-out slice for the accuracy check is empty.")
+    y_true, float_preds, quantized_preds = (np.concatenate(a).reshape(-1) for a in (y_true, float_preds, quantized_preds))
+    float_metrics = calculate_regression_metrics(y_true, float_preds) or {}
+    quantized_metrics = calculate_regression_metrics(y_true, quantized_preds) or {}
+    to_float = lambda metrics: {k: (None if np.isnan(v) else float(v)) for k, v in metrics.items()}
+    float_metrics, quantized_metrics = to_float(float_metrics), to_float(quantized_metrics)
+    return {
+        'samples': int(len(y_true)),
+        'float': float_metrics,
+        'quantized': quantized_metrics,
+        'delta': {k: (quantized_metrics[k] - v if v is not None and quantized_metrics.get(k) is not None else None)
+                  for k, v in float_metrics.items()},
+        'max_abs_prediction_diff': float(np.abs(quantized_preds - float_preds).max()),
+        'float_seconds': float_seconds,
+        'quantized_seconds': quantized_seconds,
+    }
+
+
+def quantized_model_path(checkpoint_path: str, mode: str) -> str:
+    """Default location of the quantized model: next to the checkpoint, e.g. best_model.static.int8.pt."""
+    stem, _ = os.path.splitext(checkpoint_path)
+    return f"{stem}.{mode}{QUANTIZED_SUFFIX}"
+
+
+def save_quantized_model(model: nn.Module, path: str, example_input: torch.Tensor, metadata: Dict[str, Any]) -> str:
+    """Saves the quantized model as a self-describing TorchScript artifact (see epibench.models.export).
+
+    Eager quantized modules cannot be pickled reliably and have no float
+    state_dict counterpart, so the model is traced with ``example_input``;
+    the trace accepts inputs in its layout, with any batch size.
+    """
+    return save_inference_artifact(model, path, example_input, {'backend': torch.backends.quantized.engine, **metadata})
+
+
+def load_quantized_model(path: str) -> Tuple[nn.Module, Dict[str, Any]]:
+    """Loads a model written by save_quantized_model onto the CPU; returns it with its metadata."""
+    return load_inference_artifact(path, torch.device('cpu'))
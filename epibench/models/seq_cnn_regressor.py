@@ -1,11 +1,46 @@
 import torch
 import torch.nn as nn
 import torch.nn.functional as F
-from typing import List, Optional
+from typing import List, Optional, Tuple
 import logging
 
+from .checkpointing import checkpoint_segment
+
 logger = logging.getLogger(__name__)
 
+STEM_IMPLEMENTATIONS = ('branches', 'fused', 'fft')
+
+
+def _fft_size(n: int) -> int:
+    """Smallest integer >= n whose only prime factors are 2, 3 and 5 (fast FFT lengths)."""
+    while True:
+        m = n
+        for p in (2, 3, 5):
+            while m % p == 0:
+                m //= p
+        if m == 1:
+            return n
+        n += 1
+
+
+def fft_conv1d(x: torch.Tensor, weight: torch.Tensor, bias: Optional[torch.Tensor], padding: int) -> torch.Tensor:
+    """Same result as ``F.conv1d(x, weight, bias, padding=padding)`` for odd kernels with ``padding = K // 2``.
+
+    Computed as a linear convolution with the flipped kernel via real FFTs of
+    length >= L + K - 1 (no circular wrap-around). Half-precision inputs (e.g.
+    under autocast) are computed in float32.
+    """
+    length, kernel_size = x.shape[-1], weight.shape[-1]
+    n_fft = _fft_size(length + kernel_size - 1)
+    dtype = x.dtype if x.dtype in (torch.float32, torch.float64) else torch.float32
+    with torch.autocast(device_type=x.device.type, enabled=False):
+        x_f = torch.fft.rfft(x.to(dtype), n=n_fft)
+        w_f = torch.fft.rfft(weight.to(dtype).flip(-1), n=n_fft)
+        y = torch.fft.irfft(torch.einsum('bcf,ocf->bof', x_f, w_f), n=n_fft)[..., padding:padding + length]
+        if bias is not None:
+            y = y + bias.to(dtype).unsqueeze(-1)
+    return y
+
 class SeqCNNRegressor(nn.Module):
     """Multi-branch CNN regressor for sequence data, adapted to match the reference architecture.
 
@@ -19,7 +54,9 @@ class SeqCNNRegressor(nn.Module):
                  fc_units: Optional[List[int]] = None,
                  dropout_rate: float = 0.5,
                  use_batch_norm: bool = True,
-                 activation: str = 'relu'):
+                 activation: str = 'relu',
+                 gradient_checkpointing: bool = False,
+                 stem_impl: str = 'branches'):
         """Initialize the SeqCNNRegressor model (reference-style).
 
         Args:
@@ -30,6 +67,13 @@ class SeqCNNRegressor(nn.Module):
             dropout_rate: Dropout rate for the fully connected layers.
             use_batch_norm: Whether to use Batch Normalization after conv layers.
             activation: Activation function to use ('relu' or 'gelu').
+            gradient_checkpointing: Recompute the convolutional activations in the backward pass
+                instead of storing them (see set_gradient_checkpointing).
+            stem_impl: How the branch convolutions are computed; all variants use the same weights
+                (state dicts are interchangeable). 'branches' runs one Conv1d per branch, 'fused'
+                one Conv1d with the kernels zero-padded to the largest size and stacked along the
+                output channels, 'fft' the same stacked convolution via real FFTs, whose cost does
+                not grow with the kernel size. 'fused' and 'fft' need odd kernel sizes.
         """
         super().__init__()
 
@@ -52,6 +96,12 @@ class SeqCNNRegressor(nn.Module):
         else:
             self.fc_units = fc_units
         self.dropout_rate = dropout_rate
+        self.gradient_checkpointing = gradient_checkpointing
+        if stem_impl not in STEM_IMPLEMENTATIONS:
+            raise ValueError(f"Unsupported stem_impl: {stem_impl}. Choose one of {STEM_IMPLEMENTATIONS}.")
+        if stem_impl != 'branches' and any(k % 2 == 0 for k in kernel_sizes):
+            raise ValueError(f"stem_impl '{stem_impl}' needs odd kernel sizes, got {kernel_sizes}.")
+        self.stem_impl = stem_impl
 
         # 1. Convolutional branches
         self.branches = nn.ModuleList()
@@ -114,50 +164,99 @@ class SeqCNNRegressor(nn.Module):
         if x.shape[1] == self.input_channels:
             pass
         elif x.shape[2] == self.input_channels:
-            x = x.permute(0, 2, 1)
+            # Materialize the channels-first layout once; Conv1d (oneDNN on CPU) would otherwise
+            # copy the strided view separately in every branch.
+            x = x.permute(0, 2, 1).contiguous()
         else:
             raise ValueError(f"Unexpected input shape: {x.shape}. Expected channels={self.input_channels}")
 
-        # Branches
-        branch_outputs = []
-        for conv, bn in zip(self.branches, self.branch_norms):
-            out = conv(x)
-            out = bn(out)
-            out = self.activation_fn(out)
-            branch_outputs.append(out)
-        x_cat = torch.cat(branch_outputs, dim=1)
-
-        # Block 1: conv2 -> bn2 -> activation -> pool
-        x = self.conv2(x_cat)
-        x = self.bn2(x)
-        x = self.activation_fn(x)
-        x = self.pool(x)
-
-        # Block 2: conv3 -> bn3 -> activation
-        x = self.conv3(x)
-        x = self.bn3(x)
-        x = self.activation_fn(x)
-
-        # Block 3: conv4 -> bn4 -> activation
-        x = self.conv4(x)
-        x = self.bn4(x)
-        x = self.activation_fn(x)
+        if self.gradient_checkpointing and self.training and torch.is_grad_enabled():
+            # Only the segment boundaries are stored; each segment's activations are recomputed in backward
+            x = checkpoint_segment(self._stem, self, x)
+            x = checkpoint_segment(self._block2, self, x)
+            x = checkpoint_segment(self._block3, self, x)
+        else:
+            x = self._block3(self._block2(self._stem(x)))
 
         # Global average pooling across the sequence dimension
         x = x.mean(dim=2)  # (batch, channels)
 
         # Fully connected layers
         for i, layer in enumerate(self.fc_layers):
-            if isinstance(layer, nn.Linear):
+            if isinstance(layer, nn.Dropout):
+                x = layer(x)
+            else: # nn.Linear, or its quantized replacement
                 x = layer(x)
                 # Only apply activation except for the last layer
                 if i < len(self.fc_layers) - 1:
                     x = self.activation_fn(x)
-            elif isinstance(layer, nn.Dropout):
-                x = layer(x)
         x = torch.sigmoid(x)
         return x
 
+    def set_gradient_checkpointing(self, enabled: bool = True) -> 'SeqCNNRegressor':
+        """Enables or disables activation checkpointing of the convolutional part during training.
+
+        The network is split into three segments: the branches with conv2
+        (whose full-length, concatenated activations dominate memory), conv3
+        and conv4. Only the segment outputs are kept for backward, at the cost
+        of recomputing each segment's forward pass once.
+        """
+        self.gradient_checkpointing = enabled
+        return self
+
+    def conv_bn_pairs(self) -> List[Tuple[str, str]]:
+        """Names of (convolution, BatchNorm) submodule pairs whose BatchNorm directly follows the convolution."""
+        if not self.use_batch_norm:
+            return []
+        pairs = [(f'branches.{i}', f'branch_norms.{i}') for i in range(len(self.branches))]
+        return pairs + [('conv2', 'bn2'), ('conv3', 'bn3'), ('conv4', 'bn4')]
+
+    def stacked_branch_weights(self):
+        """Branch kernels zero-padded (centered) to the largest kernel size and stacked along the output channels.
+
+        Returns:
+            Tuple of the (num_branches * num_filters, input_channels, max_kernel) weight and the stacked bias.
+        """
+        max_kernel = max(self.kernel_sizes)
+        weights, biases = [], []
+        for conv in self.branches:
+            pad = (max_kernel - conv.kernel_size[0]) // 2
+            weights.append(F.pad(conv.weight, (pad, pad)))
+            biases.append(conv.bias if conv.bias is not None else conv.weight.new_zeros(conv.out_channels))
+        return torch.cat(weights, dim=0), torch.cat(biases, dim=0)
+
+    def _branches(self, x: torch.Tensor) -> torch.Tensor:
+        """Concatenated branch outputs (conv -> bn -> activation per branch)."""
+        if self.stem_impl == 'branches':
+            return torch.cat([self.activation_fn(bn(conv(x))) for conv, bn in zip(self.branches, self.branch_norms)], dim=1)
+        weight, bias = self.stacked_branch_weights()
+        padding = max(self.kernel_sizes) // 2
+        if self.stem_impl == 'fft':
+            out = fft_conv1d(x, weight, bias, padding)
+        else:
+            out = F.conv1d(x, weight, bias, padding=padding)
+        if self.use_batch_norm:
+            # Each branch keeps its own BatchNorm (and running statistics) over its slice of the channels
+            out = torch.cat([bn(chunk) for bn, chunk in zip(self.branch_norms, out.split(self.num_filters, dim=1))], dim=1)
+        return self.activation_fn(out)
+
+    def _stem(self, x: torch.Tensor) -> torch.Tensor:
+        """Branches, concatenation and block 1 (conv2 -> bn2 -> activation -> pool)."""
+        x_cat = self._branches(x)
+
+        x = self.conv2(x_cat)
+        x = self.bn2(x)
+        x = self.activation_fn(x)
+        return self.pool(x)
+
+    def _block2(self, x: torch.Tensor) -> torch.Tensor:
+        """Block 2: conv3 -> bn3 -> activation."""
+        return self.activation_fn(self.bn3(self.conv3(x)))
+
+    def _block3(self, x: torch.Tensor) -> torch.Tensor:
+        """Block 3: conv4 -> bn4 -> activation."""
+        return self.activation_fn(self.bn4(self.conv4(x)))
+
     def init_weights(self):
         """Initializes weights for convolutional and linear layers using Xavier uniform.
         """
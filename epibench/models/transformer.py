@@ -1,7 +1,14 @@
 import torch
 import torch.nn as nn
+import torch.nn.functional as F
+import copy
+import functools
 import math
 from .base import BaseModel
+from .checkpointing import checkpoint_segment
+
+ATTENTION_MODES = ('full', 'local')
+TOKENIZERS = ('linear', 'conv')
 
 class PositionalEncoding(nn.Module):
     """Injects positional information into the input embeddings."""
@@ -22,6 +29,119 @@ class PositionalEncoding(nn.Module):
         return self.dropout(x)
 
 
+def local_attention(q: torch.Tensor, k: torch.Tensor, v: torch.Tensor, window_size: int,
+                    dropout_p: float = 0.0) -> torch.Tensor:
+    """Sliding-window attention: each position attends to keys at most ``window_size`` positions away.
+
+    The sequence is split into blocks of ``window_size`` queries which attend to
+    their own and both neighbouring key blocks through
+    F.scaled_dot_product_attention (fused/memory-efficient kernels where
+    available), so time and memory are O(length * window_size) instead of O(length^2).
+
+    Args:
+        q, k, v: Tensors of shape (batch, heads, length, head_dim).
+        window_size: Attention radius (and block size) in positions.
+        dropout_p: Attention dropout probability.
+
+    Returns:
+        Tensor of shape (batch, heads, length, head_dim).
+    """
+    batch, heads, length, head_dim = q.shape
+    num_blocks = math.ceil(length / window_size)
+    padding = num_blocks * window_size - length
+    if padding:
+        q, k, v = (F.pad(t, (0, 0, 0, padding)) for t in (q, k, v))
+
+    def with_neighbours(t):  # (..., blocks, window, dim) -> (..., blocks, 3 * window, dim)
+        previous = F.pad(t, (0, 0, 0, 0, 1, 0))[..., :-1, :, :]
+        following = F.pad(t, (0, 0, 0, 0, 0, 1))[..., 1:, :, :]
+        return torch.cat([previous, t, following], dim=-2)
+
+    blocks = (batch * heads, num_blocks, window_size, head_dim)
+    q, k, v = q.reshape(blocks), with_neighbours(k.reshape(blocks)), with_neighbours(v.reshape(blocks))
+    query_pos = torch.arange(num_blocks * window_size, device=q.device).view(num_blocks, window_size, 1)
+    key_pos = query_pos[:, :1].transpose(1, 2) - window_size + torch.arange(3 * window_size, device=q.device) # (blocks, 1, 3 * window)
+    mask = ((key_pos - query_pos).abs() <= window_size) & (key_pos >= 0) & (key_pos < length)
+    out = F.scaled_dot_product_attention(q, k, v, attn_mask=mask, dropout_p=dropout_p)
+    return out.reshape(batch, heads, num_blocks * window_size, head_dim)[:, :, :length]
+
+
+class LocalSelfAttention(nn.Module):
+    """Multi-head self-attention restricted to a sliding window (see local_attention)."""
+    def __init__(self, d_model: int, nhead: int, window_size: int, dropout: float = 0.0):
+        super().__init__()
+        if d_model % nhead:
+            raise ValueError(f"d_model ({d_model}) must be divisible by nhead ({nhead}).")
+        self.nhead = nhead
+        self.window_size = window_size
+        self.dropout = dropout
+        self.in_proj = nn.Linear(d_model, 3 * d_model)
+        self.out_proj = nn.Linear(d_model, d_model)
+
+    def forward(self, x: torch.Tensor) -> torch.Tensor:
+        """Args: x: Tensor, shape [seq_len, batch_size, d_model]"""
+        length, batch, d_model = x.shape
+        q, k, v = self.in_proj(x).view(length, batch, 3, self.nhead, d_model // self.nhead).permute(2, 1, 3, 0, 4)
+        out = local_attention(q, k, v, self.window_size, self.dropout if self.training else 0.0)
+        return self.out_proj(out.permute(2, 0, 1, 3).reshape(length, batch, d_model))
+
+
+class LocalTransformerEncoderLayer(nn.Module):
+    """Post-norm encoder layer like nn.TransformerEncoderLayer, with sliding-window self-attention."""
+    def __init__(self, d_model: int, nhead: int, window_size: int, dim_feedforward: int = 2048,
+                 dropout: float = 0.1, activation: str = 'relu'):
+        super().__init__()
+        self.self_attn = LocalSelfAttention(d_model, nhead, window_size, dropout)
+        self.linear1 = nn.Linear(d_model, dim_feedforward)
+        self.dropout = nn.Dropout(dropout)
+        self.linear2 = nn.Linear(dim_feedforward, d_model)
+        self.norm1 = nn.LayerNorm(d_model)
+        self.norm2 = nn.LayerNorm(d_model)
+        self.dropout1 = nn.Dropout(dropout)
+        self.dropout2 = nn.Dropout(dropout)
+        if activation == 'relu':
+            self.activation = F.relu
+        elif activation == 'gelu':
+            self.activation = F.gelu
+        else:
+            raise ValueError(f"Unsupported activation: {activation}. Choose 'relu' or 'gelu'.")
+
+    def forward(self, src: torch.Tensor, src_mask: torch.Tensor = None) -> torch.Tensor:
+        if src_mask is not None:
+            raise ValueError("src_mask is not supported with local attention; the window defines the mask.")
+        x = self.norm1(src + self.dropout1(self.self_attn(src)))
+        return self.norm2(x + self.dropout2(self.linear2(self.dropout(self.activation(self.linear1(x))))))
+
+
+class LocalTransformerEncoder(nn.Module):
+    """Stack of LocalTransformerEncoderLayer (same layers/norm attributes as nn.TransformerEncoder)."""
+    def __init__(self, encoder_layer: LocalTransformerEncoderLayer, num_layers: int):
+        super().__init__()
+        self.layers = nn.ModuleList([copy.deepcopy(encoder_layer) for _ in range(num_layers)])
+        self.norm = None
+
+    def forward(self, src: torch.Tensor, mask: torch.Tensor = None) -> torch.Tensor:
+        output = src
+        for layer in self.layers:
+            output = layer(output, src_mask=mask)
+        return output
+
+
+class ConvTokenizer(nn.Module):
+    """Embeds the input with a convolution and max-pools it into a shorter token sequence.
+
+    Maps (seq_len, batch, input_channels) to (ceil(seq_len / pool), batch, d_model).
+    """
+    def __init__(self, input_channels: int, d_model: int, kernel_size: int = 9, pool: int = 8):
+        super().__init__()
+        self.conv = nn.Conv1d(input_channels, d_model, kernel_size, padding=kernel_size // 2)
+        self.pool = nn.MaxPool1d(pool, ceil_mode=True) if pool > 1 else nn.Identity()
+
+    def forward(self, x: torch.Tensor) -> torch.Tensor:
+        x = self.pool(F.gelu(self.conv(x.permute(1, 2, 0))))
+        return x.permute(2, 0, 1)
+
+
 class SimpleTransformer(BaseModel):
     """
     A simple Transformer model using TransformerEncoder.
@@ -36,33 +156,61 @@ class SimpleTransformer(BaseModel):
         dim_feedforward (int): The dimension of the feedforward network model (default=2048).
         dropout (float): The dropout value (default=0.1).
         activation (str): The activation function of encoder/decoder intermediate layer, relu or gelu (default=relu).
-        batch_first (bool): If True, then the input and output tensors are provided as (batch, seq, feature). Default: False.
+        batch_first (bool): If True, the input is (batch, seq_len, input_channels), the layout of the EpiBench
+            datasets; if False, (seq_len, batch, input_channels). Default: True.
+        gradient_checkpointing (bool): Recompute each encoder layer's activations in the backward pass
+            instead of storing them (see set_gradient_checkpointing). Default: False.
+        attention (str): 'full' (nn.TransformerEncoder, quadratic in the token count) or 'local'
+            (sliding-window attention, linear in the token count). Default: 'full'.
+        window_size (int): Attention radius in tokens for attention='local'. Default: 256.
+        tokenizer (str): 'linear' (per-position projection) or 'conv' (ConvTokenizer: convolution followed by
+            max pooling by tokenizer_pool, shortening the sequence the encoder sees). Default: 'linear'.
+        tokenizer_kernel_size (int): Kernel size of the convolutional tokenizer. Default: 9.
+        tokenizer_pool (int): Pooling factor of the convolutional tokenizer. Default: 8.
     """
     def __init__(self, input_channels: int, seq_len: int, num_classes: int, d_model: int, nhead: int, num_encoder_layers: int,
-                 dim_feedforward: int = 2048, dropout: float = 0.1, activation: str = 'relu', batch_first: bool = False):
+                 dim_feedforward: int = 2048, dropout: float = 0.1, activation: str = 'relu', batch_first: bool = True,
+                 gradient_checkpointing: bool = False, attention: str = 'full', window_size: int = 256,
+                 tokenizer: str = 'linear', tokenizer_kernel_size: int = 9, tokenizer_pool: int = 8):
         super().__init__()
 
-        if batch_first:
-            raise NotImplementedError("Batch first is not yet fully supported in this simple implementation")
+        if attention not in ATTENTION_MODES:
+            raise ValueError(f"Unsupported attention: {attention}. Choose one of {ATTENTION_MODES}.")
+        if tokenizer not in TOKENIZERS:
+            raise ValueError(f"Unsupported tokenizer: {tokenizer}. Choose one of {TOKENIZERS}.")
+        if window_size < 1 or tokenizer_pool < 1:
+            raise ValueError("window_size and tokenizer_pool must be >= 1.")
 
         self.d_model = d_model
         self.batch_first = batch_first # Store batch_first
+        self.gradient_checkpointing = gradient_checkpointing
 
         # Embedding layer if input_channels != d_model (e.g., 4 channels to d_model)
-        # Assuming input is (seq_len, batch_size, input_channels) if not batch_first
-        # Or (batch_size, seq_len, input_channels) if batch_first
-        # We need input to TransformerEncoder as (seq_len, batch_size, d_model)
-        if input_channels != d_model:
+        # Batch-first inputs are transposed in forward; the layers below always see (seq_len, batch_size, ...)
+        if tokenizer == 'conv':
+            # Shorter token sequence: the encoder cost shrinks by tokenizer_pool (local) or its square (full)
+            self.embedding = ConvTokenizer(input_channels, d_model, tokenizer_kernel_size, tokenizer_pool)
+            num_tokens = math.ceil(seq_len / tokenizer_pool)
+        elif input_channels != d_model:
              # Simple linear projection
              self.embedding = nn.Linear(input_channels, d_model)
+             num_tokens = seq_len
         else:
             self.embedding = nn.Identity() # No embedding needed if channels match d_model
+            num_tokens = seq_len
 
-        self.pos_encoder = PositionalEncoding(d_model, dropout)
-        encoder_layer = nn.TransformerEncoderLayer(d_model=d_model, nhead=nhead,
-                                                   dim_feedforward=dim_feedforward,
-                                                   dropout=dropout, activation=activation, batch_first=batch_first) # Pass batch_first here
-        self.transformer_encoder = nn.TransformerEncoder(encoder_layer, num_layers=num_encoder_layers)
+        # At least the historical 5000 positions, so existing checkpoints keep their buffer shape
+        self.pos_encoder = PositionalEncoding(d_model, dropout, max_len=max(5000, num_tokens))
+        if attention == 'local':
+            encoder_layer = LocalTransformerEncoderLayer(d_model, nhead, window_size, dim_feedforward=dim_feedforward,
+                                                         dropout=dropout, activation=activation)
+            self.transformer_encoder = LocalTransformerEncoder(encoder_layer, num_layers=num_encoder_layers)
+        else:
+            # nn.MultiheadAttention dispatches to F.scaled_dot_product_attention (flash/memory-efficient kernels)
+            encoder_layer = nn.TransformerEncoderLayer(d_model=d_model, nhead=nhead,
+                                                       dim_feedforward=dim_feedforward,
+                                                       dropout=dropout, activation=activation)
+            self.transformer_encoder = nn.TransformerEncoder(encoder_layer, num_layers=num_encoder_layers)
 
         # Output layer
         # The output of TransformerEncoder is (seq_len, batch, d_model)
@@ -83,14 +231,20 @@ class SimpleTransformer(BaseModel):
             "dim_feedforward": dim_feedforward,
             "dropout": dropout,
             "activation": activation,
-            "batch_first": batch_first
+            "batch_first": batch_first,
+            "gradient_checkpointing": gradient_checkpointing,
+            "attention": attention,
+            "window_size": window_size,
+            "tokenizer": tokenizer,
+            "tokenizer_kernel_size": tokenizer_kernel_size,
+            "tokenizer_pool": tokenizer_pool
         }
 
         self.init_weights()
 
     def init_weights(self) -> None:
         initrange = 0.1
-        if hasattr(self, 'embedding') and not isinstance(self.embedding, nn.Identity):
+        if isinstance(getattr(self, 'embedding', None), nn.Linear):
             self.embedding.weight.data.uniform_(-initrange, initrange)
         self.output_layer.bias.data.zero_()
         self.output_layer.weight.data.uniform_(-initrange, initrange)
@@ -101,32 +255,46 @@ class SimpleTransformer(BaseModel):
 
         Args:
             src (torch.Tensor): Input tensor. Shape depends on batch_first.
-                               If batch_first=False: (seq_len, batch_size, input_channels)
-                               If batch_first=True: (batch_size, seq_len, input_channels) - NOT fully supported yet.
+                               If batch_first=True: (batch_size, seq_len, input_channels).
+                               If batch_first=False: (seq_len, batch_size, input_channels).
             src_mask (torch.Tensor, optional): The additive mask for the src sequence. Defaults to None.
 
         Returns:
             torch.Tensor: Output tensor of shape (batch_size, num_classes).
         """
-        # Input shape check and potential permute if batch_first is handled later
-        if self.batch_first:
-            # Input: (batch, seq, channels) -> Need (seq, batch, channels) for embedding/pos encoding if needed
-            # This part needs careful implementation if batch_first=True is fully supported
-            pass # Placeholder for potential permutation
-        else:
-            # Expected input: (seq_len, batch, channels)
-            if src.ndim != 3 or src.shape[0] != self.config['seq_len'] or src.shape[2] != self.config['input_channels']:
-                 raise ValueError(f"Expected input shape (seq_len={self.config['seq_len']}, batch, channels={self.config['input_channels']}), but got {src.shape}")
-
+        input_shape = src.shape
+        if self.batch_first and src.ndim == 3:
+            src = src.transpose(0, 1) # (batch, seq_len, channels) -> (seq_len, batch, channels)
+        if src.ndim != 3 or src.shape[0] != self.config['seq_len'] or src.shape[2] != self.config['input_channels']:
+            layout = "batch, seq_len={}, channels={}" if self.batch_first else "seq_len={}, batch, channels={}"
+            raise ValueError(f"Expected input shape ({layout.format(self.config['seq_len'], self.config['input_channels'])}), but got {input_shape}")
 
         src = self.embedding(src) * math.sqrt(self.d_model) # Scale embedding
         src = self.pos_encoder(src)
-        output = self.transformer_encoder(src, src_mask)
+        if self.gradient_checkpointing and self.training and torch.is_grad_enabled():
+            # One checkpointed segment per encoder layer: only the layer inputs are kept for backward
+            output = src
+            for layer in self.transformer_encoder.layers:
+                output = checkpoint_segment(functools.partial(layer, src_mask=src_mask), self, output)
+            if self.transformer_encoder.norm is not None:
+                output = self.transformer_encoder.norm(output)
+        else:
+            output = self.transformer_encoder(src, src_mask)
         # Aggregate sequence output - Using mean pooling here
-        output = output.mean(dim=0) # Mean across seq_len dimension (dim=0 because batch_first=False)
+        output = output.mean(dim=0) # Mean across seq_len dimension (dim=0 in the internal sequence-first layout)
         output = self.output_layer(output)
         return output # Shape: (batch_size, num_classes)
 
+    def set_gradient_checkpointing(self, enabled: bool = True) -> 'SimpleTransformer':
+        """Enables or disables per-layer activation checkpointing of the encoder during training.
+
+        The attention maps and feed-forward activations of each layer are
+        recomputed in the backward pass instead of being stored.
+        """
+        self.gradient_checkpointing = enabled
+        self.config["gradient_checkpointing"] = enabled
+        return self
+
     def get_config(self) -> dict:
         """
         Returns the configuration of the SimpleTransformer model.
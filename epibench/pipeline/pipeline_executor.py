@@ -16,6 +16,7 @@ from datetime import datetime
 from epibench.pipeline.results_collector import ResultsCollector
 from epibench.logging.log_manager import LogManager
 from epibench.logging.config_aggregator import ConfigurationAggregator
+from epibench.training.trainer import TRAINING_SUMMARY_FILENAME
 
 logger = logging.getLogger(__name__) # Get logger instance
 
@@ -309,6 +310,7 @@ class PipelineExecutor:
                 
                 # After successful pipeline execution, aggregate configuration parameters
                 self._aggregate_and_log_configs(sample_id)
+                self._log_training_summaries(sample_id)
 
             except FileNotFoundError:
                 error_msg = f"Error: The script 'scripts/run_full_pipeline.py' was not found."
@@ -379,6 +381,29 @@ class PipelineExecutor:
                 }
             })
 
+    def _log_training_summaries(self, sample_id: str):
+        """
+        Add the training summaries written by the Trainer (stop reason, LR and loss history,
+        throughput, peak memory, model cost) to the log. Training runs in the pipeline
+        subprocess, so the summaries are read from its output directory.
+
+        Args:
+            sample_id: Sample identifier
+        """
+        sample_output_dir = self.base_output_directory / sample_id
+        summaries = {}
+        for summary_path in sorted(sample_output_dir.rglob(TRAINING_SUMMARY_FILENAME)):
+            try:
+                with open(summary_path, 'r') as f:
+                    summaries[str(summary_path.parent.relative_to(sample_output_dir))] = json.load(f)
+            except (OSError, json.JSONDecodeError) as e:
+                logger.warning(f"Could not read training summary {summary_path}: {e}")
+        if not summaries:
+            logger.info(f"No {TRAINING_SUMMARY_FILENAME} found for sample {sample_id}")
+            return
+        self.log_manager.update_log({"custom_metadata": {"training_summaries": summaries}}, immediate_save=True)
+        logger.info(f"Added {len(summaries)} training summaries to the log for sample {sample_id}")
+
     def _log_pipeline_error(self, stage_name: str, start_time: datetime, error_type: str, error_message: str):
         """Helper method to log pipeline stage errors."""
         end_time = datetime.now()
@@ -0,0 +1,208 @@
+# epibench/training/checkpoint.py
+
+"""Checkpoint helpers: full training-state capture (resume after preemption) and asynchronous writes."""
+
+import copy
+import logging
+import os
+import queue
+import random
+import threading
+import time
+from collections import defaultdict, deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+import numpy as np
+import torch
+import torch.distributed as dist
+
+from epibench.training.distributed import get_rank, is_distributed
+
+logger = logging.getLogger(__name__)
+
+TRAINING_STATE_FILENAME = 'last_state.pth'
+TRAINING_STATE_VERSION = 1
+
+
+def capture_rng_state() -> Dict[str, Any]:
+    """Snapshot of the Python, NumPy, torch CPU and CUDA random number generators of this process."""
+    state = {
+        'python': random.getstate(),
+        'numpy': np.random.get_state(),
+        'torch': torch.get_rng_state(),
+    }
+    if torch.cuda.is_available():
+        state['cuda'] = torch.cuda.get_rng_state_all()
+    return state
+
+
+def restore_rng_state(state: Dict[str, Any]):
+    """Restores generators captured by :func:`capture_rng_state`."""
+    random.setstate(state['python'])
+    np.random.set_state(state['numpy'])
+    torch.set_rng_state(state['torch'].cpu() if isinstance(state['torch'], torch.Tensor) else torch.as_tensor(state['torch']))
+    if 'cuda' in state and torch.cuda.is_available():
+        torch.cuda.set_rng_state_all(state['cuda'])
+
+
+def gather_rng_states() -> List[Dict[str, Any]]:
+    """RNG states of every rank, indexed by rank (a single entry outside distributed runs).
+
+    Collective in distributed runs: all ranks must call it at the same step.
+    """
+    state = capture_rng_state()
+    if not is_distributed():
+        return [state]
+    states: List[Any] = [None] * dist.get_world_size()
+    dist.all_gather_object(states, state)
+    return states
+
+
+def restore_rank_rng_state(states: List[Dict[str, Any]]):
+    """Restores this rank's generators from a list saved by :func:`gather_rng_states`."""
+    rank = get_rank()
+    if rank >= len(states):
+        logger.warning(f"Saved RNG states cover {len(states)} rank(s); rank {rank} reuses rank 0's state.")
+        rank = 0
+    restore_rng_state(states[rank])
+
+
+def snapshot_to_cpu(obj: Any) -> Any:
+    """Deep copy of a (nested) state with every tensor detached and copied to CPU memory.
+
+    The copy is independent of the live model/optimizer, so it can be serialized
+    in the background while training keeps updating the originals.
+    """
+    if isinstance(obj, torch.Tensor):
+        return obj.detach().to('cpu', copy=True)
+    if isinstance(obj, dict):
+        return {key: snapshot_to_cpu(value) for key, value in obj.items()}
+    if isinstance(obj, list):
+        return [snapshot_to_cpu(value) for value in obj]
+    if isinstance(obj, tuple):
+        return tuple(snapshot_to_cpu(value) for value in obj)
+    return copy.deepcopy(obj)
+
+
+def atomic_torch_save(state: Any, path: str):
+    """Saves to a temporary file, fsyncs it and renames it over ``path``, so readers never see a partial file."""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp{os.getpid()}"
+    try:
+        with open(tmp_path, 'wb') as f:
+            torch.save(state, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    try:
+        dir_fd = os.open(directory, os.O_RDONLY)
+        try:
+            os.fsync(dir_fd) # Persist the rename itself
+        finally:
+            os.close(dir_fd)
+    except OSError:
+        pass # Not supported on every platform/filesystem
+
+
+class AsyncCheckpointWriter:
+    """Writes checkpoints from a background thread so training does not wait on slow filesystems.
+
+    ``submit`` snapshots the state to CPU memory in the calling thread and
+    queues it; a single worker thread writes queued checkpoints in order with
+    :func:`atomic_torch_save`. The queue is bounded: when ``max_pending``
+    writes are outstanding, ``submit`` blocks until one finishes, which caps
+    the extra host memory. ``flush`` waits for all pending writes.
+
+    Args:
+        max_pending (int): Maximum number of queued, not yet written checkpoints.
+        keep_last (Optional[int]): Keep only the newest N files of each retention
+            group (e.g. periodic epoch checkpoints). None keeps everything.
+        asynchronous (bool): If False, ``submit`` writes immediately in the calling thread.
+    """
+    def __init__(self, max_pending: int = 2, keep_last: Optional[int] = None, asynchronous: bool = True):
+        if max_pending <= 0:
+            raise ValueError(f"max_pending must be positive, got {max_pending}.")
+        if keep_last is not None and keep_last <= 0:
+            raise ValueError(f"keep_last must be positive or None, got {keep_last}.")
+        self.keep_last = keep_last
+        self.asynchronous = asynchronous
+        self.errors: List[str] = []
+        self.blocked_time = 0.0 # Seconds submit() waited for a free queue slot
+        self._retained: Dict[str, Deque[str]] = defaultdict(deque)
+        self._queue: 'queue.Queue[Optional[Tuple[Any, str, Optional[str]]]]' = queue.Queue(maxsize=max_pending)
+        self._thread: Optional[threading.Thread] = None
+
+    def submit(self, state: Dict[str, Any], path: str, retention_group: Optional[str] = None):
+        """Queues ``state`` to be written to ``path``.
+
+        Args:
+            state: State to save (tensors may live on any device).
+            path: Destination file; replaced atomically.
+            retention_group: Files submitted under the same group are pruned to the newest ``keep_last``.
+        """
+        snapshot = snapshot_to_cpu(state)
+        if not self.asynchronous:
+            self._write(snapshot, path, retention_group)
+            return
+        if self._thread is None or not self._thread.is_alive():
+            # Started lazily (and again after close()) so idle writers hold no thread
+            self._thread = threading.Thread(target=self._run, name='AsyncCheckpointWriter', daemon=True)
+            self._thread.start()
+        start = time.perf_counter()
+        self._queue.put((snapshot, path, retention_group))
+        self.blocked_time += time.perf_counter() - start
+
+    def flush(self):
+        """Blocks until every submitted checkpoint has been written."""
+        if self.asynchronous:
+            self._queue.join()
+
+    def close(self):
+        """Flushes pending writes and stops the worker thread (a later submit starts a new one)."""
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+        self._thread = None
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    return
+                self._write(*item)
+            finally:
+                self._queue.task_done()
+
+    def _write(self, state: Any, path: str, retention_group: Optional[str]):
+        start = time.perf_counter()
+        try:
+            atomic_torch_save(state, path)
+        except Exception as e:
+            message = f"Failed to write checkpoint {path}: {e}"
+            self.errors.append(message)
+            logger.error(message, exc_info=True)
+            return
+        logger.info(f"Checkpoint saved to {path} ({time.perf_counter() - start:.2f}s)")
+        if retention_group is not None and self.keep_last:
+            self._prune(retention_group, path)
+
+    def _prune(self, retention_group: str, path: str):
+        retained = self._retained[retention_group]
+        if path in retained:
+            retained.remove(path)
+        retained.append(path)
+        while len(retained) > self.keep_last:
+            old_path = retained.popleft()
+            try:
+                os.remove(old_path)
+                logger.info(f"Removed old checkpoint {old_path} (keeping last {self.keep_last}).")
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logger.warning(f"Could not remove old checkpoint {old_path}: {e}")
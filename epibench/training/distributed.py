@@ -0,0 +1,170 @@
+# epibench/training/distributed.py
+
+"""Helpers for multi-process data-parallel training (DistributedDataParallel).
+
+Processes are started by ``epibench launch`` (a thin wrapper around torchrun),
+which sets the RANK/WORLD_SIZE/LOCAL_RANK/MASTER_ADDR/MASTER_PORT environment
+variables read by :func:`init_distributed`. Without them everything here is a
+no-op and training runs in a single process as before.
+"""
+
+import logging
+import os
+from typing import Any, Dict, Optional
+
+import torch
+import torch.distributed as dist
+import torch.nn as nn
+from torch.distributed import nn as dist_nn
+from torch.nn.modules.batchnorm import _BatchNorm
+from torch.nn.parallel import DistributedDataParallel
+
+from epibench.data.samplers import distributed_sampler # noqa: F401 (re-exported)
+from epibench.utils.distributed import get_local_rank, get_rank, get_world_size, is_distributed, is_main_process # noqa: F401
+from epibench.utils.performance import available_cpus
+
+logger = logging.getLogger(__name__)
+
+
+def init_distributed(distributed_config: Optional[Dict[str, Any]] = None) -> bool:
+    """Initializes the default process group from torchrun environment variables.
+
+    Args:
+        distributed_config: The ``training.distributed`` config section. ``backend``
+            defaults to 'gloo' (CPU); 'nccl' can be used on CUDA nodes.
+
+    Returns:
+        True if the process is part of a multi-process run.
+    """
+    world_size = int(os.environ.get('WORLD_SIZE', 1))
+    if world_size <= 1:
+        return False
+    if dist.is_initialized():
+        return True
+
+    distributed_config = distributed_config or {}
+    backend = distributed_config.get('backend', 'gloo')
+    dist.init_process_group(backend=backend, init_method='env://')
+    logger.info(f"Initialized process group (backend={backend}, rank={dist.get_rank()}/{dist.get_world_size()}, "
+                f"local_rank={get_local_rank()}, master={os.environ.get('MASTER_ADDR')}:{os.environ.get('MASTER_PORT')})")
+    return True
+
+
+def cleanup_distributed():
+    """Destroys the default process group if one was initialized."""
+    if dist.is_available() and dist.is_initialized():
+        dist.destroy_process_group()
+
+
+def barrier():
+    if is_distributed():
+        dist.barrier()
+
+
+def distributed_device(device: torch.device) -> torch.device:
+    """Pins each local rank to its own GPU; CPU devices are returned unchanged."""
+    if device.type == 'cuda' and is_distributed():
+        return torch.device('cuda', get_local_rank())
+    return device
+
+
+def per_rank_threads(num_workers: int = 0) -> int:
+    """Intra-op threads per process so the ranks on one node do not oversubscribe its CPUs."""
+    local_world_size = int(os.environ.get('LOCAL_WORLD_SIZE', get_world_size()))
+    return max(1, available_cpus() // max(local_world_size, 1) - max(num_workers, 0))
+
+
+class CPUSyncBatchNorm(_BatchNorm):
+    """BatchNorm whose training-time statistics are computed over the batches of all ranks.
+
+    nn.SyncBatchNorm only supports CUDA tensors. This layer all-reduces the
+    per-channel sums and squared sums with a differentiable all_reduce, so it
+    works with the gloo backend on CPU. Outside distributed training it
+    behaves like the BatchNorm layer it replaced.
+    """
+
+    def _check_input_dim(self, input):
+        if input.dim() < 2:
+            raise ValueError(f"Expected at least 2D input (got {input.dim()}D input)")
+
+    def forward(self, input: torch.Tensor) -> torch.Tensor:
+        if not (self.training and is_distributed()):
+            return super().forward(input)
+
+        # Statistics are reduced in float32: bf16/fp16 sums under autocast are too coarse for the variance
+        input_dtype = input.dtype
+        input = input.float()
+        num_channels = input.size(1)
+        reduce_dims = [0] + list(range(2, input.dim()))
+        count = torch.full((1,), input.numel() / num_channels, dtype=input.dtype, device=input.device)
+        totals = dist_nn.functional.all_reduce(torch.cat([input.sum(reduce_dims), (input * input).sum(reduce_dims), count]))
+        global_count = totals[-1]
+        mean = totals[:num_channels] / global_count
+        var = (totals[num_channels:2 * num_channels] / global_count - mean * mean).clamp_min(0)
+
+        if self.track_running_stats:
+            with torch.no_grad():
+                self.num_batches_tracked.add_(1)
+                momentum = self.momentum if self.momentum is not None else 1.0 / float(self.num_batches_tracked)
+                unbiased_var = var * global_count / (global_count - 1).clamp_min(1)
+                self.running_mean.mul_(1 - momentum).add_(momentum * mean.detach())
+                self.running_var.mul_(1 - momentum).add_(momentum * unbiased_var.detach())
+
+        shape = [1, num_channels] + [1] * (input.dim() - 2)
+        output = (input - mean.view(shape)) * torch.rsqrt(var.view(shape) + self.eps)
+        if self.affine:
+            output = output * self.weight.view(shape) + self.bias.view(shape)
+        return output.to(input_dtype)
+
+
+def convert_cpu_sync_batchnorm(module: nn.Module) -> nn.Module:
+    """Recursively replaces BatchNorm layers with CPUSyncBatchNorm, reusing their parameters and buffers."""
+    converted = module
+    if isinstance(module, _BatchNorm) and not isinstance(module, CPUSyncBatchNorm):
+        converted = CPUSyncBatchNorm(module.num_features, module.eps, module.momentum, module.affine, module.track_running_stats)
+        if module.affine:
+            converted.weight = module.weight
+            converted.bias = module.bias
+        if module.track_running_stats:
+            converted.running_mean = module.running_mean
+            converted.running_var = module.running_var
+            converted.num_batches_tracked = module.num_batches_tracked
+        converted.train(module.training)
+    for name, child in module.named_children():
+        converted.add_module(name, convert_cpu_sync_batchnorm(child))
+    return converted
+
+
+def wrap_model(model: nn.Module, device: torch.device, sync_batchnorm: bool = False,
+               find_unused_parameters: bool = False) -> nn.Module:
+    """Wraps a model in DistributedDataParallel.
+
+    With ``sync_batchnorm`` the model's BatchNorm layers are converted in place
+    to nn.SyncBatchNorm (CUDA) or CPUSyncBatchNorm (CPU), which compute batch
+    statistics over the global batch. Parameters are reused, so an existing
+    optimizer stays valid and state dict keys are unchanged.
+    """
+    if sync_batchnorm:
+        if device.type == 'cuda':
+            model = nn.SyncBatchNorm.convert_sync_batchnorm(model)
+        else:
+            model = convert_cpu_sync_batchnorm(model)
+        logger.info("Converted BatchNorm layers to synchronised BatchNorm.")
+    device_ids = [device.index] if device.type == 'cuda' else None
+    return DistributedDataParallel(model, device_ids=device_ids, find_unused_parameters=find_unused_parameters)
+
+
+def all_reduce_sum(*values: float, device: torch.device = torch.device('cpu')) -> tuple:
+    """Sums scalars over all ranks (identity outside distributed runs)."""
+    if not is_distributed():
+        return values
+    tensor = torch.tensor(values, dtype=torch.float64, device=device)
+    dist.all_reduce(tensor, op=dist.ReduceOp.SUM)
+    return tuple(tensor.tolist())
+
+
+class NullSummaryWriter:
+    """Stand-in for SummaryWriter on non-zero ranks; every logging call is a no-op."""
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: None
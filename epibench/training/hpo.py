@@ -1,11 +1,21 @@
 import optuna
+import copy
 import logging
-from typing import Dict, Any, Callable, Optional, Union, Tuple, Type
+import math
+import os
+import shutil
+import subprocess
+import sys
+import time
+from typing import Dict, Any, Callable, List, Optional, Union, Tuple, Type
 
 import torch
 # import torch.nn as nn # Not directly used in HPOptimizer for model/criterion creation
 # import torch.optim as optim # Optimizer created within objective
-from torch.utils.data import DataLoader
+from torch.utils.data import DataLoader, Subset
+
+from epibench.data.samplers import ResumableSampler
+from epibench.training.checkpoint import atomic_torch_save
 
 from epibench.training.trainer import Trainer
 # Model is created within the objective function based on config
@@ -13,6 +23,7 @@ from epibench.training.trainer import Trainer
 from epibench.models import get_model # For instantiating model by name
 import torch.optim as optim # For instantiating optimizer by name
 import torch.nn as nn # For instantiating criterion by name
+from epibench.utils.performance import available_cpus
 
 
 logger = logging.getLogger(__name__)
@@ -38,10 +49,14 @@ def get_optuna_pruner(pruner_name: Optional[str] = None) -> Optional[optuna.prun
     if pruner_name is None:
         return None # Optuna will use its default (Median)
     pruner_name_lower = pruner_name.lower()
+    if pruner_name_lower.endswith('pruner'):
+        pruner_name_lower = pruner_name_lower[:-len('pruner')] # 'MedianPruner' -> 'median'
     if pruner_name_lower == 'median':
         return optuna.pruners.MedianPruner()
     elif pruner_name_lower == 'hyperband':
         return optuna.pruners.HyperbandPruner()
+    elif pruner_name_lower in ('successivehalving', 'sha'):
+        return optuna.pruners.SuccessiveHalvingPruner()
     elif pruner_name_lower == 'nop':
         return optuna.pruners.NopPruner()
     # Add other pruners as needed
@@ -49,6 +64,199 @@ def get_optuna_pruner(pruner_name: Optional[str] = None) -> Optional[optuna.prun
         logger.warning(f"Unknown pruner name: {pruner_name}. Using Optuna default.")
         return None
 
+def fidelity_rungs(min_data_fraction: float = 0.1, min_epochs: int = 1, max_epochs: int = 10,
+                   reduction_factor: int = 3) -> List[Dict[str, Any]]:
+    """Budgets of the multi-fidelity rungs: data fraction and epochs grow by reduction_factor per rung.
+
+    Rung r trains on min(1, min_data_fraction * eta^r) of the training set up to a
+    total of min(max_epochs, min_epochs * eta^r) epochs, and reports at resource
+    step eta^r (matching SuccessiveHalving/Hyperband pruners with min_resource=1).
+    The last rung always uses the full data and max_epochs: once the epoch budget
+    reaches max_epochs, that rung also uses the full data, so every rung adds epochs.
+
+    Raises:
+        ValueError: If a budget is out of range.
+    """
+    if not 0 < min_data_fraction <= 1:
+        raise ValueError(f"min_data_fraction must be in (0, 1], got {min_data_fraction}.")
+    if min_epochs <= 0 or max_epochs < min_epochs:
+        raise ValueError(f"Need 0 < min_epochs <= max_epochs, got {min_epochs} and {max_epochs}.")
+    if reduction_factor < 2:
+        raise ValueError(f"reduction_factor must be at least 2, got {reduction_factor}.")
+    rungs = []
+    rung = 0
+    while True:
+        scale = reduction_factor ** rung
+        fraction = min(1.0, min_data_fraction * scale)
+        epochs = min(max_epochs, int(math.ceil(min_epochs * scale)))
+        if epochs >= max_epochs:
+            fraction = 1.0 # No epochs left to give later rungs; finish on the full data
+        rungs.append({'rung': rung, 'data_fraction': fraction, 'epochs': epochs, 'resource': scale})
+        if fraction >= 1.0 and epochs >= max_epochs:
+            return rungs
+        rung += 1
+
+
+def multi_fidelity_pruner(pruner_name: Optional[str], rungs: List[Dict[str, Any]], reduction_factor: int) -> optuna.pruners.BasePruner:
+    """SuccessiveHalving or (default) Hyperband pruner whose rungs line up with fidelity_rungs."""
+    name = (pruner_name or 'hyperband').lower().replace('pruner', '')
+    if name in ('successivehalving', 'sha'):
+        return optuna.pruners.SuccessiveHalvingPruner(min_resource=1, reduction_factor=reduction_factor)
+    if name != 'hyperband':
+        logger.warning(f"Pruner '{pruner_name}' does not use multi-fidelity rungs. Using HyperbandPruner.")
+    return optuna.pruners.HyperbandPruner(min_resource=1, max_resource=rungs[-1]['resource'], reduction_factor=reduction_factor)
+
+
+# States counted towards hpo.n_trials when several worker processes share a study
+_COUNTED_TRIAL_STATES = (optuna.trial.TrialState.COMPLETE, optuna.trial.TrialState.PRUNED,
+                         optuna.trial.TrialState.FAIL, optuna.trial.TrialState.RUNNING)
+
+
+def _base_checkpoint_dir(config: Dict[str, Any]) -> str:
+    return config.get('checkpoint_dir') or config.get('output', {}).get('checkpoint_dir') or 'checkpoints'
+
+
+def default_study_storage(config: Dict[str, Any]) -> str:
+    """Journal file used for a shared study when 'hpo.storage' is not set: <checkpoint dir>/<study name>.journal."""
+    base_dir = _base_checkpoint_dir(config)
+    study_name = config.get('hpo', {}).get('study_name', 'epibench_hpo_study')
+    return f"journal:{os.path.join(base_dir, study_name + '.journal')}"
+
+
+def resolve_storage(storage: Optional[str]) -> Optional[Union[str, optuna.storages.BaseStorage]]:
+    """Turns an 'hpo.storage' value into something optuna.create_study accepts.
+
+    'journal:<path>' (or a path ending in .journal/.log) selects a journal file,
+    which works on shared filesystems without a database server. SQLite URLs get
+    a generous lock timeout so several local worker processes can share them.
+    Other database URLs are passed through; None means in-memory.
+    """
+    if storage is None or isinstance(storage, optuna.storages.BaseStorage):
+        return storage
+    if storage.startswith('journal:') or storage.endswith(('.journal', '.log')):
+        from optuna.storages.journal import JournalFileBackend
+        path = os.path.expanduser(storage[len('journal:'):] if storage.startswith('journal:') else storage)
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        return optuna.storages.JournalStorage(JournalFileBackend(path))
+    if storage.startswith('sqlite:'):
+        return optuna.storages.RDBStorage(storage, engine_kwargs={'connect_args': {'timeout': 60}})
+    return storage
+
+
+def worker_thread_budget(n_workers: int) -> int:
+    """Intra-op threads per HPO worker process so that n_workers processes share this node's CPUs."""
+    return max(1, available_cpus() // max(n_workers, 1))
+
+
+def build_worker_command(config_path: str, num_threads: int, log_level: str = 'INFO') -> List[str]:
+    """Command that runs trials of the shared study until hpo.n_trials is reached.
+
+    The same command (with a suitable --num-threads) can be started by hand on
+    other nodes that see the same study storage.
+    """
+    return [sys.executable, '-m', 'epibench.cli.main', 'train', '-c', config_path,
+            '--hpo', '--hpo-worker', '--num-threads', str(num_threads), '--log-level', log_level]
+
+
+def run_parallel_optimization(config_path: str, n_workers: int, threads_per_worker: Optional[int] = None,
+                              log_level: str = 'INFO') -> List[int]:
+    """Runs a study with n_workers trial processes on this node and waits for them.
+
+    Every worker loads the study from the shared storage and starts its next
+    trial as soon as its previous one finishes, until the study holds
+    hpo.n_trials trials. The storage must be persistent (see resolve_storage).
+
+    Returns:
+        The exit codes of the worker processes.
+    """
+    if n_workers <= 0:
+        raise ValueError(f"n_workers must be positive, got {n_workers}.")
+    threads = threads_per_worker or worker_thread_budget(n_workers)
+    command = build_worker_command(config_path, threads, log_level)
+    env = os.environ.copy()
+    env['OMP_NUM_THREADS'] = str(threads) # Applies before torch starts its thread pools
+    logger.info(f"Starting {n_workers} HPO worker process(es) with {threads} thread(s) each: {' '.join(command)}")
+    processes = [subprocess.Popen(command, env=env) for _ in range(n_workers)]
+    try:
+        return_codes = [process.wait() for process in processes]
+    except KeyboardInterrupt:
+        logger.warning("Interrupted; stopping HPO worker processes.")
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.wait()
+        raise
+    failed = [code for code in return_codes if code != 0]
+    if failed:
+        logger.error(f"{len(failed)} HPO worker process(es) failed (exit codes: {failed}).")
+    return return_codes
+
+
+def load_warm_start_trials(sources: List[Union[str, Dict[str, Any]]], exclude_study: Optional[str] = None,
+                           direction: str = 'minimize') -> List[optuna.trial.FrozenTrial]:
+    """Completed trials of earlier studies, best first.
+
+    Each source is a storage spec (all studies in it) or a mapping with
+    'storage' and optionally 'study_name'. The study named ``exclude_study``
+    is skipped, so a shared storage can hold the new study too.
+    """
+    trials = []
+    for source in sources:
+        if isinstance(source, str):
+            source = {'storage': source}
+        storage = resolve_storage(source['storage'])
+        study_names = [source['study_name']] if source.get('study_name') else optuna.study.get_all_study_names(storage)
+        for study_name in study_names:
+            if study_name == exclude_study:
+                continue
+            try:
+                source_study = optuna.load_study(study_name=study_name, storage=storage)
+            except KeyError:
+                logger.warning(f"Warm-start study '{study_name}' not found in {source['storage']}. Skipping it.")
+                continue
+            # Copies: the source study's cached trials must not pick up the warm-start attribute
+            completed = source_study.get_trials(deepcopy=True, states=(optuna.trial.TrialState.COMPLETE,))
+            for trial in completed:
+                trial.set_user_attr('warm_start_source', f"{study_name}#{trial.number}")
+            trials.extend(completed)
+            logger.info(f"Warm start: {len(completed)} completed trial(s) from study '{study_name}'.")
+    trials = [t for t in trials if t.value is not None and math.isfinite(t.value)]
+    trials.sort(key=lambda t: t.value, reverse=direction == 'maximize')
+    return trials
+
+
+class TopKTrialRetention:
+    """Optuna callback that keeps the checkpoint directories of the best ``keep_top_k`` finished trials only.
+
+    Directories of worse completed trials and of pruned/failed trials are
+    removed once those trials have finished; running trials are never touched.
+    """
+    def __init__(self, keep_top_k: int):
+        if keep_top_k <= 0:
+            raise ValueError(f"keep_top_k must be positive, got {keep_top_k}.")
+        self.keep_top_k = keep_top_k
+        self.removed: List[int] = []
+
+    def __call__(self, study: optuna.study.Study, trial: optuna.trial.FrozenTrial) -> None:
+        finished = study.get_trials(deepcopy=False, states=(optuna.trial.TrialState.COMPLETE, optuna.trial.TrialState.PRUNED,
+                                                             optuna.trial.TrialState.FAIL))
+        completed = [t for t in finished if t.state == optuna.trial.TrialState.COMPLETE and t.value is not None
+                     and not t.user_attrs.get('warm_start_prior')] # Prior observations copied from other studies
+        completed.sort(key=lambda t: t.value, reverse=study.direction == optuna.study.StudyDirection.MAXIMIZE)
+        keep = {t.number for t in completed[:self.keep_top_k]}
+        for finished_trial in finished:
+            trial_dir = finished_trial.user_attrs.get('checkpoint_dir')
+            if finished_trial.number in keep or not trial_dir or not os.path.isdir(trial_dir):
+                continue
+            try:
+                shutil.rmtree(trial_dir)
+                self.removed.append(finished_trial.number)
+                logger.info(f"Removed checkpoints of trial {finished_trial.number} ({finished_trial.state.name.lower()}; "
+                            f"keeping the best {self.keep_top_k} trials: {sorted(keep)}).")
+            except OSError as e:
+                logger.warning(f"Could not remove checkpoints of trial {finished_trial.number} at {trial_dir}: {e}")
+
+
 class HPOptimizer:
     """
     Manages hyperparameter optimization using Optuna.
@@ -76,7 +284,8 @@ class HPOptimizer:
             device: Device to use for training.
             study_name: Name for the Optuna study.
             direction: Direction of optimization ('minimize' or 'maximize').
-            storage: Database URL for Optuna storage. If None, uses in-memory storage.
+            storage: Optuna storage: database URL, 'journal:<path>' or a storage object (see resolve_storage).
+                If None, uses in-memory storage.
             sampler_name: Name of the Optuna sampler to use (e.g., 'TPE', 'Random').
             pruner_name: Name of the Optuna pruner to use (e.g., 'MedianPruner', 'NopPruner').
         """
@@ -87,10 +296,27 @@ class HPOptimizer:
         
         self.study_name = study_name
         self.direction = direction
-        self.storage = storage
+        self.storage = resolve_storage(storage)
         
         self.sampler = get_optuna_sampler(sampler_name)
         self.pruner = get_optuna_pruner(pruner_name)
+        keep_top_k = base_config.get('hpo', {}).get('keep_top_k_trials')
+        self.retention = TopKTrialRetention(keep_top_k) if keep_top_k else None
+
+        # --- Multi-fidelity mode (hpo.multi_fidelity) ---
+        self.rungs: Optional[List[Dict[str, Any]]] = None
+        mf_config = base_config.get('hpo', {}).get('multi_fidelity') or {}
+        if mf_config.get('enabled', False):
+            reduction_factor = mf_config.get('reduction_factor', 3)
+            max_epochs = mf_config.get('max_epochs') or base_config.get('training', {}).get('epochs', 10)
+            self.rungs = fidelity_rungs(mf_config.get('min_data_fraction', 0.1), mf_config.get('min_epochs', 1),
+                                        max_epochs, reduction_factor)
+            if len(self.rungs) > 1:
+                self.pruner = multi_fidelity_pruner(pruner_name, self.rungs, reduction_factor)
+            self._rung_order = torch.randperm(len(train_loader.dataset),
+                                              generator=torch.Generator().manual_seed(mf_config.get('seed', 0))).tolist()
+            logger.info(f"Multi-fidelity HPO with {len(self.rungs)} rungs: " +
+                        ", ".join(f"{r['data_fraction']:.0%} data/{r['epochs']} epochs" for r in self.rungs))
 
         try:
             self.study = optuna.create_study(
@@ -110,6 +336,58 @@ class HPOptimizer:
             logger.error(f"Failed to create/load Optuna study '{self.study_name}': {e}", exc_info=True)
             raise
 
+    def warm_start(self, warm_start_config: Dict[str, Any]) -> int:
+        """Seeds a new (empty) study with completed trials of earlier studies ('hpo.warm_start').
+
+        The best earlier configuration is always enqueued as trial 0. With
+        mode 'enqueue' (default) the next best top_k - 1 configurations are
+        enqueued as well; with mode 'prior' all earlier trials are added as
+        finished trials, so TPE uses them as observations from the start. Only
+        parameters of this study's search space are carried over. Objective
+        values of other samples are used as they are.
+
+        Returns:
+            The number of enqueued or added trials (0 if the study already has trials).
+        """
+        if self.study.trials:
+            logger.info(f"Study '{self.study_name}' already has trials; skipping warm start.")
+            return 0
+        sources = warm_start_config.get('sources') or []
+        direction = self.direction if isinstance(self.direction, str) else self.direction.name.lower()
+        trials = load_warm_start_trials(sources, exclude_study=self.study_name, direction=direction)
+        search_keys = set(self.base_config.get('hpo', {}).get('search_space', {}))
+        trials = [t for t in trials if search_keys.intersection(t.params)]
+        if not trials:
+            logger.warning("Warm start found no completed trials with parameters of this search space.")
+            return 0
+
+        mode = warm_start_config.get('mode', 'enqueue')
+        top_k = warm_start_config.get('top_k', 5)
+        count = 0
+        for trial in trials[:1] if mode == 'prior' else trials[:top_k]:
+            params = {key: value for key, value in trial.params.items() if key in search_keys}
+            self.study.enqueue_trial(params, user_attrs={'warm_start_source': trial.user_attrs['warm_start_source']},
+                                     skip_if_exists=True)
+            count += 1
+        if mode == 'prior':
+            prior_trials = []
+            for trial in trials:
+                keys = [key for key in trial.params if key in search_keys]
+                prior_trials.append(optuna.trial.create_trial(
+                    params={key: trial.params[key] for key in keys},
+                    distributions={key: trial.distributions[key] for key in keys},
+                    value=trial.value,
+                    user_attrs={'warm_start_source': trial.user_attrs['warm_start_source'], 'warm_start_prior': True},
+                ))
+            self.study.add_trials(prior_trials)
+            count += len(prior_trials)
+        elif mode != 'enqueue':
+            logger.warning(f"Unknown warm start mode '{mode}'. Enqueued the best configurations only.")
+        logger.info(f"Warm-started study '{self.study_name}' ({mode}): best earlier configuration "
+                    f"{trials[0].user_attrs['warm_start_source']} (value {trials[0].value:.6f}) runs as the first trial; "
+                    f"{count} trial(s) seeded in total.")
+        return count
+
     def _recursive_update(self, d: Dict, u: Dict) -> Dict:
         """Recursively update dictionary d with u."""
         for k, v in u.items():
@@ -303,18 +581,8 @@ class HPOptimizer:
         """
         logger.info(f"--- Starting Optuna Trial {trial.number} ---")
         
-        trial_config = {} # Start with an empty dict
-        # Deep copy of base_config to avoid modifying it across trials
-        for key, value in self.base_config.items():
-            if isinstance(value, dict):
-                trial_config[key] = {k: v for k, v in value.items()} # Shallow copy for top-level dicts
-                if isinstance(trial_config[key].get('params'), dict): # Deeper copy for model.params
-                     trial_config[key]['params'] = {k_p: v_p for k_p, v_p in trial_config[key]['params'].items()}
-                if isinstance(trial_config[key].get('optimizer_params'), dict): # Deeper copy for training.optimizer_params
-                     trial_config[key]['optimizer_params'] = {k_op: v_op for k_op, v_op in trial_config[key]['optimizer_params'].items()}
-
-            else:
-                trial_config[key] = value
+        # Deep copy of base_config, so suggested values (e.g. list entries like fc_units.0) never leak between trials
+        trial_config = copy.deepcopy(self.base_config)
         
         # Get hyperparameters for this trial using the new define_search_space
         flat_hpo_params = self.define_search_space(trial)
@@ -322,6 +590,14 @@ class HPOptimizer:
         # Update trial_config with flat_hpo_params
         for path_key, value in flat_hpo_params.items():
             self._set_value_from_path(trial_config, path_key, value)
+
+        # Separate checkpoint/log directories, so concurrent trials never overwrite each other's files
+        trial_dir = os.path.join(_base_checkpoint_dir(self.base_config), 'hpo_trials', f"trial_{trial.number}")
+        trial_config['checkpoint_dir'] = trial_dir
+        trial_config['log_dir'] = os.path.join(trial_dir, 'logs')
+        trial.set_user_attr('checkpoint_dir', trial_dir)
+        trial.set_user_attr('best_checkpoint', os.path.join(trial_dir, 'best_model.pth'))
+        start_time = time.monotonic()
         logger.debug(f"Trial {trial.number}: Effective configuration after HPO update: {trial_config}")
             
         try:
@@ -348,6 +624,12 @@ class HPOptimizer:
             # Or pass individual HPO trial specific settings for epochs directly.
             trainer_effective_config = trial_config # Pass the fully resolved config for this trial
             
+            if self.rungs is not None:
+                metric_to_optimize = self._run_rungs(trial, model, optimizer, criterion, trainer_effective_config)
+                trial.set_user_attr('train_seconds', time.monotonic() - start_time)
+                logger.info(f"--- Finished Optuna Trial {trial.number} --- Result (Metric: {metric_to_optimize:.6f})")
+                return metric_to_optimize
+
             pruning_cb = self._create_objective_callback(trial)
 
             trainer = Trainer(
@@ -362,6 +644,10 @@ class HPOptimizer:
             )
             
             trainer.train() 
+            trial.set_user_attr('train_seconds', time.monotonic() - start_time)
+            self._record_model_cost(trial, trainer)
+            if trainer.stop_reason == 'pruned':
+                raise optuna.TrialPruned(f"Pruned at epoch {trainer.current_epoch}") # Trainer stops quietly; tell Optuna
             
             # Metric for Optuna. Trainer should store the best metric achieved.
             # The direction ('minimize' or 'maximize') is set in the Optuna study.
@@ -389,6 +675,76 @@ class HPOptimizer:
             logger.error(f"Error during Optuna trial {trial.number}: {e}", exc_info=True)
             return float('inf') if self.direction == "minimize" else float('-inf') 
 
+    def _rung_loader(self, data_fraction: float) -> DataLoader:
+        """Training loader over the first data_fraction of a fixed random order (rungs use nested subsets)."""
+        if data_fraction >= 1.0:
+            return self.train_loader
+        count = max(1, int(round(data_fraction * len(self._rung_order))))
+        subset = Subset(self.train_loader.dataset, self._rung_order[:count])
+        loader = self.train_loader
+        workers = loader.num_workers
+        return DataLoader(subset, batch_size=loader.batch_size, sampler=ResumableSampler(subset, shuffle=True),
+                          num_workers=workers, pin_memory=loader.pin_memory, collate_fn=loader.collate_fn,
+                          prefetch_factor=loader.prefetch_factor if workers else None,
+                          persistent_workers=loader.persistent_workers if workers else False)
+
+    @staticmethod
+    def _record_model_cost(trial: optuna.trial.Trial, trainer: Trainer) -> None:
+        """Stores the trial model's parameter count and FLOPs per sample as user attributes."""
+        for key in ('parameters', 'flops_per_sample'):
+            if key in (trainer.model_cost or {}):
+                trial.set_user_attr(key, trainer.model_cost[key])
+
+    def _run_rungs(self, trial: optuna.trial.Trial, model: nn.Module, optimizer: optim.Optimizer,
+                   criterion: nn.Module, trial_config: Dict[str, Any]) -> float:
+        """Trains a trial rung by rung, continuing from the previous rung's weights.
+
+        After each rung the validation loss is reported at the rung's resource
+        step; the pruner decides whether the trial is promoted to the next, larger
+        budget. The LR scheduler, best validation loss and early-stopping counters
+        carry over between rungs, so the rungs together behave like one training
+        run on a growing data fraction; if early stopping triggers, the trial ends
+        at that rung. Each rung's final weights are saved to rung_<r>.pth in the
+        trial directory.
+        """
+        epochs_done = 0
+        val_loss = float('inf')
+        trainer = None
+        for rung in self.rungs:
+            rung_config = dict(trial_config)
+            rung_config['epochs'] = rung['epochs'] - epochs_done # Additional epochs on top of earlier rungs
+            logger.info(f"Trial {trial.number} rung {rung['rung']}: {rung['data_fraction']:.0%} of the training data, "
+                        f"epochs {epochs_done + 1}-{epochs_done + rung_config['epochs']}")
+            previous = trainer
+            trainer = Trainer(
+                model=model,
+                optimizer=optimizer, # Same model and optimizer state, so the rung continues where the last one ended
+                criterion=criterion,
+                config=rung_config,
+                train_loader=self._rung_loader(rung['data_fraction']),
+                val_loader=self.val_loader,
+                device=self.device,
+                scheduler=previous.scheduler if previous is not None else None,
+            )
+            if previous is not None:
+                trainer.continue_from(previous)
+            trainer.train()
+            self._record_model_cost(trial, trainer)
+            epochs_done += rung_config['epochs']
+            val_loss = trainer.best_val_loss
+            atomic_torch_save({'rung': rung, 'epochs': epochs_done, 'model_state_dict': model.state_dict(),
+                               'optimizer_state_dict': optimizer.state_dict(), 'val_loss': val_loss, 'config': trial_config},
+                              os.path.join(trial_config['checkpoint_dir'], f"rung_{rung['rung']}.pth"))
+            trial.set_user_attr('completed_rung', rung['rung'])
+            trial.report(val_loss, rung['resource'])
+            if trial.should_prune():
+                logger.info(f"Trial {trial.number} stopped after rung {rung['rung']} (val_loss {val_loss:.4f}).")
+                raise optuna.TrialPruned(f"Stopped after rung {rung['rung']}")
+            if trainer.stop_reason == 'early_stopping':
+                logger.info(f"Trial {trial.number} stopped early in rung {rung['rung']}; not promoting it further.")
+                break
+        return val_loss
+
     def run_optimization(self, 
                          n_trials: int = 50, 
                          timeout: Optional[int] = None,
@@ -406,33 +762,85 @@ class HPOptimizer:
                 n_trials=n_trials, 
                 timeout=timeout,
                 n_jobs=n_jobs,
-                catch=catch
+                catch=catch,
+                callbacks=[self.retention] if self.retention else None
             )
             logger.info(f"Optimization finished. Total trials in study: {len(self.study.trials)}")
             try:
-                 logger.info(f"Best trial number: {self.study.best_trial.number}")
-                 logger.info(f"Best value ({self.direction}): {self.study.best_value:.6f}")
-                 logger.info(f"Best parameters: {self.study.best_params}") # These are the flat keys from define_search_space
+                 best_trial = self.best_trial()
+                 logger.info(f"Best trial number: {best_trial.number}")
+                 logger.info(f"Best value ({self.direction}): {best_trial.value:.6f}")
+                 logger.info(f"Best parameters: {best_trial.params}") # These are the flat keys from define_search_space
             except ValueError:
                  logger.warning("No completed trials found in the study.")
                  
         except KeyboardInterrupt:
              logger.warning("Optimization stopped manually via KeyboardInterrupt.")
              try:
-                 logger.info(f"Current best value ({self.direction}): {self.study.best_value:.6f}")
-                 logger.info(f"Current best parameters: {self.study.best_params}")
+                 logger.info(f"Current best value ({self.direction}): {self.best_trial().value:.6f}")
+                 logger.info(f"Current best parameters: {self.best_trial().params}")
              except ValueError:
                  logger.info("No completed trials were found before interruption.")
         except Exception as e:
             logger.error(f"Optuna optimization failed: {e}", exc_info=True)
             raise
 
+    def run_worker(self, n_trials: int, timeout: Optional[int] = None) -> None:
+        """Runs trials of a shared study until it holds n_trials trials (counted across all workers).
+
+        Trials already running in other workers count, so the total overshoots
+        n_trials by at most the number of workers that start at the same time.
+        """
+        # Warm-start prior trials were never run here and do not use up the budget
+        n_trials += sum(1 for t in self.study.get_trials(deepcopy=False) if t.user_attrs.get('warm_start_prior'))
+        counted = len(self.study.get_trials(deepcopy=False, states=_COUNTED_TRIAL_STATES))
+        if counted >= n_trials:
+            logger.info(f"Study '{self.study_name}' already has {counted}/{n_trials} trials. Nothing to do.")
+            return
+        logger.info(f"HPO worker (pid {os.getpid()}) joining study '{self.study_name}' ({counted}/{n_trials} trials so far).")
+        self.study.optimize(
+            self.objective,
+            timeout=timeout,
+            callbacks=[optuna.study.MaxTrialsCallback(n_trials, states=_COUNTED_TRIAL_STATES)] + ([self.retention] if self.retention else []),
+            catch=(),
+        )
+        logger.info(f"HPO worker (pid {os.getpid()}) finished. Trials in study: {len(self.study.trials)}")
+
+    def build_final_config(self, best_params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Deep copy of the base config with the best (flat, dotted-path) hyperparameters applied."""
+        final_config = copy.deepcopy(self.base_config)
+        for path_key, value in (self.get_best_params() if best_params is None else best_params).items():
+            self._set_value_from_path(final_config, path_key, value)
+        return final_config
+
+    def best_trial(self) -> optuna.trial.FrozenTrial:
+        """Best completed trial run in this study (warm-start prior trials from other studies are ignored).
+
+        Raises:
+            ValueError: If no trial has completed.
+        """
+        completed = [t for t in self.study.get_trials(deepcopy=False, states=(optuna.trial.TrialState.COMPLETE,))
+                     if t.value is not None and not t.user_attrs.get('warm_start_prior')]
+        if not completed:
+            raise ValueError(f"No completed trials in study '{self.study_name}'.")
+        if self.study.direction == optuna.study.StudyDirection.MAXIMIZE:
+            return max(completed, key=lambda t: t.value)
+        return min(completed, key=lambda t: t.value)
+
+    def best_trial_checkpoint(self) -> Optional[str]:
+        """Path of the best trial's best_model.pth, or None if there is no completed trial or the file is gone."""
+        try:
+            path = self.best_trial().user_attrs.get('best_checkpoint')
+        except ValueError:
+            return None
+        return path if path and os.path.exists(path) else None
+
     def get_best_params(self) -> Dict[str, Any]:
         """Returns the best hyperparameters found by the Optuna study.
            These are the flat parameters as defined in define_search_space.
         """
         try:
-            return self.study.best_params # Returns the flat dictionary of best HPO params
+            return dict(self.best_trial().params) # Returns the flat dictionary of best HPO params
         except ValueError:
             logger.warning("No completed trials in the study yet. Cannot get best parameters.")
             return {}
@@ -443,7 +851,7 @@ class HPOptimizer:
     def get_best_value(self) -> Optional[float]:
         """Returns the best objective function value found by the Optuna study."""
         try:
-            return self.study.best_value
+            return self.best_trial().value
         except ValueError:
             logger.warning("No completed trials in the study yet. Cannot get best value.")
             return None
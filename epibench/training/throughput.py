@@ -0,0 +1,128 @@
+# epibench/training/throughput.py
+
+"""Step-level throughput instrumentation: data-wait vs compute time, samples/sec and memory."""
+
+import logging
+import os
+import sys
+import time
+from typing import Any, Dict, Iterable, Iterator, Optional
+
+import psutil
+import torch
+
+logger = logging.getLogger(__name__)
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process in MB (current RSS where the peak is unavailable)."""
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is reported in kilobytes on Linux and in bytes on macOS
+        return peak / (1024 ** 2) if sys.platform == 'darwin' else peak / 1024
+    except (ImportError, OSError):
+        return psutil.Process(os.getpid()).memory_info().rss / (1024 ** 2)
+
+
+def memory_stats(device: torch.device) -> Dict[str, float]:
+    """Current and peak host memory of this process plus CUDA memory of ``device`` when it is a GPU (MB)."""
+    stats = {
+        'rss_mb': psutil.Process(os.getpid()).memory_info().rss / (1024 ** 2),
+        'peak_rss_mb': peak_rss_mb(),
+    }
+    if device.type == 'cuda':
+        stats['cuda_allocated_mb'] = torch.cuda.memory_allocated(device) / (1024 ** 2)
+        stats['cuda_max_allocated_mb'] = torch.cuda.max_memory_allocated(device) / (1024 ** 2)
+    return stats
+
+
+class ThroughputMonitor:
+    """Splits training wall time into time waiting for batches and time spent computing.
+
+    Iterate the training loader through :meth:`wrap` (time spent inside the
+    loader's ``__next__`` counts as data wait) and call :meth:`step` after each
+    optimizer step. Everything else in the window (host-to-device copies,
+    forward, backward, optimizer) counts as compute. Every ``log_every_n_steps``
+    steps ``step`` synchronizes the device once, so the window timings include
+    queued GPU work, and returns the window statistics; no other step syncs.
+
+    Args:
+        device (torch.device): Training device.
+        log_every_n_steps (int): Window size in optimizer steps (0 disables window reports).
+    """
+    def __init__(self, device: torch.device, log_every_n_steps: int = 50):
+        if log_every_n_steps < 0:
+            raise ValueError(f"log_every_n_steps must be non-negative, got {log_every_n_steps}.")
+        self.device = device
+        self.log_every_n_steps = log_every_n_steps
+        self.totals = {'steps': 0, 'samples': 0, 'data_wait_seconds': 0.0, 'elapsed_seconds': 0.0}
+        self._reset_window()
+
+    def _reset_window(self):
+        self._window_start = time.perf_counter()
+        self._window_wait = 0.0
+        self._window_steps = 0
+        self._window_samples = 0
+
+    def start_epoch(self):
+        """Starts a new measurement window (excludes validation and checkpointing between epochs)."""
+        self._reset_window()
+
+    def wrap(self, iterable: Iterable) -> Iterator:
+        """Yields from ``iterable`` while accumulating the time spent waiting for each item."""
+        iterator = iter(iterable)
+        while True:
+            start = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            self._window_wait += time.perf_counter() - start
+            yield item
+
+    def _synchronize(self):
+        if self.device.type == 'cuda':
+            torch.cuda.synchronize(self.device)
+
+    def step(self, num_samples: int) -> Optional[Dict[str, float]]:
+        """Records one optimizer step; returns the window statistics when a report is due."""
+        self._window_steps += 1
+        self._window_samples += num_samples
+        if self.log_every_n_steps and self._window_steps >= self.log_every_n_steps:
+            return self.flush()
+        return None
+
+    def flush(self) -> Optional[Dict[str, float]]:
+        """Closes the current window (e.g. at epoch end) and returns its statistics, or None if it is empty."""
+        if not self._window_steps:
+            self._reset_window()
+            return None
+        self._synchronize()
+        elapsed = max(time.perf_counter() - self._window_start, 1e-9)
+        wait = min(self._window_wait, elapsed)
+        stats = {
+            'steps': self._window_steps,
+            'samples': self._window_samples,
+            'samples_per_sec': self._window_samples / elapsed,
+            'data_wait_seconds': wait,
+            'compute_seconds': elapsed - wait,
+            'data_wait_fraction': wait / elapsed,
+        }
+        stats.update(memory_stats(self.device))
+        self.totals['steps'] += self._window_steps
+        self.totals['samples'] += self._window_samples
+        self.totals['data_wait_seconds'] += wait
+        self.totals['elapsed_seconds'] += elapsed
+        self._reset_window()
+        return stats
+
+    def summary(self) -> Dict[str, Any]:
+        """Run-level totals over all closed windows."""
+        elapsed = self.totals['elapsed_seconds']
+        summary: Dict[str, Any] = dict(self.totals)
+        summary['compute_seconds'] = elapsed - self.totals['data_wait_seconds']
+        summary['samples_per_sec'] = self.totals['samples'] / elapsed if elapsed > 0 else None
+        summary['data_wait_fraction'] = self.totals['data_wait_seconds'] / elapsed if elapsed > 0 else None
+        summary.update(memory_stats(self.device))
+        return summary
@@ -1,5 +1,5 @@
 import torch
-from torch.utils.data import DataLoader
+from torch.utils.data import DataLoader, Subset
 import torch.nn as nn
 import torch.optim as optim
 from tqdm import tqdm
@@ -7,15 +7,56 @@ import logging
 import os
 from torch.utils.tensorboard import SummaryWriter
 from datetime import datetime
-from torch.cuda.amp import GradScaler, autocast # Import for mixed precision
+from torch.amp import GradScaler, autocast # Device-generic mixed precision (CUDA float16, CPU bfloat16)
 import gc # For garbage collection if needed
 from typing import Optional, Dict, Any, Callable # For type hinting + Callable
 import optuna
 import shutil
+import itertools
+import time
+import inspect
+import json
+import copy
+
+from epibench.data.prefetch import BackgroundPrefetcher, maybe_prefetch
+from epibench.data.transforms import build_crop_transforms
+from epibench.data.samplers import LossAwareSampler, ResumableSampler, dataset_targets, stratified_subset_indices
+from epibench.models.loading import compile_model, example_input_from_dataset, get_compile_config
+from epibench.models.profiling import model_cost
+from epibench.training.checkpoint import (TRAINING_STATE_FILENAME, TRAINING_STATE_VERSION, AsyncCheckpointWriter,
+                                          gather_rng_states, restore_rank_rng_state)
+from epibench.training.distributed import (NullSummaryWriter, all_reduce_sum, barrier, distributed_sampler,
+                                           is_distributed, is_main_process, wrap_model)
+from epibench.training.throughput import ThroughputMonitor
+from epibench.utils.performance import describe_runtime, resolve_amp_dtype
 
 # Use the root logger configured by LoggerManager
 logger = logging.getLogger(__name__) # Get logger for this module
 
+TRAINING_SUMMARY_FILENAME = 'training_summary.json'
+
+
+def build_lr_scheduler(optimizer: optim.Optimizer, name: str, params: Optional[Dict[str, Any]] = None):
+    """Creates a torch.optim.lr_scheduler by class name.
+
+    Parameters the installed PyTorch version does not accept (e.g. 'verbose',
+    removed in PyTorch 2.2+) are dropped with a warning instead of failing.
+
+    Raises:
+        ValueError: If the scheduler name is unknown.
+    """
+    SchedulerClass = getattr(optim.lr_scheduler, name, None)
+    if SchedulerClass is None or not inspect.isclass(SchedulerClass):
+        raise ValueError(f"Unknown learning rate scheduler: {name}")
+    params = dict(params or {})
+    accepted = inspect.signature(SchedulerClass.__init__).parameters
+    if not any(p.kind == inspect.Parameter.VAR_KEYWORD for p in accepted.values()):
+        unsupported = [key for key in params if key not in accepted]
+        if unsupported:
+            logger.warning(f"Ignoring scheduler parameters not supported by {name}: {unsupported}")
+            params = {key: value for key, value in params.items() if key in accepted}
+    return SchedulerClass(optimizer, **params)
+
 class Trainer:
     """
     Handles the training and validation loops for a PyTorch model.
@@ -25,7 +66,9 @@ class Trainer:
     def __init__(self, model: nn.Module, optimizer: optim.Optimizer, criterion: nn.Module,
                  config: Dict[str, Any], 
                  train_loader: DataLoader, val_loader: DataLoader, device: torch.device,
-                 pruning_callback: Optional[Callable[[int, float], None]] = None # Add pruning callback
+                 pruning_callback: Optional[Callable[[int, float], None]] = None, # Add pruning callback
+                 scheduler: Optional[Any] = None,
+                 log_manager: Optional[Any] = None
                  ):
         """
         Initializes the Trainer, configuring settings from the config dictionary.
@@ -36,19 +79,54 @@ class Trainer:
             criterion: The loss function.
             config: Configuration dictionary containing settings like:
                 - epochs (int, default: 10)
-                - use_mixed_precision (bool, default: False)
-                - use_gradient_checkpointing (bool, default: False) # Model needs to implement this
+                - use_mixed_precision / training.use_amp (bool, default: False): Autocast on CUDA or CPU.
+                - training.amp_dtype (str, optional): 'float16' or 'bfloat16' (default: float16 on CUDA, bfloat16 on CPU).
+                - use_gradient_checkpointing (bool, default: False): Recompute activations in the backward pass
+                  (models with set_gradient_checkpointing, e.g. SeqCNNRegressor and SimpleTransformer).
                 - checkpoint_dir (str, default: 'checkpoints')
                 - log_dir (str, default: 'runs/epibench_experiment_<timestamp>')
                 - save_best_only (bool, default: True) # If true, only save best model
                 - save_every_n_epochs (int, optional): Save checkpoint every N epochs regardless of performance.
-            train_loader: DataLoader for the training set.
+                - training.save_state_every_n_steps (int, optional): Also write the resumable training state
+                  (last_state.pth, always written at the end of each epoch) every N optimizer steps.
+                - training.save_state_every_n_minutes (float, optional): Same, every N minutes of training.
+                - training.async_checkpointing (bool, default: True): Write checkpoints from a background thread.
+                - training.checkpoint_queue_size (int, default: 2): Checkpoints that may be queued before saving blocks.
+                - training.keep_last_checkpoints (int, optional): Keep only the newest N periodic epoch checkpoints.
+                - data.prefetch_batches (int, default: 0): Batches to load ahead in a background thread (0 disables).
+                - model.compile (bool or dict, optional): torch.compile settings (see epibench.models.loading.compile_model).
+                - training.distributed (dict, optional): DDP options used when launched with `epibench launch`:
+                  sync_batchnorm (bool, default: False), find_unused_parameters (bool, default: False).
+                - training.early_stopping_patience (int, optional): Stop after N epochs without a validation
+                  loss improvement larger than training.early_stopping_min_delta (float, default: 0.0).
+                - training.scheduler (str, optional) / training.scheduler_params (dict): A torch.optim.lr_scheduler
+                  class, stepped once per epoch (ReduceLROnPlateau with the validation loss).
+                - training.gradient_clipping (float, optional): Max global gradient norm (0 or null disables).
+                - training.log_every_n_steps (int, default: 50): Interval of the step loss, samples/sec,
+                  data-wait/compute time and memory reports (TensorBoard 'Perf/*'; 0 disables).
+                - training.check_finite_loss (bool, default: False): Skip optimizer steps with a NaN/inf loss
+                  by reading the loss on the host every step (a device synchronization). Without it, such steps
+                  are neutralized on the device instead: their gradients are zeroed and their loss is left out
+                  of the epoch average (the optimizer still steps, so momentum can move the weights), and they
+                  are counted and reported at the end of the epoch.
+                - training.val_every_n_epochs (int, default: 1): Validate every N epochs (and after the last one).
+                - training.val_every_n_steps (int, optional): Additionally validate every N optimizer steps.
+                  Pruning callbacks then receive the global step instead of the epoch.
+                - training.val_subset_size (int or float, optional): Validate on a fixed subset of this many
+                  samples (or fraction) stratified by target. Best-model selection, early stopping, the
+                  plateau scheduler and pruning use the subset loss; the full split is validated every
+                  training.full_val_every_n_epochs epochs (default: none) and after the last epoch.
+            train_loader: DataLoader for the training set. With a LossAwareSampler the per-sample losses are
+                importance-weighted and fed back to the sampler (the reported training loss is the weighted one).
             val_loader: DataLoader for the validation set.
             device: The device to run training on (e.g., 'cuda' or 'cpu').
             pruning_callback: Optional callback for Optuna pruning (epoch, val_loss) -> None.
+            scheduler: Optional learning rate scheduler, overriding training.scheduler. Its state is included in checkpoints.
+            log_manager: Optional LogManager; the training summary is added to its active run log.
         """
         self.model = model.to(device)
         self.optimizer = optimizer
+        self.scheduler = scheduler
         self.criterion = criterion
         self.config = config
         self.train_loader = train_loader
@@ -56,10 +134,22 @@ class Trainer:
         self.device = device
         self.current_epoch = 0
         self.best_val_loss = float('inf')
+        self.start_epoch = 0
+        self.global_step = 0
+        self.history = {'train_loss': [], 'val_loss': []}
+        self._resume_position = None # Mid-epoch position restored by resume()
+        self.model_cost = None # Parameters and FLOPs, measured when train() starts
+        self._epoch_loader_rng_state = None
         self._pruning_callback = pruning_callback # Store the callback
+        self.log_manager = log_manager
+        self.stop_reason = None
+        self.best_epoch = None
+        # In multi-process runs only rank 0 writes checkpoints, TensorBoard logs and progress bars
+        self.distributed = is_distributed()
+        self.is_main_process = is_main_process()
 
         # --- Configuration derived attributes ---
-        self.epochs = self.config.get('epochs', 10)
+        self.epochs = self._get_setting('epochs', 10)
         if not isinstance(self.epochs, int) or self.epochs <= 0:
             logger.warning(f"Invalid 'epochs' value ({self.epochs}). Using default 10.")
             self.epochs = 10
@@ -68,30 +158,185 @@ class Trainer:
         default_log_dir = f"runs/epibench_experiment_{timestamp}"
         default_checkpoint_dir = f"checkpoints/epibench_experiment_{timestamp}"
         
-        self.log_dir = self.config.get('log_dir', default_log_dir)
-        self.checkpoint_dir = self.config.get('checkpoint_dir', default_checkpoint_dir)
-        self.save_best_only = self.config.get('save_best_only', True)
-        self.save_every_n_epochs = self.config.get('save_every_n_epochs', None)
+        self.log_dir = self._get_setting('log_dir', default_log_dir)
+        self.checkpoint_dir = self._get_setting('checkpoint_dir', default_checkpoint_dir)
+        self.save_best_only = self._get_setting('save_best_only', True)
+        self.save_every_n_epochs = self._get_setting('save_every_n_epochs', None)
         if self.save_every_n_epochs is not None and (not isinstance(self.save_every_n_epochs, int) or self.save_every_n_epochs <= 0):
              logger.warning(f"Invalid 'save_every_n_epochs' ({self.save_every_n_epochs}). Disabling periodic saving.")
              self.save_every_n_epochs = None
 
+        # --- Early Stopping, LR Scheduling and Gradient Clipping ---
+        self.early_stopping_patience = self._get_setting('early_stopping_patience')
+        if self.early_stopping_patience is not None and (not isinstance(self.early_stopping_patience, int) or self.early_stopping_patience <= 0):
+            logger.warning(f"Invalid 'early_stopping_patience' ({self.early_stopping_patience}). Disabling early stopping.")
+            self.early_stopping_patience = None
+        self.early_stopping_min_delta = float(self._get_setting('early_stopping_min_delta', 0.0) or 0.0)
+        early_stopping_metric = self._get_setting('early_stopping_metric', 'val_loss')
+        if early_stopping_metric != 'val_loss':
+            logger.warning(f"Early stopping only supports 'val_loss' (got '{early_stopping_metric}'). Monitoring validation loss.")
+        self.epochs_without_improvement = 0
+        self._early_stopping_best = float('inf')
+
+        if self.scheduler is None and self._get_setting('scheduler'):
+            self.scheduler = build_lr_scheduler(self.optimizer, self._get_setting('scheduler'), self._get_setting('scheduler_params'))
+        if self.scheduler is not None:
+            logger.info(f"Learning rate scheduler: {type(self.scheduler).__name__}")
+
+        self.gradient_clipping = self._get_setting('gradient_clipping')
+        if self.gradient_clipping is not None and (not isinstance(self.gradient_clipping, (int, float)) or self.gradient_clipping < 0):
+            logger.warning(f"Invalid 'gradient_clipping' ({self.gradient_clipping}). Disabling gradient clipping.")
+            self.gradient_clipping = None
+        self.gradient_clipping = self.gradient_clipping or None # 0 disables
+
+        # --- Step-Level Instrumentation ---
+        self.log_every_n_steps = int(self._get_setting('log_every_n_steps', 50) or 0)
+        self.check_finite_loss = bool(self._get_setting('check_finite_loss', False))
+        self.throughput = ThroughputMonitor(self.device, self.log_every_n_steps)
+
+        # --- Loss-Aware Sampling ---
+        # A LossAwareSampler needs the per-sample losses: the loss is rebuilt with reduction='none' and weighted
+        sampler = getattr(self.train_loader, 'sampler', None)
+        self.loss_aware_sampler = sampler if isinstance(sampler, LossAwareSampler) else None
+        if self.loss_aware_sampler is not None:
+            if not hasattr(criterion, 'reduction'):
+                raise ValueError(f"Loss-aware sampling needs a loss with a 'reduction' option; {type(criterion).__name__} has none.")
+            self.sample_criterion = copy.copy(criterion)
+            self.sample_criterion.reduction = 'none'
+            self.loss_aware_sampler.to(self.device)
+            logger.info("Training with loss-aware importance sampling (importance-weighted training loss).")
+
+        # --- Input Cropping ---
+        # Checkpoints record the evaluation crop length so evaluate/predict use the same input geometry
+        _, eval_crop = build_crop_transforms(self.config.get('data', {}).get('crop'))
+        self.crop_length = eval_crop.length if eval_crop is not None else None
+
+        # --- Validation Cadence ---
+        self.val_every_n_epochs = self._get_setting('val_every_n_epochs', 1)
+        if not isinstance(self.val_every_n_epochs, int) or self.val_every_n_epochs <= 0:
+            logger.warning(f"Invalid 'val_every_n_epochs' ({self.val_every_n_epochs}). Validating every epoch.")
+            self.val_every_n_epochs = 1
+        self.val_every_n_steps = self._get_setting('val_every_n_steps')
+        if self.val_every_n_steps is not None and (not isinstance(self.val_every_n_steps, int) or self.val_every_n_steps <= 0):
+            logger.warning(f"Invalid 'val_every_n_steps' ({self.val_every_n_steps}). Disabling step-based validation.")
+            self.val_every_n_steps = None
+        self.full_val_every_n_epochs = self._get_setting('full_val_every_n_epochs')
+        if self.full_val_every_n_epochs is not None and (not isinstance(self.full_val_every_n_epochs, int) or self.full_val_every_n_epochs <= 0):
+            logger.warning(f"Invalid 'full_val_every_n_epochs' ({self.full_val_every_n_epochs}). Running full validation after the last epoch only.")
+            self.full_val_every_n_epochs = None
+        self.val_subset_loader = self._build_val_subset_loader(self._get_setting('val_subset_size'))
+        self._stop_requested = False # Set by mid-epoch validation when early stopping triggers
+
+        # --- Resumable Training State ---
+        self.training_state_path = os.path.join(self.checkpoint_dir, TRAINING_STATE_FILENAME)
+        self.save_state_every_n_steps = self._get_setting('save_state_every_n_steps')
+        if self.save_state_every_n_steps is not None and (not isinstance(self.save_state_every_n_steps, int) or self.save_state_every_n_steps <= 0):
+            logger.warning(f"Invalid 'save_state_every_n_steps' ({self.save_state_every_n_steps}). Disabling step-based state saving.")
+            self.save_state_every_n_steps = None
+        self.save_state_every_n_minutes = self._get_setting('save_state_every_n_minutes')
+        if self.save_state_every_n_minutes is not None and (not isinstance(self.save_state_every_n_minutes, (int, float)) or self.save_state_every_n_minutes <= 0):
+            logger.warning(f"Invalid 'save_state_every_n_minutes' ({self.save_state_every_n_minutes}). Disabling time-based state saving.")
+            self.save_state_every_n_minutes = None
+        self._last_state_save_time = time.monotonic()
+
+        # --- Checkpoint Writer ---
+        keep_last = self._get_setting('keep_last_checkpoints')
+        if keep_last is not None and (not isinstance(keep_last, int) or keep_last <= 0):
+            logger.warning(f"Invalid 'keep_last_checkpoints' ({keep_last}). Keeping all periodic checkpoints.")
+            keep_last = None
+        self.checkpoint_writer = AsyncCheckpointWriter(
+            max_pending=self._get_setting('checkpoint_queue_size', 2),
+            keep_last=keep_last,
+            asynchronous=bool(self._get_setting('async_checkpointing', True)),
+        )
+
         os.makedirs(self.checkpoint_dir, exist_ok=True)
         os.makedirs(self.log_dir, exist_ok=True) # Ensure log dir exists
-        self.writer = SummaryWriter(log_dir=self.log_dir)
+        self.writer = SummaryWriter(log_dir=self.log_dir) if self.is_main_process else NullSummaryWriter()
 
         # --- Mixed Precision Setup ---
-        self.use_mixed_precision = self.config.get('use_mixed_precision', False) and self.device.type == 'cuda'
-        self.scaler = GradScaler(enabled=self.use_mixed_precision)
+        # Autocast runs in float16 on CUDA and bfloat16 on CPU by default; only float16 needs loss scaling.
+        self.use_mixed_precision = bool(self._get_setting('use_mixed_precision', self._get_setting('use_amp', False)))
+        self.amp_dtype = resolve_amp_dtype(self.device, self._get_setting('amp_dtype'))
+        self.scaler = GradScaler(self.device.type, enabled=self.use_mixed_precision and self.amp_dtype == torch.float16)
         if self.use_mixed_precision:
-            logger.info("Mixed precision training enabled.")
+            logger.info(f"Mixed precision training enabled ({self.amp_dtype} autocast on {self.device.type}, loss scaling {'on' if self.scaler.is_enabled() else 'off'}).")
         else:
             logger.info("Mixed precision training disabled.")
             
-        # Note: Gradient checkpointing needs to be implemented within the model's forward pass
-        self.use_gradient_checkpointing = self.config.get('use_gradient_checkpointing', False)
+        # Activation checkpointing trades one extra forward pass per segment for much smaller stored activations
+        self.use_gradient_checkpointing = bool(self._get_setting('use_gradient_checkpointing', False))
         if self.use_gradient_checkpointing:
-             logger.info("Gradient Checkpointing configured (ensure model implements it).")
+            if hasattr(self.model, 'set_gradient_checkpointing'):
+                self.model.set_gradient_checkpointing(True)
+                logger.info("Gradient checkpointing enabled: activations are recomputed in the backward pass.")
+            else:
+                logger.warning(f"'use_gradient_checkpointing' is set but {type(self.model).__name__} does not support it. Ignoring it.")
+
+        # --- Background Prefetching ---
+        self.prefetch_batches = self.config.get('data', {}).get('prefetch_batches', 0) or 0
+        if not isinstance(self.prefetch_batches, int) or self.prefetch_batches < 0:
+            logger.warning(f"Invalid 'data.prefetch_batches' ({self.prefetch_batches}). Disabling prefetching.")
+            self.prefetch_batches = 0
+        if self.prefetch_batches:
+            logger.info(f"Background prefetching enabled ({self.prefetch_batches} batches).")
+
+        # --- Distributed Data Parallel and Compilation ---
+        # forward_model runs the forward passes; self.model stays the unwrapped module for state dicts and checkpoints.
+        self.forward_model = self.model
+        if self.distributed:
+            distributed_config = self._get_setting('distributed', {}) or {}
+            self.forward_model = wrap_model(self.model, self.device,
+                                            sync_batchnorm=distributed_config.get('sync_batchnorm', False),
+                                            find_unused_parameters=distributed_config.get('find_unused_parameters', False))
+            self.model = self.forward_model.module # Same module, with SyncBatchNorm layers if converted
+            logger.info(f"DistributedDataParallel enabled (rank {torch.distributed.get_rank()}/{torch.distributed.get_world_size()}).")
+        compile_config = get_compile_config(self.config)
+        if compile_config.get('enabled', False):
+            example_input = None
+            try:
+                example_input = example_input_from_dataset(self.train_loader.dataset, self.device,
+                                                           batch_size=getattr(self.train_loader, 'batch_size', 1))
+            except Exception as e:
+                logger.warning(f"Could not build an example input for the compile warm-up: {e}")
+            # Warm up under the training autocast settings so the compiled graphs match the training steps
+            with autocast(device_type=self.device.type, dtype=self.amp_dtype, enabled=self.use_mixed_precision):
+                self.forward_model = compile_model(self.forward_model, compile_config, example_input=example_input, for_training=True)
+
+        num_workers = getattr(self.train_loader, 'num_workers', 0) or 0
+        logger.info(f"Effective runtime settings: {describe_runtime(self.device)} (DataLoader workers: {num_workers})")
+
+    def _build_val_subset_loader(self, subset_size) -> Optional[DataLoader]:
+        """DataLoader over a fixed, target-stratified subset of the validation set (None if not configured)."""
+        if subset_size is None or self.val_loader is None:
+            return None
+        dataset = self.val_loader.dataset
+        seed = self.config.get('data', {}).get('seed', 0)
+        try:
+            indices = stratified_subset_indices(dataset_targets(dataset), subset_size, seed=seed)
+        except (ValueError, TypeError) as e:
+            logger.warning(f"Invalid 'val_subset_size' ({subset_size}): {e}. Validating on the full split.")
+            return None
+        subset = Subset(dataset, indices.tolist()) # Same subset on every rank (seeded); sharded below
+        workers = self.val_loader.num_workers
+        loader = DataLoader(subset, batch_size=self.val_loader.batch_size, shuffle=False,
+                            sampler=distributed_sampler(subset, shuffle=False),
+                            num_workers=workers, pin_memory=self.val_loader.pin_memory,
+                            collate_fn=self.val_loader.collate_fn,
+                            prefetch_factor=self.val_loader.prefetch_factor if workers else None,
+                            persistent_workers=self.val_loader.persistent_workers if workers else False)
+        logger.info(f"Fast validation on a stratified subset of {len(indices)}/{len(dataset)} samples.")
+        return loader
+
+    def _get_setting(self, key: str, default: Any = None) -> Any:
+        """Looks up a trainer setting at the top level of the config, then in 'training', then in 'output'."""
+        if key in self.config:
+            return self.config[key]
+        for section in ('training', 'output'):
+            section_config = self.config.get(section)
+            if isinstance(section_config, dict) and key in section_config:
+                return section_config[key]
+        return default
 
     def _save_checkpoint(self, is_best=False):
         """Saves the current model state as a checkpoint.
@@ -101,6 +346,8 @@ class Trainer:
         Args:
             is_best (bool): If True, saves as 'best_model.pth'.
         """
+        if not self.is_main_process:
+            return
         if is_best:
             filename = "best_model.pth"
         elif self.save_every_n_epochs and (self.current_epoch + 1) % self.save_every_n_epochs == 0:
@@ -114,15 +361,143 @@ class Trainer:
             'epoch': self.current_epoch + 1,
             'model_state_dict': self.model.state_dict(),
             'optimizer_state_dict': self.optimizer.state_dict(),
-            'scaler_state_dict': self.scaler.state_dict() if self.use_mixed_precision else None, 
+            'scaler_state_dict': self.scaler.state_dict() if self.scaler.is_enabled() else None, 
+            'scheduler_state_dict': self.scheduler.state_dict() if self.scheduler is not None else None,
             'best_val_loss': self.best_val_loss,
+            'crop_length': self.crop_length, # Input length seen at validation (None: full windows)
             'config': self.config # Save config used for this run
         }
-        try:
-             torch.save(state, checkpoint_path)
-             logger.info(f"Checkpoint saved to {checkpoint_path}")
-        except Exception as e:
-             logger.error(f"Failed to save checkpoint {checkpoint_path}: {e}", exc_info=True)
+        # Snapshot to CPU now, serialize in the background; periodic epoch files are subject to keep_last_checkpoints
+        self.checkpoint_writer.submit(state, checkpoint_path, retention_group=None if is_best else 'periodic')
+
+    def save_training_state(self, epoch: int, batches_done: int = 0, epoch_loss_sum: float = 0.0):
+        """Writes the full training state to ``last_state.pth`` so the run can be resumed exactly.
+
+        Besides the model/optimizer/scaler/scheduler states this captures the RNG
+        states of every rank, the sampler position, the loss accumulated so far
+        in the current epoch and the per-epoch history. Must be called by all
+        ranks at the same step in distributed runs; only rank 0 writes.
+
+        Args:
+            epoch (int): Epoch to continue from (0-based).
+            batches_done (int): Training batches of ``epoch`` already completed (0 at an epoch boundary).
+            epoch_loss_sum (float): Sum of the batch losses of those batches.
+        """
+        rng_states = gather_rng_states()
+        self._last_state_save_time = time.monotonic()
+        if not self.is_main_process:
+            return
+        sampler = getattr(self.train_loader, 'sampler', None)
+        state = {
+            'training_state_version': TRAINING_STATE_VERSION,
+            'epoch': epoch,
+            'batches_done': batches_done,
+            'epoch_loss_sum': epoch_loss_sum,
+            'global_step': self.global_step,
+            'model_state_dict': self.model.state_dict(),
+            'optimizer_state_dict': self.optimizer.state_dict(),
+            'scaler_state_dict': self.scaler.state_dict() if self.scaler.is_enabled() else None,
+            'scheduler_state_dict': self.scheduler.state_dict() if self.scheduler is not None else None,
+            'best_val_loss': self.best_val_loss,
+            'history': self.history,
+            'best_epoch': self.best_epoch,
+            'early_stopping': {'best': self._early_stopping_best, 'epochs_without_improvement': self.epochs_without_improvement},
+            'rng_states': rng_states,
+            'sampler_state': sampler.state_dict() if isinstance(sampler, ResumableSampler) else None,
+            'loader_rng_state': self._epoch_loader_rng_state if batches_done else self._loader_rng_state(),
+            'config': self.config,
+        }
+        logger.info(f"Saving training state (epoch {epoch + 1}, batch {batches_done}, step {self.global_step})")
+        self.checkpoint_writer.submit(state, self.training_state_path) # Replaced atomically; never left truncated
+
+    def _loader_rng_state(self) -> Optional[torch.Tensor]:
+        """State of the training DataLoader's own generator (seeds its workers), if it has one."""
+        generator = getattr(self.train_loader, 'generator', None)
+        return generator.get_state() if generator is not None else None
+
+    def _state_save_due(self) -> bool:
+        """Whether the step- or time-based training-state interval has elapsed (same answer on all ranks)."""
+        if self.save_state_every_n_steps and self.global_step % self.save_state_every_n_steps == 0:
+            return True
+        if self.save_state_every_n_minutes:
+            due = (time.monotonic() - self._last_state_save_time) >= self.save_state_every_n_minutes * 60
+            if self.distributed:
+                due = all_reduce_sum(float(due and self.is_main_process), device=self.device)[0] > 0 # Rank 0's clock decides
+            return due
+        return False
+
+    def continue_from(self, previous: 'Trainer') -> 'Trainer':
+        """Continues the run of an earlier Trainer of the same model and optimizer (e.g. the previous HPO rung).
+
+        Carries over the best validation loss and epoch, the early-stopping
+        counters and the global step. Pass ``scheduler=previous.scheduler`` to
+        the constructor to continue the LR schedule as well; a scheduler built
+        from the config would start over.
+        """
+        self.best_val_loss = previous.best_val_loss
+        self.best_epoch = previous.best_epoch
+        self._early_stopping_best = previous._early_stopping_best
+        self.epochs_without_improvement = previous.epochs_without_improvement
+        self.global_step = previous.global_step
+        return self
+
+    def resume(self, state_path: Optional[str] = None) -> 'Trainer':
+        """Restores a training state written by :meth:`save_training_state`.
+
+        ``train()`` then continues at the saved epoch and batch with the same
+        sample order, RNG streams and accumulated statistics as the interrupted run.
+
+        Args:
+            state_path (Optional[str]): State file (default: ``<checkpoint_dir>/last_state.pth``).
+
+        Raises:
+            FileNotFoundError: If the state file does not exist.
+            KeyError: If the file is not a training-state checkpoint.
+        """
+        state_path = state_path or self.training_state_path
+        if not os.path.exists(state_path):
+            raise FileNotFoundError(f"Training state file not found: {state_path}")
+        state = torch.load(state_path, map_location=self.device, weights_only=False)
+        if 'training_state_version' not in state:
+            raise KeyError(f"{state_path} is not a training-state checkpoint (missing 'training_state_version'). "
+                           f"Resume from {TRAINING_STATE_FILENAME}.")
+
+        self.model.load_state_dict(state['model_state_dict'])
+        self.optimizer.load_state_dict(state['optimizer_state_dict'])
+        if state.get('scaler_state_dict') is not None and self.scaler.is_enabled():
+            self.scaler.load_state_dict(state['scaler_state_dict'])
+        if state.get('scheduler_state_dict') is not None:
+            if self.scheduler is not None:
+                self.scheduler.load_state_dict(state['scheduler_state_dict'])
+            else:
+                logger.warning("Training state contains a scheduler state but no scheduler is configured. Ignoring it.")
+        self.best_val_loss = state['best_val_loss']
+        self.history = state.get('history', self.history)
+        self.best_epoch = state.get('best_epoch')
+        early_stopping_state = state.get('early_stopping') or {}
+        self._early_stopping_best = early_stopping_state.get('best', self.best_val_loss)
+        self.epochs_without_improvement = early_stopping_state.get('epochs_without_improvement', 0)
+        self.global_step = state.get('global_step', 0)
+        self.start_epoch = state['epoch']
+        if self.loss_aware_sampler is not None and state.get('sampler_state') is not None:
+            self.loss_aware_sampler.load_state_dict(state['sampler_state']) # Scores and partial-epoch losses
+
+        if state.get('batches_done'):
+            self._resume_position = {
+                'epoch': state['epoch'],
+                'batches_done': state['batches_done'],
+                'epoch_loss_sum': state.get('epoch_loss_sum', 0.0),
+                'rng_states': state['rng_states'],
+                'sampler_state': state.get('sampler_state'),
+                'loader_rng_state': state.get('loader_rng_state'),
+            }
+        else:
+            restore_rank_rng_state(state['rng_states'])
+            if state.get('loader_rng_state') is not None and getattr(self.train_loader, 'generator', None) is not None:
+                self.train_loader.generator.set_state(state['loader_rng_state'].cpu())
+        logger.info(f"Resumed training state from {state_path}: epoch {self.start_epoch + 1}, batch {state.get('batches_done', 0)}, "
+                    f"step {self.global_step}, best validation loss {self.best_val_loss:.4f}")
+        return self
 
     def _log_gpu_memory(self, stage="EpochEnd"):
         """Logs current GPU memory usage if CUDA is available."""
@@ -146,19 +521,113 @@ class Trainer:
             except Exception as e:
                  logger.error(f"Failed to log GPU memory: {e}", exc_info=True)
 
+    def _log_chunk_cache_stats(self):
+        """Logs per-epoch hit/miss counters of the training dataset's chunk cache, then resets them."""
+        dataset = getattr(self.train_loader, 'dataset', None)
+        cache_stats = getattr(dataset, 'cache_stats', None)
+        stats = cache_stats() if callable(cache_stats) else None
+        if not stats:
+            return
+        logger.info(f"Chunk cache (Epoch {self.current_epoch+1}): Hits={stats['hits']}, Misses={stats['misses']}, "
+                    f"Evictions={stats['evictions']}, HitRate={stats['hit_rate']:.2%}")
+        self.writer.add_scalar('ChunkCache/hits', stats['hits'], self.current_epoch)
+        self.writer.add_scalar('ChunkCache/misses', stats['misses'], self.current_epoch)
+        self.writer.add_scalar('ChunkCache/hit_rate', stats['hit_rate'], self.current_epoch)
+        dataset.reset_cache_stats()
+
+    def _log_step_stats(self, stats: Dict[str, float], avg_loss: float):
+        """Writes one step-interval report (loss, throughput, data wait vs compute, memory) to the log and TensorBoard."""
+        step = self.global_step
+        self.writer.add_scalar('Loss/train_step', avg_loss, step)
+        for key in ('samples_per_sec', 'data_wait_seconds', 'compute_seconds', 'data_wait_fraction',
+                    'rss_mb', 'peak_rss_mb', 'cuda_allocated_mb', 'cuda_max_allocated_mb'):
+            if key in stats:
+                self.writer.add_scalar(f'Perf/{key}', stats[key], step)
+        message = (f"Step {step} (Epoch {self.current_epoch+1}): loss={avg_loss:.4f}, "
+                   f"{stats['samples_per_sec']:.1f} samples/s, data wait {stats['data_wait_seconds']:.2f}s "
+                   f"({stats['data_wait_fraction']:.0%}), compute {stats['compute_seconds']:.2f}s, "
+                   f"peak RSS {stats['peak_rss_mb']:.0f}MB")
+        if 'cuda_max_allocated_mb' in stats:
+            message += f", CUDA max allocated {stats['cuda_max_allocated_mb']:.0f}MB"
+        logger.info(message)
+
+    def _log_data_wait(self, loader, stage: str):
+        """Logs how long the loop waited on the background prefetcher during an epoch."""
+        if not isinstance(loader, BackgroundPrefetcher):
+            return
+        logger.info(f"{stage} data wait (Epoch {self.current_epoch+1}): {loader.wait_time:.2f}s over {loader.batches_served} batches")
+        self.writer.add_scalar(f'DataWait/{stage}_seconds', loader.wait_time, self.current_epoch)
+
+    def _set_transform_epoch(self):
+        """Advances epoch-dependent training transforms (e.g. a crop-length curriculum)."""
+        dataset = self.train_loader.dataset
+        while isinstance(dataset, Subset):
+            dataset = dataset.dataset
+        transform = getattr(dataset, 'transform', None)
+        if not hasattr(transform, 'set_epoch'):
+            return
+        transform.set_epoch(self.current_epoch)
+        if getattr(self.train_loader, 'persistent_workers', False) and self.current_epoch == self.start_epoch:
+            logger.warning("Epoch-dependent transforms do not reach persistent DataLoader workers; they keep the first epoch's settings.")
+        crop_lengths = [t.length for t in getattr(transform, 'transforms', [transform]) if hasattr(t, 'length')]
+        if crop_lengths:
+            logger.info(f"Training crop length for epoch {self.current_epoch+1}: {crop_lengths[0]}")
+            self.writer.add_scalar('Data/crop_length', crop_lengths[0], self.current_epoch)
+
+    def _zero_grads_unless(self, finite: torch.Tensor):
+        """Zeroes all gradients on the device when ``finite`` is False, without reading it on the host."""
+        for parameter in self.model.parameters():
+            if parameter.grad is not None:
+                parameter.grad.copy_(torch.where(finite, parameter.grad, torch.zeros_like(parameter.grad)))
+
     def train_one_epoch(self):
         """
         Runs a single training epoch.
         """
         self.model.train()  # Set model to training mode
-        total_loss = 0.0
-        num_batches = len(self.train_loader)
+        # Losses are summed on the device and only read at report intervals, avoiding a sync per step
+        total_loss = torch.zeros((), device=self.device)
+        window_loss = torch.zeros((), device=self.device)
+        non_finite_steps = torch.zeros((), device=self.device) # Counted on the device; read once per epoch
+        batches_done = 0
 
         logger.info(f"Starting Training Epoch {self.current_epoch+1}/{self.epochs}")
 
-        pbar = tqdm(self.train_loader, desc=f"Epoch {self.current_epoch+1}/{self.epochs} Training", leave=False)
+        sampler = getattr(self.train_loader, 'sampler', None)
+        if hasattr(sampler, 'set_epoch'):
+            sampler.set_epoch(self.current_epoch) # Reshuffle DistributedSampler shards each epoch
+        self._set_transform_epoch()
+        num_batches = len(self.train_loader)
+
+        # Continue mid-epoch after resume(): skip the batches the interrupted run already trained on
+        resume_position = self._resume_position if self._resume_position and self._resume_position['epoch'] == self.current_epoch else None
+        self._resume_position = None
+        generator = getattr(self.train_loader, 'generator', None)
+        if resume_position and resume_position['loader_rng_state'] is not None and generator is not None:
+            generator.set_state(resume_position['loader_rng_state'].cpu())
+        self._epoch_loader_rng_state = self._loader_rng_state()
+        skip_batches = 0
+        if resume_position:
+            batches_done = resume_position['batches_done']
+            total_loss += resume_position['epoch_loss_sum']
+            if isinstance(sampler, ResumableSampler):
+                sampler.set_start_index(min(batches_done * self.train_loader.batch_size, sampler.num_samples))
+            else:
+                logger.warning("Training loader does not use a ResumableSampler; skipping already-trained batches by reading them. "
+                               "The sample order only matches the interrupted run if the loader does not shuffle.")
+                skip_batches = batches_done
+            logger.info(f"Resuming epoch {self.current_epoch+1} at batch {batches_done}/{num_batches}.")
+
+        loader = maybe_prefetch(self.train_loader, self.prefetch_batches, self.device)
+        self.throughput.start_epoch()
+        pbar = tqdm(self.throughput.wrap(itertools.islice(loader, skip_batches, None)), desc=f"Epoch {self.current_epoch+1}/{self.epochs} Training",
+                    leave=False, disable=not self.is_main_process, initial=batches_done, total=num_batches)
 
-        for batch_idx, batch_data in enumerate(pbar):
+        for batch_idx, batch_data in enumerate(pbar, start=batches_done):
+            if resume_position:
+                # Restore RNG streams after the loader iterator exists, exactly where the interrupted run saved them
+                restore_rank_rng_state(resume_position['rng_states'])
+                resume_position = None
             # Handle potential inclusion of coordinates or other metadata
             if len(batch_data) == 3:
                 features, targets, _ = batch_data  # Unpack coords but ignore them for now
@@ -169,16 +638,25 @@ class Trainer:
 
             features = features.to(self.device, non_blocking=True)
             targets = targets.to(self.device, non_blocking=True)
+            if self.loss_aware_sampler is not None:
+                sample_indices, sample_weights = self.loss_aware_sampler.next_batch(features.size(0))
+                sample_weights = sample_weights.to(self.device, non_blocking=True)
 
             self.optimizer.zero_grad(set_to_none=True) # More memory efficient
 
-            with autocast(enabled=self.use_mixed_precision):
-                outputs = self.model(features)
+            with autocast(device_type=self.device.type, dtype=self.amp_dtype, enabled=self.use_mixed_precision):
+                outputs = self.forward_model(features)
                 if outputs is None:
                      logger.error(f"Model returned None output at epoch {self.current_epoch+1}, batch {batch_idx}. Skipping batch.")
                      continue # Skip this batch if model output is None
                 try:
-                    loss = self.criterion(outputs, targets)
+                    if self.loss_aware_sampler is not None:
+                        sample_losses = self.sample_criterion(outputs, targets)
+                        sample_losses = sample_losses.reshape(sample_losses.size(0), -1).float().mean(dim=1)
+                        self.loss_aware_sampler.record_losses(sample_indices, sample_losses)
+                        loss = (sample_losses * sample_weights).mean() # Unbiased estimate of the uniform mean loss
+                    else:
+                        loss = self.criterion(outputs, targets)
                 except Exception as e:
                      logger.error(f"Error computing loss at epoch {self.current_epoch+1}, batch {batch_idx}: {e}", exc_info=True)
                      logger.error(f"Output shape: {outputs.shape}, Target shape: {targets.shape}")
@@ -189,56 +667,83 @@ class Trainer:
                  continue # Skip if loss is None
                  
             # Check for NaN/inf loss before scaling
-            if not torch.isfinite(loss):
-                 logger.error(f"Non-finite loss detected at epoch {self.current_epoch+1}, batch {batch_idx}: {loss.item()}. Skipping backward pass.")
-                 continue # Skip backward/step if loss is NaN/inf
+            if self.check_finite_loss:
+                if not torch.isfinite(loss):
+                    logger.error(f"Non-finite loss detected at epoch {self.current_epoch+1}, batch {batch_idx}: {loss.item()}. Skipping backward pass.")
+                    continue # Skip backward/step if loss is NaN/inf
+                finite = None
+            else:
+                finite = torch.isfinite(loss.detach())
+                non_finite_steps += (~finite).float()
                  
             self.scaler.scale(loss).backward()
-            # Optional: Gradient clipping can be added here if needed
-            # self.scaler.unscale_(self.optimizer) # Unscale before clipping
-            # torch.nn.utils.clip_grad_norm_(self.model.parameters(), max_norm=1.0)
+            if self.gradient_clipping:
+                self.scaler.unscale_(self.optimizer) # Clip the true gradients, not the loss-scaled ones
+            if finite is not None:
+                self._zero_grads_unless(finite)
+            if self.gradient_clipping:
+                torch.nn.utils.clip_grad_norm_(self.model.parameters(), max_norm=self.gradient_clipping)
             self.scaler.step(self.optimizer)
             self.scaler.update()
+            self.global_step += 1
 
-            batch_loss = loss.item()
+            batch_loss = loss.detach().float()
+            if finite is not None:
+                batch_loss = torch.where(finite, batch_loss, torch.zeros_like(batch_loss))
             total_loss += batch_loss
-            
-            # Log batch loss to TensorBoard (optional, can be verbose)
-            # global_step = self.current_epoch * num_batches + batch_idx
-            # self.writer.add_scalar('Loss/train_batch', batch_loss, global_step)
-            
-            pbar.set_postfix({'batch_loss': f"{batch_loss:.4f}"})
+            window_loss += batch_loss
+            if self._state_save_due() and batch_idx + 1 < num_batches: # The epoch-end state is saved by train()
+                self.save_training_state(self.current_epoch, batch_idx + 1, total_loss.item())
 
+            window_stats = self.throughput.step(features.size(0))
+            if window_stats is not None:
+                self._log_step_stats(window_stats, window_loss.item() / window_stats['steps'])
+                pbar.set_postfix({'loss': f"{window_loss.item() / window_stats['steps']:.4f}",
+                                  'samples/s': f"{window_stats['samples_per_sec']:.0f}"})
+                window_loss.zero_()
+
+            if self.val_every_n_steps and self.global_step % self.val_every_n_steps == 0 and batch_idx + 1 < num_batches:
+                self.throughput.flush() # Validation time is not training throughput
+                window_loss.zero_()
+                val_loss = self.validate() # This might raise TrialPruned
+                self.writer.add_scalar('Loss/validation_step', val_loss, self.global_step)
+                self.model.train()
+                self.throughput.start_epoch()
+                if self._after_validation(val_loss):
+                    self._stop_requested = True
+                    num_batches = batch_idx + 1 # Average over the batches actually trained
+                    break
+
+        self.throughput.flush() # Close the partial window so the run totals cover the whole epoch
+        skipped_steps = int(non_finite_steps.item())
+        if skipped_steps:
+            logger.warning(f"{skipped_steps} training step(s) of epoch {self.current_epoch+1} had a non-finite loss; "
+                           f"their gradients were zeroed and their loss left out of the average.")
+            self.writer.add_scalar('Train/non_finite_steps', skipped_steps, self.current_epoch)
+            num_batches -= skipped_steps
+        if self.loss_aware_sampler is not None:
+            sampler_stats = self.loss_aware_sampler.update_scores()
+            for name, value in sampler_stats.items():
+                self.writer.add_scalar(f'Sampler/{name}', value, self.current_epoch)
+            logger.info(f"Loss-aware sampling (Epoch {self.current_epoch+1}): " + ", ".join(f"{name}={value:.3f}" for name, value in sampler_stats.items()))
+        total_loss, num_batches = all_reduce_sum(total_loss.item(), num_batches, device=self.device)
         avg_loss = total_loss / num_batches if num_batches > 0 else 0.0
         pbar.close()
+        self._log_data_wait(loader, "Train")
         logger.info(f"Finished Training Epoch {self.current_epoch+1}/{self.epochs}. Average Loss: {avg_loss:.4f}")
         return avg_loss
 
-    def validate(self):
-        """
-        Runs validation on the validation set.
-        Reports intermediate results for pruning if callback is provided.
-        """
+    def _validation_loss(self, loader, desc: str) -> float:
+        """Average loss over ``loader`` (all ranks), using inference mode and the model in eval mode."""
         self.model.eval()  # Set model to evaluation mode
-        total_loss = 0.0
-        num_batches = len(self.val_loader)
-        if num_batches == 0:
-             logger.warning("Validation loader is empty. Skipping validation.")
-             # Report a high loss if pruning is active, otherwise return inf
-             if self._pruning_callback:
-                 try:
-                     # Report a very high value to potentially trigger pruning
-                     self._pruning_callback(self.current_epoch, float('inf')) 
-                 except optuna.TrialPruned: # Catch pruning exception if it happens here
-                     raise # Re-raise immediately
-                 except Exception as e:
-                     logger.error(f"Error in pruning callback during empty validation: {e}", exc_info=True)
-             return float('inf') 
-
-        logger.info(f"Starting Validation Epoch {self.current_epoch+1}/{self.epochs}")
-        pbar = tqdm(self.val_loader, desc=f"Epoch {self.current_epoch+1}/{self.epochs} Validation", leave=False)
+        total_loss = torch.zeros((), device=self.device)
+        non_finite = torch.zeros((), device=self.device)
+        num_batches = len(loader)
+        prefetched = maybe_prefetch(loader, self.prefetch_batches, self.device)
+        pbar = tqdm(prefetched, desc=desc, leave=False, disable=not self.is_main_process)
 
-        with torch.no_grad():
+        # inference_mode skips autograd bookkeeping entirely (cheaper than no_grad)
+        with torch.inference_mode():
             for batch_idx, batch_data in enumerate(pbar):
                 # Handle potential inclusion of coordinates or other metadata
                 if len(batch_data) == 3:
@@ -251,37 +756,70 @@ class Trainer:
                 features = features.to(self.device, non_blocking=True)
                 targets = targets.to(self.device, non_blocking=True)
 
-                with autocast(enabled=self.use_mixed_precision):
+                with autocast(device_type=self.device.type, dtype=self.amp_dtype, enabled=self.use_mixed_precision):
                      try:
-                        outputs = self.model(features)
+                        outputs = self.forward_model(features)
                         if outputs is None:
                              logger.error(f"Model returned None output during validation at epoch {self.current_epoch+1}, batch {batch_idx}. Skipping batch.")
+                             num_batches -= 1
                              continue
                         loss = self.criterion(outputs, targets)
                      except Exception as e:
                           logger.error(f"Error during validation forward pass at epoch {self.current_epoch+1}, batch {batch_idx}: {e}", exc_info=True)
+                          num_batches -= 1
                           continue
-                          
-                if loss is None or not torch.isfinite(loss):
-                    logger.error(f"Non-finite or None validation loss detected at epoch {self.current_epoch+1}, batch {batch_idx}. Skipping batch.")
-                    continue
 
-                batch_loss = loss.item()
-                total_loss += batch_loss
-                pbar.set_postfix({'val_loss': f"{batch_loss:.4f}"})
+                # Non-finite batches are excluded by masking, so the losses are only read once per pass
+                finite = torch.isfinite(loss)
+                total_loss += torch.where(finite, loss.detach().float(), torch.zeros_like(total_loss))
+                non_finite += (~finite).float()
 
-        avg_loss = total_loss / num_batches if num_batches > 0 else float('inf')
+        if non_finite.item():
+            logger.error(f"Skipped {int(non_finite.item())} validation batch(es) with a non-finite loss at epoch {self.current_epoch+1}.")
+        num_batches -= int(non_finite.item())
+        # Average over all ranks so every rank makes the same best-model and pruning decisions
+        total_loss, num_batches = all_reduce_sum(total_loss.item(), num_batches, device=self.device)
         pbar.close()
-        logger.info(f"Finished Validation Epoch {self.current_epoch+1}/{self.epochs}. Average Loss: {avg_loss:.4f}")
+        self._log_data_wait(prefetched, "Validation")
+        return total_loss / num_batches if num_batches > 0 else float('inf')
+
+    def validate(self, full: bool = False, report: bool = True):
+        """
+        Runs validation on the validation set (or its fixed subset, if configured).
+        Reports intermediate results for pruning if callback is provided.
+
+        Args:
+            full (bool): Use the full validation split even if a subset is configured.
+            report (bool): Pass the loss to the pruning callback.
+        """
+        loader = self.val_loader if full or self.val_subset_loader is None else self.val_subset_loader
+        report_step = self.global_step if self.val_every_n_steps else self.current_epoch
+        if loader is None or len(loader) == 0:
+             logger.warning("Validation loader is empty. Skipping validation.")
+             # Report a high loss if pruning is active, otherwise return inf
+             if self._pruning_callback and report:
+                 try:
+                     # Report a very high value to potentially trigger pruning
+                     self._pruning_callback(report_step, float('inf'))
+                 except optuna.TrialPruned: # Catch pruning exception if it happens here
+                     raise # Re-raise immediately
+                 except Exception as e:
+                     logger.error(f"Error in pruning callback during empty validation: {e}", exc_info=True)
+             return float('inf') 
+
+        kind = 'full' if loader is self.val_loader else 'subset'
+        logger.info(f"Starting Validation Epoch {self.current_epoch+1}/{self.epochs} ({kind}, step {self.global_step})")
+        avg_loss = self._validation_loss(loader, f"Epoch {self.current_epoch+1}/{self.epochs} Validation ({kind})")
+        logger.info(f"Finished Validation Epoch {self.current_epoch+1}/{self.epochs} ({kind}). Average Loss: {avg_loss:.4f}")
         
         # --- Pruning Callback --- 
-        if self._pruning_callback:
+        if self._pruning_callback and report:
             try:
-                # Report the average validation loss for this epoch
-                self._pruning_callback(self.current_epoch, avg_loss)
-                logger.debug(f"Reported val_loss {avg_loss:.4f} for epoch {self.current_epoch} to Optuna trial.")
+                # Report the average validation loss at this epoch (or step, with step-based validation)
+                self._pruning_callback(report_step, avg_loss)
+                logger.debug(f"Reported val_loss {avg_loss:.4f} for step {report_step} to Optuna trial.")
             except optuna.TrialPruned: # Catch pruning exception
-                 logger.info(f"Pruning condition met after epoch {self.current_epoch}. Raising TrialPruned.")
+                 logger.info(f"Pruning condition met at step {report_step}. Raising TrialPruned.")
                  raise # Re-raise for HPOptimizer.objective to catch
             except Exception as e:
                  # Log error but don't stop training just because of callback error
@@ -289,30 +827,39 @@ class Trainer:
                  
         return avg_loss
 
-    def train(self):
-        """
-        Runs the full training loop for the specified number of epochs.
-        Handles TrialPruned exceptions raised by the validation callback.
-        """
-        # Now using self.epochs directly which was set in __init__
-        logger.info(f"Starting training run for {self.epochs} epochs on {self.device}.")
-        logger.info(f"Mixed Precision: {'Enabled' if self.use_mixed_precision else 'Disabled'}")
-        logger.info(f"Gradient Checkpointing: {'Enabled (model must support)' if self.use_gradient_checkpointing else 'Disabled'}")
-        logger.info(f"Checkpoints will be saved in: {self.checkpoint_dir}")
-        logger.info(f"Logs will be saved in: {self.log_dir}")
-        logger.info(f"Saving best model only: {self.save_best_only}")
-        if self.save_every_n_epochs:
-            logger.info(f"Saving checkpoint every {self.save_every_n_epochs} epochs.")
+    def _after_validation(self, val_loss: float) -> bool:
+        """Best-model checkpoint, plateau scheduler and early-stopping update for one validation; True to stop."""
+        if val_loss < self.best_val_loss:
+            self.best_val_loss = val_loss
+            self.best_epoch = self.current_epoch + 1
+            logger.info(f"New best validation loss: {self.best_val_loss:.4f}. Saving best model...")
+            self._save_checkpoint(is_best=True)
+        if isinstance(self.scheduler, optim.lr_scheduler.ReduceLROnPlateau):
+            if val_loss == float('inf'):
+                logger.warning("No validation loss available; skipping ReduceLROnPlateau step.")
+            else:
+                self.scheduler.step(val_loss)
+        return self._update_early_stopping(val_loss)
 
-        for epoch in range(self.epochs):
+    def _validation_due(self, epoch: int) -> bool:
+        """Whether to validate after ``epoch`` (0-based): every val_every_n_epochs epochs and after the last one."""
+        return (epoch + 1) % self.val_every_n_epochs == 0 or epoch + 1 == self.epochs
+
+    def _run_epochs(self):
+        """Runs the epochs from start_epoch to epochs (train, validate when due, log and checkpoint each)."""
+        for epoch in range(self.start_epoch, self.epochs):
             self.current_epoch = epoch
             try:
-                train_loss = self.train_one_epoch()
-                val_loss = self.validate() # This might raise TrialPruned
+                train_loss = self.train_one_epoch() # Runs step-based validations, which may request a stop
+                should_stop = self._stop_requested
+                val_loss = None
+                if not should_stop and self._validation_due(epoch):
+                    val_loss = self.validate() # This might raise TrialPruned
+                    self.writer.add_scalar('Loss/validation_epoch', val_loss, self.current_epoch)
+                    should_stop = self._after_validation(val_loss)
 
                 # Log average epoch losses to TensorBoard
                 self.writer.add_scalar('Loss/train_epoch', train_loss, self.current_epoch)
-                self.writer.add_scalar('Loss/validation_epoch', val_loss, self.current_epoch)
                 
                 # Log learning rate (if using a scheduler, get it from there)
                 try:
@@ -324,33 +871,145 @@ class Trainer:
                      
                 # Log GPU memory usage at the end of the epoch
                 self._log_gpu_memory(stage="EpochEnd")
+                self._log_chunk_cache_stats()
+
+                # With a validation subset, check the full split periodically and at the end of training
+                if self.val_subset_loader is not None and (should_stop or epoch + 1 == self.epochs or
+                        (self.full_val_every_n_epochs and (epoch + 1) % self.full_val_every_n_epochs == 0)):
+                    full_val_loss = self.validate(full=True, report=False)
+                    self.writer.add_scalar('Loss/validation_full', full_val_loss, self.current_epoch)
+                    self.history.setdefault('full_val_loss', []).append({'epoch': epoch + 1, 'val_loss': full_val_loss})
 
-                is_best = val_loss < self.best_val_loss
-                if is_best:
-                    self.best_val_loss = val_loss
-                    logger.info(f"New best validation loss: {self.best_val_loss:.4f}. Saving best model...")
-                    self._save_checkpoint(is_best=True)
-                    
                 # Save periodically if configured and not saving only best
                 if not self.save_best_only and self.save_every_n_epochs:
                      self._save_checkpoint(is_best=False)
+
+                if self.scheduler is not None and not isinstance(self.scheduler, optim.lr_scheduler.ReduceLROnPlateau):
+                    self.scheduler.step() # Per-epoch schedulers; ReduceLROnPlateau steps with each validation
+
+                self.history['train_loss'].append(train_loss)
+                self.history['val_loss'].append(val_loss) # None for epochs without validation
+                self.save_training_state(epoch + 1) # Resume point at the epoch boundary
+                if should_stop:
+                    self.stop_reason = 'early_stopping'
+                    logger.info(f"Early stopping at epoch {epoch + 1}: no validation loss improvement larger than "
+                                f"{self.early_stopping_min_delta} for {self.epochs_without_improvement} validations "
+                                f"(best {self._early_stopping_best:.4f} at epoch {self.best_epoch}).")
+                    break
             
             except optuna.TrialPruned: 
                 # If validate() raised TrialPruned, catch it here, log, and break the loop
                 logger.info(f"Trial pruned at epoch {self.current_epoch}. Stopping training for this trial.")
-                # self.writer.close() # Close writer if stopping early
+                self.stop_reason = 'pruned'
                 break # Exit the epoch loop for this trial
             except Exception as e:
                  logger.error(f"Error during epoch {self.current_epoch+1}: {e}", exc_info=True)
-                 # Optionally break or continue based on severity
-                 break # Example: Stop training on other errors too
+                 self.stop_reason = 'error'
+                 break # Stop training on other errors too
+        else:
+            self.stop_reason = 'completed'
+
+    def _update_early_stopping(self, val_loss: float) -> bool:
+        """Tracks validations without a loss improvement larger than min_delta; True when training should stop."""
+        if not self.early_stopping_patience:
+            return False
+        if val_loss < self._early_stopping_best - self.early_stopping_min_delta:
+            self._early_stopping_best = val_loss
+            self.epochs_without_improvement = 0
+            return False
+        self.epochs_without_improvement += 1
+        logger.info(f"No validation loss improvement for {self.epochs_without_improvement}/{self.early_stopping_patience} validations.")
+        return self.epochs_without_improvement >= self.early_stopping_patience
 
-        logger.info(f"Training loop finished for this trial after {self.current_epoch + 1} epochs. Best Validation Loss: {self.best_val_loss:.4f}")
+    def _measure_model_cost(self):
+        """Records the parameter count and forward FLOPs per training sample in self.model_cost.
+
+        Measured on the unwrapped model with the first training sample, so the
+        cost of architectures can be compared with their validation loss.
+        """
+        example_input = None
+        try:
+            example_input = example_input_from_dataset(self.train_loader.dataset, self.device)
+        except Exception as e:
+            logger.warning(f"Could not build an example input for FLOP counting: {e}")
+        self.model_cost = model_cost(self.model, example_input)
+        if 'flops_per_sample' in self.model_cost:
+            logger.info(f"Model cost: {self.model_cost['parameters']:,} parameters, "
+                        f"{self.model_cost['gflops_per_sample']:.3f} GFLOPs per sample (input {self.model_cost['input_shape']})")
+        else:
+            logger.info(f"Model cost: {self.model_cost['parameters']:,} parameters")
+        return self.model_cost
+
+    def _write_training_summary(self):
+        """Records why and when training stopped in training_summary.json and in the run log (main process only)."""
+        if not self.is_main_process:
+            return None
+        epochs_completed = len(self.history['train_loss'])
+        best_val_loss = self.best_val_loss if self.best_val_loss != float('inf') else None
+        summary = {
+            'stop_reason': self.stop_reason,
+            'epochs_completed': epochs_completed,
+            'epochs_configured': self.epochs,
+            'epochs_saved': max(self.epochs - epochs_completed, 0) if self.stop_reason == 'early_stopping' else 0,
+            'best_epoch': self.best_epoch,
+            'best_val_loss': best_val_loss,
+            'early_stopping_patience': self.early_stopping_patience,
+            'early_stopping_min_delta': self.early_stopping_min_delta,
+            'final_lr': self.optimizer.param_groups[0]['lr'] if self.optimizer.param_groups else None,
+            'performance': self.throughput.summary(),
+            'model_cost': self.model_cost,
+            'history': self.history,
+        }
+        summary_path = os.path.join(self.checkpoint_dir, TRAINING_SUMMARY_FILENAME)
+        try:
+            with open(summary_path, 'w') as f:
+                json.dump(summary, f, indent=2)
+            logger.info(f"Training summary saved to {summary_path}")
+        except OSError as e:
+            logger.error(f"Could not write training summary {summary_path}: {e}")
+        if self.log_manager is not None:
+            try:
+                self.log_manager.update_log({'custom_metadata': {'training_summaries': {self.checkpoint_dir: summary}}}, immediate_save=True)
+            except Exception as e:
+                logger.warning(f"Could not add the training summary to the run log: {e}")
+        return summary
+
+    def train(self):
+        """
+        Runs the full training loop for the specified number of epochs.
+        Handles TrialPruned exceptions raised by the validation callback.
+        Continues from the restored epoch/batch if resume() was called.
+
+        Returns:
+            Dict[str, list]: Per-epoch 'train_loss' and 'val_loss' history.
+        """
+        # Now using self.epochs directly which was set in __init__
+        logger.info(f"Starting training run for {self.epochs} epochs on {self.device}.")
+        logger.info(f"Mixed Precision: {f'Enabled ({self.amp_dtype})' if self.use_mixed_precision else 'Disabled'}")
+        logger.info(f"Gradient Checkpointing: {'Enabled' if getattr(self.model, 'gradient_checkpointing', False) else 'Disabled'}")
+        logger.info(f"Checkpoints will be saved in: {self.checkpoint_dir}")
+        logger.info(f"Logs will be saved in: {self.log_dir}")
+        logger.info(f"Saving best model only: {self.save_best_only}")
+        if self.save_every_n_epochs:
+            logger.info(f"Saving checkpoint every {self.save_every_n_epochs} epochs.")
+
+        if self.start_epoch:
+            logger.info(f"Continuing from epoch {self.start_epoch + 1} (global step {self.global_step}).")
+        self._stop_requested = False # A stop requested in an earlier train() call does not carry over
+        self._measure_model_cost()
+
+        try:
+            self._run_epochs()
+        finally:
+            # Wait for queued checkpoint writes, also when training is interrupted
+            self.checkpoint_writer.flush()
+
+        logger.info(f"Training loop finished ({self.stop_reason}) after {self.current_epoch + 1} epochs. Best Validation Loss: {self.best_val_loss:.4f}")
         self.writer.close()
         # Note: The best_val_loss is returned by HPOptimizer.objective
 
         # --- Add logic to save last epoch as best if no validation occurred --- 
-        if self.save_best_only and self.best_val_loss == float('inf'):
+        if self.is_main_process and self.save_best_only and self.best_val_loss == float('inf'):
             logger.warning("Validation did not run or improve. Saving final epoch state as 'best_model.pth'.")
             # Manually construct final epoch checkpoint path
             last_epoch_filename = f"epoch_{self.epochs}.pth" # Assumes epochs finished
@@ -373,15 +1032,25 @@ class Trainer:
                      'epoch': self.epochs,
                      'model_state_dict': self.model.state_dict(),
                      'optimizer_state_dict': self.optimizer.state_dict(),
-                     'scaler_state_dict': self.scaler.state_dict() if self.use_mixed_precision else None, 
+                     'scaler_state_dict': self.scaler.state_dict() if self.scaler.is_enabled() else None, 
                      'best_val_loss': self.best_val_loss, # Still inf, but saving state
                      'config': self.config
                  }
-                 try:
-                     torch.save(state, best_checkpoint_path)
-                     logger.info(f"Checkpoint saved to {best_checkpoint_path}")
-                 except Exception as e:
-                     logger.error(f"Failed to save final state checkpoint {best_checkpoint_path}: {e}", exc_info=True)
+                 self.checkpoint_writer.submit(state, best_checkpoint_path)
+
+        self.checkpoint_writer.close() # Write everything before returning
+        if self.checkpoint_writer.errors:
+            logger.error(f"{len(self.checkpoint_writer.errors)} checkpoint write(s) failed: {self.checkpoint_writer.errors}")
+        elif self.checkpoint_writer.blocked_time > 0.5:
+            logger.info(f"Training waited {self.checkpoint_writer.blocked_time:.2f}s for the checkpoint writer queue.")
+        perf = self.throughput.summary()
+        if perf['samples_per_sec'] is not None:
+            logger.info(f"Training throughput: {perf['samples_per_sec']:.1f} samples/s over {perf['steps']} steps, "
+                        f"data wait {perf['data_wait_seconds']:.1f}s ({perf['data_wait_fraction']:.0%} of training time), "
+                        f"peak RSS {perf['peak_rss_mb']:.0f}MB")
+        self._write_training_summary()
+        barrier() # Other ranks wait until rank 0 has written its final checkpoints
+        return self.history
 
     @staticmethod
     def load_model(checkpoint_path, model, device, optimizer=None, scaler=None):
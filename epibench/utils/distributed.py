@@ -0,0 +1,34 @@
+# epibench/utils/distributed.py
+
+"""Rank and world-size queries for multi-process runs.
+
+These only read the state of the default process group (or the torchrun
+environment), so the data and training packages can both use them; process
+group setup and model wrapping live in epibench.training.distributed.
+"""
+
+import os
+
+import torch.distributed as dist
+
+
+def is_distributed() -> bool:
+    """Whether a process group is initialized with more than one process."""
+    return dist.is_available() and dist.is_initialized() and dist.get_world_size() > 1
+
+
+def get_rank() -> int:
+    return dist.get_rank() if is_distributed() else 0
+
+
+def get_world_size() -> int:
+    return dist.get_world_size() if is_distributed() else 1
+
+
+def get_local_rank() -> int:
+    return int(os.environ.get('LOCAL_RANK', 0))
+
+
+def is_main_process() -> bool:
+    """True on rank 0 (and in non-distributed runs); only this rank writes checkpoints and TensorBoard logs."""
+    return get_rank() == 0
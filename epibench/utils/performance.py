@@ -0,0 +1,102 @@
+# epibench/utils/performance.py
+
+import logging
+import os
+from typing import Any, Dict, Optional, Union
+
+import torch
+
+logger = logging.getLogger(__name__)
+
+_AMP_DTYPES = {
+    'bfloat16': torch.bfloat16,
+    'bf16': torch.bfloat16,
+    'float16': torch.float16,
+    'fp16': torch.float16,
+}
+
+
+def available_cpus() -> int:
+    """Number of CPUs this process may run on.
+
+    Uses the scheduler affinity mask, which reflects SLURM/cgroup CPU binding,
+    falling back to SLURM_CPUS_PER_TASK and finally os.cpu_count().
+    """
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        pass
+    slurm_cpus = os.environ.get('SLURM_CPUS_PER_TASK')
+    if slurm_cpus and slurm_cpus.isdigit():
+        return int(slurm_cpus)
+    return os.cpu_count() or 1
+
+
+def configure_threads(num_threads: Optional[Union[int, str]] = None, num_interop_threads: Optional[int] = None,
+                      num_workers: int = 0) -> Dict[str, int]:
+    """Configures PyTorch intra-op and inter-op thread pools.
+
+    Args:
+        num_threads: Intra-op threads. ``'auto'`` reserves one CPU per DataLoader
+            worker so compute threads do not compete with data loading. None
+            leaves the current setting untouched.
+        num_interop_threads: Inter-op threads. Can only be changed before any
+            parallel work has started; otherwise a warning is logged.
+        num_workers: Number of DataLoader worker processes (used by ``'auto'``).
+
+    Returns:
+        The effective {'num_threads', 'num_interop_threads'}.
+    """
+    if num_threads == 'auto':
+        num_threads = max(1, available_cpus() - max(num_workers, 0))
+    if num_threads is not None:
+        if not isinstance(num_threads, int) or num_threads <= 0:
+            raise ValueError(f"num_threads must be a positive integer or 'auto', got {num_threads!r}.")
+        torch.set_num_threads(num_threads)
+
+    if num_interop_threads is not None:
+        if not isinstance(num_interop_threads, int) or num_interop_threads <= 0:
+            raise ValueError(f"num_interop_threads must be a positive integer, got {num_interop_threads!r}.")
+        if num_interop_threads != torch.get_num_interop_threads():
+            try:
+                torch.set_num_interop_threads(num_interop_threads)
+            except RuntimeError as e:
+                logger.warning(f"Could not set inter-op threads to {num_interop_threads} (already in use): {e}")
+
+    return {'num_threads': torch.get_num_threads(), 'num_interop_threads': torch.get_num_interop_threads()}
+
+
+def resolve_amp_dtype(device: torch.device, amp_dtype: Optional[str] = None) -> torch.dtype:
+    """Returns the autocast dtype for a device.
+
+    Defaults to float16 on CUDA and bfloat16 elsewhere (CPU autocast only supports bfloat16 well).
+    """
+    if amp_dtype is None:
+        return torch.float16 if device.type == 'cuda' else torch.bfloat16
+    try:
+        return _AMP_DTYPES[str(amp_dtype).lower()]
+    except KeyError:
+        raise ValueError(f"Unsupported autocast dtype '{amp_dtype}'. Choose from {sorted(_AMP_DTYPES)}.")
+
+
+def cpu_supports_bf16() -> bool:
+    """Whether oneDNN reports native bfloat16 support on this CPU (AVX512-BF16/AMX)."""
+    try:
+        return bool(torch.backends.mkldnn.is_available() and torch.ops.mkldnn._is_mkldnn_bf16_supported())
+    except (AttributeError, RuntimeError):
+        return False
+
+
+def describe_runtime(device: torch.device) -> Dict[str, Any]:
+    """Collects the effective runtime settings that matter for throughput, for logging."""
+    info: Dict[str, Any] = {
+        'device': str(device),
+        'torch_version': torch.__version__,
+        'num_threads': torch.get_num_threads(),
+        'num_interop_threads': torch.get_num_interop_threads(),
+        'available_cpus': available_cpus(),
+        'mkldnn_enabled': torch.backends.mkldnn.is_available() and torch.backends.mkldnn.enabled,
+    }
+    if device.type == 'cpu':
+        info['cpu_bf16_supported'] = cpu_supports_bf16()
+    return info
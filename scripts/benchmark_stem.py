@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Benchmarks the SeqCNNRegressor stem implementations ('branches', 'fused', 'fft').
+
+Loads identical weights into each variant, checks that the outputs match the
+reference 'branches' stem, and times the branch convolutions alone and the full
+training step (forward + backward) on the selected device.
+
+Usage:
+  python scripts/benchmark_stem.py --batch-size 32 --seq-len 10000 --threads 8
+"""
+
+import argparse
+import statistics
+import sys
+import time
+
+import torch
+
+from epibench.models.seq_cnn_regressor import STEM_IMPLEMENTATIONS, SeqCNNRegressor
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark SeqCNNRegressor stem implementations.")
+    parser.add_argument('--batch-size', type=int, default=32)
+    parser.add_argument('--seq-len', type=int, default=10000)
+    parser.add_argument('--input-channels', type=int, default=11)
+    parser.add_argument('--num-filters', type=int, default=64)
+    parser.add_argument('--kernel-sizes', type=int, nargs='+', default=[3, 9, 25, 51])
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--threads', type=int, default=None, help="torch intra-op threads (default: torch's choice).")
+    parser.add_argument('--device', default='cpu')
+    return parser.parse_args()
+
+
+def _time(fn, repeats, device):
+    fn()  # Warm-up (allocator, oneDNN/cuDNN algorithm selection)
+    timings = []
+    for _ in range(repeats):
+        if device.type == 'cuda':
+            torch.cuda.synchronize(device)
+        start = time.perf_counter()
+        fn()
+        if device.type == 'cuda':
+            torch.cuda.synchronize(device)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def main():
+    args = parse_args()
+    if args.threads:
+        torch.set_num_threads(args.threads)
+    device = torch.device(args.device)
+    torch.manual_seed(0)
+    model_params = dict(input_channels=args.input_channels, num_filters=args.num_filters, kernel_sizes=args.kernel_sizes)
+    reference = SeqCNNRegressor(**model_params).to(device).eval()
+    x = torch.randn(args.batch_size, args.input_channels, args.seq_len, device=device)
+    with torch.no_grad():
+        reference_out = reference._branches(x)
+
+    print(f"Stem benchmark: batch {args.batch_size}, length {args.seq_len}, kernels {args.kernel_sizes}, "
+          f"{args.num_filters} filters, device {device}, threads {torch.get_num_threads()}")
+    print(f"{'stem_impl':<10} {'max |diff|':>11} {'stem fwd (s)':>13} {'train step (s)':>15}")
+    for impl in STEM_IMPLEMENTATIONS:
+        model = SeqCNNRegressor(**model_params, stem_impl=impl).to(device)
+        model.load_state_dict(reference.state_dict())
+        model.eval()
+        with torch.no_grad():
+            max_diff = (model._branches(x) - reference_out).abs().max().item()
+            stem_time = _time(lambda: model._branches(x), args.repeats, device)
+        model.train()
+        train_time = _time(lambda: model(x).sum().backward(), args.repeats, device)
+        print(f"{impl:<10} {max_diff:>11.2e} {stem_time:>13.4f} {train_time:>15.4f}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -5,6 +5,8 @@ from pathlib import Path
 import sys
 import logging
 
+from epibench.data.datasets import write_virtual_dataset
+
 # Set up basic logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -109,6 +111,47 @@ def combine_h5_files(sample_id: str, input_dir: Path, output_dir: Path):
         sys.exit(1)
 
 
+def combine_h5_files_virtual(sample_ids: list, input_dir: Path, output_dir: Path) -> Path:
+    """
+    Maps the train, validation, and test HDF5 files of one or more samples into a
+    single virtual HDF5 file. No feature data is copied; the output references the
+    source files, which must stay in place.
+
+    Args:
+        sample_ids: Sample identifiers to include.
+        input_dir: The base directory where the sample folders are located.
+        output_dir: The directory where the virtual file will be saved.
+
+    Returns:
+        Path of the written virtual file.
+    """
+    file_suffixes = ['train.h5', 'validation.h5', 'test.h5']
+    sources = {}
+    for sample_id in sample_ids:
+        matching_dirs = sorted(input_dir.glob(f"*{sample_id}*"))
+        if not matching_dirs:
+            logger.error(f"No directory found for sample ID glob '*{sample_id}*' in {input_dir}")
+            sys.exit(1)
+        sample_dir = matching_dirs[0]
+        if len(matching_dirs) > 1:
+            logger.warning(f"Multiple directories found for sample '{sample_id}'. Using the first one: {sample_dir}")
+        paths = [str(sample_dir / suffix) for suffix in file_suffixes if (sample_dir / suffix).exists()]
+        if not paths:
+            logger.error(f"No HDF5 files found for sample {sample_id} in {sample_dir}")
+            sys.exit(1)
+        sources[sample_id] = paths
+
+    name = sample_ids[0] if len(sample_ids) == 1 else "combined"
+    output_path = output_dir / f"{name}_all_regions_virtual.h5"
+    try:
+        write_virtual_dataset(sources, str(output_path))
+    except Exception as e:
+        logger.error(f"Failed to write virtual dataset {output_path}: {e}")
+        sys.exit(1)
+    logger.info(f"Successfully created virtual HDF5 file: {output_path}")
+    return output_path
+
+
 def main():
     parser = argparse.ArgumentParser(
         description="Combine train, validation, and test HDF5 files for an EpiBench sample.",
@@ -118,7 +161,8 @@ def main():
         "--sample-id",
         type=str,
         required=True,
-        help="The unique identifier for the sample (e.g., '263578')."
+        nargs='+',
+        help="The unique identifier for the sample (e.g., '263578'). Several IDs may be given with --virtual."
     )
     parser.add_argument(
         "--input-dir",
@@ -133,9 +177,20 @@ def main():
         help="The directory where the combined HDF5 file will be saved."
     )
     
+    parser.add_argument(
+        "--virtual",
+        action="store_true",
+        help="Write an HDF5 virtual dataset that references the source files instead of copying them into memory."
+    )
+    
     args = parser.parse_args()
 
-    combine_h5_files(args.sample_id, args.input_dir, args.output_dir)
+    if args.virtual:
+        combine_h5_files_virtual(args.sample_id, args.input_dir, args.output_dir)
+    else:
+        if len(args.sample_id) > 1:
+            parser.error("Multiple sample IDs are only supported with --virtual.")
+        combine_h5_files(args.sample_id[0], args.input_dir, args.output_dir)
 
 if __name__ == '__main__':
     main() 
\ No newline at end of file
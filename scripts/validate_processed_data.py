@@ -5,6 +5,8 @@ import sys
 import os
 import logging
 
+from epibench.data.statistics import compute_file_statistics, read_stats_attrs
+
 # Basic logger setup
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -121,11 +123,45 @@ def validate_hdf5_file(file_path: str, expected_channels: int = 11, num_samples_
     logger.info(f"Validation successful for {file_path}")
     return True
 
+def report_statistics(file_path: str, compute_missing: bool = False):
+    """Logs the per-channel and target statistics stored in a processed HDF5 file.
+
+    Statistics are read from the file attributes written by process-data. Files
+    without them are only scanned (and the result stored) if compute_missing is True.
+
+    Args:
+        file_path (str): Path to the HDF5 file.
+        compute_missing (bool): Compute and store statistics if the attributes are missing.
+    """
+    stats = read_stats_attrs(file_path)
+    if stats is None:
+        if not compute_missing:
+            logger.warning(f"No statistics attributes in {file_path}. Use --compute-stats to compute and store them.")
+            return
+        logger.info(f"Computing statistics for {file_path} (one pass over the file)...")
+        stats = compute_file_statistics(file_path, write=True)
+
+    feature_stats = stats['feature']
+    logger.info(f"Feature statistics for {file_path} ({feature_stats.count} positions per channel):")
+    for channel in range(feature_stats.num_channels):
+        logger.info(f"  Channel {channel}: mean={feature_stats.mean[channel]:.4f}, std={feature_stats.std[channel]:.4f}, "
+                    f"min={feature_stats.min[channel]:.4f}, max={feature_stats.max[channel]:.4f}")
+    target_stats = stats['target']
+    logger.info(f"Target statistics: n={target_stats.count}, mean={target_stats.mean[0]:.4f}, std={target_stats.std[0]:.4f}, "
+                f"min={target_stats.min[0]:.4f}, max={target_stats.max[0]:.4f}")
+    if 'target_hist' in stats:
+        edges = stats['target_hist']['edges']
+        counts = stats['target_hist']['counts']
+        histogram = ", ".join(f"[{edges[i]:.2f}, {edges[i + 1]:.2f}): {int(count)}" for i, count in enumerate(counts))
+        logger.info(f"Target histogram: {histogram}")
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Validate processed EpiBench HDF5 data files.")
     parser.add_argument("h5_files", nargs='+', help="Path(s) to the HDF5 file(s) to validate (e.g., train.h5 validation.h5 test.h5)")
     parser.add_argument("--expected-channels", type=int, default=11, help="Expected number of channels in the features dataset.")
     parser.add_argument("--num-samples", type=int, default=5, help="Number of random samples to check in detail.")
+    parser.add_argument("--no-stats", action="store_true", help="Do not report the stored per-channel statistics.")
+    parser.add_argument("--compute-stats", action="store_true", help="Compute and store statistics for files processed before they were recorded.")
 
     args = parser.parse_args()
 
@@ -133,6 +169,8 @@ if __name__ == "__main__":
     for file_path in args.h5_files:
         if not validate_hdf5_file(file_path, args.expected_channels, args.num_samples):
             all_valid = False
+        elif not args.no_stats:
+            report_statistics(file_path, compute_missing=args.compute_stats)
 
     if all_valid:
         logger.info("All specified files passed validation.")
@@ -11,7 +11,7 @@ setup(
     url='https://github.com/Bonney96/epibench',
     packages=find_packages(exclude=['tests*', 'scripts*', 'examples*']),
     install_requires=[
-        'torch>=1.12.0',
+        'torch>=2.3.0',
         'numpy>=1.21.0',
         'pandas>=1.3.0',
         'matplotlib>=3.4.0',
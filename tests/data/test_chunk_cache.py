@@ -0,0 +1,68 @@
+import h5py
+import numpy as np
+import pytest
+from torch.utils.data import DataLoader
+
+from epibench.data.chunk_cache import SharedChunkCache
+from epibench.data.datasets import HDF5Dataset
+
+
+@pytest.fixture
+def chunked_hdf5_file(tmp_path):
+    file_path = tmp_path / "chunked.h5"
+    features = np.random.rand(40, 8, 3).astype(np.float32)
+    with h5py.File(file_path, 'w') as f:
+        f.create_dataset('features', data=features, chunks=(8, 8, 3), compression='gzip')
+        f.create_dataset('targets', data=np.random.rand(40, 1).astype(np.float32))
+    return str(file_path), features
+
+
+def test_shared_chunk_cache_lru_eviction():
+    cache = SharedChunkCache(max_bytes=2 * 4 * 2 * 4, chunk_shape=(4, 2), dtype=np.float32)
+    assert cache.num_slots == 2
+    chunks = {key: np.full((4, 2), key, dtype=np.float32) for key in range(3)}
+    loads = []
+
+    def loader(key):
+        loads.append(key)
+        return chunks[key]
+
+    np.testing.assert_array_equal(cache.get_row(0, 1, lambda: loader(0)), [0, 0])
+    cache.get_row(1, 0, lambda: loader(1))
+    cache.get_row(0, 2, lambda: loader(0))  # hit, refreshes chunk 0
+    cache.get_row(2, 0, lambda: loader(2))  # evicts chunk 1 (least recently used)
+    cache.get_row(0, 3, lambda: loader(0))  # still cached
+
+    assert loads == [0, 1, 2]
+    stats = cache.stats()
+    assert stats == {'hits': 2, 'misses': 3, 'evictions': 1, 'hit_rate': pytest.approx(0.4)}
+    cache.reset_stats()
+    assert cache.stats()['hits'] == 0
+
+
+def test_hdf5_dataset_chunk_cache_shared_across_workers(chunked_hdf5_file):
+    file_path, features = chunked_hdf5_file
+    dataset = HDF5Dataset(file_path, chunk_cache_mb=1)
+    assert dataset.chunk_cache is not None
+
+    loader = DataLoader(dataset, batch_size=5, num_workers=2, shuffle=False)
+    loaded = np.concatenate([batch[0].numpy() for batch in loader])
+    np.testing.assert_array_equal(loaded, features)
+
+    # One miss per chunk, recorded in shared memory and visible in the main process
+    stats = dataset.cache_stats()
+    assert stats['misses'] + stats['hits'] == 40
+    assert stats['misses'] >= 5
+
+    dataset.reset_cache_stats()
+    for idx in range(len(dataset)):
+        np.testing.assert_array_equal(dataset[idx][0], features[idx])
+    assert dataset.cache_stats() == {'hits': 40, 'misses': 0, 'evictions': 0, 'hit_rate': 1.0}
+    dataset.close()
+
+
+def test_hdf5_dataset_without_cache_reports_none(chunked_hdf5_file):
+    file_path, _ = chunked_hdf5_file
+    dataset = HDF5Dataset(file_path)
+    assert dataset.cache_stats() is None
+    dataset.close()
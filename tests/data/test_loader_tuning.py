@@ -0,0 +1,78 @@
+import argparse
+
+import h5py
+import numpy as np
+import pytest
+import yaml
+
+from epibench.cli.tune_loader import setup_tune_loader_parser, tune_loader_main
+from epibench.data.datasets import HDF5Dataset
+from epibench.data.loader_tuning import benchmark_loader, build_grid, diagnose_bottleneck, select_best, write_overlay
+
+
+@pytest.fixture
+def processed_file(tmp_path):
+    file_path = tmp_path / "train.h5"
+    with h5py.File(file_path, 'w') as f:
+        f.create_dataset('features', data=np.random.rand(64, 32, 5).astype(np.float32), chunks=(8, 32, 5), compression='gzip')
+        f.create_dataset('targets', data=np.random.rand(64, 1).astype(np.float32))
+    return str(file_path)
+
+
+def test_build_grid_skips_worker_options_without_workers():
+    grid = build_grid([16, 32], [0, 2], [2, 4], [False])
+    no_worker = [g for g in grid if g['num_workers'] == 0]
+    assert len(no_worker) == 2
+    assert all(g['prefetch_factor'] is None and not g['persistent_workers'] for g in no_worker)
+    assert len(grid) == 2 + 2 * 2 * 2
+
+
+def test_benchmark_loader_reports_throughput_and_rss(processed_file):
+    dataset = HDF5Dataset(processed_file)
+    result = benchmark_loader(dataset, batch_size=16, num_workers=0, max_batches=2, passes=1)
+    assert result['samples_per_sec'] > 0
+    assert result['peak_rss_mb'] > 0
+    assert result['batch_size'] == 16
+    dataset.close()
+
+
+def test_diagnose_bottleneck(processed_file):
+    diagnosis = diagnose_bottleneck(processed_file, num_chunks=4)
+    assert diagnosis['chunks_sampled'] == 4
+    assert diagnosis['bound'] in ('io', 'decode')
+
+
+def test_select_best_respects_rss_budget(tmp_path):
+    results = [
+        {'batch_size': 32, 'num_workers': 4, 'prefetch_factor': 2, 'persistent_workers': True, 'pin_memory': False,
+         'samples_per_sec': 900.0, 'peak_rss_mb': 4000.0},
+        {'batch_size': 64, 'num_workers': 0, 'prefetch_factor': None, 'persistent_workers': False, 'pin_memory': False,
+         'samples_per_sec': 500.0, 'peak_rss_mb': 800.0},
+    ]
+    assert select_best(results)['num_workers'] == 4
+    best = select_best(results, max_rss_mb=1000)
+    assert best['num_workers'] == 0
+    assert select_best(results, max_rss_mb=10) is None
+
+    overlay_path = write_overlay(best, str(tmp_path / "overlay.yaml"))
+    with open(overlay_path) as f:
+        overlay = yaml.safe_load(f)
+    assert overlay == {'data': {'batch_size': 64, 'num_workers': 0, 'pin_memory': False}}
+
+
+def test_tune_loader_main_writes_overlay(processed_file, tmp_path):
+    config_path = tmp_path / "config.yaml"
+    with open(config_path, 'w') as f:
+        yaml.safe_dump({'data': {'train_path': processed_file}}, f)
+
+    parser = argparse.ArgumentParser()
+    setup_tune_loader_parser(parser)
+    output_path = tmp_path / "overlay.yaml"
+    args = parser.parse_args(['--config', str(config_path), '--batch-sizes', '16', '--num-workers', '0',
+                              '--max-batches', '2', '--output', str(output_path)])
+    tune_loader_main(args)
+
+    with open(output_path) as f:
+        overlay = yaml.safe_load(f)
+    assert overlay['data']['batch_size'] == 16
+    assert overlay['data']['num_workers'] == 0
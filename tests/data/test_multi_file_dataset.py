@@ -0,0 +1,114 @@
+import pickle
+
+import h5py
+import numpy as np
+import pytest
+import torch
+from torch.utils.data import DataLoader
+
+from epibench.data.datasets import HDF5Dataset, MultiFileDataset, write_virtual_dataset
+
+
+def _write_processed_file(path, n_samples, seq_len=16, n_channels=3, offset=0):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    features = (np.arange(n_samples * seq_len * n_channels, dtype=np.float32) + offset).reshape(n_samples, seq_len, n_channels)
+    targets = (np.arange(n_samples, dtype=np.float32) + offset).reshape(n_samples, 1)
+    with h5py.File(path, 'w') as f:
+        f.create_dataset('features', data=features)
+        f.create_dataset('targets', data=targets)
+        f.create_dataset('chrom', data=[f'chr{i % 3 + 1}' for i in range(n_samples)], dtype=h5py.string_dtype(encoding='utf-8'))
+        f.create_dataset('start', data=np.arange(n_samples, dtype=np.int64) * 100 + offset)
+        f.create_dataset('end', data=np.arange(n_samples, dtype=np.int64) * 100 + offset + 50)
+        f.attrs['target_sequence_length'] = seq_len
+    return features, targets
+
+
+@pytest.fixture
+def sample_files(tmp_path):
+    paths = {
+        'sampleA': tmp_path / 'AML_sampleA' / 'train.h5',
+        'sampleB': tmp_path / 'AML_sampleB' / 'train.h5',
+    }
+    arrays = {
+        'sampleA': _write_processed_file(paths['sampleA'], 5, offset=0),
+        'sampleB': _write_processed_file(paths['sampleB'], 7, offset=10000),
+    }
+    return paths, arrays
+
+
+def test_multi_file_dataset_index_map(sample_files):
+    paths, arrays = sample_files
+    dataset = MultiFileDataset({sample: str(path) for sample, path in paths.items()}, max_open_files=1)
+
+    assert len(dataset) == 12
+    assert dataset.sample_names == ['sampleA', 'sampleB']
+    assert dataset.locate(4) == (0, 4)
+    assert dataset.locate(5) == (1, 0)
+
+    features, target, coords = dataset[6]
+    np.testing.assert_array_equal(features, arrays['sampleB'][0][1])
+    np.testing.assert_array_equal(target, arrays['sampleB'][1][1])
+    assert coords['sample_id'] == 'sampleB'
+    assert coords['start'] == 10100
+
+    # Alternating access with a single-handle pool must keep returning correct rows
+    features, _, coords = dataset[0]
+    np.testing.assert_array_equal(features, arrays['sampleA'][0][0])
+    assert coords['sample_id'] == 'sampleA'
+    assert len(dataset._handles) == 1
+
+    with pytest.raises(IndexError):
+        dataset[12]
+    dataset.close()
+
+
+def test_multi_file_dataset_sample_ids_from_directories(sample_files):
+    paths, _ = sample_files
+    dataset = MultiFileDataset([str(paths['sampleA']), str(paths['sampleB'])])
+
+    assert dataset.sample_names == ['AML_sampleA', 'AML_sampleB']
+    np.testing.assert_array_equal(dataset.indices_for_sample('AML_sampleB'), np.arange(5, 12))
+    dataset.close()
+
+
+def test_multi_file_dataset_pickles_without_handles(sample_files):
+    paths, _ = sample_files
+    dataset = MultiFileDataset({sample: str(path) for sample, path in paths.items()})
+    dataset[0]
+    clone = pickle.loads(pickle.dumps(dataset))
+    assert len(clone._handles) == 0
+    assert clone[0][2]['sample_id'] == 'sampleA'
+    dataset.close()
+    clone.close()
+
+
+def test_multi_file_dataset_with_dataloader_workers(sample_files):
+    paths, _ = sample_files
+    dataset = MultiFileDataset({sample: str(path) for sample, path in paths.items()})
+    loader = DataLoader(dataset, batch_size=4, num_workers=2, shuffle=False)
+
+    sample_ids = []
+    for features, targets, coords in loader:
+        assert isinstance(features, torch.Tensor)
+        sample_ids.extend(coords['sample_id'])
+    assert sample_ids == ['sampleA'] * 5 + ['sampleB'] * 7
+    dataset.close()
+
+
+def test_write_virtual_dataset(sample_files, tmp_path):
+    paths, arrays = sample_files
+    output_path = tmp_path / 'combined' / 'virtual.h5'
+    write_virtual_dataset({sample: str(path) for sample, path in paths.items()}, str(output_path))
+
+    with h5py.File(output_path, 'r') as f:
+        assert f['features'].is_virtual
+        assert f['features'].shape == (12, 16, 3)
+        np.testing.assert_array_equal(f['features'][5:], arrays['sampleB'][0])
+        np.testing.assert_array_equal(f['sample_id'][:], [0] * 5 + [1] * 7)
+        assert f.attrs['target_sequence_length'] == 16
+
+    dataset = HDF5Dataset(str(output_path))
+    features, target, coords = dataset[11]
+    np.testing.assert_array_equal(features, arrays['sampleB'][0][6])
+    assert coords['chrom'] == 'chr1'
+    dataset.close()
@@ -0,0 +1,81 @@
+import time
+
+import pytest
+import torch
+from torch.utils.data import DataLoader, TensorDataset
+
+from epibench.data.prefetch import BackgroundPrefetcher, maybe_prefetch, move_batch
+
+
+def _make_loader(n_samples=10, batch_size=3):
+    features = torch.arange(n_samples * 4, dtype=torch.float32).reshape(n_samples, 4)
+    targets = torch.arange(n_samples, dtype=torch.float32).reshape(n_samples, 1)
+    return DataLoader(TensorDataset(features, targets), batch_size=batch_size, shuffle=False)
+
+
+def test_prefetcher_yields_same_batches_in_order():
+    loader = _make_loader()
+    prefetcher = BackgroundPrefetcher(loader, num_prefetch=2)
+    assert len(prefetcher) == len(loader)
+
+    for expected, actual in zip(loader, prefetcher):
+        torch.testing.assert_close(actual[0], expected[0])
+        torch.testing.assert_close(actual[1], expected[1])
+    assert prefetcher.batches_served == len(loader)
+
+    # The prefetcher can be iterated again (one pass per epoch)
+    assert sum(1 for _ in prefetcher) == len(loader)
+
+
+def test_prefetcher_casts_floating_tensors_and_keeps_metadata():
+    batch = (torch.ones(2, 3), torch.tensor([1, 2]), {'chrom': ['chr1', 'chr2'], 'start': torch.tensor([0, 5])})
+    moved = move_batch(batch, device=torch.device('cpu'), dtype=torch.bfloat16)
+    assert moved[0].dtype == torch.bfloat16
+    assert moved[1].dtype == torch.int64
+    assert moved[2]['chrom'] == ['chr1', 'chr2']
+    assert moved[2]['start'].dtype == torch.int64
+
+
+def test_prefetcher_records_wait_time():
+    class SlowLoader:
+        def __iter__(self):
+            for i in range(3):
+                time.sleep(0.05)
+                yield torch.tensor([i])
+
+        def __len__(self):
+            return 3
+
+    prefetcher = BackgroundPrefetcher(SlowLoader(), num_prefetch=1)
+    assert [int(batch) for batch in prefetcher] == [0, 1, 2]
+    assert prefetcher.wait_time >= 0.1
+
+
+def test_prefetcher_propagates_loader_errors():
+    def failing_loader():
+        yield torch.zeros(1)
+        raise RuntimeError("corrupt chunk")
+
+    class Loader:
+        def __iter__(self):
+            return failing_loader()
+
+    prefetcher = BackgroundPrefetcher(Loader(), num_prefetch=2)
+    with pytest.raises(RuntimeError, match="corrupt chunk"):
+        for _ in prefetcher:
+            pass
+
+
+def test_prefetcher_stops_on_early_exit():
+    prefetcher = BackgroundPrefetcher(_make_loader(n_samples=100, batch_size=1), num_prefetch=2)
+    for i, _ in enumerate(prefetcher):
+        if i == 2:
+            break
+    assert prefetcher.batches_served == 3
+
+
+def test_maybe_prefetch_disabled_returns_loader():
+    loader = _make_loader()
+    assert maybe_prefetch(loader, 0) is loader
+    assert maybe_prefetch(loader, None) is loader
+    assert isinstance(maybe_prefetch(loader, 2), BackgroundPrefetcher)
@@ -0,0 +1,96 @@
+import numpy as np
+import pytest
+import torch
+
+from epibench.data.samplers import LossAwareSampler, ResumableSampler, stratified_subset_indices
+
+
+def test_order_is_deterministic_per_epoch():
+    data = list(range(20))
+    sampler = ResumableSampler(data, shuffle=True, seed=3)
+    sampler.set_epoch(1)
+    first = list(sampler)
+    assert sorted(first) == data
+    assert list(sampler) == first
+    sampler.set_epoch(2)
+    assert list(sampler) != first
+
+
+def test_resume_mid_epoch_from_state_dict():
+    data = list(range(20))
+    sampler = ResumableSampler(data, shuffle=True, seed=3)
+    sampler.set_epoch(4)
+    full = list(sampler)
+
+    sampler.set_start_index(8)
+    state = sampler.state_dict()
+    restored = ResumableSampler(data, shuffle=True, seed=3)
+    restored.load_state_dict(state)
+    assert len(restored) == 12
+    assert list(restored) == full[8:]
+    assert len(restored) == 20  # The offset only applies to one iteration
+
+
+def test_unshuffled_and_sharded():
+    data = list(range(10))
+    assert list(ResumableSampler(data, shuffle=False)) == data
+    shards = [list(ResumableSampler(data, shuffle=False, num_replicas=2, rank=rank)) for rank in range(2)]
+    assert sorted(shards[0] + shards[1]) == data
+    with pytest.raises(ValueError):
+        ResumableSampler(data).set_start_index(11)
+
+
+def test_stratified_subset_follows_target_distribution():
+    targets = np.concatenate([np.zeros(900), np.ones(100)])
+    indices = stratified_subset_indices(targets, 0.1, num_bins=10, seed=1)
+    assert len(indices) == 100
+    assert (targets[indices] == 1).sum() == 10
+    assert np.array_equal(indices, stratified_subset_indices(targets, 100, num_bins=10, seed=1))
+    assert len(stratified_subset_indices(targets, 5000)) == 1000
+    with pytest.raises(ValueError):
+        stratified_subset_indices(targets, 0)
+
+
+def test_loss_aware_sampler_prefers_hard_samples_with_unbiased_weights():
+    data = list(range(100))
+    sampler = LossAwareSampler(data, seed=1, ema_decay=0.5, uniform_mix=0.2)
+    first = list(sampler)
+    indices, weights = sampler.next_batch(len(first))
+    assert torch.equal(weights, torch.ones(100))  # Uniform until scores exist
+
+    sampler.record_losses(indices, torch.where(indices < 10, 10.0, 0.1))
+    stats = sampler.update_scores()
+    assert 0 < stats['visited_fraction'] == stats['seen_fraction'] < 1  # Drawn with replacement
+    # Never-drawn samples get the mean score; score the rest too so the hard set is known exactly
+    sampler.record_losses(torch.arange(100), torch.where(torch.arange(100) < 10, 10.0, 0.1))
+    assert sampler.update_scores()['seen_fraction'] == 1
+
+    probabilities = sampler.probabilities()
+    assert probabilities.sum().item() == pytest.approx(1.0)
+    assert probabilities[:10].min() > 5 * probabilities[10:].max()
+    sampler.set_epoch(1)
+    drawn = torch.tensor(list(sampler))
+    _, weights = sampler.next_batch(len(drawn))
+    assert (drawn < 10).float().mean() > 0.5
+    # E_p[w * loss] equals the uniform mean loss
+    true_loss = torch.where(torch.arange(100) < 10, 10.0, 0.1).double()
+    assert (probabilities * true_loss / (100 * probabilities)).sum().item() == pytest.approx(true_loss.mean().item())
+    assert weights.max().item() <= 1 / 0.2 + 1e-6
+
+
+def test_loss_aware_sampler_state_round_trip():
+    data = list(range(30))
+    sampler = LossAwareSampler(data, seed=2)
+    list(sampler)
+    indices, _ = sampler.next_batch(30)
+    sampler.record_losses(indices, indices.float())
+    sampler.update_scores()
+    sampler.set_epoch(1)
+    full_order = list(sampler)
+    sampler.set_start_index(5)
+    state = sampler.state_dict()
+
+    restored = LossAwareSampler(data, seed=2)
+    restored.load_state_dict(state)
+    assert list(restored) == full_order[5:]
+    assert torch.equal(restored.scores, sampler.scores)
@@ -0,0 +1,90 @@
+import h5py
+import numpy as np
+import pytest
+
+from epibench.data.data_loader import build_feature_transform
+from epibench.data.statistics import (
+    RunningStats,
+    TargetHistogram,
+    compute_file_statistics,
+    read_stats_attrs,
+    write_stats_attrs,
+)
+from epibench.data.transforms import ChannelNormalize
+
+
+def test_running_stats_matches_numpy_and_merges():
+    rng = np.random.default_rng(0)
+    values = rng.normal(loc=[0.0, 5.0, -2.0], scale=[1.0, 3.0, 0.5], size=(1000, 3))
+
+    sequential = RunningStats(3)
+    for chunk in np.array_split(values, 7):
+        sequential.update(chunk)
+
+    # Two "workers" over disjoint halves, merged afterwards
+    left, right = RunningStats(3), RunningStats(3)
+    left.update(values[:400])
+    right.update(values[400:])
+    merged = left.merge(right)
+
+    for stats in (sequential, merged):
+        assert stats.count == 1000
+        np.testing.assert_allclose(stats.mean, values.mean(axis=0))
+        np.testing.assert_allclose(stats.variance, values.var(axis=0))
+        np.testing.assert_allclose(stats.min, values.min(axis=0))
+        np.testing.assert_allclose(stats.max, values.max(axis=0))
+
+
+def test_target_histogram_clips_out_of_range_values():
+    hist = TargetHistogram(bins=4)
+    hist.update(np.array([-0.5, 0.1, 0.3, 0.6, 0.99, 1.5]))
+    np.testing.assert_array_equal(hist.counts, [2, 1, 1, 2])
+
+
+@pytest.fixture
+def processed_file(tmp_path):
+    file_path = tmp_path / "train.h5"
+    rng = np.random.default_rng(1)
+    features = rng.normal(loc=2.0, scale=4.0, size=(30, 10, 7)).astype(np.float32)
+    with h5py.File(file_path, 'w') as f:
+        f.create_dataset('features', data=features)
+        f.create_dataset('targets', data=rng.random((30, 1)).astype(np.float32))
+    return str(file_path), features
+
+
+def test_stats_attrs_round_trip(processed_file):
+    file_path, features = processed_file
+    assert read_stats_attrs(file_path) is None
+
+    computed = compute_file_statistics(file_path, rows_per_read=8, write=True)
+    stored = read_stats_attrs(file_path)
+    assert stored['feature'].count == 300
+    np.testing.assert_allclose(stored['feature'].mean, features.reshape(-1, 7).mean(axis=0), rtol=1e-5)
+    np.testing.assert_allclose(stored['feature'].std, computed['feature'].std)
+    assert stored['target_hist']['counts'].sum() == 30
+
+
+def test_channel_normalize_from_hdf5(processed_file):
+    file_path, features = processed_file
+    compute_file_statistics(file_path, write=True)
+
+    transform = ChannelNormalize.from_hdf5(file_path)
+    assert transform.channels.tolist() == [4, 5]  # Histone channels between one-hot and boundary mask
+    normalized = transform(features[0])
+    np.testing.assert_array_equal(normalized[:, :4], features[0][:, :4])
+    np.testing.assert_array_equal(normalized[:, 6], features[0][:, 6])
+
+    all_normalized = np.stack([transform(sample) for sample in features]).reshape(-1, 7)
+    np.testing.assert_allclose(all_normalized[:, 4:6].mean(axis=0), 0.0, atol=1e-5)
+    np.testing.assert_allclose(all_normalized[:, 4:6].std(axis=0), 1.0, rtol=1e-4)
+
+
+def test_build_feature_transform_requires_stored_stats(processed_file):
+    file_path, _ = processed_file
+    assert build_feature_transform({'train_path': file_path}) is None
+    with pytest.raises(ValueError, match="No statistics"):
+        build_feature_transform({'train_path': file_path, 'normalize': True})
+
+    compute_file_statistics(file_path, write=True)
+    transform = build_feature_transform({'train_path': file_path, 'normalize': {'channels': [0, 1]}})
+    assert transform.channels.tolist() == [0, 1]
@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+import torch
+
+from epibench.data.data_loader import apply_checkpoint_crop, build_split_transforms
+from epibench.data.transforms import (CenterCrop, Compose, CurriculumCrop, RandomCrop, build_crop_transforms,
+                                      region_center)
+
+
+def _window(seq_len=100, region=(60, 80), channels=6):
+    features = np.zeros((seq_len, channels), dtype=np.float32)
+    features[:, 0] = np.arange(seq_len)  # Position marker
+    features[region[0]:region[1], -1] = 1  # Boundary mask of the BED region
+    return features
+
+
+def test_center_crop_follows_region_and_stays_inside_window():
+    features = _window()
+    assert region_center(features) == 69
+    cropped = CenterCrop(20)(features)
+    assert cropped.shape == (20, 6)
+    assert cropped[0, 0] == 59
+    assert CenterCrop(50)(_window(region=(95, 100)))[-1, 0] == 99  # Shifted back inside the window
+    assert CenterCrop(200)(features).shape == (100, 6)
+    assert region_center(np.zeros((10, 3))) == 5
+
+
+def test_random_crop_jitter_is_bounded_and_seeded():
+    features = _window()
+    crop = RandomCrop(20, jitter=5)
+    torch.manual_seed(0)
+    starts = [crop(features)[0, 0] for _ in range(50)]
+    assert min(starts) >= 54 and max(starts) <= 64 and len(set(starts)) > 1
+    torch.manual_seed(0)
+    assert [crop(features)[0, 0] for _ in range(50)] == starts
+
+
+def test_curriculum_crop_grows_and_evaluates_at_final_length():
+    train_crop, eval_crop = build_crop_transforms({'min_length': 20, 'max_length': 60, 'curriculum_epochs': 3, 'jitter': 0})
+    assert isinstance(train_crop, CurriculumCrop) and eval_crop.length == 60
+    pipeline = Compose([train_crop, None])
+    lengths = []
+    for epoch in range(4):
+        pipeline.set_epoch(epoch)
+        lengths.append(pipeline(_window()).shape[0])
+    assert lengths == [20, 40, 60, 60]
+    with pytest.raises(ValueError):
+        build_crop_transforms({'jitter': 3})
+
+
+def test_checkpoint_crop_overrides_configuration():
+    data_config = {'crop': {'length': 30}, 'train_path': 'unused.h5'}
+    apply_checkpoint_crop(data_config, {'crop_length': 40})
+    _, eval_transform = build_split_transforms(data_config)
+    assert eval_transform(_window()).shape[0] == 40
+    apply_checkpoint_crop(data_config, {'crop_length': None})
+    assert build_split_transforms(data_config) == (None, None)
+    assert apply_checkpoint_crop({'crop': 10}, {})['crop'] == 10  # Older checkpoints keep the configuration
@@ -0,0 +1,56 @@
+import pytest
+import torch
+
+from epibench.models import get_model
+from epibench.models.efficient_seq_cnn import EfficientSeqCNNRegressor
+from epibench.models.profiling import model_cost
+from epibench.models.seq_cnn_regressor import SeqCNNRegressor
+
+
+@pytest.mark.parametrize('stem_downsampling', ['stride', 'pool'])
+def test_forward_shape_and_range(stem_downsampling):
+    model = EfficientSeqCNNRegressor(num_filters=8, stem_downsampling=stem_downsampling, fc_units=[16])
+    model.eval()
+    with torch.no_grad():
+        for inputs in (torch.randn(3, 1000, 11), torch.randn(3, 11, 1000)):  # Both input layouts
+            output = model(inputs)
+            assert output.shape == (3, 1)
+            assert torch.all((output >= 0) & (output <= 1))
+
+
+def test_channel_growth_and_registry():
+    model = EfficientSeqCNNRegressor(num_filters=8, kernel_sizes=[3, 9], num_blocks=2, channel_growth=1.5)
+    assert [block.pointwise.out_channels for block in model.blocks] == [24, 36]
+    assert all(block.depthwise.groups == block.depthwise.in_channels for block in model.blocks)
+    assert model.fc_layers[0].in_features == 36
+    assert get_model('EfficientSeqCNNRegressor') is EfficientSeqCNNRegressor
+
+
+def test_cheaper_than_seq_cnn_regressor():
+    example = torch.randn(1, 10000, 11)
+    efficient = model_cost(EfficientSeqCNNRegressor(), example)
+    baseline = model_cost(SeqCNNRegressor(), example)
+    assert efficient['parameters'] * 10 < baseline['parameters']
+    assert efficient['flops_per_sample'] * 10 < baseline['flops_per_sample']
+
+
+def test_gradient_checkpointing_matches():
+    torch.manual_seed(0)
+    model = EfficientSeqCNNRegressor(num_filters=4, kernel_sizes=[3, 9], fc_units=[8])
+    inputs = torch.randn(2, 400, 11)
+    grads = []
+    for enabled in (False, True):
+        model.set_gradient_checkpointing(enabled)
+        model.zero_grad()
+        torch.manual_seed(1)
+        model(inputs).sum().backward()
+        grads.append([p.grad.clone() for p in model.parameters()])
+    for reference, checkpointed in zip(*grads):
+        assert torch.allclose(reference, checkpointed, atol=1e-6)
+
+
+def test_invalid_configuration():
+    with pytest.raises(ValueError):
+        EfficientSeqCNNRegressor(stem_downsampling='avg')
+    with pytest.raises(ValueError):
+        EfficientSeqCNNRegressor(block_kernel_size=4)
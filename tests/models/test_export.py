@@ -0,0 +1,142 @@
+import argparse
+
+import h5py
+import numpy as np
+import pandas as pd
+import pytest
+import torch
+import yaml
+
+from epibench.cli.optimize import optimize_main, setup_optimize_parser
+from epibench.cli.predict import predict_main, setup_predict_parser
+from epibench.models.efficient_seq_cnn import EfficientSeqCNNRegressor
+from epibench.models.export import (check_artifact_input, is_inference_artifact, load_inference_artifact,
+                                    optimize_for_inference, save_inference_artifact, strip_dropout)
+from epibench.models.loading import load_inference_model
+from epibench.models.seq_cnn_regressor import SeqCNNRegressor
+from epibench.models.transformer import SimpleTransformer
+
+MODEL_PARAMS = {'input_channels': 5, 'num_filters': 4, 'kernel_sizes': [3, 5], 'fc_units': [16, 8]}
+
+
+def _eval_model(model):
+    """Model with non-trivial BatchNorm running statistics, in eval mode."""
+    torch.manual_seed(0)
+    model.train()
+    with torch.no_grad():
+        for _ in range(3):
+            model(torch.randn(8, 64, 5) * 2 + 0.5)
+    return model.eval()
+
+
+@pytest.mark.parametrize('model', [
+    SeqCNNRegressor(**MODEL_PARAMS),
+    SeqCNNRegressor(**MODEL_PARAMS, stem_impl='fused'),
+    SeqCNNRegressor(**MODEL_PARAMS, stem_impl='fft'),
+    EfficientSeqCNNRegressor(input_channels=5, num_filters=4, kernel_sizes=[3, 5], fc_units=[16, 8]),
+    SimpleTransformer(input_channels=5, seq_len=64, num_classes=1, d_model=8, nhead=2, num_encoder_layers=1,
+                      dim_feedforward=16, attention='local', window_size=16),
+])
+def test_optimize_for_inference_matches_eager_model(model):
+    model = _eval_model(model)
+    optimized = optimize_for_inference(model, torch.randn(1, 64, 5))
+    assert isinstance(optimized, torch.jit.ScriptModule)
+    assert any(isinstance(m, torch.nn.Dropout) for m in model.modules())  # Original left unchanged
+    inputs = torch.randn(6, 64, 5)  # Other batch size than the trace
+    with torch.no_grad():
+        assert torch.allclose(model(inputs), optimized(inputs), atol=1e-5)
+
+
+@pytest.mark.parametrize('stem_impl', ['branches', 'fft'])
+def test_convolutional_artifact_at_another_length(stem_impl):
+    # The stem runs as branches in the trace, so no FFT size is baked in for the traced length
+    model = _eval_model(SeqCNNRegressor(**MODEL_PARAMS, stem_impl=stem_impl))
+    optimized = optimize_for_inference(model, torch.randn(1, 64, 5))
+    inputs = torch.randn(3, 96, 5)
+    with torch.no_grad():
+        assert torch.allclose(model(inputs), optimized(inputs), atol=1e-5)
+
+
+def test_artifact_rejects_other_sequence_lengths(tmp_path):
+    # Local attention splits the sequence into a traced number of blocks
+    model = _eval_model(SimpleTransformer(input_channels=5, seq_len=64, num_classes=1, d_model=8, nhead=2, num_encoder_layers=1,
+                                          dim_feedforward=16, attention='local', window_size=16))
+    example = torch.randn(1, 64, 5)
+    path = save_inference_artifact(optimize_for_inference(model, example), str(tmp_path / "model.pt"), example, {})
+    _, metadata = load_inference_artifact(path, torch.device('cpu'))
+    check_artifact_input(metadata, [(torch.zeros(64, 5), 0.0)])
+    with pytest.raises(ValueError, match=r"\[64, 5\]"):
+        check_artifact_input(metadata, [(torch.zeros(96, 5), 0.0)])
+    check_artifact_input({'epoch': 1}, [(torch.zeros(96, 5), 0.0)])  # Regular checkpoints are not checked
+
+
+def test_strip_dropout_keeps_fc_activation_pattern():
+    model = _eval_model(SeqCNNRegressor(**MODEL_PARAMS))
+    inputs = torch.randn(2, 64, 5)
+    with torch.no_grad():
+        expected = model(inputs)
+        strip_dropout(model)
+        assert [type(layer).__name__ for layer in model.fc_layers] == ['Linear', 'Linear', 'Linear']
+        assert torch.allclose(model(inputs), expected)
+
+
+def test_inference_artifact_roundtrip(tmp_path):
+    model = _eval_model(SeqCNNRegressor(**MODEL_PARAMS))
+    example = torch.randn(1, 64, 5)
+    path = save_inference_artifact(optimize_for_inference(model, example), str(tmp_path / "model.pt"), example,
+                                   {'model_name': 'SeqCNNRegressor', 'epoch': 4, 'crop_length': 64})
+    checkpoint_path = tmp_path / "checkpoint.pth"
+    torch.save({'model_state_dict': model.state_dict()}, checkpoint_path)
+    assert is_inference_artifact(path)
+    assert not is_inference_artifact(str(checkpoint_path))
+
+    loaded, metadata = load_inference_artifact(path, torch.device('cpu'))
+    assert metadata['epoch'] == 4 and metadata['crop_length'] == 64 and metadata['input_shape'] == [64, 5]
+    # load_inference_model serves artifacts without rebuilding the configured architecture
+    same, _ = load_inference_model({}, path, torch.device('cpu'))
+    inputs = torch.randn(3, 64, 5)
+    with torch.no_grad():
+        assert torch.allclose(loaded(inputs), model(inputs), atol=1e-5)
+        assert torch.allclose(same(inputs), model(inputs), atol=1e-5)
+    with pytest.raises(KeyError):
+        load_inference_artifact(str(checkpoint_path), torch.device('cpu'))
+
+
+def test_optimize_command_and_prediction(tmp_path):
+    data_path = str(tmp_path / "test.h5")
+    rng = np.random.default_rng(0)
+    with h5py.File(data_path, 'w') as f:
+        f.create_dataset('features', data=rng.random((12, 64, 5)).astype(np.float32))
+        f.create_dataset('targets', data=rng.random((12, 1)).astype(np.float32))
+    config_path = tmp_path / "config.yaml"
+    config_path.write_text(yaml.safe_dump({'model': {'name': 'SeqCNNRegressor', 'params': MODEL_PARAMS},
+                                           'data': {'test_path': data_path, 'batch_size': 4}}))
+    model = _eval_model(SeqCNNRegressor(**MODEL_PARAMS))
+    checkpoint_path = tmp_path / "best_model.pth"
+    torch.save({'epoch': 2, 'model_state_dict': model.state_dict()}, checkpoint_path)
+
+    parser = argparse.ArgumentParser()
+    setup_optimize_parser(parser)
+    optimize_main(parser.parse_args(['--config', str(config_path), '--checkpoint', str(checkpoint_path), '--device', 'cpu']))
+    artifact_path = tmp_path / "best_model.optimized.pt"
+    _, metadata = load_inference_artifact(str(artifact_path), torch.device('cpu'))
+    assert metadata['model_name'] == 'SeqCNNRegressor' and metadata['epoch'] == 2
+    assert metadata['check']['max_abs_diff'] < 1e-5
+
+    parser = argparse.ArgumentParser()
+    setup_predict_parser(parser)
+    output_file = tmp_path / "predictions.csv"
+    predict_main(parser.parse_args(['--config', str(config_path), '--checkpoint', str(artifact_path), '--device', 'cpu',
+                                    '--input-data', data_path, '--output-file', str(output_file)]))
+    with h5py.File(data_path, 'r') as f, torch.no_grad():
+        expected = model(torch.from_numpy(f['features'][:])).numpy().ravel()
+    assert np.allclose(pd.read_csv(output_file)['predictions'].to_numpy(), expected, atol=1e-5)
+
+    # Windows of another length than the traced one are rejected
+    other_path = str(tmp_path / "other.h5")
+    with h5py.File(other_path, 'w') as f:
+        f.create_dataset('features', data=rng.random((4, 96, 5)).astype(np.float32))
+        f.create_dataset('targets', data=rng.random((4, 1)).astype(np.float32))
+    with pytest.raises(SystemExit):
+        predict_main(parser.parse_args(['--config', str(config_path), '--checkpoint', str(artifact_path), '--device', 'cpu',
+                                        '--input-data', other_path, '--output-file', str(output_file)]))
@@ -0,0 +1,136 @@
+import os
+
+import pytest
+import torch
+
+from epibench.models.loading import (build_model, compile_model, example_input_from_dataset, get_compile_config,
+                                     load_inference_model, trace_with_cache)
+from epibench.models.seq_cnn_regressor import SeqCNNRegressor
+
+MODEL_CONFIG = {'name': 'SeqCNNRegressor',
+                'params': {'input_channels': 5, 'num_filters': 4, 'kernel_sizes': [3, 5], 'fc_units': [8]}}
+
+
+@pytest.fixture(autouse=True)
+def _restore_inductor_cache_dir():
+    previous = os.environ.get('TORCHINDUCTOR_CACHE_DIR')
+    yield
+    if previous is None:
+        os.environ.pop('TORCHINDUCTOR_CACHE_DIR', None)
+    else:
+        os.environ['TORCHINDUCTOR_CACHE_DIR'] = previous
+
+
+def _model():
+    torch.manual_seed(0)
+    return build_model(MODEL_CONFIG).eval()
+
+
+def test_get_compile_config():
+    assert get_compile_config({}) == {}
+    assert get_compile_config({'model': {'compile': True}}) == {'enabled': True}
+    assert get_compile_config({'model': {'compile': {'enabled': True, 'mode': 'reduce-overhead'}}})['mode'] == 'reduce-overhead'
+
+
+def test_compile_disabled_returns_model():
+    model = _model()
+    assert compile_model(model, {}) is model
+
+
+def test_load_inference_model(tmp_path):
+    model = _model()
+    checkpoint_path = tmp_path / 'best_model.pth'
+    torch.save({'epoch': 3, 'model_state_dict': model.state_dict()}, checkpoint_path)
+
+    loaded, checkpoint = load_inference_model({'model': MODEL_CONFIG}, str(checkpoint_path), torch.device('cpu'))
+    assert checkpoint['epoch'] == 3
+    assert not loaded.training
+    x = torch.rand(2, 32, 5)
+    assert torch.allclose(loaded(x), model(x))
+
+    with pytest.raises(FileNotFoundError):
+        load_inference_model({'model': MODEL_CONFIG}, str(tmp_path / 'missing.pth'), torch.device('cpu'))
+
+
+def test_torch_compile_matches_eager(tmp_path):
+    model = _model()
+    x = torch.rand(2, 32, 5)
+    compiled = compile_model(model, {'enabled': True, 'backend': 'eager', 'cache_dir': str(tmp_path)}, example_input=x[:1])
+    with torch.no_grad():
+        assert torch.allclose(compiled(x), model(x), atol=1e-6)
+
+
+def test_trace_cache_is_reused_with_current_weights(tmp_path):
+    x = torch.rand(2, 32, 5)
+    first = _model()
+    trace_with_cache(first, x[:1], str(tmp_path))
+    traces = os.listdir(tmp_path / 'torchscript')
+    assert len(traces) == 1
+
+    # A second checkpoint of the same architecture reuses the trace but keeps its own weights
+    torch.manual_seed(1)
+    second = SeqCNNRegressor(**MODEL_CONFIG['params']).eval()
+    traced = trace_with_cache(second, x[:1], str(tmp_path))
+    assert os.listdir(tmp_path / 'torchscript') == traces
+    with torch.no_grad():
+        assert torch.allclose(traced(x), second(x), atol=1e-6)
+
+    # A different input shape gets its own trace
+    trace_with_cache(second, torch.rand(1, 64, 5), str(tmp_path))
+    assert len(os.listdir(tmp_path / 'torchscript')) == 2
+
+
+def test_failed_compile_falls_back_to_trace(tmp_path):
+    model = _model()
+    x = torch.rand(1, 32, 5)
+    result = compile_model(model, {'enabled': True, 'backend': 'no_such_backend', 'cache_dir': str(tmp_path)}, example_input=x)
+    assert isinstance(result, torch.jit.ScriptModule)
+    assert compile_model(model, {'enabled': True, 'backend': 'no_such_backend', 'fallback': 'none',
+                                 'cache_dir': str(tmp_path)}, example_input=x) is model
+
+
+def test_training_compile_warm_up_leaves_state_untouched(tmp_path):
+    model = _model().train()
+    state = {name: value.clone() for name, value in model.state_dict().items()}
+    example_input = torch.rand(1, 32, 5)
+    rng_state = torch.get_rng_state()
+    compiled = compile_model(model, {'enabled': True, 'backend': 'eager', 'cache_dir': str(tmp_path)},
+                             example_input=example_input, for_training=True)
+    assert compiled is not model
+    assert model.training
+    assert all(parameter.grad is None for parameter in model.parameters())
+    assert all(torch.equal(state[name], value) for name, value in model.state_dict().items())  # BatchNorm statistics too
+    assert torch.equal(torch.get_rng_state(), rng_state)
+    assert os.environ['TORCHINDUCTOR_CACHE_DIR'] == str(tmp_path / 'inductor')
+
+
+def test_failed_training_compile_stays_eager(tmp_path):
+    model = _model().train()
+    result = compile_model(model, {'enabled': True, 'backend': 'no_such_backend', 'cache_dir': str(tmp_path)},
+                           example_input=torch.rand(1, 32, 5), for_training=True)
+    assert result is model
+
+
+def test_recompile_for_another_batch_size_uses_cache_dir(tmp_path):
+    torch._dynamo.reset()
+    model = torch.nn.Sequential(torch.nn.Linear(5, 3), torch.nn.ReLU()).eval()
+    compiled = compile_model(model, {'enabled': True, 'dynamic': False, 'fallback': 'none', 'cache_dir': str(tmp_path)},
+                             example_input=torch.rand(4, 5))
+    assert compiled is not model
+
+    def cached_files():
+        return {os.path.join(root, name) for root, _, names in os.walk(tmp_path / 'inductor') for name in names}
+
+    warm_up_files = cached_files()
+    assert warm_up_files
+    with torch.no_grad():
+        compiled(torch.rand(3, 5))  # Last partial batch: recompiled after compile_model returned
+    assert cached_files() > warm_up_files
+
+
+def test_example_input_uses_batch_size():
+    dataset = [(torch.rand(32, 5), 0.0) for _ in range(3)]
+    assert example_input_from_dataset(dataset, torch.device('cpu')).shape == (1, 32, 5)
+    assert example_input_from_dataset(dataset, torch.device('cpu'), batch_size=2).shape == (2, 32, 5)
+    assert example_input_from_dataset(dataset, torch.device('cpu'), batch_size=64).shape == (3, 32, 5)
+    assert example_input_from_dataset(dataset, torch.device('cpu'), batch_size=None).shape == (1, 32, 5)
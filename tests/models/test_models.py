@@ -1,9 +1,10 @@
+import copy
 import pytest
 import torch
 import os
 from epibench.models.base import BaseModel # Needed for load
 from epibench.models.cnn import SimpleCNN
-from epibench.models.transformer import SimpleTransformer, PositionalEncoding
+from epibench.models.transformer import SimpleTransformer, PositionalEncoding, local_attention
 
 # Test parameters
 BATCH_SIZE = 4
@@ -165,3 +166,77 @@ def test_simple_cnn_input_unsqueeze(cnn_model):
             pytest.fail("SimpleCNN failed to handle 2D input (batch, seq_len).")
     else:
         pytest.skip("Skipping 2D input test because input_channels != 1")
+
+
+def test_simple_transformer_gradient_checkpointing_matches(dummy_transformer_input):
+    """Checkpointed encoder layers give the same gradients, including dropout."""
+    torch.manual_seed(0)
+    model = SimpleTransformer(input_channels=INPUT_CHANNELS, seq_len=SEQ_LEN, num_classes=NUM_CLASSES,
+                              d_model=D_MODEL, nhead=NHEAD, num_encoder_layers=NUM_ENCODER_LAYERS, dropout=0.2,
+                              batch_first=False)
+    checkpointed = copy.deepcopy(model).set_gradient_checkpointing(True)
+    assert checkpointed.get_config()["gradient_checkpointing"] is True
+    grads = []
+    for m in (model, checkpointed):
+        m.train()
+        torch.manual_seed(1)
+        m(dummy_transformer_input).sum().backward()
+        grads.append({name: p.grad.clone() for name, p in m.named_parameters()})
+    for name, grad in grads[0].items():
+        assert torch.allclose(grad, grads[1][name], atol=1e-5), name
+
+
+def test_simple_transformer_batch_first_layout():
+    """batch_first picks the layout, also when the batch size equals seq_len."""
+    torch.manual_seed(0)
+    seq_major = SimpleTransformer(input_channels=INPUT_CHANNELS, seq_len=SEQ_LEN, num_classes=NUM_CLASSES,
+                                  d_model=D_MODEL, nhead=NHEAD, num_encoder_layers=1, dropout=0.0, batch_first=False).eval()
+    batch_major = SimpleTransformer(input_channels=INPUT_CHANNELS, seq_len=SEQ_LEN, num_classes=NUM_CLASSES,
+                                    d_model=D_MODEL, nhead=NHEAD, num_encoder_layers=1, dropout=0.0).eval()
+    assert batch_major.config["batch_first"]
+    batch_major.load_state_dict(seq_major.state_dict())
+    inputs = torch.randn(SEQ_LEN, SEQ_LEN, INPUT_CHANNELS)  # (batch, seq_len, channels) with batch == seq_len
+    with torch.no_grad():
+        expected = seq_major(inputs.transpose(0, 1))
+        assert torch.allclose(batch_major(inputs), expected, atol=1e-5)
+        assert not torch.allclose(seq_major(inputs), expected, atol=1e-5)  # Not transposed by guessing
+    with pytest.raises(ValueError, match="batch, seq_len"):
+        batch_major(torch.randn(SEQ_LEN, BATCH_SIZE, INPUT_CHANNELS))
+
+
+def test_local_attention_matches_masked_dense_attention():
+    torch.manual_seed(0)
+    q, k, v = (torch.randn(2, 3, 37, 8) for _ in range(3))
+    positions = torch.arange(37)
+    band = (positions[None, :] - positions[:, None]).abs() <= 5
+    expected = torch.nn.functional.scaled_dot_product_attention(q, k, v, attn_mask=band)
+    assert torch.allclose(local_attention(q, k, v, window_size=5), expected, atol=1e-5)
+    full = torch.nn.functional.scaled_dot_product_attention(q, k, v)
+    assert torch.allclose(local_attention(q, k, v, window_size=37), full, atol=1e-5)
+
+
+@pytest.mark.parametrize('tokenizer', ['linear', 'conv'])
+def test_simple_transformer_local_attention_long_sequences(tokenizer):
+    seq_len = 10000
+    model = SimpleTransformer(input_channels=11, seq_len=seq_len, num_classes=1, d_model=16, nhead=2,
+                              num_encoder_layers=1, dim_feedforward=32, attention='local', window_size=64,
+                              tokenizer=tokenizer, tokenizer_pool=8)
+    assert model.pos_encoder.pe.shape[0] >= (seq_len if tokenizer == 'linear' else seq_len // 8)
+    inputs = torch.randn(2, seq_len, 11)  # Batch-major dataset layout
+    output = model(inputs)
+    assert output.shape == (2, 1)
+    output.sum().backward()
+    assert all(p.grad is not None for p in model.parameters())
+
+    model.set_gradient_checkpointing(True)
+    model.zero_grad()
+    model(inputs).sum().backward()
+
+
+def test_simple_transformer_attention_validation():
+    with pytest.raises(ValueError):
+        SimpleTransformer(input_channels=INPUT_CHANNELS, seq_len=SEQ_LEN, num_classes=NUM_CLASSES, d_model=D_MODEL,
+                          nhead=NHEAD, num_encoder_layers=1, attention='linformer')
+    with pytest.raises(ValueError):
+        SimpleTransformer(input_channels=INPUT_CHANNELS, seq_len=SEQ_LEN, num_classes=NUM_CLASSES, d_model=D_MODEL,
+                          nhead=NHEAD, num_encoder_layers=1, tokenizer='patch')
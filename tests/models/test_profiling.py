@@ -0,0 +1,63 @@
+import torch
+import torch.nn as nn
+
+from epibench.models.profiling import count_parameters, estimate_flops, model_cost
+
+
+def test_conv_and_linear_flops():
+    model = nn.Sequential(nn.Conv1d(4, 8, kernel_size=3, padding=1), nn.ReLU(), nn.Flatten(), nn.Linear(8 * 10, 2))
+    flops = estimate_flops(model, torch.randn(2, 4, 10))
+    conv_macs = 2 * 8 * 10 * 4 * 3
+    linear_macs = 2 * 2 * 80
+    assert flops == 2 * (conv_macs + linear_macs)
+    assert model.training  # Mode is restored
+
+
+def test_grouped_conv_and_attention_flops():
+    depthwise = nn.Conv1d(6, 6, kernel_size=5, padding=2, groups=6)
+    assert estimate_flops(depthwise, torch.randn(1, 6, 20)) == 2 * 6 * 20 * 5
+
+    class SelfAttention(nn.Module):
+        def __init__(self):
+            super().__init__()
+            self.attention = nn.MultiheadAttention(embed_dim=8, num_heads=2)
+
+        def forward(self, x):
+            return self.attention(x, x, x)[0]
+
+    flops = estimate_flops(SelfAttention(), torch.randn(5, 1, 8))  # (seq, batch, embed)
+    assert flops == 2 * (3 * 5 * 8 * 8 + 2 * 5 * 5 * 8 + 5 * 8 * 8)
+
+
+def test_model_cost():
+    model = nn.Linear(3, 2)
+    model.bias.requires_grad_(False)
+    assert count_parameters(model) == 8
+    cost = model_cost(model, torch.randn(4, 3))
+    assert cost['trainable_parameters'] == 6
+    assert cost['input_shape'] == [3]
+    assert cost['flops_per_sample'] == 2 * 2 * 3
+    assert 'flops_per_sample' not in model_cost(model)
+
+
+def test_local_attention_flops_scale_linearly():
+    from epibench.models.transformer import SimpleTransformer
+
+    def flops(seq_len):
+        model = SimpleTransformer(input_channels=4, seq_len=seq_len, num_classes=1, d_model=8, nhead=2,
+                                  num_encoder_layers=1, dim_feedforward=16, attention='local', window_size=16)
+        return estimate_flops(model, torch.randn(1, seq_len, 4))
+
+    assert flops(512) - flops(256) == 2 * (flops(256) - flops(128))  # Linear in the length (plus the constant output layer)
+
+
+def test_functional_stems_are_counted():
+    from epibench.models.seq_cnn_regressor import SeqCNNRegressor
+
+    params = dict(input_channels=5, num_filters=4, kernel_sizes=[3, 9], fc_units=[8])
+    inputs = torch.randn(2, 64, 5)
+    flops = {impl: estimate_flops(SeqCNNRegressor(**params, stem_impl=impl), inputs) for impl in ('branches', 'fused', 'fft')}
+    branch_macs = 2 * 4 * 64 * 5 * (3 + 9)
+    assert flops['fused'] - flops['branches'] == 2 * 2 * 4 * 64 * 5 * (9 - 3)  # The 3-tap kernels are padded to 9 taps
+    assert flops['fft'] > flops['branches'] - 2 * branch_macs  # The spectral stem is not free
+
@@ -0,0 +1,101 @@
+import argparse
+import copy
+import json
+
+import h5py
+import numpy as np
+import pandas as pd
+import pytest
+import torch
+import yaml
+
+from epibench.cli.predict import predict_main, setup_predict_parser
+from epibench.cli.quantize import quantize_main, setup_quantize_parser
+from epibench.models.efficient_seq_cnn import EfficientSeqCNNRegressor
+from epibench.models.quantization import fold_batch_norm, load_quantized_model, quantize_model
+from epibench.models.seq_cnn_regressor import SeqCNNRegressor
+
+MODEL_PARAMS = {'input_channels': 5, 'num_filters': 4, 'kernel_sizes': [3, 5], 'fc_units': [8]}
+
+
+def _trained_bn_model(model):
+    """Model with non-trivial BatchNorm running statistics, in eval mode."""
+    torch.manual_seed(0)
+    model.train()
+    with torch.no_grad():
+        for _ in range(3):
+            model(torch.randn(8, 64, model.input_channels) * 2 + 0.5)
+    return model.eval()
+
+
+@pytest.mark.parametrize('model', [SeqCNNRegressor(**MODEL_PARAMS), EfficientSeqCNNRegressor(input_channels=5, num_filters=4, kernel_sizes=[3, 5])])
+def test_fold_batch_norm_preserves_outputs(model):
+    model = _trained_bn_model(model)
+    inputs = torch.randn(4, 64, 5)
+    folded = fold_batch_norm(copy.deepcopy(model))
+    assert not any(isinstance(m, torch.nn.BatchNorm1d) for m in folded.modules())
+    with torch.no_grad():
+        assert torch.allclose(model(inputs), folded(inputs), atol=1e-6)
+
+
+@pytest.mark.parametrize('mode', ['dynamic', 'static'])
+@pytest.mark.parametrize('stem_impl', ['branches', 'fused'])
+def test_quantized_model_tracks_float_model(mode, stem_impl):
+    model = _trained_bn_model(SeqCNNRegressor(**MODEL_PARAMS, stem_impl=stem_impl))
+    calibration = [torch.randn(8, 64, 5) for _ in range(4)]
+    quantized = quantize_model(model, mode, calibration)
+    assert any(isinstance(m, torch.ao.nn.quantized.dynamic.Linear) for m in quantized.modules())
+    if mode == 'static':
+        assert any(isinstance(m, torch.ao.nn.quantized.Conv1d) for m in quantized.modules())
+    assert any(isinstance(m, torch.nn.BatchNorm1d) for m in model.modules())  # Original left unchanged
+    inputs = torch.randn(4, 64, 5)
+    with torch.no_grad():
+        assert torch.allclose(model(inputs), quantized(inputs), atol=2e-2)
+
+
+def test_quantize_validation():
+    model = SeqCNNRegressor(**MODEL_PARAMS)
+    with pytest.raises(ValueError):
+        quantize_model(model, 'float16')
+    with pytest.raises(ValueError):
+        quantize_model(model, 'static')
+
+
+def test_quantize_command_and_quantized_prediction(tmp_path):
+    rng = np.random.default_rng(0)
+    paths = {}
+    for split, n in (('train', 32), ('val', 16)):
+        paths[split] = str(tmp_path / f"{split}.h5")
+        with h5py.File(paths[split], 'w') as f:
+            f.create_dataset('features', data=rng.random((n, 64, 5)).astype(np.float32))
+            f.create_dataset('targets', data=rng.random((n, 1)).astype(np.float32))
+    config = {'model': {'name': 'SeqCNNRegressor', 'params': MODEL_PARAMS},
+              'data': {'train_path': paths['train'], 'val_path': paths['val'], 'batch_size': 8}}
+    config_path = tmp_path / "config.yaml"
+    config_path.write_text(yaml.safe_dump(config))
+    model = _trained_bn_model(SeqCNNRegressor(**MODEL_PARAMS))
+    checkpoint_path = tmp_path / "best_model.pth"
+    torch.save({'epoch': 3, 'model_state_dict': model.state_dict(), 'crop_length': None}, checkpoint_path)
+
+    parser = argparse.ArgumentParser()
+    setup_quantize_parser(parser)
+    quantize_main(parser.parse_args(['--config', str(config_path), '--checkpoint', str(checkpoint_path),
+                                     '--calibration-samples', '16', '--max-r2-drop', '1.0']))
+
+    quantized_path = tmp_path / "best_model.static.int8.pt"
+    report = json.loads((tmp_path / "best_model.static.int8.json").read_text())
+    assert report['quantization'] == 'static' and report['calibration_samples'] == 16 and report['epoch'] == 3
+    assert report['accuracy']['samples'] == 16 and report['accuracy']['passed']
+    assert set(report['accuracy']['delta']) >= {'mse', 'r2'}
+    quantized, info = load_quantized_model(str(quantized_path))
+    assert info['crop_length'] is None and info['accuracy'] == report['accuracy']
+
+    parser = argparse.ArgumentParser()
+    setup_predict_parser(parser)
+    output_file = tmp_path / "predictions.csv"
+    predict_main(parser.parse_args(['--config', str(config_path), '--checkpoint', str(quantized_path), '--quantized',
+                                    '--input-data', paths['val'], '--output-file', str(output_file)]))
+    predictions = pd.read_csv(output_file)['predictions'].to_numpy()
+    with h5py.File(paths['val'], 'r') as f, torch.no_grad():
+        expected = model(torch.from_numpy(f['features'][:])).numpy().ravel()
+    assert np.abs(predictions - expected).max() < 2e-2
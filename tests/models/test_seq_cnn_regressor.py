@@ -1,3 +1,5 @@
+import copy
+
 import pytest
 import torch
 from epibench.models.seq_cnn_regressor import SeqCNNRegressor
@@ -80,4 +82,62 @@ def test_init_weights_changes_weights(default_model):
          default_model.init_weights() 
          new_bias = default_model.conv_branches[0][0].bias.data
          # Xavier init sets bias to 0
-         assert torch.all(new_bias == 0) 
\ No newline at end of file
+         assert torch.all(new_bias == 0) 
+
+def _gradients_and_stats(model, inputs):
+    model.train()
+    torch.manual_seed(1)  # Same dropout masks
+    model(inputs).sum().backward()
+    grads = {name: param.grad.clone() for name, param in model.named_parameters()}
+    return grads, {name: buf.clone() for name, buf in model.named_buffers()}
+
+
+@pytest.mark.parametrize('use_batch_norm', [True, False])
+def test_gradient_checkpointing_matches_gradients(use_batch_norm):
+    torch.manual_seed(0)
+    model = SeqCNNRegressor(input_channels=11, num_filters=4, kernel_sizes=[3, 9], fc_units=[8],
+                            dropout_rate=0.3, use_batch_norm=use_batch_norm)
+    checkpointed = copy.deepcopy(model).set_gradient_checkpointing(True)
+    inputs = torch.randn(3, 64, 11)
+    grads, buffers = _gradients_and_stats(model, inputs)
+    checkpointed_grads, checkpointed_buffers = _gradients_and_stats(checkpointed, inputs)
+    for name, grad in grads.items():
+        assert torch.allclose(grad, checkpointed_grads[name], atol=1e-6), name
+    for name, buffer in buffers.items():  # BatchNorm statistics are updated once, not again on recompute
+        assert torch.equal(buffer, checkpointed_buffers[name]), name
+    checkpointed.eval()
+    with torch.no_grad():
+        assert torch.allclose(model.eval()(inputs), checkpointed(inputs))
+
+
+@pytest.mark.parametrize('stem_impl', ['fused', 'fft'])
+@pytest.mark.parametrize('use_batch_norm', [True, False])
+def test_stem_implementations_match_branches(stem_impl, use_batch_norm):
+    torch.manual_seed(0)
+    params = dict(input_channels=11, num_filters=4, kernel_sizes=[3, 9, 25, 51], fc_units=[8], use_batch_norm=use_batch_norm)
+    reference = SeqCNNRegressor(**params)
+    model = SeqCNNRegressor(**params, stem_impl=stem_impl)
+    model.load_state_dict(reference.state_dict())  # Same parameter names and shapes
+    inputs = torch.randn(2, 300, 11)
+
+    grads = []
+    for m in (reference, model):
+        m.train()
+        torch.manual_seed(1)  # Same dropout masks
+        m(inputs).sum().backward()
+        grads.append({name: p.grad for name, p in m.named_parameters()})
+    for name, grad in grads[0].items():
+        assert torch.allclose(grad, grads[1][name], rtol=1e-4, atol=1e-5), name
+    for name, buffer in reference.named_buffers():  # Per-branch BatchNorm statistics
+        assert torch.allclose(buffer.float(), model.state_dict()[name].float(), atol=1e-5), name
+
+    reference.eval(), model.eval()
+    with torch.no_grad():
+        assert torch.allclose(reference(inputs), model(inputs), atol=1e-5)
+
+
+def test_stem_impl_validation():
+    with pytest.raises(ValueError):
+        SeqCNNRegressor(stem_impl='winograd')
+    with pytest.raises(ValueError):
+        SeqCNNRegressor(kernel_sizes=[3, 8], stem_impl='fft')
@@ -400,6 +400,19 @@ def test_run_temp_file_cleanup_on_error(mock_run_dependencies):
     mock_collector_class.assert_called_once_with(executor.base_output_directory, executor.checkpoint_data)
     mock_collector_instance.collect_all.assert_called_once()
 
+def test_log_training_summaries(executor_instance):
+    """Training summaries written in the pipeline subprocess are added to the run log."""
+    checkpoint_dir = executor_instance.base_output_directory / 'sampleA' / 'training' / 'checkpoints'
+    checkpoint_dir.mkdir(parents=True)
+    summary = {'stop_reason': 'early_stopping', 'history': {'lr': [1e-3, 5e-4]}, 'performance': {'samples_per_sec': 120.0}}
+    (checkpoint_dir / 'training_summary.json').write_text(json.dumps(summary))
+    executor_instance.log_manager = MagicMock()
+
+    executor_instance._log_training_summaries('sampleA')
+
+    executor_instance.log_manager.update_log.assert_called_once_with(
+        {"custom_metadata": {"training_summaries": {str(Path('training') / 'checkpoints'): summary}}}, immediate_save=True)
+
 # TODO: Add more tests:
 # - Test logging setup variations (_setup_logging)
 # - Test error during checkpoint saving/loading IOErrors
@@ -0,0 +1,52 @@
+import os
+import threading
+
+import torch
+
+from epibench.training import checkpoint
+from epibench.training.checkpoint import AsyncCheckpointWriter, snapshot_to_cpu
+
+
+def test_snapshot_is_independent_of_live_tensors():
+    weight = torch.zeros(3)
+    snapshot = snapshot_to_cpu({'model': {'weight': weight}, 'history': [1.0]})
+    weight.add_(1)
+    assert torch.equal(snapshot['model']['weight'], torch.zeros(3))
+
+
+def test_submit_does_not_wait_for_the_write(tmp_path, monkeypatch):
+    release = threading.Event()
+    real_save = checkpoint.atomic_torch_save
+
+    def slow_save(state, path):
+        release.wait(timeout=10)
+        real_save(state, path)
+
+    monkeypatch.setattr(checkpoint, 'atomic_torch_save', slow_save)
+    writer = AsyncCheckpointWriter(max_pending=2)
+    path = tmp_path / 'best_model.pth'
+    writer.submit({'weight': torch.ones(2)}, str(path))
+    assert not path.exists()  # Training continues while the write is pending
+
+    release.set()
+    writer.flush()
+    assert torch.equal(torch.load(path)['weight'], torch.ones(2))
+    assert not [name for name in os.listdir(tmp_path) if '.tmp' in name]
+    writer.close()
+
+
+def test_keep_last_retention(tmp_path):
+    writer = AsyncCheckpointWriter(keep_last=2)
+    for epoch in range(1, 5):
+        writer.submit({'epoch': epoch}, str(tmp_path / f'epoch_{epoch}.pth'), retention_group='periodic')
+    writer.submit({'epoch': 4}, str(tmp_path / 'best_model.pth'))
+    writer.close()
+    assert sorted(os.listdir(tmp_path)) == ['best_model.pth', 'epoch_3.pth', 'epoch_4.pth']
+
+
+def test_failed_write_is_recorded(tmp_path):
+    blocker = tmp_path / 'not_a_dir'
+    blocker.write_text('')
+    writer = AsyncCheckpointWriter(asynchronous=False)
+    writer.submit({'epoch': 1}, str(blocker / 'best_model.pth'))
+    assert len(writer.errors) == 1
@@ -0,0 +1,97 @@
+import argparse
+import os
+import socket
+
+import pytest
+import torch
+import torch.distributed as dist
+import torch.multiprocessing as mp
+import torch.nn as nn
+from torch.utils.data import DataLoader, TensorDataset
+
+from epibench.cli.launch import build_launch_command
+from epibench.models.seq_cnn_regressor import SeqCNNRegressor
+from epibench.training.distributed import (CPUSyncBatchNorm, all_reduce_sum, cleanup_distributed, distributed_sampler,
+                                           get_world_size, init_distributed, is_distributed)
+from epibench.training.trainer import Trainer
+
+WORLD_SIZE = 2
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def _check_sync_batchnorm_bf16(rank):
+    # Large offset, small spread: bf16 sums over the global batch would lose the variance entirely
+    global_batch = 100 + torch.randn(2 * 64, 3, 16, generator=torch.Generator().manual_seed(1))
+    local_batch = global_batch[rank * 64:(rank + 1) * 64].to(torch.bfloat16)
+    bn = CPUSyncBatchNorm(3, momentum=1.0).train()
+    output = bn(local_batch)
+    assert output.dtype == torch.bfloat16
+    reference = global_batch.to(torch.bfloat16).float()
+    assert torch.allclose(bn.running_mean, reference.mean(dim=(0, 2)), atol=1e-3)
+    assert torch.allclose(bn.running_var, reference.var(dim=(0, 2)), rtol=1e-2)
+
+
+def _worker(rank, port, tmp_dir):
+    os.environ.update({'RANK': str(rank), 'LOCAL_RANK': str(rank), 'WORLD_SIZE': str(WORLD_SIZE),
+                       'LOCAL_WORLD_SIZE': str(WORLD_SIZE), 'MASTER_ADDR': '127.0.0.1', 'MASTER_PORT': str(port)})
+    assert init_distributed({'backend': 'gloo'})
+    try:
+        _check_sync_batchnorm_bf16(rank)
+        generator = torch.Generator().manual_seed(0)
+        train = TensorDataset(torch.rand(16, 32, 5, generator=generator), torch.rand(16, 1, generator=generator))
+        val = TensorDataset(torch.rand(8, 32, 5, generator=generator), torch.rand(8, 1, generator=generator))
+        train_loader = DataLoader(train, batch_size=4, sampler=distributed_sampler(train, shuffle=True))
+        val_loader = DataLoader(val, batch_size=4, sampler=distributed_sampler(val, shuffle=False))
+
+        torch.manual_seed(rank)  # DDP broadcasts rank 0's initial weights
+        model = SeqCNNRegressor(input_channels=5, num_filters=4, kernel_sizes=[3, 5], fc_units=[8])
+        config = {'epochs': 2, 'log_dir': os.path.join(tmp_dir, f'logs_{rank}'), 'checkpoint_dir': os.path.join(tmp_dir, 'checkpoints'),
+                  'training': {'distributed': {'sync_batchnorm': True}}}
+        trainer = Trainer(model=model, optimizer=torch.optim.SGD(model.parameters(), lr=0.1), criterion=nn.MSELoss(),
+                          config=config, train_loader=train_loader, val_loader=val_loader, device=torch.device('cpu'))
+        assert len(train_loader) == 2  # Each rank sees half of the data
+        assert any(isinstance(m, CPUSyncBatchNorm) for m in trainer.model.modules())
+        trainer.train()
+        torch.save({'state_dict': trainer.model.state_dict(), 'best_val_loss': trainer.best_val_loss},
+                   os.path.join(tmp_dir, f'rank_{rank}.pt'))
+    finally:
+        cleanup_distributed()
+
+
+@pytest.mark.skipif(not dist.is_available(), reason="torch.distributed not available")
+def test_ddp_training_two_local_processes(tmp_path):
+    mp.spawn(_worker, args=(_free_port(), str(tmp_path)), nprocs=WORLD_SIZE, join=True)
+
+    rank0 = torch.load(tmp_path / 'rank_0.pt', weights_only=False)
+    rank1 = torch.load(tmp_path / 'rank_1.pt', weights_only=False)
+    # Gradients are synchronised, so replicas stay identical and agree on the validation loss
+    for key, value in rank0['state_dict'].items():
+        assert torch.allclose(value.float(), rank1['state_dict'][key].float()), key
+    assert rank0['best_val_loss'] == rank1['best_val_loss']
+    # Only rank 0 writes checkpoints and TensorBoard logs
+    assert (tmp_path / 'checkpoints' / 'best_model.pth').exists()
+    assert os.listdir(tmp_path / 'logs_0') and not os.listdir(tmp_path / 'logs_1')
+
+
+def test_single_process_helpers_are_noops():
+    assert not is_distributed()
+    assert get_world_size() == 1
+    assert distributed_sampler(TensorDataset(torch.zeros(4)), shuffle=True) is None
+    assert all_reduce_sum(1.5, 2) == (1.5, 2)
+
+
+def test_build_launch_command():
+    args = argparse.Namespace(nproc_per_node=4, nnodes=2, node_rank=1, master_addr='10.0.0.1', master_port=1234,
+                              epibench_args=['train', '-c', 'config.yaml'])
+    command = build_launch_command(args)
+    assert command[1:3] == ['-m', 'torch.distributed.run']
+    assert '--nproc-per-node=4' in command and '--node-rank=1' in command
+    assert command[-4:] == ['epibench.cli.main', 'train', '-c', 'config.yaml']
+
+    with pytest.raises(ValueError):
+        build_launch_command(argparse.Namespace(**{**vars(args), 'epibench_args': []}))
@@ -0,0 +1,162 @@
+import sys
+
+import optuna
+import pytest
+import torch
+from torch.utils.data import DataLoader, TensorDataset
+
+from epibench.cli.train import run_final_model_step
+from epibench.training.hpo import (HPOptimizer, build_worker_command, default_study_storage, fidelity_rungs,
+                                  get_optuna_pruner, load_warm_start_trials,
+                                  resolve_storage)
+
+
+def _loaders():
+    generator = torch.Generator().manual_seed(0)
+    dataset = TensorDataset(torch.rand(8, 32, 5, generator=generator), torch.rand(8, 1, generator=generator))
+    return DataLoader(dataset, batch_size=4), DataLoader(dataset, batch_size=4)
+
+
+def _config(tmp_path):
+    return {
+        'model': {'name': 'SeqCNNRegressor', 'params': {'input_channels': 5, 'num_filters': 4, 'kernel_sizes': [3], 'fc_units': [8]}},
+        'training': {'optimizer': 'Adam', 'optimizer_params': {'lr': 1e-3}, 'loss_function': 'MSELoss', 'epochs': 1},
+        'output': {'checkpoint_dir': str(tmp_path / 'checkpoints')},
+        'hpo': {'study_name': 'test_study', 'search_space': {'training.optimizer_params.lr': [0.0001, 0.01]}},
+    }
+
+
+def test_resolve_storage(tmp_path):
+    assert resolve_storage(None) is None
+    assert isinstance(resolve_storage(f"journal:{tmp_path / 'study.journal'}"), optuna.storages.JournalStorage)
+    assert isinstance(resolve_storage(f"sqlite:///{tmp_path / 'study.db'}"), optuna.storages.RDBStorage)
+    assert default_study_storage(_config(tmp_path)) == f"journal:{tmp_path / 'checkpoints' / 'test_study.journal'}"
+
+
+def test_build_worker_command():
+    command = build_worker_command('config.yaml', num_threads=4, log_level='DEBUG')
+    assert command[:3] == [sys.executable, '-m', 'epibench.cli.main']
+    assert command[3:] == ['train', '-c', 'config.yaml', '--hpo', '--hpo-worker', '--num-threads', '4', '--log-level', 'DEBUG']
+
+
+def test_workers_share_trial_budget(tmp_path):
+    config = _config(tmp_path)
+    storage = default_study_storage(config)
+    train_loader, val_loader = _loaders()
+    workers = [HPOptimizer(config, train_loader, val_loader, torch.device('cpu'), study_name='test_study',
+                           storage=storage, sampler_name='Random', pruner_name='nop') for _ in range(2)]
+    workers[0].run_worker(n_trials=2)
+    workers[1].run_worker(n_trials=3)  # Continues the same study up to 3 trials in total
+    workers[1].run_worker(n_trials=3)  # Budget reached: no new trials
+    assert len(workers[0].study.trials) == 3
+    assert workers[0].get_best_value() is not None
+    assert sorted(p.name for p in (tmp_path / 'checkpoints' / 'hpo_trials').iterdir()) == ['trial_0', 'trial_1', 'trial_2']
+
+
+def test_fidelity_rungs():
+    rungs = fidelity_rungs(min_data_fraction=0.1, min_epochs=1, max_epochs=10, reduction_factor=3)
+    assert [(r['data_fraction'], r['epochs'], r['resource']) for r in rungs] == [
+        (0.1, 1, 1), (pytest.approx(0.3), 3, 3), (pytest.approx(0.9), 9, 9), (1.0, 10, 27)]
+    assert len(fidelity_rungs(1.0, 5, 5)) == 1
+    # The epoch budget runs out before the data fraction reaches 1: that rung uses the full data, no repeated budgets
+    rungs = fidelity_rungs(min_data_fraction=0.01, min_epochs=1, max_epochs=3, reduction_factor=3)
+    assert [(r['data_fraction'], r['epochs']) for r in rungs] == [(0.01, 1), (1.0, 3)]
+    with pytest.raises(ValueError):
+        fidelity_rungs(min_data_fraction=0.0)
+
+
+def test_multi_fidelity_trials_continue_across_rungs(tmp_path):
+    config = _config(tmp_path)
+    config['hpo']['multi_fidelity'] = {'enabled': True, 'min_data_fraction': 0.5, 'min_epochs': 1, 'max_epochs': 2,
+                                       'reduction_factor': 2}
+    config['training'].update({'scheduler': 'StepLR', 'scheduler_params': {'step_size': 1, 'gamma': 0.5}})
+    train_loader, val_loader = _loaders()
+    hpo = HPOptimizer(config, train_loader, val_loader, torch.device('cpu'), sampler_name='Random')
+    assert isinstance(hpo.study.pruner, optuna.pruners.HyperbandPruner)
+    assert len(hpo._rung_loader(0.5).dataset) == 4
+    hpo.run_optimization(n_trials=2)
+    trial_dir = tmp_path / 'checkpoints' / 'hpo_trials' / 'trial_0'
+    rung_1 = torch.load(trial_dir / 'rung_1.pth', weights_only=False)
+    assert rung_1['epochs'] == 2
+    # The LR schedule continues across rungs instead of restarting: one decay per epoch in total
+    lr = hpo.study.trials[0].params['training.optimizer_params.lr']
+    assert rung_1['optimizer_state_dict']['param_groups'][0]['lr'] == pytest.approx(lr * 0.25)
+    assert hpo.study.trials[0].intermediate_values.keys() == {1, 2}
+
+
+def test_pruner_names():
+    assert isinstance(get_optuna_pruner('MedianPruner'), optuna.pruners.MedianPruner)
+    assert isinstance(get_optuna_pruner('hyperband'), optuna.pruners.HyperbandPruner)
+    assert isinstance(get_optuna_pruner('SuccessiveHalvingPruner'), optuna.pruners.SuccessiveHalvingPruner)
+
+
+def test_top_k_retention_and_final_model(tmp_path):
+    config = _config(tmp_path)
+    config['hpo']['keep_top_k_trials'] = 1
+    config['hpo']['search_space'] = {'model.params.fc_units.0': [4, 16], 'training.optimizer_params.lr': [0.0001, 0.01]}
+    train_loader, val_loader = _loaders()
+    hpo = HPOptimizer(config, train_loader, val_loader, torch.device('cpu'), sampler_name='Random', pruner_name='nop')
+    hpo.run_optimization(n_trials=3)
+    best = hpo.study.best_trial
+    assert [p.name for p in (tmp_path / 'checkpoints' / 'hpo_trials').iterdir()] == [f'trial_{best.number}']
+    assert best.user_attrs['train_seconds'] > 0
+
+    final_config = hpo.build_final_config()
+    assert final_config['model']['params']['fc_units'] == [best.params['model.params.fc_units.0']]
+    assert config['model']['params']['fc_units'] == [8]  # Base config untouched
+
+    run_final_model_step(hpo, {'final_model': {'strategy': 'promote'}}, train_loader, val_loader, torch.device('cpu'))
+    promoted = torch.load(tmp_path / 'final_model' / 'best_model.pth', weights_only=False)
+    reference = torch.load(hpo.best_trial_checkpoint(), weights_only=False)
+    assert all(torch.equal(promoted['model_state_dict'][k], v) for k, v in reference['model_state_dict'].items())
+
+    run_final_model_step(hpo, {'final_model': {'strategy': 'finetune', 'epochs': 1}}, train_loader, val_loader, torch.device('cpu'))
+    summary = (tmp_path / 'final_model' / 'training_summary.json')
+    assert summary.exists()
+
+
+def _source_study(tmp_path):
+    storage = f"journal:{tmp_path / 'previous.journal'}"
+    source = optuna.create_study(study_name='aml_sample', storage=resolve_storage(storage))
+    distribution = optuna.distributions.FloatDistribution(0.0001, 0.01)
+    for lr, value in [(0.001, 0.5), (0.002, 0.1), (0.003, 0.3)]:
+        source.add_trial(optuna.trial.create_trial(params={'training.optimizer_params.lr': lr, 'other.param': 1.0},
+                                                   distributions={'training.optimizer_params.lr': distribution,
+                                                                  'other.param': optuna.distributions.FloatDistribution(0.0, 2.0)},
+                                                   value=value))
+    return storage
+
+
+def test_warm_start_enqueues_best_configuration_first(tmp_path):
+    storage = _source_study(tmp_path)
+    train_loader, val_loader = _loaders()
+    hpo = HPOptimizer(_config(tmp_path), train_loader, val_loader, torch.device('cpu'), sampler_name='Random', pruner_name='nop')
+    assert hpo.warm_start({'sources': [storage], 'mode': 'enqueue', 'top_k': 2}) == 2
+    hpo.run_optimization(n_trials=3)
+    trials = hpo.study.trials
+    assert trials[0].params == {'training.optimizer_params.lr': 0.002}
+    assert trials[0].user_attrs['warm_start_source'] == 'aml_sample#1'
+    assert trials[1].params == {'training.optimizer_params.lr': 0.003}
+    assert hpo.warm_start({'sources': [storage]}) == 0  # Only new studies are seeded
+
+
+def test_warm_start_leaves_source_trials_untouched():
+    storage = optuna.storages.InMemoryStorage()
+    source = optuna.create_study(study_name='aml_sample', storage=storage)
+    source.add_trial(optuna.trial.create_trial(params={'x': 1.0}, distributions={'x': optuna.distributions.FloatDistribution(0.0, 2.0)},
+                                               value=0.5))
+    trials = load_warm_start_trials([{'storage': storage}])
+    assert trials[0].user_attrs['warm_start_source'] == 'aml_sample#0'
+    assert source.get_trials(deepcopy=False)[0].user_attrs == {}
+
+
+def test_warm_start_priors_do_not_count_as_results(tmp_path):
+    storage = _source_study(tmp_path)
+    train_loader, val_loader = _loaders()
+    hpo = HPOptimizer(_config(tmp_path), train_loader, val_loader, torch.device('cpu'), pruner_name='nop')
+    assert hpo.warm_start({'sources': [{'storage': storage, 'study_name': 'aml_sample'}], 'mode': 'prior'}) == 4
+    with pytest.raises(ValueError):
+        hpo.best_trial()  # Prior observations from another sample are never the result
+    hpo.run_optimization(n_trials=1)
+    assert hpo.best_trial().params == {'training.optimizer_params.lr': 0.002}
+    assert 'warm_start_prior' not in hpo.best_trial().user_attrs
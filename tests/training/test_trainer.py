@@ -0,0 +1,289 @@
+import json
+
+import pytest
+import torch
+import torch.nn as nn
+from torch.utils.data import DataLoader, TensorDataset
+
+from epibench.data.samplers import LossAwareSampler, ResumableSampler
+from epibench.data.transforms import Compose, build_crop_transforms
+from epibench.models.seq_cnn_regressor import SeqCNNRegressor
+from epibench.training.trainer import Trainer
+from epibench.utils.performance import configure_threads, resolve_amp_dtype
+
+
+def _make_loaders(n_train=16, n_val=8, seq_len=32, channels=5, batch_size=4):
+    generator = torch.Generator().manual_seed(0)
+    train = TensorDataset(torch.rand(n_train, seq_len, channels, generator=generator), torch.rand(n_train, 1, generator=generator))
+    val = TensorDataset(torch.rand(n_val, seq_len, channels, generator=generator), torch.rand(n_val, 1, generator=generator))
+    return DataLoader(train, batch_size=batch_size), DataLoader(val, batch_size=batch_size)
+
+
+def _make_trainer(tmp_path, config=None, model=None, **loader_kwargs):
+    torch.manual_seed(0)
+    model = model or SeqCNNRegressor(input_channels=5, num_filters=4, kernel_sizes=[3, 5], fc_units=[8])
+    train_loader, val_loader = _make_loaders(**loader_kwargs)
+    config = dict(config or {})
+    config.setdefault('log_dir', str(tmp_path / 'logs'))
+    config.setdefault('checkpoint_dir', str(tmp_path / 'checkpoints'))
+    return Trainer(
+        model=model,
+        optimizer=torch.optim.Adam(model.parameters(), lr=1e-3),
+        criterion=nn.MSELoss(),
+        config=config,
+        train_loader=train_loader,
+        val_loader=val_loader,
+        device=torch.device('cpu'),
+    )
+
+
+def test_get_setting_precedence(tmp_path):
+    trainer = _make_trainer(tmp_path, config={'use_amp': False, 'training': {'use_amp': True, 'amp_dtype': 'bf16'},
+                                              'output': {'save_best_only': False}})
+    assert trainer._get_setting('use_amp') is False
+    assert trainer._get_setting('amp_dtype') == 'bf16'
+    assert trainer._get_setting('save_best_only') is False
+    assert trainer._get_setting('missing', 42) == 42
+
+
+def test_cpu_bf16_autocast_training(tmp_path):
+    trainer = _make_trainer(tmp_path, config={'epochs': 1, 'training': {'use_amp': True}})
+    assert trainer.use_mixed_precision
+    assert trainer.amp_dtype == torch.bfloat16
+    assert not trainer.scaler.is_enabled()  # No loss scaling for bfloat16
+
+    trainer.train()
+    assert trainer.best_val_loss < float('inf')
+    checkpoint = torch.load(tmp_path / 'checkpoints' / 'best_model.pth', weights_only=False)
+    assert checkpoint['scaler_state_dict'] is None
+
+
+def test_resolve_amp_dtype():
+    assert resolve_amp_dtype(torch.device('cpu')) == torch.bfloat16
+    assert resolve_amp_dtype(torch.device('cuda')) == torch.float16
+    assert resolve_amp_dtype(torch.device('cpu'), 'float16') == torch.float16
+    with pytest.raises(ValueError):
+        resolve_amp_dtype(torch.device('cpu'), 'int8')
+
+
+def test_configure_threads():
+    original = torch.get_num_threads()
+    try:
+        assert configure_threads(num_threads=1)['num_threads'] == 1
+        assert configure_threads(num_threads='auto', num_workers=10_000)['num_threads'] == 1
+        with pytest.raises(ValueError):
+            configure_threads(num_threads=0)
+    finally:
+        torch.set_num_threads(original)
+
+
+def test_trainer_leaves_thread_pool_untouched(tmp_path):
+    original = torch.get_num_threads()
+    _make_trainer(tmp_path, config={'training': {'num_threads': original + 1}})
+    assert torch.get_num_threads() == original
+
+
+@pytest.mark.parametrize('check_finite_loss', [False, True])
+def test_non_finite_losses(tmp_path, caplog, check_finite_loss):
+    trainer = _make_trainer(tmp_path, config={'training': {'check_finite_loss': check_finite_loss}})
+    features, targets = trainer.train_loader.dataset.tensors
+    targets = targets.clone()
+    targets[:4] = float('nan')  # First batch
+    trainer.train_loader = DataLoader(TensorDataset(features, targets), batch_size=4)
+    initial = {name: value.clone() for name, value in trainer.model.state_dict().items()}
+    with caplog.at_level('WARNING'):
+        avg_loss = trainer.train_one_epoch()
+    # The NaN step is skipped (or neutralized), so the weights and the epoch loss stay finite
+    assert avg_loss == avg_loss and avg_loss < float('inf')
+    assert all(torch.isfinite(value.float()).all() for value in trainer.model.state_dict().values())
+    assert trainer.global_step == (3 if check_finite_loss else 4)
+    if not check_finite_loss:
+        assert "1 training step(s) of epoch 1 had a non-finite loss" in caplog.text
+    assert any(not torch.equal(initial[name], value) for name, value in trainer.model.state_dict().items())
+
+
+def test_non_finite_loss_leaves_parameters_unchanged_by_default(tmp_path):
+    trainer = _make_trainer(tmp_path)
+    assert not trainer.check_finite_loss
+    features, targets = trainer.train_loader.dataset.tensors
+    nan_targets = torch.full_like(targets[:4], float('nan'))
+    trainer.train_loader = DataLoader(TensorDataset(features[:4], nan_targets), batch_size=4)
+    initial = {name: parameter.detach().clone() for name, parameter in trainer.model.named_parameters()}
+    trainer.train_one_epoch()
+    for name, parameter in trainer.model.named_parameters():
+        assert torch.equal(initial[name], parameter), name
+
+def test_stop_request_does_not_carry_over_to_next_train_call(tmp_path):
+    trainer = _make_trainer(tmp_path, config={'epochs': 2})
+    trainer._stop_requested = True  # As left by a mid-epoch early stop in an earlier train() call
+    trainer.train()
+    assert trainer.stop_reason == 'completed'
+    assert len(trainer.history['train_loss']) == 2
+
+
+def test_compiled_forward_model_keeps_eager_checkpoints(tmp_path):
+    trainer = _make_trainer(tmp_path, config={'epochs': 1, 'model': {'compile': {'enabled': True, 'backend': 'eager'}}})
+    assert trainer.forward_model is not trainer.model
+    trainer.train()
+    checkpoint = torch.load(tmp_path / 'checkpoints' / 'best_model.pth', weights_only=False)
+    assert not any(key.startswith('_orig_mod') for key in checkpoint['model_state_dict'])
+
+
+def _resumable_trainer(tmp_path, config, seed, loss_aware=False):
+    generator = torch.Generator().manual_seed(0)
+    train = TensorDataset(torch.rand(16, 32, 5, generator=generator), torch.rand(16, 1, generator=generator))
+    val = TensorDataset(torch.rand(8, 32, 5, generator=generator), torch.rand(8, 1, generator=generator))
+    sampler = LossAwareSampler(train, seed=7) if loss_aware else ResumableSampler(train, shuffle=True, seed=7)
+    train_loader = DataLoader(train, batch_size=4, sampler=sampler,
+                              generator=torch.Generator().manual_seed(7))
+    torch.manual_seed(seed)
+    model = SeqCNNRegressor(input_channels=5, num_filters=4, kernel_sizes=[3, 5], fc_units=[8], dropout_rate=0.5)
+    config = dict(config, log_dir=str(tmp_path / 'logs'), checkpoint_dir=str(tmp_path / 'checkpoints'))
+    return Trainer(model=model, optimizer=torch.optim.Adam(model.parameters(), lr=1e-3), criterion=nn.MSELoss(),
+                   config=config, train_loader=train_loader, val_loader=DataLoader(val, batch_size=4),
+                   device=torch.device('cpu'))
+
+
+@pytest.mark.parametrize('loss_aware', [False, True])
+def test_mid_epoch_resume_is_exact(tmp_path, loss_aware):
+    config = {'epochs': 2, 'training': {'save_state_every_n_steps': 3}}
+    reference = _resumable_trainer(tmp_path / 'reference', config, seed=0, loss_aware=loss_aware)
+    reference_history = reference.train()
+
+    # Preempt the run after 6 optimizer steps (epoch 2, batch 2 of 4); the last state was written at step 6
+    interrupted = _resumable_trainer(tmp_path / 'interrupted', config, seed=0, loss_aware=loss_aware)
+    original_step = interrupted.optimizer.step
+    def step_then_preempt(*args, **kwargs):
+        if interrupted.global_step == 6:
+            raise SystemExit("preempted")
+        return original_step(*args, **kwargs)
+    interrupted.optimizer.step = step_then_preempt
+    with pytest.raises(SystemExit):
+        interrupted.train()
+
+    resumed = _resumable_trainer(tmp_path / 'interrupted', config, seed=123, loss_aware=loss_aware).resume()
+    assert (resumed.start_epoch, resumed.global_step) == (1, 6)
+    history = resumed.train()
+
+    assert history == reference_history
+    if loss_aware:
+        assert torch.equal(resumed.loss_aware_sampler.scores, reference.loss_aware_sampler.scores)
+    for key, value in reference.model.state_dict().items():
+        assert torch.equal(value, resumed.model.state_dict()[key]), key
+
+
+def test_resume_rejects_model_checkpoints(tmp_path):
+    trainer = _make_trainer(tmp_path, config={'epochs': 1})
+    trainer.train()
+    with pytest.raises(KeyError):
+        trainer.resume(str(tmp_path / 'checkpoints' / 'best_model.pth'))
+    with pytest.raises(FileNotFoundError):
+        trainer.resume(str(tmp_path / 'missing.pth'))
+
+
+def test_early_stopping_records_summary(tmp_path):
+    config = {'epochs': 10, 'training': {'early_stopping_patience': 2, 'early_stopping_min_delta': 1e9}}
+    trainer = _make_trainer(tmp_path, config=config)
+    history = trainer.train()
+    assert len(history['val_loss']) == 3  # Only the first epoch counts as an improvement
+    summary = json.loads((tmp_path / 'checkpoints' / 'training_summary.json').read_text())
+    assert summary['stop_reason'] == 'early_stopping'
+    assert summary['epochs_completed'] == 3
+    assert summary['epochs_saved'] == 7
+    assert summary['best_epoch'] is not None
+
+
+def test_scheduler_from_config_and_gradient_clipping(tmp_path):
+    config = {'epochs': 2, 'training': {'scheduler': 'StepLR', 'scheduler_params': {'step_size': 1, 'gamma': 0.5, 'verbose': True},
+                                        'gradient_clipping': 1e-6}}
+    trainer = _make_trainer(tmp_path, config=config)
+    assert isinstance(trainer.scheduler, torch.optim.lr_scheduler.StepLR)
+    initial = {name: value.clone() for name, value in trainer.model.state_dict().items()}
+    trainer.train()
+    assert trainer.optimizer.param_groups[0]['lr'] == pytest.approx(1e-3 * 0.25)
+    assert trainer.stop_reason == 'completed'
+    grads = [p.grad for p in trainer.model.parameters() if p.grad is not None]
+    assert torch.stack([g.norm() for g in grads]).norm() <= 1e-6 * (1 + 1e-3)
+    assert any(not torch.equal(initial[name], value) for name, value in trainer.model.state_dict().items())
+
+
+def test_reduce_lr_on_plateau_steps_on_val_loss(tmp_path):
+    config = {'epochs': 3, 'training': {'scheduler': 'ReduceLROnPlateau',
+                                        'scheduler_params': {'mode': 'min', 'factor': 0.1, 'patience': 0,
+                                                             'threshold': 1e9, 'threshold_mode': 'abs'}}}
+    trainer = _make_trainer(tmp_path, config=config)
+    trainer.train()
+    assert trainer.optimizer.param_groups[0]['lr'] == pytest.approx(1e-3 * 0.01)
+
+
+def test_step_level_throughput_reports(tmp_path):
+    trainer = _make_trainer(tmp_path, config={'epochs': 2, 'training': {'log_every_n_steps': 3}})
+    reports = []
+    original = trainer._log_step_stats
+    trainer._log_step_stats = lambda stats, loss: (reports.append((stats, loss)), original(stats, loss))
+    trainer.train()
+    assert len(reports) == 2  # 8 steps with a window of 3 (windows do not span epochs)
+    stats, loss = reports[0]
+    assert stats['samples'] == 12 and stats['samples_per_sec'] > 0 and loss > 0
+    assert stats['data_wait_seconds'] + stats['compute_seconds'] == pytest.approx(stats['samples'] / stats['samples_per_sec'])
+    summary = json.loads((tmp_path / 'checkpoints' / 'training_summary.json').read_text())
+    assert summary['performance']['steps'] == 8
+    assert summary['performance']['samples'] == 32
+    assert summary['performance']['peak_rss_mb'] > 0
+    assert summary['model_cost']['parameters'] == sum(p.numel() for p in trainer.model.parameters())
+    assert summary['model_cost']['flops_per_sample'] > 0
+
+
+def test_validation_cadence_and_subset(tmp_path):
+    config = {'epochs': 4, 'training': {'val_every_n_epochs': 2, 'val_subset_size': 4}}
+    trainer = _make_trainer(tmp_path, config=config)
+    assert len(trainer.val_subset_loader.dataset) == 4
+    reports = []
+    trainer._pruning_callback = lambda step, loss: reports.append(step)
+    history = trainer.train()
+    assert [loss is not None for loss in history['val_loss']] == [False, True, False, True]
+    assert reports == [1, 3]  # Only subset validations are reported
+    assert [entry['epoch'] for entry in history['full_val_loss']] == [4]
+    assert (tmp_path / 'checkpoints' / 'best_model.pth').exists()
+
+
+def test_step_based_validation(tmp_path):
+    trainer = _make_trainer(tmp_path, config={'epochs': 1, 'training': {'val_every_n_steps': 2}})
+    reports = []
+    trainer._pruning_callback = lambda step, loss: reports.append(step)
+    trainer.train()
+    assert reports == [2, 4]  # Mid-epoch at step 2, then the end-of-epoch validation at step 4
+    assert trainer.best_epoch == 1
+
+
+class _TransformedDataset(torch.utils.data.Dataset):
+    def __init__(self, features, targets, transform=None):
+        self.features, self.targets, self.transform = features, targets, transform
+
+    def __len__(self):
+        return len(self.features)
+
+    def __getitem__(self, idx):
+        features = self.features[idx].numpy()
+        return torch.from_numpy(self.transform(features).copy() if self.transform else features), self.targets[idx]
+
+
+def test_crop_curriculum_and_checkpoint_geometry(tmp_path):
+    crop = {'min_length': 16, 'max_length': 24, 'curriculum_epochs': 2}
+    train_crop, eval_crop = build_crop_transforms(crop)
+    generator = torch.Generator().manual_seed(0)
+    train = _TransformedDataset(torch.rand(8, 32, 5, generator=generator), torch.rand(8, 1, generator=generator), Compose([train_crop]))
+    val = _TransformedDataset(torch.rand(4, 32, 5, generator=generator), torch.rand(4, 1, generator=generator), eval_crop)
+    model = SeqCNNRegressor(input_channels=5, num_filters=4, kernel_sizes=[3, 5], fc_units=[8])
+    trainer = Trainer(model=model, optimizer=torch.optim.Adam(model.parameters(), lr=1e-3), criterion=nn.MSELoss(),
+                      config={'epochs': 2, 'data': {'crop': crop}, 'training': {'async_checkpointing': False},
+                              'log_dir': str(tmp_path / 'logs'), 'checkpoint_dir': str(tmp_path / 'checkpoints')},
+                      train_loader=DataLoader(train, batch_size=4), val_loader=DataLoader(val, batch_size=4),
+                      device=torch.device('cpu'))
+    seen_lengths = []
+    forward = trainer.forward_model.forward
+    trainer.forward_model.forward = lambda x: seen_lengths.append(x.shape[1]) or forward(x)
+    trainer.train()
+    # FLOP-count probe, epoch 1 training, validation, epoch 2 training, validation
+    assert seen_lengths == [16, 16, 16, 24, 24, 24, 24]
+    assert torch.load(tmp_path / 'checkpoints' / 'best_model.pth', weights_only=False)['crop_length'] == 24